@@ -105,6 +105,10 @@ def run_migrations_online() -> None:
         }
         if type_ == "table" and name in excluded_tables:
             return False
+        # search columns/indexes live only in the migration (see app/services/search)
+        if reflected and compare_to is None and type_ in ("column", "index") and (
+                name.startswith("search_tsv") or name.startswith("ix_search_")):
+            return False
         return True
 
     with connectable.connect() as connection:
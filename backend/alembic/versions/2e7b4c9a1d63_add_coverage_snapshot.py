@@ -0,0 +1,55 @@
+"""add coverage_snapshot read model
+
+Revision ID: 2e7b4c9a1d63
+Revises: 8d3f61b0c2a7
+Create Date: 2026-10-18 17:02:31.551204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '2e7b4c9a1d63'
+down_revision: Union[str, Sequence[str], None] = '8d3f61b0c2a7'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'coverage_snapshot',
+        sa.Column('version_id', sa.Integer(), nullable=False),
+        sa.Column('scope_type', sa.String(length=30), nullable=False),
+        sa.Column('scope_id', sa.Integer(), nullable=False),
+        sa.Column('total_requirements', sa.Integer(), nullable=False),
+        sa.Column('applicable_requirements', sa.Integer(), nullable=False),
+        sa.Column('met', sa.Integer(), nullable=False),
+        sa.Column('met_by_exception', sa.Integer(), nullable=False),
+        sa.Column('partial', sa.Integer(), nullable=False),
+        sa.Column('gap', sa.Integer(), nullable=False),
+        sa.Column('unknown', sa.Integer(), nullable=False),
+        sa.Column('coverage_pct', sa.Float(), nullable=False),
+        sa.Column('coverage_pct_excl_exceptions', sa.Float(), nullable=False),
+        sa.Column('avg_score', sa.Float(), nullable=False),
+        sa.Column('generation', sa.Integer(), server_default=sa.text('1'), nullable=False),
+        sa.Column('computed_generation', sa.Integer(), server_default=sa.text('0'), nullable=False),
+        sa.Column('computed_at', sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(['version_id'], ['framework_versions.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('version_id', 'scope_type', 'scope_id'),
+    )
+    op.create_index('ix_cov_snap_scope', 'coverage_snapshot', ['scope_type', 'scope_id'], unique=False)
+    op.create_index('ix_cov_snap_dirty', 'coverage_snapshot', ['computed_at'], unique=False,
+                    postgresql_where=sa.text('generation > computed_generation'))
+    # Rows are created on first read and kept current by the refresher
+    # (python backend/scripts/refresh_coverage_snapshots.py, or the in-process scheduler job)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_cov_snap_dirty', table_name='coverage_snapshot')
+    op.drop_index('ix_cov_snap_scope', table_name='coverage_snapshot')
+    op.drop_table('coverage_snapshot')
@@ -0,0 +1,32 @@
+"""add evidence staleness indexes
+
+Revision ID: 4f8a2c6d1e37
+Revises: 9b2d6f4e8a15
+Create Date: 2026-10-18 20:08:12.740553
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '4f8a2c6d1e37'
+down_revision: Union[str, Sequence[str], None] = '9b2d6f4e8a15'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_ce_valid_until', 'control_evidence', ['valid_until'], unique=False,
+                    postgresql_where=sa.text('valid_until IS NOT NULL'))
+    op.create_index('ix_ce_link_collected_no_until', 'control_evidence', ['control_context_link_id', 'collected_at'],
+                    unique=False, postgresql_where=sa.text('valid_until IS NULL'))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_ce_link_collected_no_until', table_name='control_evidence')
+    op.drop_index('ix_ce_valid_until', table_name='control_evidence')
@@ -0,0 +1,32 @@
+"""add risk_context_summary dirty flag
+
+Revision ID: 5a1c7e3f9b24
+Revises: 3d9e5b7a2c18
+Create Date: 2026-10-18 23:41:09.318274
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5a1c7e3f9b24'
+down_revision: Union[str, Sequence[str], None] = '3d9e5b7a2c18'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('risk_context_summary',
+                  sa.Column('dirty', sa.Boolean(), server_default=sa.false(), nullable=False))
+    op.create_index('ix_rcs_dirty', 'risk_context_summary', ['context_id'], unique=False,
+                    postgresql_where=sa.text('dirty'))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_rcs_dirty', table_name='risk_context_summary')
+    op.drop_column('risk_context_summary', 'dirty')
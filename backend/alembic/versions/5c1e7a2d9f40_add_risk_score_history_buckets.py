@@ -0,0 +1,53 @@
+"""add risk_score_history_buckets and history read index
+
+Revision ID: 5c1e7a2d9f40
+Revises: b9299ede5ca0
+Create Date: 2026-10-18 13:42:37.905114
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5c1e7a2d9f40'
+down_revision: Union[str, Sequence[str], None] = 'b9299ede5ca0'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'risk_score_history_buckets',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('enabled', sa.Boolean(), nullable=True),
+        sa.Column('risk_scenario_context_id', sa.Integer(), nullable=False),
+        sa.Column('granularity', sa.String(length=8), nullable=False),
+        sa.Column('bucket_start', sa.DateTime(), nullable=False),
+        sa.Column('points', sa.Integer(), nullable=False),
+        sa.Column('first_at', sa.DateTime(), nullable=False),
+        sa.Column('last_at', sa.DateTime(), nullable=False),
+        sa.Column('residual_min', sa.Float(), nullable=True),
+        sa.Column('residual_max', sa.Float(), nullable=True),
+        sa.Column('residual_last', sa.Float(), nullable=True),
+        sa.Column('initial_last', sa.Float(), nullable=True),
+        sa.Column('residual_min_by_domain', sa.JSON(), nullable=True),
+        sa.Column('residual_max_by_domain', sa.JSON(), nullable=True),
+        sa.Column('residual_last_by_domain', sa.JSON(), nullable=True),
+        sa.Column('initial_last_by_domain', sa.JSON(), nullable=True),
+        sa.ForeignKeyConstraint(['risk_scenario_context_id'], ['risk_scenario_contexts.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('risk_scenario_context_id', 'granularity', 'bucket_start', name='uq_rsh_bucket'),
+    )
+    # range reads of raw points per context (trend / changes / 30d delta)
+    op.create_index('ix_rsh_ctx_created', 'risk_score_history', ['risk_scenario_context_id', 'created_at'], unique=False)
+    # Fold existing rows with: python backend/scripts/compact_risk_score_history.py
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_rsh_ctx_created', table_name='risk_score_history')
+    op.drop_table('risk_score_history_buckets')
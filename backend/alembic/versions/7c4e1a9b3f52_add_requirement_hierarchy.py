@@ -0,0 +1,56 @@
+"""add requirement_hierarchy index
+
+Revision ID: 7c4e1a9b3f52
+Revises: 2e7b4c9a1d63
+Create Date: 2026-10-18 18:41:07.318420
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7c4e1a9b3f52'
+down_revision: Union[str, Sequence[str], None] = '2e7b4c9a1d63'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'requirement_hierarchy',
+        sa.Column('requirement_id', sa.Integer(), nullable=False),
+        sa.Column('version_id', sa.Integer(), nullable=False),
+        sa.Column('pre_order', sa.Integer(), nullable=False),
+        sa.Column('pre_order_end', sa.Integer(), nullable=False),
+        sa.Column('post_order', sa.Integer(), nullable=False),
+        sa.Column('depth', sa.Integer(), nullable=False),
+        sa.Column('top_level_id', sa.Integer(), nullable=False),
+        sa.Column('path', sa.Text(), nullable=False),
+        sa.Column('breadcrumb', sa.Text(), nullable=True),
+        sa.ForeignKeyConstraint(['requirement_id'], ['framework_requirements.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['version_id'], ['framework_versions.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('requirement_id'),
+    )
+    op.create_index('ix_req_hier_v_pre', 'requirement_hierarchy', ['version_id', 'pre_order'], unique=True)
+    op.create_table(
+        'requirement_hierarchy_build',
+        sa.Column('version_id', sa.Integer(), nullable=False),
+        sa.Column('etag', sa.String(length=64), nullable=False),
+        sa.Column('node_count', sa.Integer(), nullable=False),
+        sa.Column('built_at', sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(['version_id'], ['framework_versions.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('version_id'),
+    )
+    # Existing versions are indexed on first read
+    # (or up front: python backend/scripts/rebuild_requirement_hierarchy.py)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('requirement_hierarchy_build')
+    op.drop_index('ix_req_hier_v_pre', table_name='requirement_hierarchy')
+    op.drop_table('requirement_hierarchy')
@@ -0,0 +1,29 @@
+"""add compliance exception end_date index
+
+Revision ID: 8d3f61b0c2a7
+Revises: 5c1e7a2d9f40
+Create Date: 2026-10-18 15:20:44.130562
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8d3f61b0c2a7'
+down_revision: Union[str, Sequence[str], None] = '5c1e7a2d9f40'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # RiskOps "exceptions expiring" queue reads an end_date range
+    op.create_index('ix_exc_end_date', 'compliance_exceptions', ['end_date'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_exc_end_date', table_name='compliance_exceptions')
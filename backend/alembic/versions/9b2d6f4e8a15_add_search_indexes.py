@@ -0,0 +1,75 @@
+"""add full-text and trigram search indexes
+
+Revision ID: 9b2d6f4e8a15
+Revises: 7c4e1a9b3f52
+Create Date: 2026-10-18 19:26:44.902117
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9b2d6f4e8a15'
+down_revision: Union[str, Sequence[str], None] = '7c4e1a9b3f52'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# (table, column, generated expression); the columns are not mapped on the models
+# (services/search reads them by name, alembic/env.py skips them in autogenerate)
+_TSV_COLUMNS = [
+    ('framework_requirements', 'search_tsv',
+     "setweight(to_tsvector('english', coalesce(code, '')), 'A') || "
+     "setweight(to_tsvector('english', coalesce(title, '')), 'A') || "
+     "setweight(to_tsvector('english', coalesce(text, '')), 'B')"),
+    ('obligation_atoms', 'search_tsv',
+     "setweight(to_tsvector('english', coalesce(atom_key, '')), 'A') || "
+     "setweight(to_tsvector('english', coalesce(obligation_text, '')), 'A') || "
+     "setweight(to_tsvector('english', coalesce(condition, '') || ' ' || coalesce(outcome, '') || ' ' "
+     "|| coalesce(citation, '')), 'B')"),
+    ('controls', 'search_tsv_en',
+     "setweight(to_tsvector('english', coalesce(reference_code, '')), 'A') || "
+     "setweight(to_tsvector('english', coalesce(title_en, '')), 'A') || "
+     "setweight(to_tsvector('english', coalesce(description_en, '')), 'B')"),
+    ('controls', 'search_tsv_de',
+     "setweight(to_tsvector('german', coalesce(title_de, '')), 'A') || "
+     "setweight(to_tsvector('german', coalesce(description_de, '')), 'B')"),
+    ('risk_scenarios', 'search_tsv_en',
+     "setweight(to_tsvector('english', coalesce(title_en, '')), 'A') || "
+     "setweight(to_tsvector('english', coalesce(description_en, '')), 'B')"),
+    ('risk_scenarios', 'search_tsv_de',
+     "setweight(to_tsvector('german', coalesce(title_de, '')), 'A') || "
+     "setweight(to_tsvector('german', coalesce(description_de, '')), 'B')"),
+]
+
+# (index, table, column) for code lookups: similarity (%) and ILIKE 'prefix%'
+_TRGM_INDEXES = [
+    ('ix_search_fwr_code_trgm', 'framework_requirements', 'code'),
+    ('ix_search_oa_key_trgm', 'obligation_atoms', 'atom_key'),
+    ('ix_search_ctrl_code_trgm', 'controls', 'reference_code'),
+]
+
+
+def _tsv_index(table: str, column: str) -> str:
+    return f'ix_search_{table}_{column}'
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    for table, column, expr in _TSV_COLUMNS:
+        op.execute(f'ALTER TABLE {table} ADD COLUMN {column} tsvector GENERATED ALWAYS AS ({expr}) STORED')
+        op.create_index(_tsv_index(table, column), table, [column], unique=False, postgresql_using='gin')
+    for name, table, column in _TRGM_INDEXES:
+        op.create_index(name, table, [sa.text(f'{column} gin_trgm_ops')], unique=False, postgresql_using='gin')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for name, table, _ in reversed(_TRGM_INDEXES):
+        op.drop_index(name, table_name=table)
+    for table, column, _ in reversed(_TSV_COLUMNS):
+        op.drop_index(_tsv_index(table, column), table_name=table)
+        op.drop_column(table, column)
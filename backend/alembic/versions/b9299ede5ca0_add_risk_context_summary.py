@@ -0,0 +1,74 @@
+"""add risk_context_summary read model
+
+Revision ID: b9299ede5ca0
+Revises: 3744aec7b7aa
+Create Date: 2026-10-18 10:05:12.418203
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b9299ede5ca0'
+down_revision: Union[str, Sequence[str], None] = '3744aec7b7aa'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'risk_context_summary',
+        sa.Column('context_id', sa.Integer(), nullable=False),
+        sa.Column('risk_scenario_id', sa.Integer(), nullable=False),
+        sa.Column('scope_type', sa.String(length=30), nullable=False),
+        sa.Column('scope_id', sa.Integer(), nullable=False),
+        sa.Column('status', sa.String(length=50), nullable=True),
+        sa.Column('owner_id', sa.Integer(), nullable=True),
+        sa.Column('likelihood', sa.Integer(), nullable=False),
+        sa.Column('impact_c', sa.Integer(), nullable=False),
+        sa.Column('impact_i', sa.Integer(), nullable=False),
+        sa.Column('impact_a', sa.Integer(), nullable=False),
+        sa.Column('impact_l', sa.Integer(), nullable=False),
+        sa.Column('impact_r', sa.Integer(), nullable=False),
+        sa.Column('impact_overall', sa.Integer(), nullable=False),
+        sa.Column('severity', sa.Integer(), nullable=False),
+        sa.Column('severity_band', sa.String(length=16), nullable=False),
+        sa.Column('initial_score', sa.Float(), nullable=False),
+        sa.Column('residual_score', sa.Float(), nullable=False),
+        sa.Column('green_max', sa.Integer(), nullable=True),
+        sa.Column('amber_max', sa.Integer(), nullable=True),
+        sa.Column('over_appetite', sa.Boolean(), nullable=False),
+        sa.Column('rag', sa.String(length=8), nullable=True),
+        sa.Column('controls_recommended', sa.Integer(), nullable=False),
+        sa.Column('controls_implemented', sa.Integer(), nullable=False),
+        sa.Column('evidence_implemented', sa.Integer(), nullable=False),
+        sa.Column('evidence_overdue', sa.Integer(), nullable=False),
+        sa.Column('last_evidence_at', sa.DateTime(), nullable=True),
+        sa.Column('next_review', sa.DateTime(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.Column('refreshed_at', sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(['context_id'], ['risk_scenario_contexts.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('context_id'),
+    )
+    op.create_index('ix_rcs_scope_pair', 'risk_context_summary', ['scope_type', 'scope_id'], unique=False)
+    op.create_index('ix_rcs_residual', 'risk_context_summary', ['residual_score', 'updated_at', 'context_id'], unique=False)
+    op.create_index('ix_rcs_severity', 'risk_context_summary', ['severity', 'residual_score', 'updated_at', 'context_id'], unique=False)
+    op.create_index('ix_rcs_updated', 'risk_context_summary', ['updated_at', 'context_id'], unique=False)
+    op.create_index('ix_rcs_next_review', 'risk_context_summary', ['next_review', 'context_id'], unique=False)
+    op.create_index('ix_rcs_over_appetite', 'risk_context_summary', ['over_appetite', 'residual_score'], unique=False)
+    # Populate with: python backend/scripts/risk_context_summary.py rebuild
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_rcs_over_appetite', table_name='risk_context_summary')
+    op.drop_index('ix_rcs_next_review', table_name='risk_context_summary')
+    op.drop_index('ix_rcs_updated', table_name='risk_context_summary')
+    op.drop_index('ix_rcs_severity', table_name='risk_context_summary')
+    op.drop_index('ix_rcs_residual', table_name='risk_context_summary')
+    op.drop_index('ix_rcs_scope_pair', table_name='risk_context_summary')
+    op.drop_table('risk_context_summary')
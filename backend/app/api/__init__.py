@@ -1,7 +1,9 @@
 from fastapi import APIRouter
 from .ai import router as ai_router
 from .auth import router as auth_router
+from .search import router as search_router
 
 router = APIRouter()
 router.include_router(ai_router)
 router.include_router(auth_router)
+router.include_router(search_router)
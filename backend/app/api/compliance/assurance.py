@@ -1,7 +1,11 @@
+from typing import List
+
 from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
 from app.database import get_db
-from app.services.compliance.assurance import compute_assurance_rollup
+from app.services.compliance.assurance import compute_assurance_rollup, compute_assurance_rollups
+
+MAX_CONTEXTS = 1000
 
 router = APIRouter(prefix="/assurance", tags=["Compliance - Assurance Coverage"])
 
@@ -15,3 +19,18 @@ def get_assurance(
         return compute_assurance_rollup(db, version_id, context_id)
     except Exception as e:
         raise HTTPException(400, str(e))
+
+
+@router.get("/framework_versions/{version_id}/contexts")
+def get_assurance_many(
+    version_id: int,
+    context_ids: List[int] = Query(..., description="risk_scenario_context_id (repeat the parameter)"),
+    db: Session = Depends(get_db),
+):
+    """Assurance rollup for many risk contexts at once (portfolio reporting)."""
+    if len(set(context_ids)) > MAX_CONTEXTS:
+        raise HTTPException(400, f"At most {MAX_CONTEXTS} context_ids per request")
+    try:
+        return compute_assurance_rollups(db, version_id, context_ids)
+    except Exception as e:
+        raise HTTPException(400, str(e))
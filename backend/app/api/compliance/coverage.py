@@ -1,18 +1,36 @@
+import json
+
 from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
-from app.database import get_db
+from app.database import get_db, SessionLocal
 from app.constants.scopes import is_valid_scope, normalize_scope
 from app.api.deps.scope import resolve_scope
 
 from app.schemas.compliance.implementation_coverage import FrameworkImplementationCoverage
-from app.schemas.compliance.coverage import CoverageRollupResponse, CoverageRollupItem
-from app.services.compliance.coverage_rollup import coverage_rollup_by_scope_type
+from app.schemas.compliance.coverage import (
+    CoverageRollupResponse, CoverageRollupItem,
+    CoverageGridRequest, CoverageGridCell, CoverageGridResponse,
+)
+from app.services.compliance.coverage_snapshot import get_coverage_rollup
+from app.services.compliance.requirements_status import compute_status_counts_many, iter_status_counts_many
 
 from app.services.compliance.coverage_effective import compute_version_effective_coverage
 from typing import List
 from datetime import datetime
 router = APIRouter(prefix="/coverage", tags=["Compliance - Coverage"])
 
+MAX_GRID_CELLS = 20000          # larger grids must use ?stream=true
+MAX_GRID_VERSIONS = 50
+MAX_GRID_SCOPES_STREAM = 100000
+
+
+def _grid_cell(key, counts) -> dict:
+    version_id, scope_type, scope_id = key
+    applicable = counts["applicable"]
+    pct = round((counts["met"] / applicable) * 100.0, 2) if applicable > 0 else 0.0
+    return {"version_id": version_id, "scope_type": scope_type, "scope_id": scope_id, **counts, "coverage_pct": pct}
+
 @router.get("/framework_versions/{version_id}/effective", response_model=FrameworkImplementationCoverage)
 def get_version_effective_coverage(
     version_id: int,
@@ -37,9 +55,66 @@ def get_version_effective_coverage(
 def get_coverage_rollup(
     version_id: int = Query(..., gt=0),
     scope_types: list[str] = Query(default=["org", "entity", "bu", "service", "site", "asset_group", "asset_type", "tag", "asset"]),
+    fresh: bool = Query(False, description="Recompute instead of serving the stored snapshots"),
     db: Session = Depends(get_db),
 ):
     try:
-        return coverage_rollup_by_scope_type(db, version_id, scope_types)
+        return get_coverage_rollup(db, version_id, scope_types, fresh=fresh)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+
+
+_GRID_RESPONSES = {
+    200: {
+        "model": CoverageGridResponse,
+        "description": "The whole grid as JSON, or with ?stream=true one CoverageGridCell JSON object per line.",
+        "content": {
+            "application/x-ndjson": {"schema": {"$ref": "#/components/schemas/CoverageGridCell"}},
+        },
+    },
+}
+
+
+# no response_model: ?stream=true returns NDJSON, both shapes are documented in _GRID_RESPONSES
+@router.post("/grid", responses=_GRID_RESPONSES)
+def get_coverage_grid(
+    payload: CoverageGridRequest,
+    stream: bool = Query(False, description="Stream cells as NDJSON, one scope chunk at a time"),
+    db: Session = Depends(get_db),
+):
+    """
+    Presence-based status counts (same as /coverage-summary) for every
+    (framework version x scope) cell, computed with grouped queries per chunk of scopes.
+    """
+    version_ids = list(dict.fromkeys(payload.version_ids))
+    if not version_ids or len(version_ids) > MAX_GRID_VERSIONS:
+        raise HTTPException(400, detail=f"version_ids must contain 1..{MAX_GRID_VERSIONS} ids")
+    scopes = []
+    for s in payload.scopes:
+        if not is_valid_scope(s.scope_type):
+            raise HTTPException(400, detail=f"Unsupported scope_type '{s.scope_type}'")
+        scopes.append((normalize_scope(s.scope_type), s.scope_id))
+    scopes = list(dict.fromkeys(scopes))
+
+    if not stream:
+        if len(scopes) * len(version_ids) > MAX_GRID_CELLS:
+            raise HTTPException(400, detail=f"Grid exceeds {MAX_GRID_CELLS} cells; use ?stream=true")
+        counts = compute_status_counts_many(db, version_ids=version_ids, scopes=scopes)
+        return CoverageGridResponse(
+            computed_at=datetime.utcnow(),
+            cells=[CoverageGridCell(**_grid_cell(k, c)) for k, c in counts.items()],
+        )
+
+    if len(scopes) > MAX_GRID_SCOPES_STREAM:
+        raise HTTPException(400, detail=f"At most {MAX_GRID_SCOPES_STREAM} scopes per request")
+
+    def _ndjson():
+        # own session: the request-scoped one is closed before the body is streamed
+        sdb = SessionLocal()
+        try:
+            for cells in iter_status_counts_many(sdb, version_ids=version_ids, scopes=scopes):
+                yield "".join(json.dumps(_grid_cell(k, c)) + "\n" for k, c in cells)
+        finally:
+            sdb.close()
+
+    return StreamingResponse(_ndjson(), media_type="application/x-ndjson")
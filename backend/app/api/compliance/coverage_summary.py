@@ -4,7 +4,8 @@ from app.api.deps.scope import resolve_scope
 from app.database import get_db
 from typing import List
 from app.schemas.compliance.coverage_summary import CoverageSummary, CoverageSummaryWithMeta
-from app.services.compliance.coverage_summary import compute_coverage_summary, compute_coverage_summary_list
+from app.services.compliance.coverage_summary import compute_coverage_summary_list
+from app.services.compliance.coverage_snapshot import get_coverage_summary
 
 router = APIRouter(prefix="/compliance/coverage", tags=["Compliance Coverage"])
 
@@ -14,13 +15,15 @@ def get_coverage_summary(
     version_id: int = Query(..., description="Framework version id"),
     # scope_type: str = Query(..., description="Scope type (e.g., asset, tag, asset_group, asset_type, org)"),
     # scope_id: int = Query(..., description="Scope id"),
+    fresh: bool = Query(False, description="Recompute instead of serving the stored snapshot"),
     db: Session = Depends(get_db),
 ):
     """
     Returns KPI-style summary for the requested framework version and scope.
+    Served from coverage_snapshot; `last_computed_at` is when the numbers were computed.
     """
     scope_type, scope_id = scope
-    return compute_coverage_summary(db=db, version_id=version_id, scope_type=scope_type, scope_id=scope_id)
+    return get_coverage_summary(db, version_id, scope_type, scope_id, fresh=fresh)
 
 # --- NEW: list (multi-version) ------------------------------------------------
 @router.get("/summary/list", response_model=List[CoverageSummaryWithMeta])
@@ -28,6 +31,7 @@ def get_coverage_summary_list(
     scope: tuple[str, int] = Depends(resolve_scope),
     version_ids: List[int] | None = Query(None, description="Repeat or CSV: version_ids=1&version_ids=2 OR version_ids=1,2"),
     version_ids_csv: str | None = Query(None, alias="version_ids", include_in_schema=False),
+    fresh: bool = Query(False, description="Recompute instead of serving the stored snapshots"),
     db: Session = Depends(get_db),
 ):
     """
@@ -44,6 +48,6 @@ def get_coverage_summary_list(
         ids = list({int(p) for p in parts})
     if not ids:
         return []
-    return compute_coverage_summary_list(db=db, version_ids=ids, scope_type=scope_type, scope_id=scope_id)
+    return compute_coverage_summary_list(db=db, version_ids=ids, scope_type=scope_type, scope_id=scope_id, fresh=fresh)
 
 
@@ -1,31 +1,80 @@
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Query
+import os
+import shutil
+import tempfile
+
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, UploadFile, File, Query
+from fastapi.responses import JSONResponse
 from sqlalchemy.orm import Session
 from app.database import get_db
+from app.schemas.compliance.imports import ImportJobOut
+from app.core.utils import open_upload_text
 from app.services.compliance.crosswalk_importer import import_crosswalks_csv
+from app.services.import_jobs import create_job, get_job, run_job
 
 router = APIRouter(prefix="/imports", tags=["Compliance - Crosswalk Imports"])
 
+CROSSWALK_JOB_KIND = "crosswalks_csv"
+
+
+def _run_crosswalk_job(job_id: str, path: str, version_id: int, dry_run: bool, upsert: bool,
+                       default_weight: int) -> None:
+    def work(db, progress):
+        with open(path, encoding="utf-8-sig", errors="ignore", newline="") as fh:
+            return import_crosswalks_csv(db, framework_version_id=version_id, csv_text=fh, dry_run=dry_run,
+                                         upsert=upsert, default_weight=default_weight, progress=progress).dict()
+    try:
+        run_job(job_id, work)
+    finally:
+        os.unlink(path)
+
+
 @router.post("/framework_versions/{version_id}/crosswalks/csv")
-async def import_crosswalks_csv_api(
+def import_crosswalks_csv_api(
     version_id: int,
+    background_tasks: BackgroundTasks,
     file: UploadFile = File(...),
     dry_run: bool = Query(False),
     upsert: bool = Query(True),
     default_weight: int = Query(100),
+    background: bool = Query(False, description="Run as a background job; poll GET /imports/jobs/{id}"),
     db: Session = Depends(get_db),
 ):
+    """
+    Streams the upload in batches. With background=true the file is spooled to disk and
+    imported by a background job (202 + job); otherwise returns the import report.
+    """
     if not file.filename.lower().endswith(".csv"):
         raise HTTPException(status_code=400, detail="Please upload a .csv file")
+
+    if background:
+        with tempfile.NamedTemporaryFile("wb", suffix=".csv", delete=False) as tmp:
+            shutil.copyfileobj(file.file, tmp)
+        job = create_job(db, CROSSWALK_JOB_KIND, {
+            "framework_version_id": version_id, "filename": file.filename,
+            "dry_run": dry_run, "upsert": upsert, "default_weight": default_weight,
+        })
+        background_tasks.add_task(_run_crosswalk_job, job.id, tmp.name, version_id, dry_run, upsert, default_weight)
+        return JSONResponse(status_code=202, content=ImportJobOut.model_validate(job).model_dump(mode="json"))
+
     try:
-        text = (await file.read()).decode("utf-8", errors="ignore")
         rep = import_crosswalks_csv(
             db,
             framework_version_id=version_id,
-            csv_text=text,
+            csv_text=open_upload_text(file.file),
             dry_run=dry_run,
             upsert=upsert,
             default_weight=default_weight,
         )
         return rep.dict()
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/jobs/{job_id}", response_model=ImportJobOut)
+def get_import_job_api(job_id: str, db: Session = Depends(get_db)):
+    job = get_job(db, job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Import job not found")
+    return job
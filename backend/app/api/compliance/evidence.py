@@ -1,15 +1,18 @@
 from fastapi import APIRouter, Depends, HTTPException, Path, status, UploadFile, File, Header
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 from typing import List, Optional
+from urllib.parse import quote
 from app.database import get_db
 from app.schemas.compliance.evidence import ControlEvidenceCreate, ControlEvidenceUpdate, ControlEvidenceOut , LifecycleEventIn
 from app.crud.compliance import control_evidence as crud
-from app.crud.evidence import lifecycle, create_artifact_db
+from app.crud.evidence import lifecycle, create_artifact_stored
 
 from app.models.evidence.evidence_artifact import EvidenceArtifact  # import
 from app.schemas.evidence.evidence import EvidenceArtifactOut
-
-from app.crud.evidence import create_artifact_db  # NEW (reuse existing CRUD)
+from app.services.evidence.artifact_store import (
+    ArtifactTooLarge, artifact_chunks, artifact_size, get_artifact_store, parse_range,
+)
 
 
 # add near top
@@ -29,6 +32,39 @@ def get_artifact_meta(artifact_id: int, db: Session = Depends(get_db)):
         raise HTTPException(status.HTTP_404_NOT_FOUND, detail="Artifact not found")
     return obj
 
+@router.get("/artifacts/{artifact_id}/content", summary="Download artifact content (supports Range)")
+def download_artifact(artifact_id: int, range: Optional[str] = Header(None), db: Session = Depends(get_db)):
+    art = db.get(EvidenceArtifact, artifact_id)
+    if not art:
+        raise HTTPException(status.HTTP_404_NOT_FOUND, detail="Artifact not found")
+    if art.storage not in ("db", get_artifact_store().name):
+        raise HTTPException(status.HTTP_409_CONFLICT, detail=f"Artifact stored in '{art.storage}' cannot be served")
+    size = artifact_size(art)
+    try:
+        byte_range = parse_range(range, size)
+    except ValueError:
+        raise HTTPException(status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE, detail="Range not satisfiable",
+                            headers={"Content-Range": f"bytes */{size}"})
+
+    headers = {
+        "Accept-Ranges": "bytes",
+        "Content-Disposition": f"attachment; filename*=UTF-8''{quote(art.filename or f'artifact-{art.id}')}",
+    }
+    if art.sha256:
+        headers["ETag"] = f'"{art.sha256}"'
+    if byte_range is None:
+        start, end, code = 0, size - 1, status.HTTP_200_OK
+    else:
+        (start, end), code = byte_range, status.HTTP_206_PARTIAL_CONTENT
+        headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+    headers["Content-Length"] = str(end - start + 1)
+    return StreamingResponse(
+        artifact_chunks(art, start, end) if size else iter(()),
+        status_code=code,
+        media_type=art.content_type or "application/octet-stream",
+        headers=headers,
+    )
+
 @router.post("", response_model=ControlEvidenceOut)
 def add_evidence(payload: ControlEvidenceCreate, db: Session = Depends(get_db)):
     obj = crud.create(db, payload)
@@ -79,29 +115,29 @@ def supersede_evidence(evidence_id: int, replacement_id: int, db: Session = Depe
     return row
 
 @router.post("/{evidence_id}/artifact", summary="Upload and attach artifact to ControlEvidence")
-async def upload_artifact_to_control_evidence(
+def upload_artifact_to_control_evidence(
     evidence_id: int,
     file: UploadFile = File(...),
     db: Session = Depends(get_db),
     x_user: Optional[str] = Header(None),
 ):
-    # Save artifact (DB-blob storage) using existing CRUD
-    content = await file.read()
-
-    # ... inside upload_artifact_to_control_evidence(...)
-    if len(content) > MAX_UPLOAD_BYTES:
-        raise HTTPException(status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail="File too large")
-
     if file.content_type not in ALLOWED_CONTENT_TYPES:
         raise HTTPException(status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
                             detail=f"Unsupported content type: {file.content_type}")
 
-    art = create_artifact_db(
+    # Stream into the content-addressed artifact store (identical files are stored once)
+    store = get_artifact_store()
+    try:
+        stored = store.put_stream(file.file, max_bytes=MAX_UPLOAD_BYTES)
+    except ArtifactTooLarge:
+        raise HTTPException(status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail="File too large")
+
+    art = create_artifact_stored(
         db,
+        storage=store.name,
+        stored=stored,
         filename=file.filename,
         content_type=file.content_type,
-        blob=content,
-        size=len(content),
     )
 
     # Update ControlEvidence.file_path to reference the artifact (simple convention)
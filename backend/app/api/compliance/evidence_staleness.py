@@ -22,6 +22,7 @@ def get_stale_or_expiring_evidence(
     List evidence that is expired or will expire within the given window.
     If your data model stores `valid_until` directly, it will be used.
     If not, and an EvidencePolicy exists (by control), a derived `valid_until` is computed from `collected_at`.
+    Items are ordered by expiry (soonest first); the counts and `total` cover all pages.
     """
     scope_type, scope_id = scope
     return list_stale_or_expiring_evidence(
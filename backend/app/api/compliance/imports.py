@@ -1,5 +1,8 @@
+from typing import Optional
+
 from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Query
 from sqlalchemy.orm import Session
+from app.core.utils import open_upload_text
 from app.database import get_db
 from app.schemas.compliance.imports import ImportResult
 from app.services.compliance.requirements_importer import import_requirements_csv_idbased
@@ -7,11 +10,24 @@ from app.services.compliance.requirements_importer import import_requirements_cs
 router = APIRouter(prefix="/imports", tags=["Compliance - Imports"])
 
 @router.post("/framework_versions/{version_id}/requirements/csv-id", response_model=ImportResult)
-async def import_requirements_csv_id_api(version_id: int, file: UploadFile = File(...), dry_run: bool = Query(False), db: Session = Depends(get_db)):
-    if not file.filename.endswith(".csv"):
-        raise HTTPException(status_code=400, detail="Please upload a .csv file")
-    text = (await file.read()).decode("utf-8", errors="ignore")
+def import_requirements_csv_id_api(
+    version_id: int,
+    file: UploadFile = File(...),
+    atoms_file: Optional[UploadFile] = File(None, description="Optional obligation atoms CSV"),
+    dry_run: bool = Query(False),
+    diff: bool = Query(False, description="List created/updated requirements and existing ones not in the file"),
+    db: Session = Depends(get_db),
+):
+    for f in (file, atoms_file):
+        if f is not None and not f.filename.lower().endswith(".csv"):
+            raise HTTPException(status_code=400, detail="Please upload a .csv file")
     try:
-        return import_requirements_csv_idbased(db, version_id, text, dry_run=dry_run)
+        return import_requirements_csv_idbased(
+            db, version_id, open_upload_text(file.file), dry_run=dry_run,
+            atoms_csv=open_upload_text(atoms_file.file) if atoms_file is not None else None,
+            diff=diff,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
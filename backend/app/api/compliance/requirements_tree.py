@@ -1,12 +1,21 @@
-from fastapi import APIRouter, Depends, Query
+from fastapi import APIRouter, Depends, Query, Request, Response
 from sqlalchemy.orm import Session
 from app.database import get_db
 from app.schemas.compliance.requirements_tree import RequirementTreeNode
-from app.services.compliance.requirements_tree import get_requirements_tree
+from app.services.compliance.requirement_hierarchy import tree_body, tree_etag
 from typing import List
 
 router = APIRouter(prefix="/compliance/requirements", tags=["Compliance Requirements"])
 
 @router.get("/tree", response_model=List[RequirementTreeNode])
-def get_tree(version_id: int = Query(...), db: Session = Depends(get_db)):
-    return get_requirements_tree(db, version_id)
+def get_tree(request: Request, version_id: int = Query(...), db: Session = Depends(get_db)):
+    """
+    Requirement tree of a framework version. The response carries an ETag; send it back
+    in If-None-Match to get 304 Not Modified while the version's requirements are unchanged.
+    """
+    etag = tree_etag(db, version_id)
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if_none_match = request.headers.get("if-none-match") or ""
+    if etag in {t.strip().removeprefix("W/") for t in if_none_match.split(",")} or if_none_match.strip() == "*":
+        return Response(status_code=304, headers=headers)
+    return Response(content=tree_body(db, version_id, etag), media_type="application/json", headers=headers)
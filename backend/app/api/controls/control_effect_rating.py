@@ -1,17 +1,19 @@
 # api/api_control_effect_rating.py
 
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, File, HTTPException, Query, UploadFile
 from sqlalchemy.orm import Session
+from app.core.utils import open_upload_text
 from app.database import get_db
 from app.crud.controls import control_effect_rating as crud
 from app.schemas.controls.control_effect_rating import *
-from typing import List
-from app.models.controls.control_effect_rating import ControlEffectRating
-import pandas as pd
-import os
+from typing import List, Optional
+from app.services.effect_matrix_loader import load_effect_ratings_csv
+from pathlib import Path
 
 router = APIRouter(prefix="/control-effect-ratings", tags=["Control Effect Rating"])
 
+BUNDLED_MATRIX_CSV = Path(__file__).resolve().parents[2] / "data" / "control_effect_rating_full_matrix.csv"
+
 @router.post("/", response_model=List[ControlEffectRatingOut])
 def create_rating(payload: List[ControlEffectRatingCreate], db: Session = Depends(get_db)):
     return crud.upsert_control_effect_ratings_bulk(db, payload)
@@ -24,31 +26,20 @@ def get_by_scenario(scenario_id: int, db: Session = Depends(get_db)):
 def get_by_control(control_id: int, db: Session = Depends(get_db)):
     return crud.get_by_control(db, control_id)
 
-@router.post("/bulk_insert")
-def update(rating_id: int, payload: ControlEffectRatingUpdate, db: Session = Depends(get_db)):
-    csv_path = os.path.join("app", "data", "control_effect_rating_filled.csv")
-
-    print(os.getcwd(), csv_path)
-    df = pd.read_csv(csv_path)
-
-    # Convert rows
-    records = [
-        ControlEffectRating(
-            risk_scenario_id=int(row["risk_scenario_id"]),
-            control_id=int(row["control_id"]),
-            domain_id=int(row["domain_id"]),
-            score=int(row["score"])
-        )
-        for _, row in df.iterrows()
-    ]
-
-    # Insert in bulk
-    db.bulk_save_objects(records)
-    db.commit()
-    db.close()
-
-    # print("✅ Inserted into database.")
-    return {"message", "inserted"}
+@router.post("/bulk_insert", response_model=ControlEffectRatingImportResult)
+def bulk_insert(
+    file: Optional[UploadFile] = File(None, description="Effect-matrix CSV; default: the bundled full matrix"),
+    dry_run: bool = Query(False),
+    db: Session = Depends(get_db),
+):
+    """Upsert an effect-matrix CSV (score 0 removes a rating) and report the diff."""
+    try:
+        if file is not None:
+            return load_effect_ratings_csv(db, open_upload_text(file.file), dry_run=dry_run)
+        with open(BUNDLED_MATRIX_CSV, encoding="utf-8-sig", newline="") as fh:
+            return load_effect_ratings_csv(db, fh, dry_run=dry_run)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
 @router.delete("/{rating_id}")
 def delete(rating_id: int, db: Session = Depends(get_db)):
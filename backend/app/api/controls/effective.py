@@ -8,8 +8,12 @@ from sqlalchemy.orm import Session
 
 from app.database import get_db
 from app.constants.scopes import is_valid_scope, normalize_scope
-from app.schemas.controls.effective_control import EffectiveControlOut
-from app.services.controls.effective_overlay import get_effective_controls
+from app.schemas.controls.effective_control import EffectiveControlOut, EffectiveScopeRef, EffectiveControlsForScope
+from app.services.controls.effective_overlay import (
+    get_effective_controls,
+    get_effective_controls_many,
+    get_effective_controls_for_entity_assets,
+)
 # TODO merge the overlay and verbose
 from app.schemas.controls.effective_control_verbose import EffectiveControlsVerboseOut
 from app.services.controls.effective_controls_overlay import  get_effective_controls_verbose
@@ -30,6 +34,20 @@ def effective_controls_verbose(scope_type: str = Query(...), scope_id: int = Que
     st, sid = _validated(scope_type, scope_id)
     return get_effective_controls_verbose(db, st, sid)
 
+@router.post("/overlay/batch", response_model=List[EffectiveControlsForScope])
+def effective_controls_batch(scopes: List[EffectiveScopeRef], db: Session = Depends(get_db)):
+    if len(scopes) > 5000:
+        raise HTTPException(400, detail="At most 5000 scopes per request")
+    keys = [_validated(s.scope_type, s.scope_id) for s in scopes]
+    res = get_effective_controls_many(db, keys)
+    return [EffectiveControlsForScope(scope_type=st, scope_id=sid, controls=res[(st, sid)])
+            for st, sid in dict.fromkeys(keys)]
+
+@router.get("/overlay/entity/{entity_id}/assets", response_model=List[EffectiveControlsForScope])
+def effective_controls_for_entity_assets(entity_id: int, db: Session = Depends(get_db)):
+    res = get_effective_controls_for_entity_assets(db, entity_id)
+    return [EffectiveControlsForScope(scope_type="asset", scope_id=aid, controls=ctrls) for aid, ctrls in res.items()]
+
 
 # def effective_controls(
 #     scope_type: str = Query(..., description="asset|tag|asset_group|asset_type|bu|site|entity|service|org_group"),
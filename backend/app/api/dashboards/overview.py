@@ -1,5 +1,5 @@
 # app/routers/overview.py
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Query
 from sqlalchemy.orm import Session
 
 from app.database import get_db
@@ -10,8 +10,9 @@ router = APIRouter(prefix="/overview", tags=["overview"])
 
 @router.get("/summary", response_model=OverviewSummary)
 def get_overview_summary(
+    fresh: bool = Query(False, description="Recompute framework coverage instead of serving snapshots"),
     db: Session = Depends(get_db),
 ):
     # For now we intentionally do not accept params (UI uses global scope).
     # Default scope can be changed centrally here later.
-    return compute_overview_summary(db=db, scope_type="org", scope_id=1)
+    return compute_overview_summary(db=db, scope_type="org", scope_id=1, fresh=fresh)
@@ -10,9 +10,10 @@ from app.schemas.evidence import (
 from app.crud.evidence import (
     create_evidence_item, update_evidence_item, get_evidence_item,
     list_evidence_for_link, delete_evidence_item,
-    create_artifact_db, attach_artifact_to_evidence
+    create_artifact_stored, attach_artifact_to_evidence
 )
 from app.crud.evidence import lifecycle as lc
+from app.services.evidence.artifact_store import get_artifact_store
 
 router = APIRouter(prefix="/evidence/evidence", tags=["Evidence"])
 
@@ -31,18 +32,18 @@ def create_evidence(link_id: int,
         pass
     return row
 
-# --- Upload/attach an artifact (DB-blob fallback, multipart) ---
+# --- Upload/attach an artifact (streamed into the artifact store, multipart) ---
 @router.post("/{evidence_id}/artifact", response_model=EvidenceArtifactOut)
-async def upload_artifact_db(evidence_id: int,
-                             file: UploadFile = File(...),
-                             db: Session = Depends(get_db)):
-    content = await file.read()
-    art = create_artifact_db(
+def upload_artifact(evidence_id: int,
+                    file: UploadFile = File(...),
+                    db: Session = Depends(get_db)):
+    store = get_artifact_store()
+    art = create_artifact_stored(
         db,
+        storage=store.name,
+        stored=store.put_stream(file.file),
         filename=file.filename,
         content_type=file.content_type,
-        blob=content,
-        size=len(content)
     )
     # link to evidence
     row = attach_artifact_to_evidence(db, evidence_id=evidence_id, artifact_id=art.id)
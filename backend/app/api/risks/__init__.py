@@ -14,6 +14,7 @@ from .context_evidence_m4 import router as context_evidence_m4_router
 from .context_controls_m4 import router as context_controls_m4_router
 from .context_details_summaries_m4 import router as context_details_summaries_m4_router
 from .context_bulk import router as context_bulk_router
+from .risk_context_summary import router as risk_context_summary_router
 
 
 router = APIRouter()
@@ -32,4 +33,4 @@ router.include_router(context_controls_m4_router)
 router.include_router(context_evidence_m4_router)
 router.include_router(context_details_summaries_m4_router)
 router.include_router(context_bulk_router)
-
+router.include_router(risk_context_summary_router)
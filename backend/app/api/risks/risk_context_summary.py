@@ -0,0 +1,27 @@
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.orm import Session
+from typing import Dict, Any
+
+from app.database import get_db
+from app.services.risk_context_summary import rebuild_all, check_consistency, CHUNK_SIZE
+
+router = APIRouter(prefix="/risk_context_summary", tags=["Risk Contexts"])
+
+
+@router.post("/rebuild")
+def rebuild_summary(
+    chunk_size: int = Query(CHUNK_SIZE, ge=1, le=10000),
+    db: Session = Depends(get_db),
+) -> Dict[str, Any]:
+    out = rebuild_all(db, chunk_size=chunk_size)
+    db.commit()
+    return out
+
+
+@router.get("/check")
+def check_summary(
+    chunk_size: int = Query(CHUNK_SIZE, ge=1, le=10000),
+    sample: int = Query(50, ge=0, le=1000),
+    db: Session = Depends(get_db),
+) -> Dict[str, Any]:
+    return check_consistency(db, chunk_size=chunk_size, sample=sample)
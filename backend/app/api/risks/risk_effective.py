@@ -7,9 +7,10 @@ from app.models.assets.asset import Asset
 from app.models.assets.asset_type import AssetType
 from app.models.risks.risk_scenario_context import RiskScenarioContext
 from app.models.risks.risk_scenario import RiskScenario
-from app.models.risks.risk_score import RiskScore, RiskScoreHistory
+from app.models.risks.risk_score import RiskScore
 from app.models.controls.control_context_link import ControlContextLink
 from app.services.policy.resolver import resolve_appetite, compute_rag, get_required_controls, build_compliance_chips
+from app.services.risk_score_history import get_trends, residual_series
 from datetime import datetime, timedelta
 
 router = APIRouter(prefix="/assets", tags=["Risks (Effective)"])
@@ -115,10 +116,15 @@ def get_effective_risks_for_asset(
 
     results: List[RiskEffectiveItem] = []
 
+    # pick "primary" by specificity: asset > tag > group > type
+    prio = {"asset": 3, "tag": 2, "group": 1, "type": 0}
+    primaries = {scn_id: sorted(ctxs, key=lambda x: prio[scope_of(x)], reverse=True)[0]
+                 for scn_id, ctxs in by_scenario.items()}
+    # residual trends of all primaries in one read (raw points + compacted buckets)
+    trends = get_trends(db, [p.id for p in primaries.values()], start=datetime.utcnow() - timedelta(days=days))
+
     for scn_id, ctxs in by_scenario.items():
-        # pick "primary" by specificity: asset > tag > group > type
-        prio = {"asset": 3, "tag": 2, "group": 1, "type": 0}
-        primary = sorted(ctxs, key=lambda x: prio[scope_of(x)], reverse=True)[0]
+        primary = primaries[scn_id]
 
         scenario: RiskScenario = primary.risk_scenario
         # getattr(scenario, "title", None) or getattr(scenario, "title_en", None) or getattr(scenario, "title_de", None) or f"Scenario #{scenario.id}")
@@ -129,14 +135,12 @@ def get_effective_risks_for_asset(
         initial = int(getattr(score, "inherent_score", 0) or 0)
         residual = int(getattr(score, "residual_score", 0) or 0)
 
-        # trend = last N residuals (fallback to demo points)
-        hist = db.query(RiskScoreHistory)\
-                 .filter(RiskScoreHistory.risk_scenario_context_id == primary.id)\
-                 .order_by(RiskScoreHistory.created_at.desc())\
-                 .limit(days).all()
-        if hist:
-            trend = [{"x": i, "y": int(h.residual_score or 0)} for i, h in enumerate(reversed(hist))]
-            last_score_ts = max(h.created_at for h in hist)
+        # trend = daily residuals over the last N days (fallback to demo points)
+        ctx_trend = trends[primary.id]
+        if ctx_trend["buckets"] or ctx_trend["baseline"]:
+            trend = residual_series(ctx_trend)
+            last_score_ts = (ctx_trend["buckets"][-1]["lastAt"] if ctx_trend["buckets"]
+                             else ctx_trend["baseline"]["at"])
         else:
             trend = [{"x": i, "y": 40 + ((i * 3) % 12)} for i in range(16)]
             last_score_ts = None
@@ -1,6 +1,6 @@
 from fastapi import APIRouter, Depends
 from pydantic import BaseModel, Field
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 from sqlalchemy.orm import Session
 from app.database import get_db
 from app.services.risk_engine import RiskEngine
@@ -19,6 +19,9 @@ class GenerateByTypeRequest(BaseModel):
     dry_run: bool = False
     recalc_scores: bool = True
 
+class GenerateAllRequest(GenerateByTypeRequest):
+    asset_type_ids: Optional[List[int]] = None  # None = all asset types
+
 @router.get("/preview/by-type/{asset_type_id}")
 def preview_by_type(asset_type_id: int, db: Session = Depends(get_db)) -> Dict[str, Any]:
     return RiskEngine(db).preview_by_type(asset_type_id)
@@ -34,3 +37,15 @@ def generate_by_type(asset_type_id: int, req: GenerateByTypeRequest, db: Session
         dry_run=req.dry_run,
         recalc_scores=req.recalc_scores,
     )
+
+@router.post("/generate/all")
+def generate_all(req: GenerateAllRequest, db: Session = Depends(get_db)) -> Dict[str, Any]:
+    """Set-based generation for all (or the given) asset types; returns the applicability diff."""
+    return RiskEngine(db).generate_all(
+        default_likelihood=req.default_likelihood,
+        impact_ratings=[i.dict() for i in req.impact_ratings],
+        status=req.status,
+        asset_type_ids=req.asset_type_ids,
+        dry_run=req.dry_run,
+        recalc_scores=req.recalc_scores,
+    )
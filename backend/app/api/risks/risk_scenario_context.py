@@ -1,8 +1,11 @@
+from datetime import datetime
+
 from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 from typing import Optional, Dict, Any, List
 
-from app.database import get_db
+from app.database import get_db, SessionLocal
 from app.schemas.risks.risk_scenario_context import (
     RiskScenarioContext as RiskScenarioContextOut,
     RiskScenarioContextCreate,
@@ -19,6 +22,7 @@ from app.crud.risks import risk_scenario_context as crud_legacy, risk_context_li
 from app.crud.risks.risk_scenario_context import RiskScenarioContextCRUD as rsc_crud
 from app.constants.scopes import normalize_scope, is_valid_scope, SCOPE_TYPES
 from app.services import risk_history
+from app.services.risk_register_export import FORMATS, select_columns, write_export
 
 router = APIRouter(prefix="/risk_scenario_contexts", tags=["Risk Contexts"])
 
@@ -120,6 +124,7 @@ def get_contexts(
     over_appetite: Optional[bool] = None,
     owner_id: Optional[int] = None,
     days: int = 90,
+    cursor: Optional[str] = Query(None, description="nextCursor from the previous page (keyset; offset is ignored)"),
     db: Session = Depends(get_db),
 ):
     return risk_context_list.list_contexts(
@@ -134,10 +139,52 @@ def get_contexts(
         domain=domain,
         owner_id=owner_id,
         over_appetite=over_appetite,
-        days=days
+        days=days,
+        cursor=cursor,
     )
 
 
+@router.get("/contexts/export")
+def export_contexts(
+    format: str = Query("csv", pattern="^(csv|ndjson|xlsx)$"),
+    columns: Optional[str] = Query(None, description="Comma-separated export columns (default: all)"),
+    sort_by: str = Query("updated_at"),
+    sort_dir: str = Query("desc"),
+    scope: str = Query("all"),
+    status: str = Query("all"),
+    search: str = Query("", max_length=200),
+    domain: str = "all",  # C|I|A|L|R|all
+    over_appetite: Optional[bool] = None,
+    owner_id: Optional[int] = None,
+    days: int = 90,
+):
+    """
+    Stream the whole risk register (filters and sort as /contexts) as CSV, NDJSON or
+    XLSX. Rows are read through a server-side cursor and written chunk by chunk.
+    """
+    try:
+        cols = select_columns(columns)
+    except ValueError as e:
+        raise HTTPException(400, detail=str(e))
+    media_type, ext = FORMATS[format]
+
+    def _body():
+        # own session: the request-scoped one is closed before the body is streamed
+        sdb = SessionLocal()
+        try:
+            chunks = risk_context_list.iter_list_items(
+                sdb, sort_by=sort_by, sort_dir=sort_dir, scope=scope, status=status, search=search,
+                domain=domain, over_appetite=over_appetite, owner_id=owner_id, days=days,
+            )
+            yield from write_export(chunks, format, cols)
+        finally:
+            sdb.close()
+
+    filename = f"risk-register-{datetime.utcnow():%Y%m%d-%H%M%S}.{ext}"
+    return StreamingResponse(_body(), media_type=media_type,
+                             headers={"Content-Disposition": f'attachment; filename="{filename}"'})
+
+
 @router.get("/{context_id}/details", response_model=RiskContextDetails)
 @router.get("/{context_id}/details/", response_model=RiskContextDetails)
 def get_risk_context_details(
@@ -1,9 +1,13 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
+from typing import Optional, Dict, Any, List
+from datetime import datetime, timedelta
 
 from app.schemas.risks.risk_score import RiskScoreRead, RiskScoreHistoryRead
 from app.crud.risks import risk_score as crud
 from app.database import get_db
+from app.services.risk_score_batch import recalculate_scores, CHUNK_SIZE
+from app.services import risk_score_history as history
 
 router = APIRouter(prefix="/risk-scores", tags=["Risk Scores"])
 
@@ -47,3 +51,44 @@ def calculate_scores_by_scenario(scenario_id: int, db: Session = Depends(get_db)
 @router.get("/calculate", response_model=list[RiskScoreRead])
 def calculate_all_scores(db: Session = Depends(get_db)):
     return crud.calculate_all_scores(db)
+
+
+@router.post("/recalculate")
+def recalculate(
+    scenario_id: Optional[int] = Query(None, description="limit to one scenario"),
+    chunk_size: int = Query(CHUNK_SIZE, ge=1, le=10000),
+    dry_run: bool = Query(False, description="compute and report, write nothing"),
+    model: str = Query("max_e", pattern="^(max_e|multiplicative)$"),
+    db: Session = Depends(get_db),
+) -> Dict[str, Any]:
+    return recalculate_scores(db, scenario_id=scenario_id, chunk_size=chunk_size, dry_run=dry_run, model=model)
+
+
+# ------- HISTORY (trends / compaction) -------
+@router.get("/trends")
+def get_trends(
+    context_id: List[int] = Query(..., description="repeat for several contexts"),
+    start: Optional[datetime] = Query(None, description="default: 90 days ago"),
+    end: Optional[datetime] = Query(None, description="default: now"),
+    granularity: str = Query("day", pattern="^(day|week)$"),
+    db: Session = Depends(get_db),
+) -> Dict[int, Dict[str, Any]]:
+    if len(context_id) > 1000:
+        raise HTTPException(status_code=400, detail="At most 1000 contexts per request")
+    end = end or datetime.utcnow()
+    start = start or end - timedelta(days=90)
+    if start > end:
+        raise HTTPException(status_code=400, detail="start must be before end")
+    return history.get_trends(db, context_id, start=start, end=end, granularity=granularity)
+
+
+@router.post("/history/compact")
+def compact_history(
+    raw_days: int = Query(history.RAW_RETENTION_DAYS, ge=history.MIN_RAW_RETENTION_DAYS),
+    daily_days: int = Query(history.DAILY_RETENTION_DAYS, ge=history.MIN_RAW_RETENTION_DAYS),
+    chunk_size: int = Query(history.CHUNK_SIZE, ge=1, le=10000),
+    dry_run: bool = Query(False, description="report what would be folded, write nothing"),
+    db: Session = Depends(get_db),
+) -> Dict[str, Any]:
+    return history.compact_history(db, raw_days=raw_days, daily_days=daily_days,
+                                   chunk_size=chunk_size, dry_run=dry_run)
@@ -0,0 +1,33 @@
+# app/api/search.py
+
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.orm import Session
+
+from app.database import get_db
+from app.schemas.search import SearchResponse
+from app.services.search import MAX_QUERY_LENGTH, search
+
+router = APIRouter(prefix="/search", tags=["Search"])
+
+
+@router.get("", response_model=SearchResponse)
+def search_all(
+    q: str = Query(..., min_length=1, max_length=MAX_QUERY_LENGTH,
+                   description='Web-search syntax: words, "quoted phrases", or, -excluded'),
+    kinds: Optional[str] = Query(None, description="comma-separated: requirement,obligation,control,risk_scenario"),
+    version_id: Optional[int] = Query(None, description="Restrict requirements/obligations to a framework version"),
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = Query(None, description="next_cursor of the previous page"),
+    db: Session = Depends(get_db),
+):
+    """Ranked hits across requirements, obligation atoms, controls and risk scenarios."""
+    try:
+        return search(
+            db, q,
+            kinds=kinds.split(",") if kinds else None,
+            version_id=version_id, limit=limit, cursor=cursor,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
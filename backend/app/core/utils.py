@@ -1,4 +1,6 @@
+import io
 from datetime import datetime, date, time
+from typing import IO
 
 def _to_dt(d):
     if d is None:
@@ -7,4 +9,8 @@ def _to_dt(d):
         return d
     if isinstance(d, date):
         return datetime.combine(d, time.min)
-    return None
\ No newline at end of file
+    return None
+
+def open_upload_text(fileobj: IO[bytes]) -> IO[str]:
+    """Decode a binary upload (UploadFile.file) incrementally as UTF-8 text for csv."""
+    return io.TextIOWrapper(fileobj, encoding="utf-8-sig", errors="ignore", newline="")
@@ -1,13 +1,11 @@
 from app.crud.assets import *
 from app.crud.risks import *
 from app.crud.controls import *
-from app.crud.vendors import *
 from app.crud.policies import *
 from app.crud.users import *
 from app.crud.risks.threat import *
 from app.crud.risks.vulnerability import *
 from app.crud.compliance import *
-from app.crud.business import *
 
 from .asset_type_control_link import *
 from .asset_type_threat_link import *
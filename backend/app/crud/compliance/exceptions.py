@@ -33,6 +33,19 @@ def list_exceptions(
         q = q.filter(ComplianceException.framework_requirement_id == requirement_id)
     return q.order_by(ComplianceException.created_at.desc()).all()
 
+def list_expiring(db: Session, start: date, end: date, limit: Optional[int] = None) -> List[ComplianceException]:
+    """Exceptions whose end_date falls in [start, end], newest first (same order as list_exceptions)."""
+    q = (
+        db.query(ComplianceException)
+        .filter(ComplianceException.end_date.isnot(None),
+                ComplianceException.end_date >= start,
+                ComplianceException.end_date <= end)
+        .order_by(ComplianceException.created_at.desc())
+    )
+    if limit is not None:
+        q = q.limit(limit)
+    return q.all()
+
 def update(db: Session, exc_id: int, payload: ComplianceExceptionUpdate) -> Optional[ComplianceException]:
     obj = db.query(ComplianceException).get(exc_id)
     if not obj: return None
@@ -82,17 +95,9 @@ def withdraw(db: Session, exc_id: int) -> Optional[ComplianceException]:
     return obj
 
 def expire_due(db: Session) -> int:
-    """Expire approved/active exceptions past end_date (when end_date is set)."""
-    today = date.today()
-    q = db.query(ComplianceException).filter(
-        ComplianceException.end_date.isnot(None),
-        ComplianceException.end_date < today,
-        ComplianceException.status.in_(["approved","active"])
-    )
-    count = 0
-    for obj in q.all():
-        obj.status = "expired"
-        count += 1
+    """Expire approved/active exceptions past end_date (when end_date is set); one set-based UPDATE."""
+    from app.services.compliance.lifecycle_sweeper import expire_exceptions
+    count = expire_exceptions(db)
     db.commit()
     return count
 
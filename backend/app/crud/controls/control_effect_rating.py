@@ -1,8 +1,9 @@
 # crud/crud_control_effect_rating.py
 
+from sqlalchemy import tuple_
 from sqlalchemy.orm import Session
 from app.models.controls.control_effect_rating import ControlEffectRating
-from app.schemas.controls.control_effect_rating import ControlEffectRatingCreate, ControlEffectRatingUpdate
+from app.schemas.controls.control_effect_rating import ControlEffectRatingCreate, ControlEffectRatingOut, ControlEffectRatingUpdate
 from typing import Optional, List
 
 def create_control_effect_rating(db: Session, rating: ControlEffectRatingCreate):
@@ -60,11 +61,31 @@ def upsert_control_effect_rating(db: Session, rating_in: ControlEffectRatingCrea
     db.refresh(new_rating)
     return new_rating
 
-def upsert_control_effect_ratings_bulk(db: Session, ratings: List[ControlEffectRatingCreate]):
-    results = []
-    for rating in ratings:
-        result = upsert_control_effect_rating(db, rating)
-        if result:
-            results.append(result)
-    return results
-
+def upsert_control_effect_ratings_bulk(db: Session, ratings: List[ControlEffectRatingCreate]) -> List[ControlEffectRatingOut]:
+    """Same semantics as upsert_control_effect_rating per item (score 0 deletes), in one transaction."""
+    # the last rating of a cell wins, so a cell is added, updated or deleted at most once
+    latest = {(r.risk_scenario_id, r.control_id, r.domain_id): r for r in ratings}
+    if not latest:
+        return []
+    CER = ControlEffectRating
+    existing = {
+        (obj.risk_scenario_id, obj.control_id, obj.domain_id): obj
+        for obj in db.query(CER).filter(tuple_(CER.risk_scenario_id, CER.control_id, CER.domain_id).in_(latest))
+    }
+    kept = []
+    for key, rating in latest.items():
+        obj = existing.get(key)
+        if rating.score == 0:
+            if obj is not None:
+                db.delete(obj)
+            continue
+        if obj is not None:
+            obj.score = rating.score
+        else:
+            obj = ControlEffectRating(**rating.model_dump())
+            db.add(obj)
+        kept.append(obj)
+    db.flush()
+    out = [ControlEffectRatingOut.model_validate(obj) for obj in kept]
+    db.commit()
+    return out
@@ -0,0 +1,142 @@
+"""
+RiskOps queue engine.
+
+All six dashboard queues come from one pass per request:
+  - context slices are bounded, indexed reads of the risk_context_summary projection
+    (over appetite by residual, review candidates by next_review, most recently updated)
+  - the union of selected contexts is enriched once (risk_context_list.list_items_for_ids)
+  - evidence / control queues batch their per-context lookups into one query each and
+    pick the top K with heaps
+  - expiring exceptions are a date-range query with LIMIT
+"""
+from __future__ import annotations
+
+import heapq
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy.orm import Session
+
+from app.crud.compliance import exceptions as crud_exceptions
+from app.crud.m4 import context_controls as crud_controls
+from app.crud.m4 import evidence as crud_evidence
+from app.crud.risks.risk_context_list import list_items_for_ids, resolve_appetite_for_scope
+from app.models.risks.risk_context_summary import RiskContextSummary
+from app.services.policy.appetite_index import get_appetite_index
+
+DEFAULT_SLA_DAYS_AMBER = 30     # resolve_appetite_for_scope default when no policy matches
+ENRICH_DAYS = 90                # evidence staleness window of the enriched rows (register default)
+
+_SLA_FLAGS = {"DueSoon": "WARN", "Overdue": "OVERDUE"}
+
+
+def _review_sla(next_review: Optional[datetime], appetite: Dict[str, Any], now: datetime) -> Optional[str]:
+    """Same rule as the register's reviewSLAStatus."""
+    if not next_review:
+        return None
+    if now > next_review:
+        return "Overdue"
+    amber = (appetite.get("slaDays") or {}).get("amber")
+    if amber and (next_review - now).days <= int(amber):
+        return "DueSoon"
+    return "OnTrack"
+
+
+def _over_appetite_ids(db: Session, limit: int) -> List[int]:
+    S = RiskContextSummary
+    rows = (
+        db.query(S.context_id)
+        .filter(S.over_appetite.is_(True))
+        .order_by(S.residual_score.desc(), S.updated_at.desc().nullslast(), S.context_id.desc())
+        .limit(limit)
+        .all()
+    )
+    return [cid for (cid,) in rows]
+
+
+def _reviews_due(db: Session, limit: int, now: datetime) -> List[tuple]:
+    """[(context_id, flag)] ordered by next_review; stops after `limit` WARN/OVERDUE hits."""
+    S = RiskContextSummary
+    window = max(get_appetite_index(db).max_sla_days_amber, DEFAULT_SLA_DAYS_AMBER) + 1
+    candidates = (
+        db.query(S.context_id, S.scope_type, S.scope_id, S.next_review)
+        .filter(S.next_review.isnot(None), S.next_review < now + timedelta(days=window))
+        .order_by(S.next_review.asc(), S.context_id.asc())
+        .yield_per(max(limit * 4, 100))
+    )
+    appetite_cache: Dict[tuple, Dict[str, Any]] = {}
+    out: List[tuple] = []
+    for cid, st, sid, next_review in candidates:
+        if (st, sid) not in appetite_cache:
+            appetite_cache[(st, sid)] = resolve_appetite_for_scope(db, st, sid)
+        flag = _SLA_FLAGS.get(_review_sla(next_review, appetite_cache[(st, sid)], now))
+        if flag:
+            out.append((cid, flag))
+            if len(out) >= limit:
+                break
+    return out
+
+
+def _recent_ids(db: Session, limit: int) -> List[tuple]:
+    """[(context_id, updated_at)] most recently updated first."""
+    S = RiskContextSummary
+    return (
+        db.query(S.context_id, S.updated_at)
+        .filter(S.updated_at.isnot(None))
+        .order_by(S.updated_at.desc(), S.context_id.desc())
+        .limit(limit)
+        .all()
+    )
+
+
+def build_queues(
+    db: Session,
+    *,
+    limit: int = 10,
+    horizon_days: int = 30,
+    recent_days: int = 7,
+    now: Optional[datetime] = None,
+) -> Dict[str, List[Dict[str, Any]]]:
+    """Plain dict rows per queue (shapes of the RiskOps queue item schemas)."""
+    now = now or datetime.utcnow()
+
+    over_ids = _over_appetite_ids(db, limit)
+    due = _reviews_due(db, limit, now)
+    recent = _recent_ids(db, limit)
+    sample_ids = [cid for cid, _ in recent]      # evidence / control queues sample the latest contexts
+
+    rows = list_items_for_ids(db, list({*over_ids, *(cid for cid, _ in due), *sample_ids}), days=ENRICH_DAYS)
+
+    over_items = [rows[cid] for cid in over_ids if cid in rows]
+    reviews = [{**rows[cid], "slaFlag": flag} for cid, flag in due if cid in rows]
+    cutoff = now - timedelta(days=recent_days)
+    recent_items = [rows[cid] for cid, updated in recent if cid in rows and updated >= cutoff]
+
+    # evidence: warn/overdue items of the sampled contexts, context recency first, newest capture next
+    rank = {cid: i for i, cid in enumerate(sample_ids)}
+    ev_by_ctx = crud_evidence.list_by_contexts(db, sample_ids, freshness=("warn", "overdue"))
+    evidence = heapq.nsmallest(
+        limit,
+        ((rank[cid], pos, it) for cid, items in ev_by_ctx.items() for pos, it in enumerate(items)),
+        key=lambda t: (t[0], t[1]),
+    )
+
+    # controls implemented but not verified yet, same sampling/order
+    ctrl_by_ctx = crud_controls.list_for_contexts(db, sample_ids, status="implemented")
+    controls = heapq.nsmallest(
+        limit,
+        ((rank[cid], pos, it) for cid, items in ctrl_by_ctx.items() for pos, it in enumerate(items)),
+        key=lambda t: (t[0], t[1]),
+    )
+
+    today = date.today()
+    expiring = crud_exceptions.list_expiring(db, today, today + timedelta(days=horizon_days), limit=limit)
+
+    return {
+        "overAppetite": over_items,
+        "reviewsDue": reviews,
+        "evidenceOverdue": [it for _, _, it in evidence],
+        "awaitingVerification": [it for _, _, it in controls],
+        "exceptionsExpiring": expiring,
+        "recentChanges": recent_items,
+    }
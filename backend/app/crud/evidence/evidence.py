@@ -5,6 +5,7 @@ from datetime import datetime
 
 from app.models.evidence.evidence_item import EvidenceItem
 from app.models.evidence.evidence_artifact import EvidenceArtifact
+from app.services.evidence.artifact_store import StoredBlob
 
 # -------- Evidence Items --------
 
@@ -90,6 +91,30 @@ def create_artifact_db(
     db.refresh(art)
     return art
 
+# -------- Artifacts (artifact store) --------
+
+def create_artifact_stored(
+    db: Session,
+    *,
+    storage: str,
+    stored: StoredBlob,
+    filename: str,
+    content_type: Optional[str],
+) -> EvidenceArtifact:
+    art = EvidenceArtifact(
+        storage=storage,
+        location=stored.key,
+        filename=filename,
+        content_type=content_type,
+        size=stored.size,
+        sha256=stored.sha256,
+        blob=None,
+    )
+    db.add(art)
+    db.commit()
+    db.refresh(art)
+    return art
+
 def attach_artifact_to_evidence(
     db: Session,
     *,
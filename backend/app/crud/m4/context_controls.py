@@ -99,6 +99,58 @@ def list_for_context(
     return total, items, summary
 
 
+def list_for_contexts(
+    db: Session,
+    context_ids: List[int],
+    *,
+    status: Optional[str] = None,
+) -> Dict[int, List[Dict]]:
+    """
+    Controls linked to several contexts in one query: {context_id: items, latest evidence first}.
+    Items have the list_for_context() shape; `status` matches assurance_status case-insensitively.
+    """
+    if not context_ids:
+        return {}
+    ev_sub = (
+        db.query(
+            ControlEvidence.control_context_link_id.label("ccl_id"),
+            func.max(ControlEvidence.collected_at).label("last_ev"),
+        )
+        .join(ControlContextLink, ControlContextLink.id == ControlEvidence.control_context_link_id)
+        .filter(ControlContextLink.risk_scenario_context_id.in_(context_ids))
+        .group_by(ControlEvidence.control_context_link_id)
+        .subquery()
+    )
+    q = (
+        db.query(
+            ControlContextLink.id.label("id"),
+            ControlContextLink.risk_scenario_context_id.label("ctx_id"),
+            ControlContextLink.control_id.label("control_id"),
+            ControlContextLink.assurance_status.label("status"),
+            Control.reference_code.label("code"),
+            func.coalesce(Control.title_en, Control.title_de).label("title"),
+            ev_sub.c.last_ev.label("last_ev"),
+        )
+        .join(Control, Control.id == ControlContextLink.control_id)
+        .outerjoin(ev_sub, ev_sub.c.ccl_id == ControlContextLink.id)
+        .filter(ControlContextLink.risk_scenario_context_id.in_(context_ids))
+    )
+    if status:
+        q = q.filter(func.lower(func.trim(ControlContextLink.assurance_status)) == status.strip().lower())
+
+    out: Dict[int, List[Dict]] = {cid: [] for cid in context_ids}
+    for r in q.order_by(ev_sub.c.last_ev.desc().nullslast(), ControlContextLink.id).all():
+        out[r.ctx_id].append({
+            "id": r.id,
+            "contextId": r.ctx_id,
+            "controlId": r.control_id,
+            "code": r.code,
+            "title": r.title,
+            "status": (r.status or "proposed"),
+            "lastEvidenceAt": r.last_ev,
+        })
+    return out
+
 def create_link_simple(db: Session, context_id: int, control_id: int, status: str):
     """Minimal create wrapper: 409 if duplicate; returns created row."""
     exists = db.query(ControlContextLink.id).filter(
@@ -1,26 +1,13 @@
 # app/crud/m4/context_details_summaries.py
 from __future__ import annotations
-from typing import Dict, Optional
+from typing import Dict
 from sqlalchemy.orm import Session
 from sqlalchemy import func
-from datetime import datetime, date
+from datetime import datetime
 
 from app.models.controls.control_context_link import ControlContextLink
 from app.models.compliance.control_evidence import ControlEvidence
-
-def _freshness(today: date, captured_at: Optional[date], valid_until: Optional[date]) -> str:
-    # Same policy as STEP 2
-    if valid_until:
-        left = (valid_until - today).days
-        if left <= 0:   return "overdue"
-        if left <= 90:  return "warn"
-        return "ok"
-    if not captured_at:
-        return "overdue"
-    age = (today - captured_at).days
-    if age <= 90:   return "ok"
-    if age <= 180:  return "warn"
-    return "overdue"
+from app.crud.m4.evidence import _freshness  # same rule as the evidence list
 
 def controls_summary_for_context(db: Session, context_id: int) -> Dict:
     # Counts by status (normalized with "proposed" for NULL)
@@ -50,7 +37,7 @@ def controls_summary_for_context(db: Session, context_id: int) -> Dict:
 def evidence_summary_for_context(db: Session, context_id: int) -> Dict:
     # Pull relevant dates once (fast)
     q = (
-        db.query(ControlEvidence.collected_at, ControlEvidence.valid_until)
+        db.query(ControlEvidence.collected_at, ControlEvidence.valid_until, ControlEvidence.status)
           .join(ControlContextLink, ControlContextLink.id == ControlEvidence.control_context_link_id)
           .filter(ControlContextLink.risk_scenario_context_id == context_id)
     )
@@ -58,8 +45,8 @@ def evidence_summary_for_context(db: Session, context_id: int) -> Dict:
     ok = warn = overdue = 0
     last_ev = None
 
-    for collected_at, valid_until in q.all():
-        f = _freshness(today, collected_at, valid_until)
+    for collected_at, valid_until, status in q.all():
+        f = _freshness(today, collected_at, valid_until, status)
         if f == "ok": ok += 1
         elif f == "warn": warn += 1
         else: overdue += 1
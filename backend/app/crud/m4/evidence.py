@@ -8,55 +8,38 @@ from datetime import datetime, date
 from app.models.controls.control_context_link import ControlContextLink
 from app.models.compliance.control_evidence import ControlEvidence
 
-def _freshness(today: date, captured_at: Optional[date], valid_until: Optional[date]) -> str:
+def _freshness(today: date, captured_at: Optional[date], valid_until: Optional[date], status: Optional[str]) -> str:
     """
     Defaults:
+      - overdue iff the stored status is "expired" (the lifecycle sweeper sets it once
+        valid_until or the evidence policy has lapsed)
       - If valid_until present:
-          overdue if valid_until <= today
-          warn    if 0 < (valid_until - today) <= 90
+          warn    if (valid_until - today) <= 90
           ok      otherwise
       - Else fallback to captured_at age:
           ok   if age <= 90 days
-          warn if age <= 180 days
-          overdue otherwise or if captured_at is None
+          warn otherwise or if captured_at is None
     """
+    if status == "expired":
+        return "overdue"
+
     if valid_until:
         days_left = (valid_until - today).days
-        if days_left <= 0:
-            return "overdue"
         if days_left <= 90:
             return "warn"
         return "ok"
 
     if not captured_at:
-        return "overdue"
+        return "warn"
 
     age_days = (today - captured_at).days
     if age_days <= 90:
         return "ok"
-    if age_days <= 180:
-        return "warn"
-    return "overdue"
+    return "warn"
 
-def list_by_context(
-    db: Session,
-    context_id: int,
-    *,
-    control_id: Optional[int] = None,
-    evidence_type: Optional[str] = None,   # NEW
-    freshness: Optional[str] = None,       # NEW: ok|warn|overdue
-    status: Optional[str] = None,          # lifecycle: active|retired|superseded|draft|all
-    include_inactive: bool = False,
-    offset: int = 0,
-    limit: int = 50,
-    sort_by: str = "captured_at",          # captured_at | valid_until
-    sort_dir: str = "desc",
-) -> Tuple[int, List[Dict], Dict[str, int]]:
-    """
-    Returns envelope for evidence items linked to links that belong to the given risk context.
-    If 'freshness' filter is provided, total/summary reflect the filtered set.
-    """
-    q = (
+def _evidence_rows_query(db: Session):
+    """Evidence rows joined to their control/context link (caller adds the context filter)."""
+    return (
         db.query(
             ControlEvidence.id,
             ControlEvidence.control_context_link_id,
@@ -74,8 +57,47 @@ def list_by_context(
             ControlContextLink.control_id.label("control_id"),
         )
         .join(ControlContextLink, ControlContextLink.id == ControlEvidence.control_context_link_id)
-        .filter(ControlContextLink.risk_scenario_context_id == context_id)
     )
+
+def _evidence_item(row, today: date) -> Dict:
+    (eid, link_id, etype, title, descr, url, fpath, ca, vu, review_status, lifecycle_status, supersedes_id, ctx_id, ctrl_id) = row
+    return {
+        "id": eid,
+        "contextId": ctx_id,
+        "controlId": ctrl_id,
+        "linkId": link_id,
+        "type": etype or "other",
+        "ref": url or fpath,
+        "capturedAt": ca,
+        "validUntil": vu,
+        "freshness": _freshness(today, ca, vu, review_status),
+        "status": lifecycle_status,
+        "supersedes_id": supersedes_id,
+        # not exposed in Out, but available if you later extend:
+        "_title": title,
+        "_description": descr,
+        "_review_status": review_status,
+    }
+
+def list_by_context(
+    db: Session,
+    context_id: int,
+    *,
+    control_id: Optional[int] = None,
+    evidence_type: Optional[str] = None,   # NEW
+    freshness: Optional[str] = None,       # NEW: ok|warn|overdue
+    status: Optional[str] = None,          # lifecycle: active|retired|superseded|draft|all
+    include_inactive: bool = False,
+    offset: int = 0,
+    limit: int = 50,
+    sort_by: str = "captured_at",          # captured_at | valid_until
+    sort_dir: str = "desc",
+) -> Tuple[int, List[Dict], Dict[str, int]]:
+    """
+    Returns envelope for evidence items linked to links that belong to the given risk context.
+    If 'freshness' filter is provided, total/summary reflect the filtered set.
+    """
+    q = _evidence_rows_query(db).filter(ControlContextLink.risk_scenario_context_id == context_id)
     if control_id is not None:
         q = q.filter(ControlContextLink.control_id == control_id)
     if evidence_type:
@@ -90,27 +112,7 @@ def list_by_context(
     rows = q.all()
 
     today = datetime.utcnow().date()
-    items_all: List[Dict] = []
-    for (eid, link_id, etype, title, descr, url, fpath, ca, vu, review_status, lifecycle_status, supersedes_id, ctx_id, ctrl_id) in rows:
-        ref = url or fpath
-        fr = _freshness(today, ca, vu)
-        items_all.append({
-            "id": eid,
-            "contextId": ctx_id,
-            "controlId": ctrl_id,
-            "linkId": link_id,
-            "type": etype or "other",
-            "ref": ref,
-            "capturedAt": ca,
-            "validUntil": vu,
-            "freshness": fr,
-            "status": lifecycle_status,
-            "supersedes_id": supersedes_id,
-            # not exposed in Out, but available if you later extend:
-            "_title": title,
-            "_description": descr,
-            "_review_status": review_status,
-        })
+    items_all: List[Dict] = [_evidence_item(row, today) for row in rows]
 
     # Optional freshness filter (post-compute)
     if freshness in ("ok", "warn", "overdue"):
@@ -133,6 +135,35 @@ def list_by_context(
 
     return total, items, summary
 
+def list_by_contexts(
+    db: Session,
+    context_ids: List[int],
+    *,
+    freshness: Optional[Tuple[str, ...]] = None,   # e.g. ("warn", "overdue")
+) -> Dict[int, List[Dict]]:
+    """
+    Active evidence of several contexts in one query: {context_id: items, newest capture first}.
+    Items have the list_by_context() shape; `freshness` keeps only those classes.
+    """
+    if not context_ids:
+        return {}
+    rows = (
+        _evidence_rows_query(db)
+        .filter(ControlContextLink.risk_scenario_context_id.in_(context_ids))
+        .filter(ControlEvidence.lifecycle_status == 'active')
+        .all()
+    )
+    today = datetime.utcnow().date()
+    out: Dict[int, List[Dict]] = {cid: [] for cid in context_ids}
+    for row in rows:
+        it = _evidence_item(row, today)
+        if freshness and it["freshness"] not in freshness:
+            continue
+        out[it["contextId"]].append(it)
+    for items in out.values():
+        items.sort(key=lambda it: (it["capturedAt"] or date.min), reverse=True)
+    return out
+
 # --- create_for_context stays as implemented previously ---
 from urllib.parse import urlparse
 import os
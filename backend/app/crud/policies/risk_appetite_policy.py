@@ -1,5 +1,4 @@
 from sqlalchemy.orm import Session
-from sqlalchemy import or_, and_
 from typing import Optional, Iterable, Tuple
 from datetime import datetime
 
@@ -8,6 +7,7 @@ from app.schemas.policies.risk_appetite_policy import (
     RiskAppetitePolicyCreate, RiskAppetitePolicyUpdate
 )
 from app.models.assets.asset import Asset  # for match helper
+from app.services.policy.appetite_index import get_appetite_index
 
 def create(db: Session, data: RiskAppetitePolicyCreate) -> RiskAppetitePolicy:
     row = RiskAppetitePolicy(**data.model_dump())
@@ -71,81 +71,29 @@ def _candidate_scopes_for_asset(asset: Asset) -> Iterable[Tuple[Optional[str], O
     for t in getattr(asset, "tags", []) or []:
         yield ("asset_tag", t.id, _SPECIFICITY["asset_tag"])
 
+def best_for_asset(
+    db: Session,
+    asset: Asset,
+    at_time: Optional[datetime] = None,
+    domain: Optional[str] = None,  # total appetite when None
+):
+    """Best AppetiteEntry for the asset's candidate scopes, ranked by (specificity, priority, recency)."""
+    return get_appetite_index(db).best_of(_candidate_scopes_for_asset(asset), domain=domain, at=at_time)
+
 def find_effective_for_asset(
     db: Session,
     asset_id: int,
     at_time: Optional[datetime] = None,
     domain: Optional[str] = None,  # total appetite when None
 ) -> Optional[RiskAppetitePolicy]:
-    at_time = at_time or datetime.utcnow()
     asset = db.query(Asset).get(asset_id)
     if not asset:
         return None
-
-    candidates = list(_candidate_scopes_for_asset(asset))
-
-    # Build OR(filter) for the candidate (scope, scope_id) pairs plus global/null
-    ors = [and_(RiskAppetitePolicy.scope == s, RiskAppetitePolicy.scope_id == sid)
-           for (s, sid, _rank) in candidates if s is not None]
-    ors.append(and_(RiskAppetitePolicy.scope.is_(None), RiskAppetitePolicy.scope_id.is_(None)))
-
-    q = (
-        db.query(RiskAppetitePolicy)
-          .filter(or_(*ors))
-          .filter(RiskAppetitePolicy.effective_from <= at_time)
-          .filter(or_(RiskAppetitePolicy.effective_to.is_(None), RiskAppetitePolicy.effective_to >= at_time))
-    )
-
-    # If asking for a domain-specific cap, filter by domain; else prefer domain is NULL (total)
-    if domain:
-        q = q.filter(RiskAppetitePolicy.domain == domain)
-    else:
-        q = q.filter(RiskAppetitePolicy.domain.is_(None))
-
-    rows = q.all()
-    if not rows:
-        return None
-
-    # Rank by (specificity, priority, recency)
-    def score(p: RiskAppetitePolicy):
-        # find the matching candidate to get its specificity
-        match_rank = 0
-        for s, sid, rk in candidates:
-            if (s is None and p.scope is None) or (p.scope == s and p.scope_id == sid):
-                match_rank = rk
-                break
-        return (match_rank, p.priority or 0, p.effective_from or datetime.min)
-
-    rows.sort(key=score, reverse=True)
-    return rows[0]
+    entry = best_for_asset(db, asset, at_time=at_time, domain=domain)
+    return db.get(RiskAppetitePolicy, entry.id) if entry else None
 
 def resolve_for(db: Session, *, asset, scenario=None) -> Optional[RiskAppetitePolicy]:
-    now = datetime.utcnow()
-    q = db.query(RiskAppetitePolicy).filter(
-        (RiskAppetitePolicy.effective_from <= now),
-        (RiskAppetitePolicy.effective_to.is_(None) | (RiskAppetitePolicy.effective_to >= now))
-    )
-
-    candidates = []
-    for p in q.all():
-        score = 0
-        if getattr(p, "asset_type_id", None) and getattr(asset, "type_id", None) == p.asset_type_id:
-            score += 3
-        if getattr(p, "asset_tag_id", None) and any(t.id == p.asset_tag_id for t in (getattr(asset, "tags", []) or [])):
-            score += 2
-        # support both single group_id or list of groups
-        if getattr(p, "asset_group_id", None):
-            if getattr(asset, "group_id", None) == p.asset_group_id:
-                score += 1
-            elif any(getattr(g, "id", None) == p.asset_group_id for g in (getattr(asset, "groups", []) or [])):
-                score += 1
-
-        # include globals (no selectors) so you always have a fallback
-        if score or (p.asset_type_id is None and p.asset_tag_id is None and p.asset_group_id is None):
-            candidates.append((score + (p.priority or 0), p))
-
-    if not candidates:
-        return None
-
-    candidates.sort(key=lambda x: (x[0],), reverse=True)
-    return candidates[0][1]
\ No newline at end of file
+    # legacy selector columns (asset_type_id/asset_tag_id/asset_group_id) were replaced by the
+    # unified scope; resolve through the same candidate ranking as find_effective_for_asset
+    entry = best_for_asset(db, asset)
+    return db.get(RiskAppetitePolicy, entry.id) if entry else None
@@ -1,11 +1,15 @@
 # risk_context_list.py  (updated to unified scope)
+import base64
+import json
 from fastapi import HTTPException
 from datetime import datetime, timedelta
-from sqlalchemy import func, desc, asc, case, and_, or_
+from sqlalchemy import func, desc, asc, case, and_, or_, tuple_, select, exists, true, cast, Integer
+from sqlalchemy.orm import contains_eager, selectinload
 
 from app.models.risks.risk_scenario_context import RiskScenarioContext
 from app.models.risks.risk_scenario import RiskScenario
 from app.models.risks.risk_score import RiskScore
+from app.models.risks.risk_context_summary import RiskContextSummary
 
 from app.models.controls.control_context_link import ControlContextLink
 from app.models.controls.control_effect_rating import ControlEffectRating
@@ -13,11 +17,15 @@ from app.models.controls.control import Control
 from app.schemas.risks.risk_context_details import *
 
 from app.services.policy.resolver import *
+from app.services.policy.appetite_index import get_appetite_index
+from app.services.scope_labels import clear_request_scope_labels, resolve_scope_labels, scope_label
 from app.services.risk_analysis import (
     compute_residual_effective_only,
     compute_target_residual_planned,
+    compute_residuals_batch,
 )
-from app.services.evidence.freshness import evidence_aggregate_by_context, evidence_aggregate_for_context
+from app.services.evidence.freshness import evidence_aggregate_by_context, evidence_aggregate_for_context, evidence_totals
+from app.services.risk_score_history import get_trends, residual_series
 from app.crud.m4.context_details_summaries import (
     controls_summary_for_context,
     evidence_summary_for_context,
@@ -26,45 +34,9 @@ from app.models.controls.control_context_link import ControlContextLink as CCL
 from app.models.compliance.control_evidence import ControlEvidence
 from collections import defaultdict
 from datetime import date
+from typing import Iterator
 
 
-# Optional/known models for scope labels (import if present)
-try:
-    from app.models.assets.asset import Asset
-except Exception:
-    Asset = None
-try:
-    from app.models.assets.asset_group import AssetGroup
-except Exception:
-    AssetGroup = None
-try:
-    from app.models.assets.asset_type import AssetType
-except Exception:
-    AssetType = None
-try:
-    from app.models.assets.asset_tag import AssetTag
-except Exception:
-    AssetTag = None
-try:
-    from app.models.org.entity import OrgEntity
-except Exception:
-    OrgEntity = None
-try:
-    from app.models.org.business_unit import BusinessUnit
-except Exception:
-    BusinessUnit = None
-try:
-    from app.models.org.site import Site
-except Exception:
-    Site = None
-try:
-    from app.models.org.service import Service
-except Exception:
-    Service = None
-try:
-    from app.models.org.group import OrgGroup
-except Exception:
-    OrgGroup = None
 try:
     from app.models.risks.risk_score import RiskScore, RiskScoreHistory
 except Exception:
@@ -77,6 +49,12 @@ from app.models.policies.risk_appetite_policy import RiskAppetitePolicy
 
 SPEC_SCOPE = ("asset","asset_group","asset_type","tag","bu","site","entity","service","org_group")
 
+# appetite when no active policy matches (scope or global)
+_DEFAULT_GREEN_MAX, _DEFAULT_AMBER_MAX = 9, 18
+
+# impact domain ids as written by crud.risks.risk_scenario_context._set_impacts
+DOMAIN_ID_BY_CODE = {"C": 1, "I": 2, "A": 3, "L": 4, "R": 5}
+
 def _as_datetime(ts):
     """Coerce date/datetime/None to datetime (midnight for dates)."""
     if isinstance(ts, datetime):
@@ -90,8 +68,19 @@ def _pack_impacts(c: RiskScenarioContext) -> Dict[str, int]:
     Build impacts dict from your context model.
     Adjust if you store ratings differently.
     """
+    return _pack_ratings(getattr(c, "impact_ratings", []) or [])
+
+def _pack_ratings(ratings) -> Dict[str, int]:
+    """Impacts dict from rating objects/rows exposing .domain_id and .score."""
+    code_by_id = {v: k for k, v in DOMAIN_ID_BY_CODE.items()}
+    if ratings and all(getattr(r, "domain_id", None) in code_by_id for r in ratings):
+        # keyed by domain id (same mapping as the risk_context_summary impact_* columns)
+        out = {"C": 0, "I": 0, "A": 0, "L": 0, "R": 0}
+        for r in ratings:
+            out[code_by_id[r.domain_id]] = r.score
+        return out
     # Example if you keep a list of per-domain scores (C,I,A,L,R):
-    vals = [r.score for r in (getattr(c, "impact_ratings", []) or [])[:5]]
+    vals = [r.score for r in ratings[:5]]
     vals += [0] * (5 - len(vals))
     return {"C": vals[0], "I": vals[1], "A": vals[2], "L": vals[3], "R": vals[4]}
 
@@ -118,115 +107,26 @@ def resolve_scope_info(db: Session, scope_type: Optional[str], scope_id: Optiona
     """
     Returns (label, asset_id_for_appetite) for a given (scope_type, scope_id).
     asset_id_for_appetite is only meaningful when scope_type == 'asset'.
+    Prefetch pages with resolve_scope_labels(); this then hits the request cache.
     """
-    if not scope_type:
-        return ("Organization", None)
-
-    # ORM lookups only if the model exists
-    if scope_type == "asset" and Asset and scope_id:
-        row = db.query(Asset).get(scope_id)
-        return (getattr(row, "name", f"asset:{scope_id}") if row else f"asset:{scope_id}", scope_id)
-
-    if scope_type == "asset_group" and AssetGroup and scope_id:
-        row = db.query(AssetGroup).get(scope_id)
-        return (getattr(row, "name", f"group:{scope_id}") if row else f"group:{scope_id}", None)
-
-    if scope_type == "asset_type" and AssetType and scope_id:
-        row = db.query(AssetType).get(scope_id)
-        return (getattr(row, "name", f"type:{scope_id}") if row else f"type:{scope_id}", None)
-
-    if scope_type == "tag" and AssetTag and scope_id:
-        row = db.query(AssetTag).get(scope_id)
-        return (getattr(row, "name", f"tag:{scope_id}") if row else f"tag:{scope_id}", None)
-
-    if scope_type == "entity" and OrgEntity and scope_id:
-        row = db.query(OrgEntity).get(scope_id)
-        return (getattr(row, "name", f"entity:{scope_id}") if row else f"entity:{scope_id}", None)
-
-    if scope_type == "bu" and BusinessUnit and scope_id:
-        row = db.query(BusinessUnit).get(scope_id)
-        return (getattr(row, "name", f"bu:{scope_id}") if row else f"bu:{scope_id}", None)
+    label = scope_label(db, scope_type, scope_id)
+    return (label, scope_id if scope_type == "asset" and scope_id else None)
 
-    if scope_type == "site" and Site and scope_id:
-        row = db.query(Site).get(scope_id)
-        return (getattr(row, "name", f"site:{scope_id}") if row else f"site:{scope_id}", None)
-
-    if scope_type == "service" and Service and scope_id:
-        row = db.query(Service).get(scope_id)
-        return (getattr(row, "name", f"service:{scope_id}") if row else f"service:{scope_id}", None)
-
-    if scope_type == "org_group" and OrgGroup and scope_id:
-        row = db.query(OrgGroup).get(scope_id)
-        return (getattr(row, "name", f"org_group:{scope_id}") if row else f"org_group:{scope_id}", None)
-
-    # default fallback
-    return (f"{scope_type}:{scope_id}" if scope_id is not None else scope_type, None)
-
-# Unified-scope label resolver (reuse your central version if you have one)
+# Unified-scope label resolver (batched/cached in app.services.scope_labels)
 def resolve_scope_label(db: Session, scope_type: Optional[str], scope_id: Optional[int]) -> str:
-    model_map = {
-        "asset": ("app.models.assets.asset", "Asset", "name"),
-        "asset_group": ("app.models.assets.asset_group", "AssetGroup", "name"),
-        "asset_type": ("app.models.assets.asset_type", "AssetType", "name"),
-        "tag": ("app.models.assets.asset_tag", "AssetTag", "name"),
-        "entity": ("app.models.org.entity", "OrgEntity", "name"),
-        "bu": ("app.models.org.business_unit", "BusinessUnit", "name"),
-        "site": ("app.models.org.site", "Site", "name"),
-        "service": ("app.models.services.service", "Service", "name"),
-        "org_group": ("app.models.org.org_group", "OrgGroup", "name"),
-    }
-    if not scope_type:
-        return "Organization"
-    mod_path, cls_name, label_attr = model_map.get(scope_type, (None, None, None))
-    if not mod_path or scope_id is None:
-        return f"{scope_type}:{scope_id}" if scope_id is not None else scope_type
-    try:
-        module = __import__(mod_path, fromlist=[cls_name])
-        cls = getattr(module, cls_name)
-        row = db.query(cls).get(scope_id)
-        return getattr(row, label_attr, f"{scope_type}:{scope_id}") if row else f"{scope_type}:{scope_id}"
-    except Exception:
-        return f"{scope_type}:{scope_id}"
+    return scope_label(db, scope_type, scope_id)
 
 def resolve_appetite_for_scope(db: Session, scope_type: Optional[str], scope_id: Optional[int]) -> Dict[str, Any]:
     """
-    Minimal scope-based appetite resolver against risk_appetite_policies:
-    1) Try exact (scope, scope_id), active by date.
+    Scope-based appetite from the in-process policy index:
+    1) Exact (scope, scope_id) total policy, active now.
     2) Fallback to global (NULL,NULL).
     Returns dict {greenMax, amberMax, domainCaps, slaDays}.
     """
-    now = datetime.utcnow()
-    q = (
-        db.query(RiskAppetitePolicy)
-          .filter(RiskAppetitePolicy.effective_from <= now)
-          .filter(or_(RiskAppetitePolicy.effective_to.is_(None), RiskAppetitePolicy.effective_to >= now))
-    )
-    if scope_type and scope_id is not None:
-        q = q.filter(
-            or_(
-                and_(RiskAppetitePolicy.scope == scope_type, RiskAppetitePolicy.scope_id == scope_id),
-                and_(RiskAppetitePolicy.scope.is_(None), RiskAppetitePolicy.scope_id.is_(None)),
-            )
-        ).order_by(
-            # prefer exact scope before global, then priority
-            desc(RiskAppetitePolicy.scope.is_(None)),
-            desc(RiskAppetitePolicy.priority),
-            desc(RiskAppetitePolicy.id),
-        )
-    else:
-        q = q.filter(RiskAppetitePolicy.scope.is_(None), RiskAppetitePolicy.scope_id.is_(None))\
-             .order_by(desc(RiskAppetitePolicy.priority), desc(RiskAppetitePolicy.id))
-
-    row = q.first()
-    if not row:
-        return {"greenMax": 9, "amberMax": 18, "domainCaps": {}, "slaDays": {"amber": 30, "red": 7}}
-
-    return {
-        "greenMax": row.green_max,
-        "amberMax": row.amber_max,
-        "domainCaps": row.domain_caps_json or {},
-        "slaDays": {"amber": row.sla_days_amber, "red": row.sla_days_red},
-    }
+    entry = get_appetite_index(db).resolve(scope_type, scope_id)
+    if not entry:
+        return {"greenMax": _DEFAULT_GREEN_MAX, "amberMax": _DEFAULT_AMBER_MAX, "domainCaps": {}, "slaDays": {"amber": 30, "red": 7}}
+    return entry.as_appetite()
 
 def _control_display_name(code: Optional[str], title_en: Optional[str], title_de: Optional[str]) -> str:
     title = title_en or title_de or ""
@@ -251,6 +151,28 @@ def _owner_display(u) -> tuple[str, str]:
 
 
 # ------------- main query ----------------
+def _appetite_lateral(now: datetime):
+    """
+    Per-context total appetite policy as a LATERAL subquery, with the same precedence as
+    the appetite index (exact scope, then global; priority; latest effective_from).
+    No row -> caller falls back to the defaults.
+    """
+    P = RiskAppetitePolicy
+    return (
+        select(P.green_max, P.amber_max, P.domain_caps_json)
+        .where(P.domain.is_(None))
+        .where(P.effective_from <= now)
+        .where(or_(P.effective_to.is_(None), P.effective_to >= now))
+        .where(or_(
+            and_(P.scope == RiskScenarioContext.scope_type, P.scope_id == RiskScenarioContext.scope_id),
+            and_(P.scope.is_(None), P.scope_id.is_(None)),
+        ))
+        .order_by(P.scope.is_(None), desc(P.priority), desc(P.effective_from), desc(P.id))
+        .limit(1)
+        .lateral("appetite")
+    )
+
+
 def context_metrics(
         db: Session,
         scope: Optional[str] = "all",
@@ -262,192 +184,131 @@ def context_metrics(
         days: Optional[int] = 365,
         search: Optional["str"] = None,
 ) -> Dict[str, Any]:
+    """
+    KPI strip aggregates computed in SQL (constant number of round trips).
+    Impacts come from risk_context_summary; residual from RiskScore (0 when unscored),
+    appetite thresholds/domain caps from a lateral join on risk_appetite_policies.
+    """
     now = datetime.utcnow()
     stale_before = now - timedelta(days=days)
     cutoff_30d = now - timedelta(days=30)
 
-    # ---- Base contexts with filters (unified scope) ----
-    q = (db.query(RiskScenarioContext)
-         .join(RiskScenario)
-         .outerjoin(RiskScore, RiskScore.risk_scenario_context_id == RiskScenarioContext.id))
-
-    if scope != "all":
-        q = q.filter(RiskScenarioContext.scope_type == scope)
-        if scope_id is not None:
-            q = q.filter(RiskScenarioContext.scope_id == scope_id)
-    if status != "all":
-        q = q.filter(RiskScenarioContext.status == status)
-    if owner_id is not None:
-        q = q.filter(RiskScenarioContext.owner_id == owner_id)
-    if search:
-        like = f"%{search.lower()}%"
-        q = q.filter(func.lower(func.coalesce(RiskScenario.title_en, "")).like(like))
-
-    contexts: List[RiskScenarioContext] = q.all()
-    if not contexts:
-        return {
-            "total": 0,
-            "overAppetite": 0,
-            "severityCounts": {"Low": 0, "Medium": 0, "High": 0, "Critical": 0},
-            "ragCounts": {"Green": 0, "Amber": 0, "Red": 0},
-            "evidence": {"ok": 0, "warn": 0, "overdue": 0},
-            "reviewSLA": {"onTrack": 0, "dueSoon": 0, "overdue": 0},
-            "heatmap": {},
-            "avgResidual": 0.0,
-            "exceptionsExpiring30d": 0,
-            "ownerAssigned": 0,
-            "mitigationsInProgress": 0,
-            "residualReduction30d": 0,
-            "lastUpdatedMax": None,
-            "asOf": now.replace(microsecond=0).isoformat() + "Z",
-        }
-
-    ctx_ids = [c.id for c in contexts]
-    scn_ids = list({c.risk_scenario_id for c in contexts})
-
-    # ---- Bulk scores (fast path) ----
-    scores = db.query(
-        RiskScore.risk_scenario_context_id,
-        RiskScore.residual_score,
-        RiskScore.last_updated
-    ).filter(RiskScore.risk_scenario_context_id.in_(ctx_ids)).all()
-    score_by_ctx = {cid: {"residual": (res or 0), "last": lu} for cid, res, lu in scores}
-
-    # ---- Evidence aggregates (centralized) ----
-    agg_by_ctx = evidence_aggregate_by_context(db, ctx_ids, stale_before)
-    total_impl = sum(v["implemented"] for v in agg_by_ctx.values())
-    total_overdue = sum(v["overdue"] for v in agg_by_ctx.values())
-    total_ok = max(total_impl - total_overdue, 0)
-    max_evidence_ts = max([v["max_evidence"] for v in agg_by_ctx.values() if v["max_evidence"]], default=None)
-
-    # ---- Recommended totals per scenario (for coverage in heatmap/KPI if needed)
-    rec_rows = (
-        db.query(
-            ControlEffectRating.risk_scenario_id,
-            func.count(ControlEffectRating.control_id).label("n")
-        )
-        .filter(ControlEffectRating.risk_scenario_id.in_(scn_ids),
-                ControlEffectRating.score > 0)
-        .group_by(ControlEffectRating.risk_scenario_id)
-        .all()
+    S = RiskContextSummary
+    RSC = RiskScenarioContext
+
+    def _filtered(q):
+        q = (q.join(RiskScenario, RiskScenario.id == RSC.risk_scenario_id)
+              .outerjoin(RiskScore, RiskScore.risk_scenario_context_id == RSC.id))
+        if scope != "all":
+            q = q.filter(RSC.scope_type == scope)
+            if scope_id is not None:
+                q = q.filter(RSC.scope_id == scope_id)
+        if status != "all":
+            q = q.filter(RSC.status == status)
+        if owner_id is not None:
+            q = q.filter(RSC.owner_id == owner_id)
+        if search:
+            like = f"%{search.lower()}%"
+            q = q.filter(func.lower(func.coalesce(RiskScenario.title_en, "")).like(like))
+        return q
+
+    # ---- Per-context derived fields as SQL expressions ----
+    likelihood = func.coalesce(RSC.likelihood, 0)
+    impact_overall = func.coalesce(S.impact_overall, 0)
+    sev = impact_overall * likelihood
+    band = case((sev <= 5, "Low"), (sev <= 11, "Medium"), (sev <= 19, "High"), else_="Critical")
+    residual = cast(func.floor(func.coalesce(RiskScore.residual_score, 0)), Integer)
+
+    pol = _appetite_lateral(now)
+    green_max = func.coalesce(pol.c.green_max, _DEFAULT_GREEN_MAX)
+    amber_max = func.coalesce(pol.c.amber_max, _DEFAULT_AMBER_MAX)
+    cap_breach = or_(*[
+        func.coalesce(getattr(S, f"impact_{code.lower()}"), 0) * likelihood > pol.c.domain_caps_json[code].as_float()
+        for code in ("C", "I", "A", "L", "R")
+    ])
+    rag = case((cap_breach, "Red"), (residual <= green_max, "Green"), (residual <= amber_max, "Amber"), else_="Red")
+
+    # mitigations in progress: via status OR control links in approved/implemented (not verified)
+    PROGRESS_STATUSES = ("mitigating", "inprogress", "in_progress")
+    mitigating = or_(
+        func.lower(func.replace(func.coalesce(RSC.status, ""), " ", "")).in_(PROGRESS_STATUSES),
+        exists().where(
+            ControlContextLink.risk_scenario_context_id == RSC.id,
+            func.lower(ControlContextLink.assurance_status).in_(("approved", "implemented")),
+        ),
     )
-    rec_by_scn = {sid: int(n) for sid, n in rec_rows}
-
-    # ---- Compute per-context derived fields (severity, bands, appetite, rag) ----
-    severity_counts = {"Low": 0, "Medium": 0, "High": 0, "Critical": 0}
-    rag_counts = {"Green": 0, "Amber": 0, "Red": 0}
-    heatmap: Dict[str, int] = {}
-    over_appetite_count = 0
-    last_updated_candidates: List[datetime] = []
-
-    # NEW accumulators
-    residuals_for_avg: List[int] = []
-    owner_assigned = 0
-    filtered_ids: set[int] = set()
-
-    # cache appetite per unique (scope_type, scope_id)
-    uniq_scopes = {(c.scope_type, c.scope_id) for c in contexts}
-    appetite_cache: Dict[tuple, Dict] = {pair: resolve_appetite_for_scope(db, *pair) for pair in uniq_scopes}
 
-    filtered_contexts: List[RiskScenarioContext] = []
-
-    for c in contexts:
-        impacts = _pack_impacts(c)
-        if domain in ("C", "I", "A", "L", "R") and (impacts.get(domain, 0) or 0) <= 0:
-            continue
+    # residual 30 days ago = latest history row at/before the cutoff
+    base_30d = (
+        select(cast(func.floor(func.coalesce(RiskScoreHistory.residual_score, 0)), Integer))
+        .where(RiskScoreHistory.risk_scenario_context_id == RSC.id,
+               RiskScoreHistory.created_at <= cutoff_30d)
+        .order_by(RiskScoreHistory.created_at.desc(), RiskScoreHistory.id.desc())
+        .limit(1)
+        .scalar_subquery()
+    )
 
-        impact_overall = _impact_overall(impacts)
-        sev = _severity(impact_overall, int(c.likelihood or 0))
-        band = _severity_band(sev)
-
-        sc = score_by_ctx.get(c.id, {"residual": 0, "last": None})
-        residual = int(sc["residual"] or 0)
-        residuals_for_avg.append(residual)
-
-        appetite = appetite_cache[(c.scope_type, c.scope_id)]
-        amber_max = int(appetite.get("amberMax") or 0)
-        is_over = residual > amber_max
-
-        # optional filter
-        if over_appetite is not None and bool(is_over) != bool(over_appetite):
-            continue
-
-        # RAG via your existing function
-        rag = compute_rag(
-            residual=residual,
-            appetite=appetite,
-            likelihood=int(c.likelihood or 0),
-            impacts=impacts,
+    q = _filtered(
+        db.query(
+            RSC.id.label("id"),
+            RSC.owner_id.label("owner_id"),
+            RSC.updated_at.label("updated_at"),
+            RiskScore.last_updated.label("last_updated"),
+            likelihood.label("likelihood"),
+            impact_overall.label("impact_overall"),
+            band.label("band"),
+            residual.label("residual"),
+            rag.label("rag"),
+            (residual > amber_max).label("is_over"),
+            mitigating.label("mitigating"),
+            func.greatest(func.coalesce(base_30d - residual, 0), 0).label("reduction"),
         )
-
-        severity_counts[band] += 1
-        rag_counts[rag] = rag_counts.get(rag, 0) + 1
-        if is_over:
-            over_appetite_count += 1
-
-        # heatmap cell (impactOverall x likelihood)
-        key = f"{impact_overall}x{int(c.likelihood or 0)}"
-        heatmap[key] = heatmap.get(key, 0) + 1
-
-        # updated timestamps to compute max
-        last_updated_candidates.extend([getattr(c, "updated_at", None), sc["last"]])
-
-        # NEW: owner assigned count
-        if getattr(c, "owner_id", None):
-            owner_assigned += 1
-
-        filtered_contexts.append(c)
-        filtered_ids.add(c.id)
-
-    filtered_ctx_ids = list(filtered_ids)
-
-    # ---- Mitigations in progress ----
-    # via status OR control links in approved/implemented (not verified)
-    PROGRESS_STATUSES = {"mitigating", "inprogress", "in_progress"}
-    mitig_contexts_status = {
-        c.id for c in filtered_contexts
-        if str(c.status or "").replace(" ", "").lower() in PROGRESS_STATUSES
-    }
-    link_progress_rows = (
-        db.query(ControlContextLink.risk_scenario_context_id)
-          .filter(ControlContextLink.risk_scenario_context_id.in_(filtered_ctx_ids))
-          .filter(func.lower(ControlContextLink.assurance_status).in_(("approved", "implemented")))
-          .distinct()
-          .all()
+        .select_from(RSC)
     )
-    mitig_contexts_links = {cid for (cid,) in link_progress_rows}
-    mitigations_in_progress = len(mitig_contexts_status | mitig_contexts_links)
-
-    # ---- Residual reduction over last 30 days ----
-    if filtered_ctx_ids:
-        sub = (
-            db.query(
-                RiskScoreHistory.risk_scenario_context_id.label("ctx"),
-                func.max(RiskScoreHistory.created_at).label("mx")
-            )
-            .filter(RiskScoreHistory.risk_scenario_context_id.in_(filtered_ctx_ids),
-                    RiskScoreHistory.created_at <= cutoff_30d)
-            .group_by(RiskScoreHistory.risk_scenario_context_id)
-            .subquery()
-        )
-        base_rows = (
-            db.query(RiskScoreHistory.risk_scenario_context_id, RiskScoreHistory.residual_score)
-              .join(sub, and_(
-                    RiskScoreHistory.risk_scenario_context_id == sub.c.ctx,
-                    RiskScoreHistory.created_at == sub.c.mx
-              ))
+    q = q.outerjoin(S, S.context_id == RSC.id).outerjoin(pol, true())
+    if domain in ("C", "I", "A", "L", "R"):
+        q = q.filter(func.coalesce(getattr(S, f"impact_{domain.lower()}"), 0) > 0)
+    rows = q.subquery("metric_rows")
+
+    # avgResidual covers the domain-filtered set; everything else also honours over_appetite
+    sel = rows.c.is_over.is_(bool(over_appetite)) if over_appetite is not None else true()
+
+    def _count(cond):
+        return func.coalesce(func.sum(case((and_(sel, cond), 1), else_=0)), 0)
+
+    bands = ("Low", "Medium", "High", "Critical")
+    rags = ("Green", "Amber", "Red")
+    totals = db.query(
+        func.count(rows.c.id).label("n_all"),
+        func.coalesce(func.sum(rows.c.residual), 0).label("residual_sum"),
+        _count(true()).label("total"),
+        _count(rows.c.is_over).label("over"),
+        _count(and_(rows.c.owner_id.isnot(None), rows.c.owner_id != 0)).label("owner_assigned"),
+        _count(rows.c.mitigating).label("mitigating"),
+        func.coalesce(func.sum(case((sel, rows.c.reduction), else_=0)), 0).label("reduction"),
+        func.max(case((sel, rows.c.updated_at))).label("max_updated"),
+        func.max(case((sel, rows.c.last_updated))).label("max_scored"),
+        *[_count(rows.c.band == b).label(f"band_{b}") for b in bands],
+        *[_count(rows.c.rag == r).label(f"rag_{r}") for r in rags],
+    ).one()
+
+    heatmap: Dict[str, int] = {
+        f"{int(imp)}x{int(lik)}": int(n)
+        for imp, lik, n in (
+            db.query(rows.c.impact_overall, rows.c.likelihood, func.count())
+              .filter(sel)
+              .group_by(rows.c.impact_overall, rows.c.likelihood)
               .all()
         )
-        base_by_ctx = {cid: int(res or 0) for cid, res in base_rows}
-    else:
-        base_by_ctx = {}
+    }
 
-    residual_reduction_30d = 0
-    for cid in filtered_ctx_ids:
-        latest = int(score_by_ctx.get(cid, {}).get("residual", 0) or 0)
-        base = base_by_ctx.get(cid)
-        if base is not None and base > latest:
-            residual_reduction_30d += (base - latest)
+    # ---- Evidence aggregates over the base set (before domain/appetite filters) ----
+    base_ids = _filtered(db.query(RSC.id).select_from(RSC)).subquery()
+    ev = evidence_totals(db, select(base_ids.c.id), stale_before)
+    total_impl = ev["implemented"]
+    total_overdue = ev["overdue"]
+    total_ok = max(total_impl - total_overdue, 0)
+    max_evidence_ts = ev["max_evidence"]
 
     # ---- Exceptions expiring in 30 days (optional model) ----
     exceptions_expiring_30d = 0
@@ -456,10 +317,10 @@ def context_metrics(
     except Exception:
         ComplianceException = None
 
-    if ComplianceException:
+    if ComplianceException and int(totals.total or 0):
         exceptions_expiring_30d = int((
             db.query(func.count(func.distinct(ComplianceException.id)))
-              .filter(ComplianceException.risk_scenario_context_id.in_(filtered_ctx_ids))
+              .filter(ComplianceException.risk_scenario_context_id.in_(select(rows.c.id).where(sel)))
               .filter(ComplianceException.end_date.isnot(None))
               .filter(ComplianceException.end_date <= now + timedelta(days=30))
               .filter(or_(
@@ -470,76 +331,153 @@ def context_metrics(
         ) or 0)
 
     # ---- Averages & timestamps ----
-    avg_residual = round(sum(residuals_for_avg) / len(residuals_for_avg), 2) if residuals_for_avg else 0.0
-
-    last_updated_max = None
-    if last_updated_candidates or max_evidence_ts:
-        last_updated_max = max([d for d in last_updated_candidates if d] + ([max_evidence_ts] if max_evidence_ts else []))
+    n_all = int(totals.n_all or 0)
+    avg_residual = round(int(totals.residual_sum or 0) / n_all, 2) if n_all else 0.0
+    last_updated_max = _max_dt(totals.max_updated, totals.max_scored, max_evidence_ts)
 
     return {
-        "total": len(filtered_contexts),
-        "overAppetite": over_appetite_count,
-        "severityCounts": severity_counts,
-        "ragCounts": rag_counts,
+        "total": int(totals.total or 0),
+        "overAppetite": int(totals.over or 0),
+        "severityCounts": {b: int(getattr(totals, f"band_{b}") or 0) for b in bands},
+        "ragCounts": {r: int(getattr(totals, f"rag_{r}") or 0) for r in rags},
         "evidence": {"ok": total_ok, "warn": total_overdue, "overdue": total_overdue},
         "reviewSLA": {"onTrack": 0, "dueSoon": 0, "overdue": 0},   # fill if you persist next_review per-context
         "heatmap": heatmap,
         "avgResidual": avg_residual,                 # NEW
         "exceptionsExpiring30d": exceptions_expiring_30d,  # NEW
-        "ownerAssigned": owner_assigned,             # NEW
-        "mitigationsInProgress": mitigations_in_progress,  # NEW
-        "residualReduction30d": residual_reduction_30d,    # NEW
+        "ownerAssigned": int(totals.owner_assigned or 0),             # NEW
+        "mitigationsInProgress": int(totals.mitigating or 0),  # NEW
+        "residualReduction30d": int(totals.reduction or 0),    # NEW
         "lastUpdatedMax": last_updated_max.replace(microsecond=0).isoformat() + "Z" if last_updated_max else None,
         "asOf": now.replace(microsecond=0).isoformat() + "Z",
     }
 
 
-def list_contexts(
+# ------------- SQL list engine (filters/sort/keyset over risk_context_summary) ----------------
+
+_EPOCH = datetime(1970, 1, 1)
+_FAR_FUTURE = datetime(9999, 12, 31)
+
+# sort_by -> derived keys (contextId is always appended as the unique tiebreaker)
+_SORT_KEYS = {
+    "severity": ("severity", "residual", "updated"),
+    "residual": ("residual", "updated"),
+    "updated_at": ("updated",),
+    "updatedAt": ("updated",),
+    "next_review": ("next_review",),
+    "nextReview": ("next_review",),
+}
+_KEY_KINDS = {"severity": "int", "residual": "float", "updated": "dt", "next_review": "dt", "id": "int"}
+
+
+def _list_query(
     db: Session,
     *,
-    offset: int = 0,
-    limit: int = 25,
-    sort_by: str = "updated_at",   # "severity" | "residual" | "updated_at"
-    sort_dir: str = "desc",
-    scope: str = "all",            # one of SPEC_SCOPE or 'all'
+    now: datetime,
+    scope: str = "all",
+    scope_id: Optional[int] = None,
     status: str = "all",
     search: str = "",
-    # NEW filters
-    domain: str = "all",                 # C|I|A|L|R|all
+    domain: str = "all",
     over_appetite: Optional[bool] = None,
     owner_id: Optional[int] = None,
-    days: int = 90,
 ):
+    """
+    Filtered context query plus SQL expressions of the derived list fields, read from the
+    risk_context_summary projection (severity, residual, updated, next_review).
+    """
+    S = RiskContextSummary
+    severity = func.coalesce(S.severity, 0)
+    residual = func.coalesce(S.residual_score, 0)
+    updated = func.coalesce(S.updated_at, RiskScenarioContext.updated_at, _EPOCH)
+    next_review = func.coalesce(RiskScenarioContext.next_review, _FAR_FUTURE)
+
     q = (
         db.query(RiskScenarioContext)
           .join(RiskScenario)
           .outerjoin(RiskScore, RiskScore.risk_scenario_context_id == RiskScenarioContext.id)
+          .outerjoin(S, S.context_id == RiskScenarioContext.id)
     )
 
     # Filters (unified scope)
     if scope != "all":
         q = q.filter(RiskScenarioContext.scope_type == scope)
-
+        if scope_id is not None:
+            q = q.filter(RiskScenarioContext.scope_id == scope_id)
     if status != "all":
         q = q.filter(RiskScenarioContext.status == status)
-
     if owner_id is not None:
         q = q.filter(RiskScenarioContext.owner_id == owner_id)
-
     if search:
         like = f"%{search.lower()}%"
-        # Adjust fields you want searchable:
         q = q.filter(func.lower(func.coalesce(RiskScenario.title_en, "")).like(like))
 
-    base_rows: List[RiskScenarioContext] = q.all()
-    if not base_rows:
-        return {"total": 0, "items": []}
+    # Derived filters (domain / over_appetite) from the projection
+    if domain in DOMAIN_ID_BY_CODE:
+        q = q.filter(getattr(S, f"impact_{domain.lower()}") > 0)
+    if over_appetite is not None:
+        q = q.filter(S.over_appetite.is_(True) if over_appetite else func.coalesce(S.over_appetite, False).is_(False))
+
+    exprs = {
+        "severity": severity,
+        "residual": residual,
+        "updated": updated,
+        "next_review": next_review,
+        "id": RiskScenarioContext.id,
+    }
+    return q, exprs
+
+
+def _sort_signature(sort_by: str, sort_dir: str) -> str:
+    return f"{sort_by}:{sort_dir}"
+
+
+def encode_cursor(sort_by: str, sort_dir: str, keys: List[str], values: List[Any]) -> str:
+    """Opaque keyset cursor: base64url(JSON) of the last row's sort key values."""
+    vals = []
+    for k, v in zip(keys, values):
+        if _KEY_KINDS[k] == "dt":
+            vals.append(v.isoformat() if v is not None else None)
+        elif _KEY_KINDS[k] == "float":
+            vals.append(float(v or 0))
+        else:
+            vals.append(int(v or 0))
+    raw = json.dumps({"s": _sort_signature(sort_by, sort_dir), "k": vals}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str, sort_by: str, sort_dir: str, keys: List[str]) -> List[Any]:
+    try:
+        pad = "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode((cursor + pad).encode("ascii")).decode("utf-8"))
+        if payload.get("s") != _sort_signature(sort_by, sort_dir):
+            raise ValueError("sort mismatch")
+        raw_vals = payload["k"]
+        if len(raw_vals) != len(keys):
+            raise ValueError("key length mismatch")
+        out = []
+        for k, v in zip(keys, raw_vals):
+            kind = _KEY_KINDS[k]
+            if kind == "dt":
+                out.append(datetime.fromisoformat(v))
+            elif kind == "float":
+                out.append(float(v))
+            else:
+                out.append(int(v))
+        return out
+    except Exception:
+        raise HTTPException(400, "Invalid cursor for this sort")
+
+
+def _assemble_list_items(db: Session, contexts: List[RiskScenarioContext], *, now: datetime, days: int) -> List[Dict[str, Any]]:
+    """Build list rows for an already filtered/sorted page of contexts (order preserved)."""
+    if not contexts:
+        return []
 
     # Aggregates (controls/evidence and recommended totals)
-    ctx_ids = [c.id for c in base_rows]
-    scn_ids = list({c.risk_scenario_id for c in base_rows})
+    ctx_ids = [c.id for c in contexts]
+    scn_ids = list({c.risk_scenario_id for c in contexts})
 
-    now = datetime.utcnow()
     stale_before = now - timedelta(days=days)
 
     impl_by_ctx = evidence_aggregate_by_context(db, ctx_ids, stale_before)
@@ -598,24 +536,27 @@ def list_contexts(
             rec_ids_by_scn[sid].add(cid)
             rec_names_by_scn[sid].append(_control_display_name(code, t_en, t_de))
 
-    # rec_by_scn = {sid: int(n) for sid, n in rec_rows}
+    # gated residuals for the whole page against the in-memory effect matrix
+    try:
+        gated_by_ctx = compute_residuals_batch(db, contexts)
+    except Exception:
+        gated_by_ctx = {}
+
+    # appetite per unique scope on this page; scope labels in one query per scope type
+    appetite_cache: Dict[tuple, Dict] = {}
+    resolve_scope_labels(db, {(getattr(c, "scope_type", None), getattr(c, "scope_id", None)) for c in contexts})
 
     items: List[Dict[str, Any]] = []
-    for c in base_rows:
+    for c in contexts:
         st = getattr(c, "scope_type", None)
         sid = getattr(c, "scope_id", None)
 
         # scope labels + appetite at that scope
-        scope_label, asset_id_for_app = resolve_scope_info(db, st, sid)
-        appetite = resolve_appetite_for_scope(db, st, sid)
-
-        # scores
-        # score = c.score
-        # initial = int(getattr(score, "inherent_score", 0) or 0) or 50
-        # residual = int(getattr(score, "residual_score", 0) or 0) or 25
-        #
-        # impacts = _pack_impacts(c)
-        # impact_overall = _impact_overall(impacts)
+        label, asset_id_for_app = resolve_scope_info(db, st, sid)
+        if (st, sid) not in appetite_cache:
+            appetite_cache[(st, sid)] = resolve_appetite_for_scope(db, st, sid)
+        appetite = appetite_cache[(st, sid)]
+
         score = c.score  # may be None
         likelihood = int(c.likelihood or 0)
         impacts = _pack_impacts(c)
@@ -631,16 +572,9 @@ def list_contexts(
         sev_band = _severity_band(sev)
 
         # Optional gated residuals (effective-only and planned target)
-        try:
-            _g = compute_residual_effective_only(c)
-            residual_gated_val = float(_g.get("overall") or 0.0)
-        except Exception:
-            residual_gated_val = None
-        try:
-            _t = compute_target_residual_planned(c)
-            target_residual_val = float(_t.get("overall") or 0.0)
-        except Exception:
-            target_residual_val = None
+        _gt = gated_by_ctx.get(c.id)
+        residual_gated_val = float(_gt["effective"].get("overall") or 0.0) if _gt else None
+        target_residual_val = float(_gt["planned"].get("overall") or 0.0) if _gt else None
 
         # controls/evidence
         ev = impl_by_ctx.get(c.id, {"implemented": 0, "overdue": 0, "max_evidence": None})
@@ -666,9 +600,6 @@ def list_contexts(
         # domains (non-zero only)
         domains = [k for k, v in impacts.items() if v and v > 0]
 
-        # updatedAt (context vs evidence vs score updated)
-        updated_at = _max_dt(getattr(c, "updated_at", None), latest_ev, getattr(score, "updated_at", None))
-
         # SLA status if you later add next_review on context
         next_review = getattr(c, "next_review", None)
         if next_review:
@@ -687,15 +618,14 @@ def list_contexts(
         # Owner -------------
         owner_name, owner_initials = _owner_display(getattr(c, "owner", None))
 
-
         items.append({
             "contextId": c.id,
             "scenarioId": c.risk_scenario_id,
             "scenarioTitle": getattr(c.risk_scenario, "title_en", None) or getattr(c.risk_scenario, "title", None) or f"Scenario #{c.risk_scenario_id}",
             "scope": st,
-            "scopeName": scope_label,
+            "scopeName": label,
             "assetId": asset_id_for_app,         # only set for scope_type='asset'
-            "assetName": scope_label if st == "asset" else None,
+            "assetName": label if st == "asset" else None,
             "ownerId": getattr(c, "owner_id", None),
             "owner": owner_name,
             "ownerInitials": owner_initials,
@@ -721,13 +651,12 @@ def list_contexts(
                 "overdue": overdue,    # NEW
             },
             "updatedAt": updated_at_dt.isoformat() if updated_at_dt else None,
-            "_u": updated_at_dt,  # temp only for sorting
             "overAppetite": over_app,
             "severity": sev,
             "severityBand": sev_band,
             "domains": domains,
-            "scopeDisplay": f"{st}:{scope_label}" if scope_label else st,
-            "scopeRef": {"type": st, "id": sid, "label": scope_label},
+            "scopeDisplay": f"{st}:{label}" if label else st,
+            "scopeRef": {"type": st, "id": sid, "label": label},
             "lastReview": getattr(c, "last_review", None) if not isinstance(getattr(c, "last_review", None), datetime) else getattr(c, "last_review").isoformat(),
             "nextReview": getattr(c, "next_review", None) if not isinstance(getattr(c, "next_review", None), datetime) else getattr(c, "next_review").isoformat(),
             "reviewSLAStatus": review_sla,
@@ -735,40 +664,167 @@ def list_contexts(
             "appetite": appetite,
         })
 
-    # ----- derived filters (domain / over_appetite) -----
-    if domain in ("C","I","A","L","R"):
-        items = [it for it in items if (it["impacts"].get(domain, 0) or 0) > 0]
-    if over_appetite is not None:
-        items = [it for it in items if bool(it.get("overAppetite")) == bool(over_appetite)]
-
-    total = len(items)
-
-    # ----- sorting -----
-    reverse = (sort_dir.lower() == "desc")
-    if sort_by == "severity":
-        items.sort(key=lambda it: (it.get("severity") or 0,
-                                   it.get("residual") or 0,
-                                   it.get("_u") or datetime.min),
-                   reverse=reverse)
-    elif sort_by == "residual":
-        items.sort(key=lambda it: (it.get("residual") or 0,
-                                   it.get("_u") or datetime.min),
-                   reverse=reverse)
-    elif sort_by in ("updated_at", "updatedAt"):
-        items.sort(key=lambda it: (it.get("_u") or datetime.min),
-                   reverse=reverse)
-    else:
-        items.sort(key=lambda it: (it.get("_u") or datetime.min, it["contextId"]),
-                   reverse=reverse)
+    return items
 
-    # paginate AFTER sorting
-    page = items[offset: offset + limit]
 
-    # drop temp sort key so it never leaks to clients
-    for it in page:
-        it.pop("_u", None)
+def list_contexts(
+    db: Session,
+    *,
+    offset: int = 0,
+    limit: int = 25,
+    sort_by: str = "updated_at",   # "severity" | "residual" | "updated_at" | "next_review"
+    sort_dir: str = "desc",
+    scope: str = "all",            # one of SPEC_SCOPE or 'all'
+    status: str = "all",
+    search: str = "",
+    # NEW filters
+    domain: str = "all",                 # C|I|A|L|R|all
+    over_appetite: Optional[bool] = None,
+    owner_id: Optional[int] = None,
+    days: int = 90,
+    cursor: Optional[str] = None,        # opaque keyset cursor (nextCursor of the previous page)
+):
+    """
+    Risk register page. Filtering, derived sort keys and pagination run in SQL, so only
+    `limit` contexts are enriched in Python. With `cursor` the page continues after the
+    previous one (keyset) and `offset` is ignored; `nextCursor` is None on the last page.
+    """
+    now = datetime.utcnow()
+    q, exprs = _list_query(
+        db,
+        now=now,
+        scope=scope,
+        status=status,
+        search=search,
+        domain=domain,
+        over_appetite=over_appetite,
+        owner_id=owner_id,
+    )
+
+    total = q.order_by(None).with_entities(func.count(RiskScenarioContext.id)).scalar() or 0
+    if not total:
+        return {"total": 0, "items": [], "nextCursor": None}
+
+    descending = (sort_dir or "desc").lower() == "desc"
+    keys = list(_SORT_KEYS.get(sort_by, ("updated",))) + ["id"]
+    key_exprs = [exprs[k] for k in keys]
+
+    if cursor:
+        after = decode_cursor(cursor, sort_by, sort_dir, keys)
+        row_key = tuple_(*key_exprs)
+        q = q.filter(row_key < tuple_(*after) if descending else row_key > tuple_(*after))
+    elif offset:
+        q = q.offset(offset)
+
+    rows = (
+        q.options(
+            contains_eager(RiskScenarioContext.risk_scenario),
+            contains_eager(RiskScenarioContext.score),
+            selectinload(RiskScenarioContext.impact_ratings),
+            selectinload(RiskScenarioContext.control_links),
+        )
+        .add_columns(*[e.label(f"_k_{k}") for k, e in zip(keys, key_exprs)])
+        .order_by(*[e.desc() if descending else e.asc() for e in key_exprs])
+        .limit(limit + 1)
+        .all()
+    )
+
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    next_cursor = None
+    if has_more and rows:
+        next_cursor = encode_cursor(sort_by, sort_dir, keys, list(rows[-1][1:]))
+
+    items = _assemble_list_items(db, [r[0] for r in rows], now=now, days=days)
+    return {"total": total, "items": items, "nextCursor": next_cursor}
+
+
+EXPORT_CHUNK_SIZE = 500
+
 
-    return {"total": len(items), "items": page}
+def iter_list_items(
+    db: Session,
+    *,
+    sort_by: str = "updated_at",
+    sort_dir: str = "desc",
+    scope: str = "all",
+    scope_id: Optional[int] = None,
+    status: str = "all",
+    search: str = "",
+    domain: str = "all",
+    over_appetite: Optional[bool] = None,
+    owner_id: Optional[int] = None,
+    days: int = 90,
+    chunk_size: int = EXPORT_CHUNK_SIZE,
+) -> Iterator[List[Dict[str, Any]]]:
+    """
+    The whole register as list rows (same filters, sort and fields as list_contexts),
+    one chunk at a time for exports. Contexts come from a server-side cursor
+    (yield_per -> stream_results) and are enriched per chunk by _assemble_list_items();
+    enriched contexts are expunged and the label memo is reset, so memory stays flat
+    however large the register is.
+    """
+    now = datetime.utcnow()
+    q, exprs = _list_query(
+        db,
+        now=now,
+        scope=scope,
+        scope_id=scope_id,
+        status=status,
+        search=search,
+        domain=domain,
+        over_appetite=over_appetite,
+        owner_id=owner_id,
+    )
+    descending = (sort_dir or "desc").lower() == "desc"
+    key_exprs = [exprs[k] for k in list(_SORT_KEYS.get(sort_by, ("updated",))) + ["id"]]
+    q = (
+        q.options(
+            contains_eager(RiskScenarioContext.risk_scenario),
+            contains_eager(RiskScenarioContext.score),
+            selectinload(RiskScenarioContext.impact_ratings),
+            selectinload(RiskScenarioContext.control_links),
+        )
+        .order_by(*[e.desc() if descending else e.asc() for e in key_exprs])
+        .yield_per(chunk_size)
+    )
+
+    def flush(chunk: List[RiskScenarioContext]) -> List[Dict[str, Any]]:
+        items = _assemble_list_items(db, chunk, now=now, days=days)
+        for c in chunk:
+            db.expunge(c)
+        clear_request_scope_labels(db)
+        return items
+
+    chunk: List[RiskScenarioContext] = []
+    for c in q:
+        chunk.append(c)
+        if len(chunk) >= chunk_size:
+            yield flush(chunk)
+            chunk = []
+    if chunk:
+        yield flush(chunk)
+
+
+def list_items_for_ids(db: Session, context_ids: List[int], *, days: int = 90) -> Dict[int, Dict[str, Any]]:
+    """{context_id: list row} for arbitrary contexts, enriched in one pass (dashboard queues)."""
+    if not context_ids:
+        return {}
+    contexts = (
+        db.query(RiskScenarioContext)
+        .join(RiskScenario)
+        .outerjoin(RiskScore, RiskScore.risk_scenario_context_id == RiskScenarioContext.id)
+        .filter(RiskScenarioContext.id.in_(context_ids))
+        .options(
+            contains_eager(RiskScenarioContext.risk_scenario),
+            contains_eager(RiskScenarioContext.score),
+            selectinload(RiskScenarioContext.impact_ratings),
+            selectinload(RiskScenarioContext.control_links),
+        )
+        .all()
+    )
+    items = _assemble_list_items(db, contexts, now=datetime.utcnow(), days=days)
+    return {it["contextId"]: it for it in items}
 
 
 def get_context_by_details(db: Session, context_id: int, days: int = 90):
@@ -802,14 +858,7 @@ def get_context_by_details(db: Session, context_id: int, days: int = 90):
     # --- 2) Scores & trend (fast path via RiskScore/RiskScoreHistory) ---
     initial = int(getattr(score, "inherent_score", 0) or 0) or 25
     residual = int(getattr(score, "residual_score", 0) or 0) or 25
-    hist = (
-        db.query(RiskScoreHistory)
-        .filter(RiskScoreHistory.risk_scenario_context_id == ctx.id)
-        .order_by(RiskScoreHistory.created_at.desc())
-        .limit(days)
-        .all()
-    )
-    trend = [{"x": i, "y": int(h.residual_score or 0)} for i, h in enumerate(reversed(hist))] if hist else []
+    trend = residual_series(get_trends(db, [ctx.id], start=stale_before, end=now)[ctx.id])
 
     # --- 3) Impacts/likelihood/severity ---
     impacts = _pack_impacts(ctx)
@@ -822,7 +871,7 @@ def get_context_by_details(db: Session, context_id: int, days: int = 90):
     # --- 4) Scope & appetite & rag ---
     scope_type = getattr(ctx, "scope_type", None)
     scope_id = getattr(ctx, "scope_id", None)
-    scope_label = resolve_scope_label(db, scope_type, scope_id)
+    label = resolve_scope_label(db, scope_type, scope_id)
     appetite = resolve_appetite_for_scope(db, scope_type, scope_id)
     over_appetite = residual > int(appetite.get("amberMax") or 0)
     rag = compute_rag(
@@ -1030,8 +1079,8 @@ def get_context_by_details(db: Session, context_id: int, days: int = 90):
         scenarioDescription=scenario_desc,
 
         scope=scope_type or "org",
-        scopeRef=ScopeRef(type=scope_type, id=scope_id, label=scope_label),
-        scopeDisplay=f"{scope_type}:{scope_label}" if scope_type else scope_label,
+        scopeRef=ScopeRef(type=scope_type, id=scope_id, label=label),
+        scopeDisplay=f"{scope_type}:{label}" if scope_type else label,
 
         ownerId=getattr(ctx, "owner_id", None),
         owner=owner_name,
@@ -1,6 +1,6 @@
 from fastapi import HTTPException
 from sqlalchemy.orm import Session
-from sqlalchemy import and_, tuple_, func
+from sqlalchemy import and_, or_, tuple_, func, select
 from sqlalchemy.dialects.postgresql import insert as pg_insert
 from app.models.risks.risk_scenario_context import RiskScenarioContext
 from app.models.risks.risk_scenario import RiskScenario
@@ -11,6 +11,7 @@ from app.models.risks.risk_context_impact_rating import RiskContextImpactRating
 from typing import Optional, List, Tuple, Dict, Any
 from app.models.risks.risk_scenario_context import RiskScenarioContext as RSCModel
 from app.models.common.idempotency_key import IdempotencyKey
+from app.services.risk_context_summary import refresh_context_summaries
 from datetime import datetime
 
 
@@ -259,7 +260,9 @@ def prefill_contexts(
 ):
     # Lazy import to avoid circular deps
     from app.crud.risks.risk_context_list import resolve_scope_label
+    from app.services.scope_labels import resolve_scope_labels
     ex = find_existing_pairs(db, pairs)
+    resolve_scope_labels(db, {(st, sid) for (_scn, st, sid) in pairs})
     out = []
     for (scenario_id, st, sid) in pairs:
         label = resolve_scope_label(db, st, sid)
@@ -383,6 +386,9 @@ def batch_assign(db: Session, body: BatchAssignIn):
         for ctx_id in target_ctx_ids:
             _set_impacts(db, ctx_id, impact_items)
 
+    # bulk statements above bypass flush events -> refresh the read model explicitly
+    refresh_context_summaries(db, [*created_ids, *updated_ids, *(target_ctx_ids if impact_items else [])])
+
     db.commit()
 
     # --- Skipped list (only for skip mode)
@@ -420,6 +426,143 @@ def batch_assign(db: Session, body: BatchAssignIn):
     return resp
 
 
+BULK_CHUNK_SIZE = 1000
+IMPACT_DOMAIN_IDS = {"C": 1, "I": 2, "A": 3, "L": 4, "R": 5}  # same mapping as _set_impacts
+
+
+def bulk_create_contexts(
+    db: Session,
+    items: List[Dict[str, Any]],
+    *,
+    on_conflict: str = "skip",
+    idempotency_key: Optional[str] = None,
+) -> Dict[str, Any]:
+    """
+    Set-based counterpart of calling batch_assign() once per item.
+
+    items: {risk_scenario_id, scope_type (normalized), scope_id, likelihood, impacts
+    ({C,I,A,L,R: score} or None), owner_id, next_review}. Existing
+    (scenario, scope_type, scope_id) pairs are resolved with one tuple-IN query; contexts
+    are written with multi-row INSERT ... ON CONFLICT ... RETURNING per chunk:
+      - skip:   DO NOTHING; existing pairs are reported in "skipped"
+      - update: DO UPDATE likelihood / owner_id / next_review where the item sets them
+    Impact ratings (all five domains, missing -> 0, as _set_impacts) are replaced for
+    created contexts and, with update, for existing ones; one DELETE + one multi-row
+    INSERT per chunk. A pair repeated in the request and items of unknown scenarios are
+    skipped. Everything is committed once; the caller schedules scoring for
+    createdIds + updated.
+    """
+    if on_conflict not in ("skip", "update"):
+        raise ValueError(f"unknown on_conflict {on_conflict!r}")
+    if idempotency_key:
+        row = db.query(IdempotencyKey).get(idempotency_key)
+        if row and row.response_json:
+            import json
+            return json.loads(row.response_json)
+
+    now = datetime.utcnow()
+    table = RiskScenarioContext.__table__
+    keys = [table.c.risk_scenario_id, table.c.scope_type, table.c.scope_id]
+    created_ids: List[int] = []
+    updated_ids: List[int] = []
+    skipped: List[dict] = []
+
+    def skip(it: Dict[str, Any], reason: Optional[str] = None) -> None:
+        entry = {"scenarioId": it["risk_scenario_id"], "scopeRef": {"type": it["scope_type"], "id": it["scope_id"]}}
+        if reason:
+            entry["reason"] = reason
+        skipped.append(entry)
+
+    known_scenarios = set(db.execute(
+        select(RiskScenario.id).where(RiskScenario.id.in_({it["risk_scenario_id"] for it in items}))
+    ).scalars()) if items else set()
+    unique: Dict[Tuple[int, str, int], Dict[str, Any]] = {}
+    for it in items:
+        key = (it["risk_scenario_id"], it["scope_type"], it["scope_id"])
+        if it["risk_scenario_id"] not in known_scenarios:
+            skip(it, "scenario not found")
+        elif key in unique:
+            skip(it, "duplicate in request")
+        else:
+            unique[key] = it
+
+    batch = list(unique.items())
+    for i in range(0, len(batch), BULK_CHUNK_SIZE):
+        chunk = dict(batch[i:i + BULK_CHUNK_SIZE])
+        existing = find_existing_pairs(db, list(chunk))
+
+        rows = [
+            {
+                "risk_scenario_id": sid, "scope_type": st, "scope_id": scope_id,
+                "likelihood": int(it["likelihood"]) if it.get("likelihood") is not None else None,
+                "status": "Open",
+                "owner_id": it.get("owner_id"),
+                "next_review": it.get("next_review"),
+                "created_at": now, "updated_at": now, "enabled": True,
+            }
+            for (sid, st, scope_id), it in chunk.items()
+            if on_conflict == "update" or (sid, st, scope_id) not in existing
+        ]
+        written: Dict[Tuple[int, str, int], int] = {}
+        if rows:
+            stmt = pg_insert(table).values(rows)
+            if on_conflict == "update":
+                ex = stmt.excluded
+                stmt = stmt.on_conflict_do_update(
+                    index_elements=keys,
+                    set_={
+                        "likelihood": func.coalesce(ex.likelihood, table.c.likelihood),
+                        "owner_id": func.coalesce(ex.owner_id, table.c.owner_id),
+                        "next_review": func.coalesce(ex.next_review, table.c.next_review),
+                        "updated_at": ex.updated_at,
+                    },
+                    where=or_(ex.likelihood.isnot(None), ex.owner_id.isnot(None), ex.next_review.isnot(None)),
+                )
+            else:
+                stmt = stmt.on_conflict_do_nothing(index_elements=keys)
+            stmt = stmt.returning(table.c.id, *keys)
+            written = {(sid, st, scope_id): ctx_id for ctx_id, sid, st, scope_id in db.execute(stmt)}
+
+        impact_ctx: Dict[int, Dict[str, Any]] = {}
+        for key, it in chunk.items():
+            if key in written and key not in existing:
+                created_ids.append(written[key])
+            elif on_conflict == "update" and key in existing and (key in written or it.get("impacts")):
+                updated_ids.append(existing[key])
+            else:
+                skip(it)
+                continue
+            if it.get("impacts"):
+                impact_ctx[written.get(key) or existing[key]] = it["impacts"]
+
+        if impact_ctx:
+            ratings = RiskContextImpactRating.__table__
+            db.execute(ratings.delete().where(ratings.c.risk_scenario_context_id.in_(list(impact_ctx))))
+            db.execute(ratings.insert().values([
+                {"risk_scenario_context_id": ctx_id, "domain_id": dom_id,
+                 "score": int(impacts.get(dom) or 0), "created_at": now, "updated_at": now, "enabled": True}
+                for ctx_id, impacts in impact_ctx.items()
+                for dom, dom_id in IMPACT_DOMAIN_IDS.items()
+            ]))
+
+    # Core statements bypass the flush listeners -> refresh the read model explicitly
+    refresh_context_summaries(db, [*created_ids, *updated_ids], now=now)
+    resp = {"createdIds": created_ids, "skipped": skipped, "updated": updated_ids}
+
+    if idempotency_key:
+        import json
+        payload_hash = _hash_payload(json.dumps(items, default=str, sort_keys=True))
+        row = db.query(IdempotencyKey).get(idempotency_key)
+        if row:
+            row.request_hash = payload_hash
+            row.response_json = json.dumps(resp, default=str)
+        else:
+            db.add(IdempotencyKey(key=idempotency_key, request_hash=payload_hash,
+                                  response_json=json.dumps(resp, default=str)))
+    db.commit()
+    return resp
+
+
 class RiskScenarioContextCRUD:
     @staticmethod
     def get(db: Session, context_id: int) -> RSCModel:
@@ -8,6 +8,8 @@ from app.models.risks.risk_scenario_context import RiskScenarioContext
 from app.schemas.risks.risk_score import RiskScoreRead, RiskScoreHistoryRead
 
 from app.services import calculate_risk_scores_by_context  # assuming you have logic separated
+from app.services.risk_score_batch import recalculate_scores
+from app.services.risk_score_history import same_score
 
 
 def get_latest_score_by_context(db: Session, context_id: int) -> RiskScoreRead:
@@ -43,6 +45,7 @@ def calculate_and_store_scores(db: Session, context_id: int) -> RiskScore:
 
     # Update latest score (upsert)
     existing = db.query(RiskScore).filter(RiskScore.risk_scenario_context_id == context_id).first()
+    changed = not same_score(existing, result)
     if not existing:
         existing = RiskScore(risk_scenario_context_id=context_id)
         db.add(existing)
@@ -53,16 +56,17 @@ def calculate_and_store_scores(db: Session, context_id: int) -> RiskScore:
     existing.residual_by_domain = result["residual_by_domain"]
     existing.last_updated = datetime.utcnow()
 
-    # Insert into history
-    history = RiskScoreHistory(
-        risk_scenario_context_id=context_id,
-        initial_score=result["initial_score"],
-        residual_score=result["residual_score"],
-        initial_by_domain=result["initial_by_domain"],
-        residual_by_domain=result["residual_by_domain"],
-        created_at=datetime.utcnow()
-    )
-    db.add(history)
+    # Insert into history (only when the score moved; unchanged recomputes add nothing)
+    if changed:
+        history = RiskScoreHistory(
+            risk_scenario_context_id=context_id,
+            initial_score=result["initial_score"],
+            residual_score=result["residual_score"],
+            initial_by_domain=result["initial_by_domain"],
+            residual_by_domain=result["residual_by_domain"],
+            created_at=datetime.utcnow()
+        )
+        db.add(history)
 
     db.commit()
     db.refresh(existing)
@@ -132,22 +136,14 @@ def get_score_history_by_scenario(db: Session, scenario_id: int) -> List[RiskSco
 
 
 def calculate_scores_by_scenario(db: Session, scenario_id: int) -> List[RiskScore]:
-    context_ids = db.query(RiskScenarioContext.id).filter(
-        RiskScenarioContext.risk_scenario_id == scenario_id
-    ).all()
-
-    updated_scores = []
-    for c in context_ids:
-        score = calculate_and_store_scores(db, c.id)
-        updated_scores.append(score)
-    return updated_scores
+    recalculate_scores(db, scenario_id=scenario_id)
+    return db.query(RiskScore)\
+             .join(RiskScenarioContext, RiskScenarioContext.id == RiskScore.risk_scenario_context_id)\
+             .filter(RiskScenarioContext.risk_scenario_id == scenario_id)\
+             .order_by(RiskScore.risk_scenario_context_id)\
+             .all()
 
 
 def calculate_all_scores(db: Session) -> List[RiskScore]:
-    all_contexts = db.query(RiskScenarioContext.id).all()
-    updated_scores = []
-
-    for c in all_contexts:
-        score = calculate_and_store_scores(db, c.id)
-        updated_scores.append(score)
-    return updated_scores
+    recalculate_scores(db)
+    return db.query(RiskScore).order_by(RiskScore.risk_scenario_context_id).all()
@@ -7,11 +7,16 @@ from app.api.dashboards import router as dashboard_router
 from app.api.policies import router as policy_router
 from app.api.compliance import router as compliance_router
 from app.api.org import router as org_router
-from app.api import ai_router, auth_router
+from app.api import ai_router, auth_router, search_router
 from app.api.scopes import router as scope_router
 from app.api.evidence import router as ev_router
 from app.api.iam import router as iam_router
 from app.services.iam.deps import require_default_access
+from app.config import COVERAGE_SNAPSHOT_REFRESH_SECONDS, LIFECYCLE_SWEEP_SECONDS, RISK_CONTEXT_SUMMARY_REFRESH_SECONDS
+from app.services.compliance.coverage_snapshot import refresh_all_dirty
+from app.services.compliance.lifecycle_sweeper import run_lifecycle_sweep
+from app.services import risk_context_summary
+from app.services.scheduler import Scheduler
 
 from app.api.assets import asset_lifecycle_event, asset_type, asset_relation, asset_group, asset_maintenance, \
     asset_security_profile, asset_tag, asset_scan, asset_owner, asset
@@ -42,6 +47,7 @@ app.include_router(auth_router)
 app.include_router(iam_router)
 app.include_router(scope_router)
 app.include_router(ai_router)
+app.include_router(search_router)
 app.include_router(ev_router)
 app.include_router(org_router)
 app.include_router(compliance_router)
@@ -52,6 +58,27 @@ app.include_router(risk_router, prefix="/risks")
 app.include_router(control_router,prefix="/controls")
 app.include_router(asset_router, prefix="")
 
+scheduler = Scheduler()
+
+
+@app.on_event("startup")
+async def _start_scheduler():
+    if COVERAGE_SNAPSHOT_REFRESH_SECONDS > 0:
+        scheduler.add_job("coverage_snapshot_refresh", COVERAGE_SNAPSHOT_REFRESH_SECONDS, refresh_all_dirty)
+    if RISK_CONTEXT_SUMMARY_REFRESH_SECONDS > 0:
+        scheduler.add_job("risk_context_summary_refresh", RISK_CONTEXT_SUMMARY_REFRESH_SECONDS,
+                          risk_context_summary.refresh_all_dirty)
+    if LIFECYCLE_SWEEP_SECONDS > 0:
+        scheduler.add_job("lifecycle_sweep", LIFECYCLE_SWEEP_SECONDS, run_lifecycle_sweep,
+                          leader_only=True, initial_delay=30)
+    scheduler.start()
+
+
+@app.on_event("shutdown")
+async def _stop_scheduler():
+    await scheduler.stop()
+
+
 @app.get("/")
 def read_root():
     return {"message": "Secura backend is running"}
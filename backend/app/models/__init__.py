@@ -1,13 +1,11 @@
 from app.models.assets import *  # import all asset models
 from app.models.risks import *
 from app.models.controls import *
-from app.models.vendors import *
 from app.models.policies import *
 from app.models.users import *
 from app.models.risks.threat import *
 from app.models.risks.vulnerability import *
 from app.models.compliance import *
-from app.models.business import *
 from app.models.org import *
 from app.models.evidence import  *
 from app.models.common import *
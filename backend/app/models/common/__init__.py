@@ -1 +1,2 @@
-from .idempotency_key import *
\ No newline at end of file
+from .idempotency_key import *
+from .import_job import *
\ No newline at end of file
@@ -0,0 +1,23 @@
+# app/models/common/import_job.py
+from app.core.base import Base
+from sqlalchemy import Column, String, DateTime, Text, Integer, Index
+from sqlalchemy.dialects.postgresql import JSONB
+from datetime import datetime
+
+class ImportJob(Base):
+    """A background import run; polled by clients for progress and its final report."""
+    __tablename__ = "import_jobs"
+    id = Column(String(36), primary_key=True)                   # uuid4 hex
+    kind = Column(String(50), nullable=False)                   # e.g. "crosswalks_csv"
+    status = Column(String(20), nullable=False, default="queued")  # queued|running|succeeded|failed
+    params = Column(JSONB, nullable=True)
+    processed = Column(Integer, nullable=False, default=0)      # input rows handled so far
+    report = Column(JSONB, nullable=True)
+    error = Column(Text, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    started_at = Column(DateTime, nullable=True)
+    finished_at = Column(DateTime, nullable=True)
+
+    __table_args__ = (
+        Index("ix_import_jobs_kind_created", "kind", "created_at"),
+    )
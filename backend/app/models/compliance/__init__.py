@@ -9,3 +9,5 @@ from .exception import ComplianceException, ComplianceExceptionComment
 from .obligation_atom import ObligationAtom
 from .control_evidence_view import ControlEvidenceView
 from .requirement_owner import RequirementOwner
+from .coverage_snapshot import CoverageSnapshot
+from .requirement_hierarchy import RequirementHierarchy, RequirementHierarchyBuild
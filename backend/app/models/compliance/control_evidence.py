@@ -1,6 +1,6 @@
 # app/models/compliance/control_evidence.py
 
-from sqlalchemy import Column, Integer, String, Text, Date, DateTime, ForeignKey, Index
+from sqlalchemy import Column, Integer, String, Text, Date, DateTime, ForeignKey, Index, text
 from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.orm import relationship
 from datetime import datetime
@@ -42,3 +42,9 @@ class ControlEvidence(Base):
     link = relationship("ControlContextLink", backref="evidence")
 
     # __table_args__ = (Index("ix_control_evidence_link_valid_until", "control_context_link_id", "valid_until"))
+    # staleness queue (services/compliance/evidence_staleness.py): explicit expiry / policy-derived expiry
+    __table_args__ = (
+        Index("ix_ce_valid_until", "valid_until", postgresql_where=text("valid_until IS NOT NULL")),
+        Index("ix_ce_link_collected_no_until", "control_context_link_id", "collected_at",
+              postgresql_where=text("valid_until IS NULL")),
+    )
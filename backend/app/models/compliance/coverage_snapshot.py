@@ -0,0 +1,35 @@
+# Persisted coverage read model per (framework version, scope) (see services/compliance/coverage_snapshot.py)
+from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, Index, text
+from datetime import datetime
+from app.core.base import Base
+
+
+class CoverageSnapshot(Base):
+    __tablename__ = "coverage_snapshot"
+
+    version_id = Column(Integer, ForeignKey("framework_versions.id", ondelete="CASCADE"), primary_key=True)
+    scope_type = Column(String(30), primary_key=True)
+    scope_id = Column(Integer, primary_key=True)     # 0 = rollup over every scope of scope_type
+
+    # presence-based status counts (compute_status_counts / coverage_rollup_by_scope_type)
+    total_requirements = Column(Integer, nullable=False, default=0)
+    applicable_requirements = Column(Integer, nullable=False, default=0)
+    met = Column(Integer, nullable=False, default=0)
+    met_by_exception = Column(Integer, nullable=False, default=0)
+    partial = Column(Integer, nullable=False, default=0)
+    gap = Column(Integer, nullable=False, default=0)
+    unknown = Column(Integer, nullable=False, default=0)
+
+    coverage_pct = Column(Float, nullable=False, default=0)
+    coverage_pct_excl_exceptions = Column(Float, nullable=False, default=0)
+    avg_score = Column(Float, nullable=False, default=0)   # effective coverage score (0..1)
+
+    # dirty while generation > computed_generation; writers bump generation in their transaction
+    generation = Column(Integer, nullable=False, default=1, server_default=text("1"))
+    computed_generation = Column(Integer, nullable=False, default=0, server_default=text("0"))
+    computed_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+    __table_args__ = (
+        Index("ix_cov_snap_scope", "scope_type", "scope_id"),
+        Index("ix_cov_snap_dirty", "computed_at", postgresql_where=text("generation > computed_generation")),
+    )
@@ -48,6 +48,7 @@ class ComplianceException(Base):
         Index("ix_exc_status", "status"),
         Index("ix_exc_target_ctrl", "control_id"),
         Index("ix_exc_target_req", "framework_requirement_id"),
+        Index("ix_exc_end_date", "end_date"),
         # NEW: must target at least one of requirement/control
         CheckConstraint(
             "(framework_requirement_id IS NOT NULL) OR (control_id IS NOT NULL)",
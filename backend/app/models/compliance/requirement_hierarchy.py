@@ -0,0 +1,38 @@
+# Per-version requirement hierarchy index (see services/compliance/requirement_hierarchy.py)
+from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, Index
+from datetime import datetime
+from app.core.base import Base
+
+
+class RequirementHierarchy(Base):
+    """
+    One row per requirement: pre-order interval of its subtree plus materialized path.
+    Descendants of X are the rows of X's version with X.pre_order < pre_order <= X.pre_order_end.
+    """
+    __tablename__ = "requirement_hierarchy"
+
+    requirement_id = Column(Integer, ForeignKey("framework_requirements.id", ondelete="CASCADE"), primary_key=True)
+    version_id = Column(Integer, ForeignKey("framework_versions.id", ondelete="CASCADE"), nullable=False)
+
+    pre_order = Column(Integer, nullable=False)
+    pre_order_end = Column(Integer, nullable=False)   # pre_order of the last node of the subtree
+    post_order = Column(Integer, nullable=False)
+    depth = Column(Integer, nullable=False, default=0)
+
+    top_level_id = Column(Integer, nullable=False)
+    path = Column(Text, nullable=False)               # ancestor ids root first, e.g. "12.57.103"
+    breadcrumb = Column(Text, nullable=True)          # ancestor codes, e.g. "A.5 > A.5.1 > A.5.1.1"
+
+    __table_args__ = (
+        Index("ix_req_hier_v_pre", "version_id", "pre_order", unique=True),
+    )
+
+
+class RequirementHierarchyBuild(Base):
+    """Last index build of a framework version; etag identifies the serialized requirements tree."""
+    __tablename__ = "requirement_hierarchy_build"
+
+    version_id = Column(Integer, ForeignKey("framework_versions.id", ondelete="CASCADE"), primary_key=True)
+    etag = Column(String(64), nullable=False)
+    node_count = Column(Integer, nullable=False, default=0)
+    built_at = Column(DateTime, default=datetime.utcnow, nullable=False)
@@ -9,7 +9,7 @@ class EvidenceLifecycleEvent(Base):
 
     id = Column(Integer, primary_key=True)
     evidence_id = Column(Integer, ForeignKey('control_evidence.id', ondelete='CASCADE'), nullable=False)
-    event = Column(String(50), nullable=False)  # created|updated|artifact_uploaded|superseded|retired|restored
+    event = Column(String(50), nullable=False)  # created|updated|artifact_uploaded|superseded|retired|restored|expired
     actor_id = Column(Integer, nullable=True)
     notes = Column(Text, nullable=True)
     meta = Column(JSONB, nullable=True)
@@ -0,0 +1,61 @@
+# Denormalized read model: one row per RiskScenarioContext (see services/risk_context_summary.py)
+from sqlalchemy import Column, Integer, String, Float, Boolean, DateTime, ForeignKey, Index, false, text
+from datetime import datetime
+from app.core.base import Base
+
+
+class RiskContextSummary(Base):
+    __tablename__ = "risk_context_summary"
+
+    context_id = Column(Integer, ForeignKey("risk_scenario_contexts.id", ondelete="CASCADE"), primary_key=True)
+    risk_scenario_id = Column(Integer, nullable=False)
+    scope_type = Column(String(30), nullable=False)
+    scope_id = Column(Integer, nullable=False)
+    status = Column(String(50), nullable=True)
+    owner_id = Column(Integer, nullable=True)
+    likelihood = Column(Integer, nullable=False, default=0)
+
+    # impacts per domain (C,I,A,L,R) and derived severity
+    impact_c = Column(Integer, nullable=False, default=0)
+    impact_i = Column(Integer, nullable=False, default=0)
+    impact_a = Column(Integer, nullable=False, default=0)
+    impact_l = Column(Integer, nullable=False, default=0)
+    impact_r = Column(Integer, nullable=False, default=0)
+    impact_overall = Column(Integer, nullable=False, default=0)
+    severity = Column(Integer, nullable=False, default=0)
+    severity_band = Column(String(16), nullable=False, default="Low")
+
+    # scores (RiskScore, or likelihood × impact when not scored yet)
+    initial_score = Column(Float, nullable=False, default=0)
+    residual_score = Column(Float, nullable=False, default=0)
+
+    # appetite at the context's scope
+    green_max = Column(Integer, nullable=True)
+    amber_max = Column(Integer, nullable=True)
+    over_appetite = Column(Boolean, nullable=False, default=False)
+    rag = Column(String(8), nullable=True)   # Green|Amber|Red
+
+    # controls: recommended (scenario effect ratings > 0) vs implemented on this context
+    controls_recommended = Column(Integer, nullable=False, default=0)
+    controls_implemented = Column(Integer, nullable=False, default=0)
+
+    # evidence freshness over implemented/verified links
+    evidence_implemented = Column(Integer, nullable=False, default=0)
+    evidence_overdue = Column(Integer, nullable=False, default=0)
+    last_evidence_at = Column(DateTime, nullable=True)
+
+    next_review = Column(DateTime, nullable=True)
+    updated_at = Column(DateTime, nullable=True)       # max(context, score, evidence)
+    refreshed_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    # set by appetite-policy / scenario-wide writes, cleared when refresh_dirty() picks the row up
+    dirty = Column(Boolean, nullable=False, default=False, server_default=false())
+
+    __table_args__ = (
+        Index("ix_rcs_scope_pair", "scope_type", "scope_id"),
+        Index("ix_rcs_residual", "residual_score", "updated_at", "context_id"),
+        Index("ix_rcs_severity", "severity", "residual_score", "updated_at", "context_id"),
+        Index("ix_rcs_updated", "updated_at", "context_id"),
+        Index("ix_rcs_next_review", "next_review", "context_id"),
+        Index("ix_rcs_over_appetite", "over_appetite", "residual_score"),
+        Index("ix_rcs_dirty", "context_id", postgresql_where=text("dirty")),
+    )
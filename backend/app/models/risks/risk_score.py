@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, Float, DateTime, ForeignKey, JSON, func
+from sqlalchemy import Column, Integer, Float, String, DateTime, ForeignKey, JSON, Index, UniqueConstraint, func
 from sqlalchemy.orm import relationship
 from app.core.base import BaseMain  # Adjust if you're using a different base class
 
@@ -26,3 +26,32 @@ class RiskScoreHistory(BaseMain):
     created_at = Column(DateTime, default=func.now())
 
     context = relationship("RiskScenarioContext", back_populates="score_history", lazy="joined")
+
+    __table_args__ = (
+        Index("ix_rsh_ctx_created", "risk_scenario_context_id", "created_at"),
+    )
+
+
+class RiskScoreHistoryBucket(BaseMain):
+    """Compacted history: RiskScoreHistory points folded per day/week (see services/risk_score_history.py)."""
+    __tablename__ = "risk_score_history_buckets"
+
+    risk_scenario_context_id = Column(Integer, ForeignKey("risk_scenario_contexts.id", ondelete="CASCADE"), nullable=False)
+    granularity = Column(String(8), nullable=False)        # day|week
+    bucket_start = Column(DateTime, nullable=False)
+    points = Column(Integer, nullable=False, default=0)
+    first_at = Column(DateTime, nullable=False)
+    last_at = Column(DateTime, nullable=False)
+
+    residual_min = Column(Float)
+    residual_max = Column(Float)
+    residual_last = Column(Float)
+    initial_last = Column(Float)
+    residual_min_by_domain = Column(JSON)
+    residual_max_by_domain = Column(JSON)
+    residual_last_by_domain = Column(JSON)
+    initial_last_by_domain = Column(JSON)
+
+    __table_args__ = (
+        UniqueConstraint("risk_scenario_context_id", "granularity", "bucket_start", name="uq_rsh_bucket"),
+    )
@@ -49,6 +49,32 @@ class CoverageRollupResponse(BaseModel):
     computed_at: Optional[datetime] = None
     items: List[CoverageRollupItem]
 
+
+class CoverageGridScope(BaseModel):
+    scope_type: str
+    scope_id: int
+
+class CoverageGridRequest(BaseModel):
+    version_ids: List[int]
+    scopes: List[CoverageGridScope]
+
+class CoverageGridCell(BaseModel):
+    version_id: int
+    scope_type: str
+    scope_id: int
+    total: int
+    applicable: int
+    met: int
+    met_by_exception: int
+    partial: int
+    gap: int
+    unknown: int
+    coverage_pct: float  # met / applicable, 0..100
+
+class CoverageGridResponse(BaseModel):
+    computed_at: datetime
+    cells: List[CoverageGridCell]
+
 #
 # class RequirementCoverageItem(BaseModel):
 #     requirement_id: int
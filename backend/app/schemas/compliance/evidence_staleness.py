@@ -28,4 +28,5 @@ class EvidenceStalenessResponse(BaseModel):
     within_days: int
     expired_count: int
     expiring_soon_count: int
+    total: int = 0                        # rows of the whole queue (all pages)
     items: List[EvidenceStalenessItem]
@@ -1,5 +1,6 @@
-from pydantic import BaseModel, Field
-from typing import Optional, List
+from datetime import datetime
+from pydantic import BaseModel, ConfigDict, Field
+from typing import Any, Dict, Optional, List
 
 class RequirementCsvRow(BaseModel):
     code: str = Field(..., min_length=1)
@@ -7,6 +8,17 @@ class RequirementCsvRow(BaseModel):
     text: Optional[str] = None
     parent_code: Optional[str] = None
 
+class RequirementChange(BaseModel):
+    ext_id: str
+    code: Optional[str] = None
+    fields: List[str] = []  # changed columns (title|text|sort_index|parent_id)
+
+class RequirementImportDiff(BaseModel):
+    created: List[RequirementChange] = []
+    updated: List[RequirementChange] = []
+    unchanged: int = 0
+    not_in_file: List[str] = []  # codes of existing requirements the file does not mention
+
 class ImportResult(BaseModel):
     framework_version_id: int
     total_rows: int
@@ -16,3 +28,21 @@ class ImportResult(BaseModel):
     dry_run: bool
     skipped: int = 0
     errors: List[str] = []
+    unchanged: int = 0
+    atoms_total: int = 0
+    atoms_created: int = 0
+    atoms_updated: int = 0
+    diff: Optional[RequirementImportDiff] = None
+
+class ImportJobOut(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    id: str
+    kind: str
+    status: str  # queued|running|succeeded|failed
+    processed: int = 0
+    report: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
@@ -1,7 +1,7 @@
 # schemas/control_effect_rating.py
 
 from pydantic import BaseModel
-from typing import Optional
+from typing import List, Optional
 
 class ControlEffectRatingBase(BaseModel):
     risk_scenario_id: int
@@ -20,3 +20,17 @@ class ControlEffectRatingOut(ControlEffectRatingBase):
 
     class Config:
         from_attributes = True
+
+class ControlEffectRatingImportResult(BaseModel):
+    total_rows: int
+    created: int
+    updated: int
+    deleted: int      # cells set to score 0 that had a rating
+    unchanged: int
+    skipped: int
+    error_count: int = 0
+    errors: List[str] = []
+    errors_truncated: bool = False
+    dry_run: bool = False
+    scenarios_touched: int = 0
+    matrix_version: Optional[int] = None  # effect-matrix version after the import (None: nothing written)
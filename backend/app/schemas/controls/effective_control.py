@@ -19,7 +19,7 @@
 # =============================================================
 # 1) app/schemas/controls/effective_control.py
 # =============================================================
-from typing import Optional, Literal
+from typing import Optional, Literal, List
 from pydantic import BaseModel, Field
 
 EffectiveSource = Literal["direct", "provider", "baseline"]
@@ -43,3 +43,14 @@ class EffectiveControlOut(BaseModel):
 
     class Config:
         from_attributes = True
+
+
+class EffectiveScopeRef(BaseModel):
+    scope_type: str
+    scope_id: int
+
+
+class EffectiveControlsForScope(BaseModel):
+    scope_type: str
+    scope_id: int
+    controls: List[EffectiveControlOut]
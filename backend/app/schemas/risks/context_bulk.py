@@ -1,4 +1,4 @@
-from typing import List, Dict, Optional
+from typing import List, Dict, Literal, Optional
 from datetime import datetime
 from pydantic import BaseModel
 from app.schemas.risks.risk_scenario_context import ScopeRef
@@ -11,16 +11,16 @@ class BulkCreateItem(BaseModel):
     impacts: Optional[Dict[str, int]] = None  # keys: C,I,A,L,R
     ownerId: Optional[int] = None
     nextReview: Optional[datetime] = None
-    # future: onConflict: Literal["skip","update"] = "skip"
 
 
 class BulkCreateRequest(BaseModel):
     items: List[BulkCreateItem]
-    idempotencyKey: Optional[str] = None  # reserved; wrapper is idempotent by skip semantics
+    onConflict: Literal["skip", "update"] = "skip"  # update: likelihood/owner/review/impacts of existing contexts
+    idempotencyKey: Optional[str] = None  # replays the stored response for a repeated key
 
 
 class BulkCreateResponse(BaseModel):
     createdIds: List[int] = []
-    skipped: List[dict] = []  # {scenarioId, scopeRef}
+    skipped: List[dict] = []  # {scenarioId, scopeRef, reason?}
     updated: List[int] = []
 
@@ -88,3 +88,4 @@ class RiskContextListItem(BaseModel):
 class RiskContextListResponse(BaseModel):
     total: int
     items: List[RiskContextListItem]
+    nextCursor: Optional[str] = None              # NEW: opaque keyset cursor, None on last page
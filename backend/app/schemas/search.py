@@ -0,0 +1,20 @@
+# app/schemas/search.py
+from pydantic import BaseModel
+from typing import List, Optional
+
+
+class SearchHit(BaseModel):
+    kind: str                          # requirement | obligation | control | risk_scenario
+    id: int
+    code: Optional[str] = None         # requirement code, atom key or control reference code
+    title: Optional[str] = None
+    score: float
+    highlight: Optional[str] = None    # matched terms wrapped in <mark>...</mark>
+    version_id: Optional[int] = None   # framework version (requirements / obligations)
+    requirement_id: Optional[int] = None
+
+
+class SearchResponse(BaseModel):
+    q: str
+    items: List[SearchHit]
+    next_cursor: Optional[str] = None  # pass back as ?cursor= for the next page
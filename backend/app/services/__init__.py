@@ -1,2 +1,3 @@
 from .risk_analysis import calculate_risk_scores_by_context, calculate_risk_scores_by_scenario
-from .ai_matcher import suggest_threats_for_asset_type
\ No newline at end of file
+from .ai_matcher import suggest_threats_for_asset_type
+from . import risk_context_summary  # registers the read-model flush listeners
@@ -1,6 +1,7 @@
+from sqlalchemy import func
 from sqlalchemy.orm import Session
-from datetime import date, timedelta
-from typing import Dict, List, Literal, Optional
+from datetime import date
+from typing import Dict, Iterable, List, Literal, Optional, Set, Tuple
 
 from app.models.compliance.framework_requirement import FrameworkRequirement
 from app.models.compliance.control_framework_mapping import ControlFrameworkMapping  # your crosswalk model
@@ -11,27 +12,31 @@ from app.models.compliance.exception import ComplianceException
 
 AssuranceOrder = ["proposed","mapped","planning","implementing","implemented","monitoring","analyzing","evidenced","fresh","expired","exception"]
 
-def _has_active_exception_for_req(db, requirement_id: int, context_id: int) -> bool:
-    today = date.today()
-    return db.query(ComplianceException).filter(
-        ComplianceException.risk_scenario_context_id == context_id,
-        ComplianceException.framework_requirement_id == requirement_id,
-        ComplianceException.status.in_(["approved", "active"]),
-        ComplianceException.start_date <= today,
-        ComplianceException.end_date >= today,
-    ).first() is not None
+_FRESHNESS_STATUSES = ("implemented", "monitoring", "analyzing", "evidenced", "fresh", "expired")
+_EVIDENCE_STATUSES = ("valid", "expired")   # ControlEvidence.status values that decide freshness
+
 
-def _has_active_exception_for_any_control(db, control_ids: list[int], context_id: int) -> bool:
-    if not control_ids:
-        return False
+def _active_exceptions(db, context_ids: List[int]) -> Dict[int, Tuple[Set[int], Set[int]]]:
+    """{context_id: (requirement ids, control ids)} with an approved/active exception today, one query."""
     today = date.today()
-    return db.query(ComplianceException).filter(
-        ComplianceException.risk_scenario_context_id == context_id,
-        ComplianceException.control_id.in_(control_ids),
+    rows = db.query(
+        ComplianceException.risk_scenario_context_id,
+        ComplianceException.framework_requirement_id,
+        ComplianceException.control_id,
+    ).filter(
+        ComplianceException.risk_scenario_context_id.in_(context_ids),
         ComplianceException.status.in_(["approved", "active"]),
         ComplianceException.start_date <= today,
         ComplianceException.end_date >= today,
-    ).first() is not None
+    ).all()
+    out: Dict[int, Tuple[Set[int], Set[int]]] = {cid: (set(), set()) for cid in context_ids}
+    for ctx_id, req_id, ctrl_id in rows:
+        if req_id is not None:
+            out[ctx_id][0].add(req_id)
+        if ctrl_id is not None:
+            out[ctx_id][1].add(ctrl_id)
+    return out
+
 
 def _best_status(a: str, b: str) -> str:
     # pick the "stronger" status
@@ -39,40 +44,76 @@ def _best_status(a: str, b: str) -> str:
     ib = AssuranceOrder.index(b) if b in AssuranceOrder else 0
     return a if ia >= ib else b
 
-def _freshness_for_link(db: Session, link: ControlContextLink, requirement_ids: List[int]) -> Optional[str]:
+
+def _latest_evidence(db: Session, link_ids: List[int]) -> Dict[int, Tuple[str, Optional[int]]]:
     """
-    Returns 'fresh'|'expired'|None, based on evidence + policy (control-level overrides requirement-level).
+    {link_id: (stored status of the link's deciding evidence, control-level policy freshness_days)}
+    in one query. The deciding evidence is the newest "valid" one, else the newest "expired" one
+    (the lifecycle sweeper moves stale evidence to "expired"); links with neither are absent.
     """
-    # policy resolution: control policy first
-    pol = db.query(EvidencePolicy).filter(EvidencePolicy.control_id == link.control_id).first()
-    if not pol:
-        # try any requirement-level policy that applies to this link (first match)
-        pol = db.query(EvidencePolicy).filter(EvidencePolicy.framework_requirement_id.in_(requirement_ids)).first()
-    if not pol:
-        return None  # no policy -> don't override
-
-    # get newest valid evidence for this link
-    ev = (
-        db.query(ControlEvidence)
-        .filter(ControlEvidence.control_context_link_id == link.id, ControlEvidence.status == "valid")
-        .order_by(ControlEvidence.collected_at.desc(), ControlEvidence.id.desc())
-        .first()
+    if not link_ids:
+        return {}
+    ranked = (
+        db.query(
+            ControlEvidence.control_context_link_id.label("link_id"),
+            ControlEvidence.status.label("status"),
+            func.row_number().over(
+                partition_by=ControlEvidence.control_context_link_id,
+                order_by=(
+                    (ControlEvidence.status == "valid").desc(),
+                    ControlEvidence.collected_at.desc(),
+                    ControlEvidence.id.desc(),
+                ),
+            ).label("rn"),
+        )
+        .filter(ControlEvidence.control_context_link_id.in_(link_ids),
+                ControlEvidence.status.in_(_EVIDENCE_STATUSES))
+        .subquery()
     )
-    if not ev:
+    rows = (
+        db.query(ranked.c.link_id, ranked.c.status, EvidencePolicy.freshness_days)
+        .join(ControlContextLink, ControlContextLink.id == ranked.c.link_id)
+        .outerjoin(EvidencePolicy, EvidencePolicy.control_id == ControlContextLink.control_id)
+        .filter(ranked.c.rn == 1)
+        .all()
+    )
+    return {link_id: (status, days) for link_id, status, days in rows}
+
+
+def _freshness(evidence: Optional[Tuple[str, Optional[int]]], req_days: Optional[int]) -> Optional[str]:
+    """
+    Returns 'fresh'|'expired'|None from the stored evidence status: 'expired' whenever the
+    link's evidence has expired, 'fresh' for valid evidence under a policy (control-level
+    overrides requirement-level), None otherwise.
+    """
+    if not evidence:
         return None
+    status, days = evidence
+    if status == "expired":
+        return "expired"
+    if days is None and req_days is None:
+        return None  # no policy -> don't override
+    return "fresh"
 
-    horizon = ev.collected_at + timedelta(days=pol.freshness_days)
-    return "fresh" if date.today() <= horizon else "expired"
 
-def compute_assurance_rollup(
-    db: Session, framework_version_id: int, risk_scenario_context_id: int
-) -> Dict:
+def compute_assurance_rollups(
+    db: Session, framework_version_id: int, risk_scenario_context_ids: Iterable[int]
+) -> List[Dict]:
     """
-    For each requirement in the version, compute best status in given context, and summary counts.
+    compute_assurance_rollup for many contexts (portfolio reporting). Requirements, mappings,
+    links, deciding evidence status per link (with policy days) and active exceptions are loaded with
+    one query each for all contexts; the best-status fold runs in memory.
     """
-    reqs = db.query(FrameworkRequirement).filter(
-        FrameworkRequirement.framework_version_id == framework_version_id
-    ).all()
+    context_ids = list(dict.fromkeys(int(c) for c in risk_scenario_context_ids))
+    if not context_ids:
+        return []
+
+    reqs = (
+        db.query(FrameworkRequirement.id, FrameworkRequirement.code, FrameworkRequirement.title)
+        .filter(FrameworkRequirement.framework_version_id == framework_version_id)
+        .order_by(FrameworkRequirement.id)
+        .all()
+    )
 
     # map: requirement_id -> control_ids
     rows = (
@@ -85,76 +126,88 @@ def compute_assurance_rollup(
     for rid, cid in rows:
         req_to_controls.setdefault(rid, []).append(cid)
 
-    # get all links in this context for those controls
+    # requirement-level policies (fallback when the control has none)
+    req_days: Dict[int, int] = dict(
+        db.query(EvidencePolicy.framework_requirement_id, EvidencePolicy.freshness_days)
+        .join(FrameworkRequirement, FrameworkRequirement.id == EvidencePolicy.framework_requirement_id)
+        .filter(FrameworkRequirement.framework_version_id == framework_version_id)
+        .all()
+    )
+
+    # all links in these contexts for the mapped controls: (ctx, control) -> [(link_id, status)]
     control_ids = list({cid for cids in req_to_controls.values() for cid in cids})
-    links = []
+    ctl_to_links: Dict[Tuple[int, int], List[Tuple[int, Optional[str]]]] = {}
     if control_ids:
-        links = (
-            db.query(ControlContextLink)
+        for link_id, ctx_id, ctrl_id, status in (
+            db.query(ControlContextLink.id, ControlContextLink.risk_scenario_context_id,
+                     ControlContextLink.control_id, ControlContextLink.assurance_status)
             .filter(
-                ControlContextLink.risk_scenario_context_id == risk_scenario_context_id,
-                ControlContextLink.control_id.in_(control_ids)
-            ).all()
-        )
-    # index: control_id -> [links]
-    ctl_to_links: Dict[int, List[ControlContextLink]] = {}
-    for l in links:
-        ctl_to_links.setdefault(l.control_id, []).append(l)
-
-    # roll up per requirement
-    per_requirement = []
-    summary_counts: Dict[str, int] = {k: 0 for k in AssuranceOrder}
-
-    for r in reqs:
-        best = "mapped" if r.id in req_to_controls else "mapped"  # mapped if any mapping exists; else still mapped baseline
-        cids = req_to_controls.get(r.id, [])
-
-        for cid in cids:
-            # evaluate all links of this control in the given context
-            for lnk in ctl_to_links.get(cid, []):
-                st = lnk.assurance_status or "proposed"
-                # evaluate freshness override if status is evidenced/implemented or better
-                if st in ("implemented","monitoring","analyzing","evidenced","fresh","expired"):
-                    fres = _freshness_for_link(db, lnk, [r.id])
-                    if fres == "fresh":
-                        st = "fresh"
-                    elif fres == "expired" and st != "fresh":
-                        st = "expired"
-                best = _best_status(best, st)
-
-        # If we don't already have strong coverage, surface an active exception
-        # (we do NOT override 'fresh' or 'evidenced')
-        if best not in ("fresh", "evidenced"):
-            if _has_active_exception_for_req(db, r.id, risk_scenario_context_id) \
-                    or _has_active_exception_for_any_control(db, cids, risk_scenario_context_id):
-                best = "exception"
-
-        per_requirement.append({
-            "requirement_id": r.id,
-            "code": r.code,
-            "title": r.title,
-            "best_status": best,
+                ControlContextLink.risk_scenario_context_id.in_(context_ids),
+                ControlContextLink.control_id.in_(control_ids),
+            )
+            .order_by(ControlContextLink.id)
+            .all()
+        ):
+            ctl_to_links.setdefault((ctx_id, ctrl_id), []).append((link_id, status))
+
+    evidence = _latest_evidence(db, [
+        link_id for links in ctl_to_links.values() for link_id, status in links
+        if (status or "proposed") in _FRESHNESS_STATUSES
+    ])
+    exceptions = _active_exceptions(db, context_ids)
+
+    out: List[Dict] = []
+    for ctx_id in context_ids:
+        exc_reqs, exc_controls = exceptions[ctx_id]
+        # roll up per requirement
+        per_requirement = []
+        summary_counts: Dict[str, int] = {k: 0 for k in AssuranceOrder}
+
+        for r in reqs:
+            best = "mapped"  # mapped baseline, with or without mappings
+            cids = req_to_controls.get(r.id, [])
+
+            for cid in cids:
+                # evaluate all links of this control in the given context
+                for link_id, status in ctl_to_links.get((ctx_id, cid), ()):
+                    st = status or "proposed"
+                    # evaluate freshness override if status is evidenced/implemented or better
+                    if st in _FRESHNESS_STATUSES:
+                        fres = _freshness(evidence.get(link_id), req_days.get(r.id))
+                        if fres == "fresh":
+                            st = "fresh"
+                        elif fres == "expired" and st != "fresh":
+                            st = "expired"
+                    best = _best_status(best, st)
+
+            # If we don't already have strong coverage, surface an active exception
+            # (we do NOT override 'fresh' or 'evidenced')
+            if best not in ("fresh", "evidenced"):
+                if r.id in exc_reqs or any(cid in exc_controls for cid in cids):
+                    best = "exception"
+
+            per_requirement.append({
+                "requirement_id": r.id,
+                "code": r.code,
+                "title": r.title,
+                "best_status": best,
+            })
+            summary_counts[best] = summary_counts.get(best, 0) + 1
+
+        out.append({
+            "framework_version_id": framework_version_id,
+            "context_id": ctx_id,
+            "total_requirements": len(reqs),
+            "status_counts": summary_counts,
+            "details": per_requirement
         })
-        summary_counts[best] = summary_counts.get(best, 0) + 1
-
-    total = len(reqs)
-    return {
-        "framework_version_id": framework_version_id,
-        "context_id": risk_scenario_context_id,
-        "total_requirements": total,
-        "status_counts": summary_counts,
-        "details": per_requirement
-    }
-
-
-def _has_active_exception(db, requirement_id: int, context_id: int) -> bool:
-    today = date.today()
-    return db.query(ComplianceException).filter(
-        ComplianceException.risk_scenario_context_id == context_id,
-        ComplianceException.framework_requirement_id == requirement_id,
-        ComplianceException.status.in_(["approved","active"]),
-        ComplianceException.start_date <= today,
-        ComplianceException.end_date >= today,
-    ).first() is not None
+    return out
 
 
+def compute_assurance_rollup(
+    db: Session, framework_version_id: int, risk_scenario_context_id: int
+) -> Dict:
+    """
+    For each requirement in the version, compute best status in given context, and summary counts.
+    """
+    return compute_assurance_rollups(db, framework_version_id, [risk_scenario_context_id])[0]
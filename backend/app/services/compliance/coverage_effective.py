@@ -1,39 +1,21 @@
-from typing import Dict, List, Optional
+from typing import Dict, Iterable, List, Optional, Tuple
 from sqlalchemy.orm import Session
-import importlib
 from datetime import date
 
 from app.constants.compliance import STATUS_VALUE, INHERITANCE_MULTIPLIER
-from app.services.controls.effective_overlay import get_effective_controls
+from app.constants.scopes import normalize_scope
+from app.services.controls.effective_overlay import get_effective_controls, get_effective_controls_many
 
 # Framework models (these names match your structure)
 from app.models.compliance.framework_requirement import FrameworkRequirement
+from app.models.compliance.control_framework_mapping import ControlFrameworkMapping
 from app.models.compliance.exception import ComplianceException
 from app.models.risks.risk_scenario_context import RiskScenarioContext
 
 from app.schemas.compliance.implementation_coverage import (
     ControlHit, RequirementImplementationCoverage, FrameworkImplementationCoverage
 )
-
-
-
-# --- locate ControlFrameworkMapping dynamically (no guessing required later) ---
-def _load_mapping_model():
-    CANDIDATE_IMPORTS = [
-        "app.models.frameworks.control_framework_mapping",
-        "app.models.compliance.control_framework_mapping",
-        "app.models.controls.control_framework_mapping",
-        "app.models.crosswalks.control_framework_mapping",
-    ]
-    for modpath in CANDIDATE_IMPORTS:
-        try:
-            mod = importlib.import_module(modpath)
-            return getattr(mod, "ControlFrameworkMapping")
-        except Exception:
-            continue
-    raise ImportError("ControlFrameworkMapping model not found. Please tell me its module path.")
-
-ControlFrameworkMapping = _load_mapping_model()
+from app.services.compliance.coverage_matrix import get_coverage_matrix
 
 
 def _derive_status(score: float, has_mappings: bool) -> str:
@@ -77,6 +59,36 @@ def _find_active_exception_id_for_req_in_scope(
     return row[0] if row else None
 
 
+def _active_exception_ids_by_req(db, version_id: int, scope_type: str, scope_id: int) -> Dict[int, int]:
+    """
+    Bulk variant of _find_active_exception_id_for_req_in_scope for a whole framework version:
+    {requirement_id: most recent active/approved exception id} in one query.
+    """
+    today = date.today()
+    rows = (
+        db.query(ComplianceException.framework_requirement_id, ComplianceException.id)
+        .join(
+            RiskScenarioContext,
+            ComplianceException.risk_scenario_context_id == RiskScenarioContext.id,
+        )
+        .join(FrameworkRequirement, FrameworkRequirement.id == ComplianceException.framework_requirement_id)
+        .filter(
+            FrameworkRequirement.framework_version_id == version_id,
+            RiskScenarioContext.scope_type == scope_type,
+            RiskScenarioContext.scope_id == scope_id,
+            ComplianceException.start_date <= today,
+            ComplianceException.end_date >= today,
+            ComplianceException.status.in_(["approved", "active"]),
+        )
+        .order_by(ComplianceException.framework_requirement_id, ComplianceException.updated_at.desc())
+        .all()
+    )
+    out: Dict[int, int] = {}
+    for req_id, exc_id in rows:
+        out.setdefault(req_id, exc_id)
+    return out
+
+
 def _score_requirement(
     db,
     req,
@@ -88,15 +100,10 @@ def _score_requirement(
     Compute weighted score for a single requirement from effective controls,
     then derive status and exception flags.
     """
-    # Load mapping model dynamically if this module uses a loader; otherwise import directly.
-    try:
-        ControlFrameworkMapping = _load_mapping_model()
-    except NameError:
-        from app.models.compliance.control_framework_mapping import ControlFrameworkMapping  # fallback
-
     mappings = list(
         db.query(ControlFrameworkMapping)
         .filter(ControlFrameworkMapping.framework_requirement_id == req.id)
+        .order_by(ControlFrameworkMapping.control_id.asc(), ControlFrameworkMapping.id.asc())
         .all()
     )
 
@@ -180,6 +187,11 @@ def compute_version_effective_coverage(
     scope_type: str,
     scope_id: int,
 ) -> FrameworkImplementationCoverage:
+    """
+    Same result as running _score_requirement for every requirement of the version, but
+    scored from the cached requirement x control matrix (services/compliance/coverage_matrix.py)
+    with the scope's exceptions loaded in one query.
+    """
     # Effective controls index for the scope
     effective = get_effective_controls(db, scope_type, scope_id)
     effective_by_ctrl = {
@@ -190,22 +202,46 @@ def compute_version_effective_coverage(
         } for e in effective
     }
 
-    reqs: List[FrameworkRequirement] = (
-        db.query(FrameworkRequirement)
-        .filter(FrameworkRequirement.framework_version_id == version_id)
-        .order_by(FrameworkRequirement.sort_index.asc(), FrameworkRequirement.id.asc())
-        .all()
-    )
+    matrix = get_coverage_matrix(db, version_id)
+    scores, entries = matrix.score(effective_by_ctrl)
+    exceptions = _active_exception_ids_by_req(db, version_id, scope_type, scope_id) if len(matrix) else {}
 
     req_cov: List[RequirementImplementationCoverage] = []
     total = 0.0
-    count = 0
-    for r in reqs:
-        rc = _score_requirement(db, r, effective_by_ctrl,scope_type, scope_id)
-        req_cov.append(rc)
-        total += rc.score
-        count += 1
+    for i, req in enumerate(matrix.requirements):
+        if not matrix.has_mappings(i):
+            req_cov.append(RequirementImplementationCoverage(
+                requirement_id=req.id, code=req.code, title=req.title, score=0.0, hits=[],
+                status="unknown", exception_applied=False, exception_id=None,
+            ))
+            continue
+
+        hits = []
+        for e in entries[i]:
+            eff = effective_by_ctrl[e.control_id]
+            hits.append(ControlHit(
+                control_id=e.control_id,
+                source=eff.get("source"),
+                assurance_status=eff.get("assurance_status"),
+                inheritance_type=eff.get("inheritance_type"),
+                weight_share=e.weight_share,
+                contribution=e.contribution,
+            ))
+        score = scores[i]
+        exc_id = exceptions.get(req.id)
+        if exc_id:
+            # Exception = treated as compliant but clearly flagged (see _score_requirement)
+            status, exception_applied, score = "met", True, 1.0
+        else:
+            status, exception_applied = _derive_status(score, has_mappings=True), False
 
+        req_cov.append(RequirementImplementationCoverage(
+            requirement_id=req.id, code=req.code, title=req.title, score=score, hits=hits,
+            status=status, exception_applied=exception_applied, exception_id=exc_id,
+        ))
+        total += score
+
+    count = len(req_cov)
     framework_score = round((total / count) if count else 0.0, 4)
     return FrameworkImplementationCoverage(
         version_id=version_id,
@@ -214,3 +250,35 @@ def compute_version_effective_coverage(
         score=framework_score,
         requirements=req_cov,
     )
+
+
+def effective_coverage_scores(
+    db: Session,
+    keys: Iterable[Tuple[int, str, int]],
+) -> Dict[Tuple[int, str, int], float]:
+    """
+    Framework score of compute_version_effective_coverage for many
+    (version_id, scope_type, scope_id) keys, without building the per-requirement payload:
+    one overlay pass for all scopes, cached matrices, one exception query per key.
+    """
+    keys = list(dict.fromkeys(keys))
+    overlays = get_effective_controls_many(db, list(dict.fromkeys((normalize_scope(st), sid) for _, st, sid in keys)))
+    out: Dict[Tuple[int, str, int], float] = {}
+    for version_id, scope_type, scope_id in keys:
+        effective_by_ctrl = {
+            e.control_id: {
+                "source": e.source,
+                "assurance_status": e.assurance_status,
+                "inheritance_type": e.inheritance_type,
+            } for e in overlays.get((normalize_scope(scope_type), scope_id), [])
+        }
+        matrix = get_coverage_matrix(db, version_id)
+        scores, _ = matrix.score(effective_by_ctrl)
+        exceptions = _active_exception_ids_by_req(db, version_id, scope_type, scope_id) if len(matrix) else {}
+        total = 0.0
+        for i, req in enumerate(matrix.requirements):
+            if matrix.has_mappings(i):
+                total += 1.0 if exceptions.get(req.id) else scores[i]
+        count = len(matrix.requirements)
+        out[(version_id, scope_type, scope_id)] = round((total / count) if count else 0.0, 4)
+    return out
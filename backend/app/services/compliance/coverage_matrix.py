@@ -0,0 +1,192 @@
+"""
+Process-wide requirement x control weight matrices for effective coverage.
+
+Each framework version's ControlFrameworkMapping rows are loaded once into a CSR
+block: requirements (in sort_index, id order) are rows, the distinct mapped controls
+are columns, and every stored entry is the mapping's normalized weight share
+(weight / sum of the requirement's weights, weight defaulting to 100). Coverage for a
+scope then needs one value vector over the columns (STATUS_VALUE x
+INHERITANCE_MULTIPLIER of the effective controls) and a single segmented sum over the
+entries instead of a mapping query per requirement.
+
+Versioning works like services/effect_matrix.py: matrices are rebuilt lazily when the
+counter moves. It is bumped after a SessionLocal transaction that wrote requirements
+or mappings commits, or via invalidate_coverage_matrices() after Core/bulk writes.
+MATRIX_MAX_AGE_SECONDS bounds staleness for other workers.
+"""
+from __future__ import annotations
+
+import threading
+import time
+from itertools import chain
+from typing import Dict, List, Mapping, NamedTuple, Optional, Tuple
+
+import numpy as np
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from app.constants.compliance import INHERITANCE_MULTIPLIER, STATUS_VALUE
+from app.database import SessionLocal
+from app.models.compliance.control_framework_mapping import ControlFrameworkMapping
+from app.models.compliance.framework_requirement import FrameworkRequirement
+
+MATRIX_MAX_AGE_SECONDS = 300
+
+_PENDING_KEY = "coverage_matrix_dirty"
+
+
+class RequirementRow(NamedTuple):
+    id: int
+    code: Optional[str]
+    title: Optional[str]
+
+
+class ScoredEntry(NamedTuple):
+    """One mapped control that is effective in the scope (a ControlHit)."""
+    control_id: int
+    weight_share: float
+    contribution: float
+
+
+class CoverageMatrix:
+    def __init__(self, version_id: int, requirements: List[RequirementRow],
+                 mappings: List[Tuple[int, int, Optional[int]]], version: int):
+        """mappings: (framework_requirement_id, control_id, weight); row entries keep this order."""
+        self.version_id = version_id
+        self.version = version
+        self.built_at = time.monotonic()
+        self.requirements = requirements
+
+        row_of = {r.id: i for i, r in enumerate(requirements)}
+        per_row: List[List[Tuple[int, int]]] = [[] for _ in requirements]
+        for req_id, ctrl_id, weight in mappings:
+            i = row_of.get(req_id)
+            if i is not None:
+                per_row[i].append((ctrl_id, weight or 100))
+
+        self.controls = np.unique(np.fromiter((c for _, c, _ in mappings), dtype=np.int64, count=len(mappings)))
+        counts = np.fromiter((len(p) for p in per_row), dtype=np.int64, count=len(per_row))
+        self.indptr = np.concatenate(([0], np.cumsum(counts))).astype(np.int64)
+        self.rows = np.repeat(np.arange(len(requirements), dtype=np.int64), counts)
+        flat = [e for p in per_row for e in p]
+        self.control_ids = np.fromiter((c for c, _ in flat), dtype=np.int64, count=len(flat))
+        self.cols = np.searchsorted(self.controls, self.control_ids)
+        weights = np.fromiter((w for _, w in flat), dtype=np.float64, count=len(flat))
+        totals = np.bincount(self.rows, weights=weights, minlength=len(requirements))
+        totals[totals == 0] = 1.0
+        self.shares = weights / totals[self.rows]
+
+    def __len__(self) -> int:
+        return len(self.control_ids)
+
+    def has_mappings(self, row: int) -> bool:
+        return bool(self.indptr[row + 1] > self.indptr[row])
+
+    def value_vector(self, effective_by_ctrl: Mapping[int, Mapping]) -> Tuple[np.ndarray, np.ndarray]:
+        """(values, present) over the matrix columns for {control_id: effective control dict}."""
+        values = np.zeros(len(self.controls), dtype=np.float64)
+        present = np.zeros(len(self.controls), dtype=bool)
+        if not len(self.controls):
+            return values, present
+        for ctrl_id, eff in effective_by_ctrl.items():
+            pos = int(np.searchsorted(self.controls, ctrl_id))
+            if pos < len(self.controls) and self.controls[pos] == ctrl_id and eff:
+                present[pos] = True
+                values[pos] = (STATUS_VALUE.get(eff.get("assurance_status"), 0.0)
+                               * INHERITANCE_MULTIPLIER.get(eff.get("inheritance_type"), 1.0))
+        return values, present
+
+    def score(self, effective_by_ctrl: Mapping[int, Mapping]) -> Tuple[List[float], List[List[ScoredEntry]]]:
+        """
+        Requirement scores (clipped to 1.0, rounded to 6 places) and the hit entries of
+        every row, identical to summing round(status x inheritance x share, 6) per mapping.
+        """
+        n = len(self.requirements)
+        values, present = self.value_vector(effective_by_ctrl)
+        hit = np.flatnonzero(present[self.cols])
+        raw = self.shares[hit] * values[self.cols[hit]]
+        # Python round() per contribution keeps the sums bit-identical to the per-row loop
+        contrib = np.fromiter((round(float(x), 6) for x in raw), dtype=np.float64, count=len(hit))
+        totals = np.bincount(self.rows[hit], weights=contrib, minlength=n)
+
+        entries: List[List[ScoredEntry]] = [[] for _ in range(n)]
+        for k, c in zip(hit.tolist(), contrib.tolist()):
+            entries[int(self.rows[k])].append(ScoredEntry(int(self.control_ids[k]), float(self.shares[k]), c))
+        scores = [min(round(float(t), 6), 1.0) for t in totals]
+        return scores, entries
+
+
+_lock = threading.Lock()
+_version = 0
+_matrices: Dict[int, CoverageMatrix] = {}
+
+
+def invalidate_coverage_matrices() -> int:
+    """Bump the version counter; every cached matrix is rebuilt on next use."""
+    global _version
+    with _lock:
+        _version += 1
+        _matrices.clear()
+        return _version
+
+
+def _load(db: Session, version_id: int, version: int) -> CoverageMatrix:
+    requirements = [
+        RequirementRow(*r)
+        for r in db.query(FrameworkRequirement.id, FrameworkRequirement.code, FrameworkRequirement.title)
+        .filter(FrameworkRequirement.framework_version_id == version_id)
+        .order_by(FrameworkRequirement.sort_index.asc(), FrameworkRequirement.id.asc())
+        .all()
+    ]
+    mappings = (
+        db.query(ControlFrameworkMapping.framework_requirement_id,
+                 ControlFrameworkMapping.control_id,
+                 ControlFrameworkMapping.weight)
+        .join(FrameworkRequirement, FrameworkRequirement.id == ControlFrameworkMapping.framework_requirement_id)
+        .filter(FrameworkRequirement.framework_version_id == version_id)
+        .order_by(ControlFrameworkMapping.control_id.asc(), ControlFrameworkMapping.id.asc())
+        .all()
+    )
+    return CoverageMatrix(version_id, requirements, mappings, version)
+
+
+def _fresh(m: Optional[CoverageMatrix], version: int) -> bool:
+    return m is not None and m.version == version and time.monotonic() - m.built_at < MATRIX_MAX_AGE_SECONDS
+
+
+def get_coverage_matrix(db: Session, version_id: int) -> CoverageMatrix:
+    """Matrix of one framework version, reloaded when invalidated or older than MATRIX_MAX_AGE_SECONDS."""
+    if db.info.get(_PENDING_KEY):
+        # this transaction changed requirements/mappings: private matrix that sees its own writes
+        return _load(db, version_id, -1)
+    m = _matrices.get(version_id)
+    if _fresh(m, _version):
+        return m
+    with _lock:
+        version = _version
+        m = _matrices.get(version_id)
+        if _fresh(m, version):
+            return m
+        m = _load(db, version_id, version)
+        _matrices[version_id] = m
+        return m
+
+
+# ---------------- write-time invalidation ----------------
+
+@event.listens_for(SessionLocal, "after_flush")
+def _mark_mapping_writes(session: Session, flush_context) -> None:
+    if any(isinstance(o, (ControlFrameworkMapping, FrameworkRequirement))
+           for o in chain(session.new, session.dirty, session.deleted)):
+        session.info[_PENDING_KEY] = True
+
+
+@event.listens_for(SessionLocal, "after_commit")
+def _bump_after_commit(session: Session) -> None:
+    if session.info.pop(_PENDING_KEY, False):
+        invalidate_coverage_matrices()
+
+
+@event.listens_for(SessionLocal, "after_rollback")
+def _discard_on_rollback(session: Session) -> None:
+    session.info.pop(_PENDING_KEY, None)
@@ -136,50 +136,57 @@ def coverage_rollup_by_scope_type(db: Session, version_id: int, scope_types: lis
     )
     mapped_count = len(mapped_req_ids)
 
+    appl_filters = (
+        [or_(ControlContextLink.__table__.c[CCL_APPL.key].is_(None),
+             ControlContextLink.__table__.c[CCL_APPL.key] != "na")] if CCL_APPL is not None else []
+    )
+    CCL_TYPE_COL = ControlContextLink.__table__.c[CCL_CTX_TYPE.key]
+
+    # requirements that have at least one ControlContextLink at each scope_type (one grouped query)
+    with_impl_by_type = dict(
+        db.execute(
+            select(CCL_TYPE_COL, func.count(distinct(CFM_REQ_ID)))
+            .select_from(ControlFrameworkMapping)
+            .join(FrameworkRequirement, FrameworkRequirement.id == CFM_REQ_ID)
+            .join(ControlContextLink, ControlContextLink.__table__.c[CCL_CTRL_ID.key] == CFM_CTRL_ID)
+            .where(
+                FrameworkRequirement.framework_version_id == version_id,
+                CCL_TYPE_COL.in_(scope_types),
+                ev_pred,
+                *appl_filters,
+            )
+            .group_by(CCL_TYPE_COL)
+        ).all()
+    )
+
+    # requirements with at least one *valid* evidence now, per scope_type
+    ev_filters = [CE_STATUS == "valid"]
+    if CE_VALID_FROM is not None:
+        ev_filters.append(or_(CE_VALID_FROM.is_(None), CE_VALID_FROM <= now))
+    if CE_VALID_TO is not None:
+        ev_filters.append(or_(CE_VALID_TO.is_(None), CE_VALID_TO >= now))
+
+    met_by_type = dict(
+        db.execute(
+            select(CCL_TYPE_COL, func.count(distinct(CFM_REQ_ID)))
+            .select_from(ControlFrameworkMapping)
+            .join(FrameworkRequirement, FrameworkRequirement.id == CFM_REQ_ID)
+            .join(ControlContextLink, ControlContextLink.__table__.c[CCL_CTRL_ID.key] == CFM_CTRL_ID)
+            .join(ControlEvidence, ControlEvidence.__table__.c[CE_LINK_ID.key] == ControlContextLink.__table__.c[CCL_ID.key])
+            .where(
+                FrameworkRequirement.framework_version_id == version_id,
+                CCL_TYPE_COL.in_(scope_types),
+                *ev_filters,
+                *appl_filters,
+            )
+            .group_by(CCL_TYPE_COL)
+        ).all()
+    )
+
     items = []
     for st in scope_types:
-        # requirements that have at least one ControlContextLink at this scope_type
-        reqs_with_impl = set(
-            r for (r,) in db.execute(
-                select(distinct(CFM_REQ_ID))
-                .join(FrameworkRequirement, FrameworkRequirement.id == CFM_REQ_ID)
-                .join(ControlContextLink, ControlContextLink.__table__.c[CCL_CTRL_ID.key] == CFM_CTRL_ID)
-                .where(
-                    FrameworkRequirement.framework_version_id == version_id,
-                    ControlContextLink.__table__.c[CCL_CTX_TYPE.key] == st,
-                    ev_pred,
-                    *([or_(ControlContextLink.__table__.c[CCL_APPL.key].is_(None),
-                            ControlContextLink.__table__.c[CCL_APPL.key] != "na")] if CCL_APPL is not None else []),
-                )
-            ).all()
-            if r is not None
-        )
-        with_impl_count = len(reqs_with_impl)
-
-        # requirements with at least one *valid* evidence now for this scope_type
-        ev_filters = [CE_STATUS == "valid"]
-        if CE_VALID_FROM is not None:
-            ev_filters.append(or_(CE_VALID_FROM.is_(None), CE_VALID_FROM <= now))
-        if CE_VALID_TO is not None:
-            ev_filters.append(or_(CE_VALID_TO.is_(None), CE_VALID_TO >= now))
-
-        reqs_met = set(
-            r for (r,) in db.execute(
-                select(distinct(CFM_REQ_ID))
-                .join(FrameworkRequirement, FrameworkRequirement.id == CFM_REQ_ID)
-                .join(ControlContextLink, ControlContextLink.__table__.c[CCL_CTRL_ID.key] == CFM_CTRL_ID)
-                .join(ControlEvidence, ControlEvidence.__table__.c[CE_LINK_ID.key] == ControlContextLink.__table__.c[CCL_ID.key])
-                .where(
-                    FrameworkRequirement.framework_version_id == version_id,
-                    ControlContextLink.__table__.c[CCL_CTX_TYPE.key] == st,
-                    *ev_filters,
-                    * ([or_(ControlContextLink.__table__.c[CCL_APPL.key].is_(None),
-                        ControlContextLink.__table__.c[CCL_APPL.key] != "na")] if CCL_APPL is not None else []),
-                )
-            ).all()
-            if r is not None
-        )
-        met_count = len(reqs_met)
+        with_impl_count = with_impl_by_type.get(st, 0)
+        met_count = met_by_type.get(st, 0)
 
         partial_count = max(with_impl_count - met_count, 0)
         gap_count = max(mapped_count - with_impl_count, 0)
@@ -0,0 +1,469 @@
+"""
+coverage_snapshot read model.
+
+One row per (framework version, scope_type, scope_id) with the coverage-summary
+counts, percentages and the effective-coverage avg_score; scope_id 0 holds the
+per-scope_type rollup (coverage_rollup_by_scope_type). Reads serve the stored row
+(last_computed_at = when it was really computed) and compute + store it only when it
+is missing or the caller asks for ?fresh=true. Keys use the canonical scope type
+(constants.scopes.normalize_scope, e.g. "org" -> "entity"), the form links are stored
+in, so reads, refreshes and dirty marking all address the same rows.
+
+Staleness is tracked with two counters: flush events of SessionLocal sessions bump
+`generation` of the affected rows inside the writing transaction, and a refresh
+stores the generation it computed from in `computed_generation`. Rows with
+generation > computed_generation (or older than SNAPSHOT_MAX_AGE_SECONDS, since
+evidence validity drifts with time) are recomputed by refresh_dirty(), run by the
+the in-process scheduler (services/scheduler.py, job "coverage_snapshot_refresh")
+or scripts/refresh_coverage_snapshots.py.
+
+What marks a row dirty:
+  - ControlContextLink: its scope (or its risk context's scope) and every scope type
+    whose effective-control overlay can inherit from it (_INHERITED_BY), plus rollups
+  - ControlEvidence: the scope of its link, plus rollups
+  - ComplianceException: the scope of its risk context
+  - ControlFrameworkMapping / FrameworkRequirement: every row of the version
+Core/bulk writers call mark_scopes_dirty() / mark_versions_dirty() themselves.
+"""
+from __future__ import annotations
+
+import logging
+from collections import defaultdict
+from datetime import datetime, timedelta
+from itertools import chain
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from sqlalchemy import event, or_, and_, select, tuple_, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.inspection import inspect as sa_inspect
+from sqlalchemy.orm import Session
+
+from app.constants.scopes import normalize_scope
+from app.database import SessionLocal
+from app.models.compliance.coverage_snapshot import CoverageSnapshot
+from app.models.compliance.control_evidence import ControlEvidence
+from app.models.compliance.control_framework_mapping import ControlFrameworkMapping
+from app.models.compliance.exception import ComplianceException
+from app.models.compliance.framework_requirement import FrameworkRequirement
+from app.models.compliance.framework_version import FrameworkVersion
+from app.models.controls.control_context_link import ControlContextLink
+from app.models.risks.risk_scenario_context import RiskScenarioContext
+from app.schemas.compliance.coverage_summary import CoverageSummary
+from app.services.compliance.coverage_effective import effective_coverage_scores
+from app.services.compliance.coverage_rollup import coverage_rollup_by_scope_type
+from app.services.compliance.requirements_status import compute_status_counts_many
+
+logger = logging.getLogger(__name__)
+
+ROLLUP_SCOPE_ID = 0
+SNAPSHOT_MAX_AGE_SECONDS = 3600
+REFRESH_BATCH = 50
+
+_PENDING_KEY = "coverage_snapshot_pending"
+
+# scope types whose overlay (services/controls/effective_overlay.py) can include a layer of the key type
+_INHERITED_BY = {
+    "asset_type": ("asset",),
+    "asset_group": ("asset",),
+    "tag": ("asset",),
+    "site": ("asset",),
+    "bu": ("asset",),
+    "entity": ("bu", "site", "asset"),
+    "service": ("entity", "bu", "site", "asset"),
+    "org_group": ("entity", "bu", "site", "asset"),
+}
+
+SnapshotKey = Tuple[int, str, int]
+
+
+def _normalize_keys(keys: Iterable[SnapshotKey]) -> List[SnapshotKey]:
+    # rows are keyed by the canonical scope type ("org" -> "entity"), like the links that dirty them
+    return list(dict.fromkeys((int(v), normalize_scope(st), int(sid)) for v, st, sid in keys))
+
+
+# ---------------- compute ----------------
+
+def _pct(n: int, d: int) -> float:
+    return round((n / d) * 100.0, 2) if d > 0 else 0.0
+
+
+def _snapshot_row(key: SnapshotKey, counts: Dict[str, int], avg_score: float, now: datetime) -> Dict[str, Any]:
+    version_id, scope_type, scope_id = key
+    applicable = counts["applicable"]
+    return {
+        "version_id": version_id,
+        "scope_type": scope_type,
+        "scope_id": scope_id,
+        "total_requirements": counts["total"],
+        "applicable_requirements": applicable,
+        "met": counts["met"],
+        "met_by_exception": counts["met_by_exception"],
+        "partial": counts["partial"],
+        "gap": counts["gap"],
+        "unknown": counts["unknown"],
+        "coverage_pct": _pct(counts["met"], applicable),
+        "coverage_pct_excl_exceptions": _pct(counts["met"] - counts["met_by_exception"], applicable),
+        "avg_score": avg_score,
+        "computed_at": now,
+    }
+
+
+def compute_snapshot_rows(db: Session, keys: Iterable[SnapshotKey], *, now: Optional[datetime] = None) -> List[Dict[str, Any]]:
+    """Compute snapshot rows from source tables (no writes)."""
+    now = now or datetime.utcnow()
+    keys = _normalize_keys(keys)
+    scope_keys = [k for k in keys if k[2] != ROLLUP_SCOPE_ID]
+    out: List[Dict[str, Any]] = []
+
+    if scope_keys:
+        counts = compute_status_counts_many(
+            db,
+            version_ids={vid for vid, _, _ in scope_keys},
+            scopes={(st, sid) for _, st, sid in scope_keys},
+        )
+        scores = effective_coverage_scores(db, scope_keys)
+        out += [_snapshot_row(k, counts[k], scores[k], now) for k in scope_keys]
+
+    rollup_types: Dict[int, List[str]] = defaultdict(list)
+    for vid, st, sid in keys:
+        if sid == ROLLUP_SCOPE_ID:
+            rollup_types[vid].append(st)
+    for vid, types in rollup_types.items():
+        rollup = coverage_rollup_by_scope_type(db, vid, types)
+        for item in rollup["items"]:
+            c = item["counts"]
+            unknown = int(c["unknown"] or 0)
+            applicable = max(int(c["total"] or 0) - unknown, 0)
+            counts = {"total": int(c["total"] or 0), "applicable": applicable, "met": c["met"],
+                      "met_by_exception": 0, "partial": c["partial"], "gap": c["gap"], "unknown": unknown}
+            out.append(_snapshot_row((vid, item["scope_type"], ROLLUP_SCOPE_ID), counts, 0.0, now))
+    return out
+
+
+# ---------------- write ----------------
+
+def _generations(db: Session, keys: List[SnapshotKey]) -> Dict[SnapshotKey, int]:
+    S = CoverageSnapshot
+    if not keys:
+        return {}
+    rows = db.execute(
+        select(S.version_id, S.scope_type, S.scope_id, S.generation)
+        .where(tuple_(S.version_id, S.scope_type, S.scope_id).in_(keys))
+    ).all()
+    return {(v, st, sid): gen for v, st, sid, gen in rows}
+
+
+def refresh_snapshots(db: Session, keys: Iterable[SnapshotKey], *, now: Optional[datetime] = None) -> Dict[SnapshotKey, Dict[str, Any]]:
+    """
+    Recompute and upsert the given snapshots in the current transaction (caller commits).
+    Each row records the generation it was computed from; bumps by concurrent writers
+    are kept, so those rows stay dirty.
+    """
+    keys = _normalize_keys(keys)
+    if not keys:
+        return {}
+    gens = _generations(db, keys)
+    return _upsert_rows(db, compute_snapshot_rows(db, keys, now=now), gens)
+
+
+def _upsert_rows(db: Session, rows: List[Dict[str, Any]], gens: Dict[SnapshotKey, int]) -> Dict[SnapshotKey, Dict[str, Any]]:
+    """Upsert computed rows, each recorded as computed from gens[key] (1 for new rows)."""
+    if not rows:
+        return {}
+    for r in rows:
+        gen = gens.get((r["version_id"], r["scope_type"], r["scope_id"]), 1)
+        r["generation"] = gen
+        r["computed_generation"] = gen
+
+    table = CoverageSnapshot.__table__
+    stmt = pg_insert(table).values(rows)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[table.c.version_id, table.c.scope_type, table.c.scope_id],
+        set_={c.name: stmt.excluded[c.name] for c in table.columns
+              if c.name not in ("version_id", "scope_type", "scope_id", "generation")},
+    )
+    db.execute(stmt)
+    return {(r["version_id"], r["scope_type"], r["scope_id"]): r for r in rows}
+
+
+def mark_scopes_dirty(db: Session, scopes: Iterable[Tuple[str, int]], *, inherited: bool = True,
+                      rollups: bool = True) -> int:
+    """Bump the generation of every snapshot of the given scopes (and inheriting scope types)."""
+    T = CoverageSnapshot.__table__
+    scopes = {(normalize_scope(st), int(sid)) for st, sid in scopes if st and sid is not None}
+    if not scopes:
+        return 0
+    preds = [tuple_(T.c.scope_type, T.c.scope_id).in_(list(scopes))]
+    types = {t for st, _ in scopes for t in _INHERITED_BY.get(st, ())} if inherited else set()
+    if types:
+        preds.append(and_(T.c.scope_type.in_(types), T.c.scope_id != ROLLUP_SCOPE_ID))
+    if rollups:
+        preds.append(T.c.scope_id == ROLLUP_SCOPE_ID)
+    res = db.execute(update(T).where(or_(*preds)).values(generation=T.c.generation + 1))
+    return res.rowcount or 0
+
+
+def _mark_keys_dirty(db: Session, keys: Iterable[SnapshotKey]) -> int:
+    """Bump the generation of the given snapshots only."""
+    T = CoverageSnapshot.__table__
+    keys = _normalize_keys(keys)
+    if not keys:
+        return 0
+    res = db.execute(
+        update(T).where(tuple_(T.c.version_id, T.c.scope_type, T.c.scope_id).in_(keys))
+        .values(generation=T.c.generation + 1)
+    )
+    return res.rowcount or 0
+
+
+def mark_versions_dirty(db: Session, version_ids: Iterable[int]) -> int:
+    """Bump the generation of every snapshot of the given framework versions."""
+    T = CoverageSnapshot.__table__
+    ids = {int(v) for v in version_ids if v is not None}
+    if not ids:
+        return 0
+    res = db.execute(update(T).where(T.c.version_id.in_(ids)).values(generation=T.c.generation + 1))
+    return res.rowcount or 0
+
+
+# ---------------- read ----------------
+
+def _to_summary(row) -> CoverageSummary:
+    get = row.get if isinstance(row, dict) else (lambda k: getattr(row, k))
+    return CoverageSummary(
+        version_id=get("version_id"),
+        scope_type=get("scope_type"),
+        scope_id=get("scope_id"),
+        total_requirements=get("total_requirements"),
+        applicable_requirements=get("applicable_requirements"),
+        met=get("met"),
+        met_by_exception=get("met_by_exception"),
+        partial=get("partial"),
+        gap=get("gap"),
+        unknown=get("unknown"),
+        coverage_pct=get("coverage_pct"),
+        coverage_pct_excl_exceptions=get("coverage_pct_excl_exceptions"),
+        avg_score=get("avg_score"),
+        last_computed_at=get("computed_at"),
+    )
+
+
+def _load_or_refresh(db: Session, keys: List[SnapshotKey], fresh: bool) -> Dict[SnapshotKey, Any]:
+    S = CoverageSnapshot
+    keys = _normalize_keys(keys)
+    rows: Dict[SnapshotKey, Any] = {}
+    if not fresh and keys:
+        rows = {
+            (r.version_id, r.scope_type, r.scope_id): r
+            for r in db.query(S).filter(tuple_(S.version_id, S.scope_type, S.scope_id).in_(keys)).all()
+        }
+    missing = [k for k in keys if k not in rows]
+    if not missing:
+        return rows
+    # unknown versions are computed (all zeros, as before the read model) but not stored: no FK row to hang them on
+    known = set(db.execute(
+        select(FrameworkVersion.id).where(FrameworkVersion.id.in_({k[0] for k in missing}))
+    ).scalars())
+    unknown = [k for k in missing if k[0] not in known]
+    if unknown:
+        rows.update({(r["version_id"], r["scope_type"], r["scope_id"]): r for r in compute_snapshot_rows(db, unknown)})
+    stored = [k for k in missing if k[0] in known]
+    if stored:
+        try:
+            rows.update(refresh_snapshots(db, stored))
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+    return rows
+
+
+def get_coverage_summaries(
+    db: Session,
+    version_ids: Iterable[int],
+    scope_type: str,
+    scope_id: int,
+    *,
+    fresh: bool = False,
+) -> Dict[int, CoverageSummary]:
+    """{version_id: CoverageSummary} from snapshots; missing rows (all rows when fresh) are computed and stored."""
+    keys = _normalize_keys((v, scope_type, scope_id) for v in version_ids)
+    rows = _load_or_refresh(db, keys, fresh)
+    return {k[0]: _to_summary(rows[k]) for k in keys if k in rows}
+
+
+def get_coverage_summary(db: Session, version_id: int, scope_type: str, scope_id: int, *,
+                         fresh: bool = False) -> CoverageSummary:
+    return get_coverage_summaries(db, [version_id], scope_type, scope_id, fresh=fresh)[int(version_id)]
+
+
+def get_coverage_rollup(db: Session, version_id: int, scope_types: List[str], *, fresh: bool = False) -> Dict[str, Any]:
+    """coverage_rollup_by_scope_type() shape served from the scope_id=0 snapshots, plus computed_at."""
+    scope_types = list(dict.fromkeys(scope_types))
+    rows = _load_or_refresh(db, [(version_id, st, ROLLUP_SCOPE_ID) for st in scope_types], fresh)
+    items, computed_at, total, unknown = [], None, 0, 0
+    for st in scope_types:
+        # one item per requested type, under the caller's name ("org" is served by the "entity" row)
+        s = _to_summary(rows[(int(version_id), normalize_scope(st), ROLLUP_SCOPE_ID)])
+        total, unknown = s.total_requirements, s.unknown
+        computed_at = s.last_computed_at if computed_at is None else min(computed_at, s.last_computed_at)
+        items.append({
+            "scope_type": st,
+            "counts": {"total": s.total_requirements, "unknown": s.unknown,
+                       "met": s.met, "partial": s.partial, "gap": s.gap},
+        })
+    return {
+        "version_id": version_id,
+        "items": items,
+        "totals": {"total": total, "unknown": unknown, "mapped": total - unknown},
+        "computed_at": computed_at,
+    }
+
+
+# ---------------- background refresh ----------------
+
+def refresh_dirty(db: Session, *, limit: int = REFRESH_BATCH, max_age_seconds: int = SNAPSHOT_MAX_AGE_SECONDS,
+                  now: Optional[datetime] = None) -> Dict[str, int]:
+    """
+    Recompute up to `limit` dirty or expired snapshots, oldest first.
+
+    The rows are claimed in a short transaction (FOR UPDATE SKIP LOCKED, then marked
+    computed at their current generation and committed), so no lock is held while
+    computing and other workers skip them. Writer bumps during the computation keep
+    the rows dirty; if the computation fails the claimed rows are marked dirty again.
+    """
+    S = CoverageSnapshot
+    T = S.__table__
+    now = now or datetime.utcnow()
+    try:
+        gens = {
+            (v, st, sid): gen for v, st, sid, gen in db.execute(
+                select(S.version_id, S.scope_type, S.scope_id, S.generation)
+                .where(or_(S.generation > S.computed_generation,
+                           S.computed_at < now - timedelta(seconds=max_age_seconds)))
+                .order_by(S.computed_at.asc())
+                .limit(max(1, int(limit)))
+                .with_for_update(skip_locked=True)
+            ).all()
+        }
+        keys = list(gens)
+        if keys:
+            db.execute(
+                update(T).where(tuple_(T.c.version_id, T.c.scope_type, T.c.scope_id).in_(keys))
+                .values(computed_generation=T.c.generation, computed_at=now)
+            )
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    if not keys:
+        return {"refreshed": 0}
+
+    try:
+        _upsert_rows(db, compute_snapshot_rows(db, keys, now=now), gens)
+        db.commit()
+    except Exception:
+        db.rollback()
+        _mark_keys_dirty(db, keys)
+        db.commit()
+        raise
+    return {"refreshed": len(keys)}
+
+
+def refresh_all_dirty(db: Session, *, limit: int = REFRESH_BATCH,
+                      max_age_seconds: int = SNAPSHOT_MAX_AGE_SECONDS) -> Dict[str, int]:
+    """Drain refresh_dirty() until nothing is left (one commit per batch)."""
+    now = datetime.utcnow()
+    total = batches = 0
+    while True:
+        n = refresh_dirty(db, limit=limit, max_age_seconds=max_age_seconds, now=now)["refreshed"]
+        if not n:
+            return {"refreshed": total, "batches": batches}
+        total += n
+        batches += 1
+
+
+# ---------------- write-time dirty marking (flush events) ----------------
+
+def _pending(session: Session) -> Dict[str, set]:
+    return session.info.setdefault(
+        _PENDING_KEY,
+        {"scopes": set(), "context_ids": set(), "exception_context_ids": set(),
+         "link_ids": set(), "requirement_ids": set(), "version_ids": set()},
+    )
+
+
+def _old_and_new(obj, attr: str) -> List[Any]:
+    hist = sa_inspect(obj).attrs[attr].history
+    return [v for v in chain(hist.added or (), hist.unchanged or (), hist.deleted or ()) if v is not None]
+
+
+def _collect_change(obj, pending: Dict[str, set]) -> None:
+    if isinstance(obj, ControlContextLink):
+        types, ids = _old_and_new(obj, "scope_type"), _old_and_new(obj, "scope_id")
+        pending["scopes"].update((st, sid) for st in types for sid in ids)
+        pending["context_ids"].update(_old_and_new(obj, "risk_scenario_context_id"))
+    elif isinstance(obj, ControlEvidence):
+        pending["link_ids"].add(obj.control_context_link_id)
+    elif isinstance(obj, ComplianceException):
+        pending["exception_context_ids"].update(_old_and_new(obj, "risk_scenario_context_id"))
+    elif isinstance(obj, ControlFrameworkMapping):
+        pending["requirement_ids"].update(_old_and_new(obj, "framework_requirement_id"))
+    elif isinstance(obj, FrameworkRequirement):
+        pending["version_ids"].update(_old_and_new(obj, "framework_version_id"))
+
+
+def _context_scopes(session: Session, context_ids: Set[int]) -> Set[Tuple[str, int]]:
+    if not context_ids:
+        return set()
+    return {
+        (st, sid) for st, sid in session.query(RiskScenarioContext.scope_type, RiskScenarioContext.scope_id)
+                                        .filter(RiskScenarioContext.id.in_(context_ids)).all()
+    }
+
+
+@event.listens_for(SessionLocal, "after_flush")
+def _collect_snapshot_changes(session: Session, flush_context) -> None:
+    pending = None
+    for obj in chain(session.new, session.dirty, session.deleted):
+        if isinstance(obj, (ControlContextLink, ControlEvidence, ComplianceException,
+                            ControlFrameworkMapping, FrameworkRequirement)):
+            pending = pending or _pending(session)
+            _collect_change(obj, pending)
+
+
+@event.listens_for(SessionLocal, "after_flush_postexec")
+def _mark_snapshot_changes(session: Session, flush_context) -> None:
+    pending = session.info.pop(_PENDING_KEY, None)
+    if not pending:
+        return
+    conn = session.connection()
+    savepoint = conn.begin_nested()
+    try:
+        scopes = set(pending["scopes"]) | _context_scopes(session, pending["context_ids"])
+        link_ids = {i for i in pending["link_ids"] if i is not None}
+        if link_ids:
+            for st, sid, ctx_id in session.query(ControlContextLink.scope_type, ControlContextLink.scope_id,
+                                                 ControlContextLink.risk_scenario_context_id) \
+                                          .filter(ControlContextLink.id.in_(link_ids)).all():
+                if st and sid is not None:
+                    scopes.add((st, sid))
+                elif ctx_id is not None:
+                    pending["context_ids"].add(ctx_id)
+            scopes |= _context_scopes(session, pending["context_ids"])
+        mark_scopes_dirty(session, scopes)
+        mark_scopes_dirty(session, _context_scopes(session, pending["exception_context_ids"]),
+                          inherited=False, rollups=False)
+
+        version_ids = set(pending["version_ids"])
+        if pending["requirement_ids"]:
+            version_ids.update(
+                v for (v,) in session.query(FrameworkRequirement.framework_version_id)
+                                     .filter(FrameworkRequirement.id.in_(pending["requirement_ids"])).all()
+            )
+        mark_versions_dirty(session, version_ids)
+        savepoint.commit()
+    except Exception:
+        # never fail the business write because of the read model; rows also expire by age
+        savepoint.rollback()
+        logger.exception("coverage_snapshot dirty marking failed")
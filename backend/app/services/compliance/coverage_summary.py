@@ -1,11 +1,10 @@
-from datetime import datetime
 from sqlalchemy.orm import Session
 from typing import List, Optional, Set
 from sqlalchemy import select, func, distinct, or_
 from sqlalchemy.inspection import inspect as sa_inspect
-from app.services.compliance.coverage_effective import compute_version_effective_coverage
-from app.schemas.compliance.coverage_summary import CoverageSummary, CoverageSummaryWithMeta
-from app.services.compliance.requirements_status import valid_evidence_filters, compute_status_counts
+from app.schemas.compliance.coverage_summary import CoverageSummaryWithMeta
+from app.services.compliance.requirements_status import valid_evidence_filters
+from app.services.compliance.coverage_snapshot import get_coverage_summaries
 
 # Models we’ll need to enrich the summary (imported lazily where possible)
 from app.models.compliance.framework_requirement import FrameworkRequirement
@@ -36,61 +35,6 @@ def _required_col(model, *candidates, **kw):
         raise RuntimeError(f"{model.__name__}: cannot find a matching column among {have}")
     return col
 
-def compute_coverage_summary(
-    db: Session,
-    version_id: int,
-    scope_type: str,
-    scope_id: int,
-) -> CoverageSummary:
-    """
-    Computes KPI-style coverage summary for a framework version within a specific scope.
-    Status counts (met/partial/gap/unknown) use the SAME presence-based logic as rollup/list.
-    We still compute avg_score from coverage_effective for a maturity KPI.
-    """
-
-    # 1) Presence-based status counts (aligned with rollup/list)
-    counts = compute_status_counts(db, version_id=version_id, scope_type=scope_type, scope_id=scope_id)
-    total = counts["total"]
-    applicable = counts["applicable"]
-    met = counts["met"]
-    met_by_exception = counts["met_by_exception"]
-    partial = counts["partial"]
-    gap = counts["gap"]
-    unknown = counts["unknown"]
-
-      # 2) Percentages (keep 0..100 to match existing schema)
-
-    if applicable <= 0:
-        coverage_pct = 0.0
-        coverage_pct_excl_exceptions = 0.0
-    else:
-        coverage_pct = round((met / applicable) * 100.0, 2)
-        coverage_pct_excl_exceptions = round(((met - met_by_exception) / applicable) * 100.0, 2)
-
-    # 3) Maturity KPI from effective coverage (unchanged)
-    fcov = compute_version_effective_coverage(db = db, version_id = version_id, scope_type = scope_type, scope_id = scope_id)
-    avg_score = round((fcov.score or 0.0), 4) if hasattr(fcov, "score") else (
-                    round(sum((r.score or 0.0) for r in getattr(fcov, "requirements", [])) / max(
-                len(getattr(fcov, "requirements", []), 1), 1), 4)
-    )
-
-    return CoverageSummary(
-        version_id=version_id,
-        scope_type=scope_type,
-        scope_id=scope_id,
-        total_requirements=total,
-        applicable_requirements=applicable,
-        met=met,
-        met_by_exception=met_by_exception,
-        partial=partial,
-        gap=gap,
-        unknown=unknown,
-        coverage_pct=coverage_pct,
-        coverage_pct_excl_exceptions=coverage_pct_excl_exceptions,
-        avg_score=avg_score,
-        last_computed_at=datetime.utcnow(),
-    )
-
 # --- NEW: list helper (adds identity + freshness/controls stats) -------------
 def _framework_version_meta(db: Session, version_id: int) -> dict:
     """
@@ -217,10 +161,13 @@ def compute_coverage_summary_list(
     version_ids: List[int],
     scope_type: str,
     scope_id: int,
+    fresh: bool = False,
 ) -> List[CoverageSummaryWithMeta]:
+    # base counts/scores come from coverage_snapshot (recomputed when fresh=True)
+    bases = get_coverage_summaries(db, version_ids, scope_type, scope_id, fresh=fresh)
     out: List[CoverageSummaryWithMeta] = []
     for vid in version_ids:
-        base = compute_coverage_summary(db=db, version_id=vid, scope_type=scope_type, scope_id=scope_id)
+        base = bases[vid]
         meta = _framework_version_meta(db, vid)
         extras = _controls_stats_and_freshness(db, version_id=vid, scope_type=scope_type, scope_id=scope_id)
         out.append(CoverageSummaryWithMeta(**base.dict(), **meta, **extras, top_gaps=[]))
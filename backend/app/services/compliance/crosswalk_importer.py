@@ -1,12 +1,42 @@
+"""
+Crosswalk CSV import: control <-> framework requirement mappings of one version.
+
+Columns: framework_requirement_code, control_code (required), weight, notes.
+
+The input is streamed (a str, or any iterable of text lines such as an upload
+wrapped by app.core.utils.open_upload_text()) and handled in batches of BATCH_SIZE
+rows: one SELECT finds which (requirement, control) pairs of the batch already exist
+(for the created / updated counts), one INSERT ... ON CONFLICT
+(framework_requirement_id, control_id) DO UPDATE (or DO NOTHING without upsert)
+writes the new and changed rows.
+Code lookups are column-only maps built once per import. A pair repeated inside a
+batch flushes the batch first, so repeats behave as in a row-by-row import.
+
+The whole import is one transaction; a dry run executes the same batches inside a
+savepoint and rolls it back, so its counts are exactly those of a real run. Per-line
+errors are counted in full but only the first MAX_REPORTED_ERRORS messages are kept.
+Core writes bypass the ORM flush listeners, so the import invalidates the coverage
+matrices and marks the version's coverage snapshots dirty itself.
+"""
 import csv
 from io import StringIO
-from typing import List, Dict, Optional, Tuple
+from typing import Callable, Dict, Iterable, List, Optional, Tuple, Union
+
+from sqlalchemy import select, tuple_
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.orm import Session
-from sqlalchemy import and_
 
 from app.models.compliance.framework_requirement import FrameworkRequirement
 from app.models.controls.control import Control
 from app.models.compliance.control_framework_mapping import ControlFrameworkMapping
+from app.services.compliance.coverage_matrix import invalidate_coverage_matrices
+from app.services.compliance.coverage_snapshot import mark_versions_dirty
+
+BATCH_SIZE = 1000
+MAX_REPORTED_ERRORS = 1000
+
+Pair = Tuple[int, int]           # (framework_requirement_id, control_id)
+Values = Tuple[int, Optional[str]]  # (weight, notes)
 
 class CrosswalkImportReport:
     def __init__(self):
@@ -14,135 +44,159 @@ class CrosswalkImportReport:
         self.created = 0
         self.updated = 0
         self.skipped = 0
+        self.error_count = 0
         self.errors: List[str] = []
 
+    def error(self, line: int, message: str):
+        self.skipped += 1
+        self.error_count += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append(f"Line {line}: {message}")
+
     def dict(self):
         return {
             "total_rows": self.total_rows,
             "created": self.created,
             "updated": self.updated,
             "skipped": self.skipped,
+            "error_count": self.error_count,
             "errors": self.errors,
+            "errors_truncated": self.error_count > len(self.errors),
         }
 
-def _parse_csv(text: str) -> List[Dict[str, str]]:
-    reader = csv.DictReader(StringIO(text))
+def _reader(source: Union[str, Iterable[str]]) -> csv.DictReader:
+    reader = csv.DictReader(StringIO(source) if isinstance(source, str) else source)
     required = {"framework_requirement_code", "control_code"}
     if not reader.fieldnames:
         raise ValueError("CSV has no header")
-    cols = {c.strip() for c in reader.fieldnames}
-    missing = required - cols
+    reader.fieldnames = [c.strip() for c in reader.fieldnames]
+    missing = required - set(reader.fieldnames)
     if missing:
         raise ValueError(f"CSV missing required columns: {', '.join(sorted(missing))}")
-    rows: List[Dict[str, str]] = []
-    for raw in reader:
-        rows.append({
-            "framework_requirement_code": (raw.get("framework_requirement_code") or "").strip(),
-            "control_code": (raw.get("control_code") or "").strip(),
-            "weight": (raw.get("weight") or "").strip(),
-            "notes": (raw.get("notes") or "").strip(),
-        })
-    return rows
+    return reader
 
 def _resolve_requirement_ids(db: Session, framework_version_id: int) -> Dict[str, int]:
-    # Build a map: requirement_code -> id (scoped to version)
-    out: Dict[str, int] = {}
-    q = db.query(FrameworkRequirement).filter(
-        FrameworkRequirement.framework_version_id == framework_version_id
+    # requirement_code -> id (scoped to version)
+    rows = db.execute(
+        select(FrameworkRequirement.code, FrameworkRequirement.id)
+        .where(FrameworkRequirement.framework_version_id == framework_version_id,
+               FrameworkRequirement.code.isnot(None))
     )
-    for r in q.all():
-        if r.code:
-            out[str(r.code).strip()] = r.id
-    return out
+    return {str(code).strip(): id_ for code, id_ in rows}
 
 def _resolve_control_ids(db: Session) -> Dict[str, int]:
-    # Build a map: control_code -> id (assumes codes unique)
-    out: Dict[str, int] = {}
-    for c in db.query(Control).all():
-        if c.reference_code:
-            out[str(c.reference_code).strip()] = c.id
-    return out
+    # control_code -> id (assumes codes unique)
+    rows = db.execute(select(Control.reference_code, Control.id).where(Control.reference_code.isnot(None)))
+    return {str(code).strip(): id_ for code, id_ in rows}
+
+def _write_batch(db: Session, batch: Dict[Pair, Values], rep: CrosswalkImportReport, upsert: bool) -> None:
+    CFM = ControlFrameworkMapping
+    pairs = list(batch)
+    existing: Dict[Pair, Values] = {
+        (req_id, ctl_id): (weight, notes or None)
+        for req_id, ctl_id, weight, notes in db.execute(
+            select(CFM.framework_requirement_id, CFM.control_id, CFM.weight, CFM.notes)
+            .where(tuple_(CFM.framework_requirement_id, CFM.control_id).in_(pairs))
+        )
+    }
+    new = [p for p in pairs if p not in existing]
+    changed = [p for p in pairs if p in existing and existing[p] != batch[p]]
+    rep.created += len(new)
+    if upsert:
+        rep.updated += len(changed)
+    else:
+        rep.skipped += len(existing)
+
+    rows = [
+        {"framework_requirement_id": req_id, "control_id": ctl_id, "weight": batch[(req_id, ctl_id)][0],
+         "notes": batch[(req_id, ctl_id)][1]}
+        for req_id, ctl_id in (new + changed if upsert else new)
+    ]
+    if not rows:
+        return
+    table = CFM.__table__
+    stmt = pg_insert(table)
+    keys = [table.c.framework_requirement_id, table.c.control_id]
+    if upsert:
+        stmt = stmt.on_conflict_do_update(
+            index_elements=keys, set_={"weight": stmt.excluded.weight, "notes": stmt.excluded.notes})
+    else:
+        stmt = stmt.on_conflict_do_nothing(index_elements=keys)
+    db.execute(stmt, rows)
 
 def import_crosswalks_csv(
     db: Session,
     framework_version_id: int,
-    csv_text: str,
+    csv_text: Union[str, Iterable[str]],
     dry_run: bool = False,
     upsert: bool = True,
     default_weight: int = 100,
+    batch_size: int = BATCH_SIZE,
+    progress: Optional[Callable[[int], None]] = None,
 ) -> CrosswalkImportReport:
+    """csv_text: the CSV as a str or an iterable of lines; progress(rows_so_far) runs after every batch."""
     rep = CrosswalkImportReport()
-    rows = _parse_csv(csv_text)
-    rep.total_rows = len(rows)
-    if not rows:
-        return rep
+    reader = _reader(csv_text)
+    savepoint = db.begin_nested() if dry_run else None
+
+    req_code_to_id: Optional[Dict[str, int]] = None
+    ctl_code_to_id: Dict[str, int] = {}
+    batch: Dict[Pair, Values] = {}
 
-    # Build lookup caches
-    req_code_to_id = _resolve_requirement_ids(db, framework_version_id)
-    ctl_code_to_id = _resolve_control_ids(db)
+    def flush():
+        if batch:
+            _write_batch(db, batch, rep, upsert)
+            batch.clear()
+        if progress is not None:
+            progress(rep.total_rows)
 
-    for i, r in enumerate(rows, start=2):  # start=2 to account for header=1 when reporting line numbers
-        req_code = r["framework_requirement_code"]
-        ctl_code = r["control_code"]
+    for raw in reader:
+        rep.total_rows += 1
+        if req_code_to_id is None:  # lookups only once there is a row
+            req_code_to_id = _resolve_requirement_ids(db, framework_version_id)
+            ctl_code_to_id = _resolve_control_ids(db)
+
+        line = reader.line_num
+        req_code = (raw.get("framework_requirement_code") or "").strip()
+        ctl_code = (raw.get("control_code") or "").strip()
         if not req_code or not ctl_code:
-            rep.skipped += 1
-            rep.errors.append(f"Line {i}: missing framework_requirement_code or control_code")
+            rep.error(line, "missing framework_requirement_code or control_code")
             continue
 
         req_id = req_code_to_id.get(req_code)
         if not req_id:
-            rep.skipped += 1
-            rep.errors.append(f"Line {i}: requirement code '{req_code}' not found in version {framework_version_id}")
+            rep.error(line, f"requirement code '{req_code}' not found in version {framework_version_id}")
             continue
 
         ctl_id = ctl_code_to_id.get(ctl_code)
         if not ctl_id:
-            rep.skipped += 1
-            rep.errors.append(f"Line {i}: control code '{ctl_code}' not found")
+            rep.error(line, f"control code '{ctl_code}' not found")
             continue
 
         # parse weight
+        weight_raw = (raw.get("weight") or "").strip()
         try:
-            weight = int(r["weight"]) if r["weight"] else default_weight
+            weight = int(weight_raw) if weight_raw else default_weight
         except ValueError:
             weight = default_weight
 
-        notes = r["notes"] or None
+        notes = (raw.get("notes") or "").strip() or None
 
-        # Upsert
-        existing = (
-            db.query(ControlFrameworkMapping)
-            .filter(
-                ControlFrameworkMapping.framework_requirement_id == req_id,
-                ControlFrameworkMapping.control_id == ctl_id,
-            ).first()
-        )
+        pair = (req_id, ctl_id)
+        if pair in batch:  # a later row must see the earlier one as existing
+            flush()
+        batch[pair] = (weight, notes)
+        if len(batch) >= batch_size:
+            flush()
+    flush()
 
-        if existing:
-            if upsert:
-                changed = False
-                if existing.weight != weight:
-                    existing.weight = weight; changed = True
-                if (existing.notes or None) != notes:
-                    existing.notes = notes; changed = True
-                if changed and not dry_run:
-                    db.flush()
-                rep.updated += 1 if changed else 0
-            else:
-                rep.skipped += 1
-            continue
-
-        # Create new
-        if not dry_run:
-            obj = ControlFrameworkMapping(
-                framework_requirement_id=req_id,
-                control_id=ctl_id,
-                weight=weight,
-                notes=notes,
-            )
-            db.add(obj)
-        rep.created += 1
-
-    if not dry_run:
-        db.commit()
+    if savepoint is not None:
+        savepoint.rollback()
+        return rep
+    wrote = bool(rep.created or rep.updated)
+    if wrote:
+        mark_versions_dirty(db, [framework_version_id])
+    db.commit()
+    if wrote:
+        invalidate_coverage_matrices()
     return rep
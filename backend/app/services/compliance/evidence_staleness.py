@@ -1,73 +1,99 @@
-from datetime import datetime, timedelta
-from typing import List, Optional, Tuple
+"""
+Evidence staleness queue.
+
+Effective expiry of an evidence row is coalesce(valid_until, collected_at +
+EvidencePolicy.freshness_days) with the policy of the link's control (at most one:
+uq_evp_control_once). Filtering (expired / expiring_soon), ordering (soonest expiry
+first) and paging all run in the database; the counts come from window functions over
+the same filtered set, so every page carries the totals of the whole queue.
+
+The expiry mixes two tables, so it cannot be one indexed expression. The query is a
+UNION ALL of two branches instead, each range-scanning its own partial index on
+control_evidence:
+  - explicit expiry: valid_until in the window (ix_ce_valid_until)
+  - policy expiry: per control policy, the link's evidence without valid_until whose
+    collected_at is in the window shifted by freshness_days (ix_ce_link_collected_no_until)
+"""
+from datetime import date, datetime, timedelta
+from typing import Optional
+
+from sqlalchemy import Date, and_, case, func, literal, select, union_all
+from sqlalchemy.ext.compiler import compiles
 from sqlalchemy.orm import Session
+from sqlalchemy.sql.functions import FunctionElement
 
+from app.models.compliance.control_evidence import ControlEvidence
+from app.models.compliance.evidence_policy import EvidencePolicy
+from app.models.controls.control import Control
+from app.models.controls.control_context_link import ControlContextLink
+from app.models.risks.risk_scenario_context import RiskScenarioContext
 from app.schemas.compliance.evidence_staleness import (
     EvidenceStalenessItem,
     EvidenceStalenessResponse,
 )
 
-# --- Model imports (adjust if your paths differ) ---
 
-from app.models.compliance.control_evidence import ControlEvidence
+class add_days(FunctionElement):
+    """date + integer days (PostgreSQL date arithmetic; date() modifier on SQLite)."""
+    type = Date()
+    name = "add_days"
+    inherit_cache = True
 
 
-from app.models.controls.control_context_link import ControlContextLink
+@compiles(add_days)
+def _add_days_default(element, compiler, **kw):
+    d, n = list(element.clauses)
+    return f"({compiler.process(d, **kw)} + {compiler.process(n, **kw)})"
 
-try:
-    from app.models.controls.control import Control
-except Exception:
-    from app.models.compliance.control import Control  # type: ignore
 
-try:
-    from app.models.risks.risk_scenario_context import RiskScenarioContext
-except Exception:
-    from app.models.risks.context import RiskScenarioContext  # type: ignore
+@compiles(add_days, "sqlite")
+def _add_days_sqlite(element, compiler, **kw):
+    d, n = list(element.clauses)
+    return f"date({compiler.process(d, **kw)}, ({compiler.process(n, **kw)}) || ' days')"
 
-# Optional: if you keep freshness policy separately and want fallback calculation
-try:
-    from app.models.compliance.evidence_policy import EvidencePolicy
-except Exception:
-    EvidencePolicy = None  # type: ignore
 
+def _window(col, lo, hi, hi_strict: bool):
+    """lo <= col <(=) hi (lo optional); col may be compared against shifted bounds."""
+    preds = [col < hi if hi_strict else col <= hi]
+    if lo is not None:
+        preds.append(col >= lo)
+    return and_(*preds)
 
-def _resolve_valid_until(
-    db: Session,
-    ev: ControlEvidence,
-    ctrl_link: ControlContextLink,
-) -> Optional[datetime]:
-    """
-    Prefer explicit ev.valid_until.
-    If absent and an EvidencePolicy exists (by control_id), compute from ev.collected_at + policy.max_age_days.
-    Return None if cannot be resolved.
-    """
-    if getattr(ev, "valid_until", None):
-        return ev.valid_until
-
-    if EvidencePolicy is None:
-        return None
-
-    # Try find a policy by control_id (adjust filters if your model differs)
-    pol = (
-        db.query(EvidencePolicy)
-        .filter(EvidencePolicy.control_id == ctrl_link.control_id)
-        .order_by(EvidencePolicy.id.asc())  # if you have priority
-        .first()
-    )
-    if not pol:
-        return None
 
-    # Accept either "max_age_days" or "valid_for_days" field names
-    max_age_days = None
-    for attr in ("max_age_days", "valid_for_days", "fresh_for_days"):
-        if hasattr(pol, attr) and getattr(pol, attr) is not None:
-            max_age_days = int(getattr(pol, attr))
-            break
+def _branch(policy: bool, *, today: date, horizon: date, status: Optional[str],
+            scope_type: Optional[str], scope_id: Optional[int]):
+    CE, CCL, RSC = ControlEvidence, ControlContextLink, RiskScenarioContext
+    # window on the effective expiry: [today, horizon] for expiring_soon, (-inf, today) for expired
+    lo, hi, hi_strict = (None, today, True) if status == "expired" else (
+        (today, horizon, False) if status == "expiring_soon" else (None, horizon, False))
 
-    if max_age_days is None or not getattr(ev, "collected_at", None):
-        return None
+    if policy:
+        days = EvidencePolicy.freshness_days
+        expiry = add_days(CE.collected_at, days)
+        # shift the bounds instead of the column so collected_at stays index-searchable
+        shifted = lambda d: add_days(literal(d, Date), -days) if d is not None else None
+        stmt = (
+            select(CE.id.label("evidence_id"), expiry.label("expiry"))
+            .select_from(EvidencePolicy)
+            .join(CCL, CCL.control_id == EvidencePolicy.control_id)
+            .join(CE, CE.control_context_link_id == CCL.id)
+            .where(CE.valid_until.is_(None), _window(CE.collected_at, shifted(lo), shifted(hi), hi_strict))
+        )
+    else:
+        stmt = (
+            select(CE.id.label("evidence_id"), CE.valid_until.label("expiry"))
+            .select_from(CE)
+            .join(CCL, CCL.id == CE.control_context_link_id)
+            .where(CE.valid_until.isnot(None), _window(CE.valid_until, lo, hi, hi_strict))
+        )
 
-    return ev.collected_at + timedelta(days=max_age_days)
+    if scope_type or scope_id is not None:
+        stmt = stmt.outerjoin(RSC, RSC.id == CCL.risk_scenario_context_id)
+        if scope_type:
+            stmt = stmt.where(func.coalesce(CCL.scope_type, RSC.scope_type) == scope_type)
+        if scope_id is not None:
+            stmt = stmt.where(func.coalesce(CCL.scope_id, RSC.scope_id) == scope_id)
+    return stmt
 
 
 def list_stale_or_expiring_evidence(
@@ -80,87 +106,75 @@ def list_stale_or_expiring_evidence(
     size: int = 100,
 ) -> EvidenceStalenessResponse:
     """
-    Returns evidence items whose validity is already expired OR will expire within [within_days].
-    Optional scope filter via RiskScenarioContext.
+    Evidence whose effective expiry has passed or falls within [within_days], soonest
+    first. Scope filter on the link's own scope, else its risk context's scope.
     """
     now = datetime.utcnow()
-    horizon = now + timedelta(days=max(within_days, 0))
-
-    q = (
-        db.query(ControlEvidence, ControlContextLink, Control, RiskScenarioContext)
-        .join(ControlContextLink, ControlEvidence.control_context_link_id == ControlContextLink.id)
-        .join(Control, Control.id == ControlContextLink.control_id)
-        .join(RiskScenarioContext, RiskScenarioContext.id == ControlContextLink.risk_scenario_context_id)
-    )
-
-    if scope_type:
-        q = q.filter(RiskScenarioContext.scope_type == scope_type)
-    if scope_id is not None:
-        q = q.filter(RiskScenarioContext.scope_id == scope_id)
-
-    # We fetch a reasonable window and compute staleness in Python to support both explicit valid_until and policy-based computation.
-    # For performance in very large datasets, consider adding a DB-level filter for explicit valid_until.
-    q = q.order_by(ControlEvidence.id.desc())
-
-    # Pagination (apply after ordering)
-    offset = max(page - 1, 0) * max(size, 1)
-    rows = q.offset(offset).limit(size).all()
-
-    items: List[EvidenceStalenessItem] = []
-    expired_count = 0
-    expiring_count = 0
-
-    for ev, link, ctrl, ctx in rows:
-        valid_until = getattr(ev, "valid_until", None)
-        if not valid_until:
-            # Try to compute via policy if available
-            valid_until = _resolve_valid_until(db, ev, link)
-
-        if not valid_until:
-            # Unknown validity -> skip for this endpoint
-            continue
-
-        days_remaining = (valid_until - now).days
-        if valid_until < now:
-            st = "expired"
-        elif valid_until <= horizon:
-            st = "expiring_soon"
-        else:
-            # Healthy beyond horizon; skip
-            continue
-
-        if status and st != status:
-            continue
-
-        if st == "expired":
-            expired_count += 1
-        else:
-            expiring_count += 1
-
+    today = now.date()
+    horizon = today + timedelta(days=max(within_days, 0))
+    size = max(size, 1)
+    offset = max(page - 1, 0) * size
+
+    kw = dict(today=today, horizon=horizon, status=status, scope_type=scope_type, scope_id=scope_id)
+    queue = union_all(_branch(False, **kw), _branch(True, **kw)).subquery("queue")
+
+    CE, CCL, RSC = ControlEvidence, ControlContextLink, RiskScenarioContext
+    is_expired = case((queue.c.expiry < today, 1), else_=0)
+    rows = db.execute(
+        select(
+            queue.c.evidence_id, queue.c.expiry,
+            CE.collected_at, CE.evidence_url, CE.file_path, CE.description,
+            CCL.id.label("link_id"), CCL.control_id,
+            func.coalesce(Control.title_en, Control.title_de, Control.reference_code).label("control_name"),
+            func.coalesce(CCL.scope_type, RSC.scope_type).label("scope_type"),
+            func.coalesce(CCL.scope_id, RSC.scope_id).label("scope_id"),
+            func.count().over().label("total"),
+            func.sum(is_expired).over().label("expired"),
+        )
+        .join(CE, CE.id == queue.c.evidence_id)
+        .join(CCL, CCL.id == CE.control_context_link_id)
+        .join(Control, Control.id == CCL.control_id)
+        .outerjoin(RSC, RSC.id == CCL.risk_scenario_context_id)
+        .order_by(queue.c.expiry.asc(), queue.c.evidence_id.asc())
+        .offset(offset)
+        .limit(size)
+    ).all()
+
+    if rows:
+        total, expired_count = int(rows[0].total), int(rows[0].expired or 0)
+    elif offset:
+        # past the last page: the window columns are not available, count separately
+        total, expired_count = db.execute(
+            select(func.count(), func.coalesce(func.sum(is_expired), 0)).select_from(queue)
+        ).one()
+    else:
+        total = expired_count = 0
+
+    items = []
+    for r in rows:
+        expiry = r.expiry
         items.append(
             EvidenceStalenessItem(
-                evidence_id=ev.id,
-                control_context_link_id=link.id,
-                control_id=link.control_id,
-                control_name=getattr(ctrl, "name", None),
-                scope_type=getattr(ctx, "scope_type", None),
-                scope_id=getattr(ctx, "scope_id", None),
-                collected_at=getattr(ev, "collected_at", None),
-                valid_until=valid_until,
-                days_remaining=days_remaining,
-                status=st,  # type: ignore
-                uri=getattr(ev, "uri", None),
-                notes=getattr(ev, "notes", None),
+                evidence_id=r.evidence_id,
+                control_context_link_id=r.link_id,
+                control_id=r.control_id,
+                control_name=r.control_name,
+                scope_type=r.scope_type,
+                scope_id=r.scope_id,
+                collected_at=r.collected_at,
+                valid_until=expiry,
+                days_remaining=(expiry - today).days,
+                status="expired" if expiry < today else "expiring_soon",
+                uri=r.evidence_url or r.file_path,
+                notes=r.description,
             )
         )
 
-    # Sort by nearest deadline first (expired first, then soonest)
-    items.sort(key=lambda x: (0 if x.status == "expired" else 1, x.valid_until or now))
-
     return EvidenceStalenessResponse(
         now=now,
         within_days=within_days,
         expired_count=expired_count,
-        expiring_soon_count=expiring_count,
+        expiring_soon_count=total - expired_count,
+        total=total,
         items=items,
     )
@@ -0,0 +1,211 @@
+"""
+Lifecycle sweeper: moves time-driven state into stored status.
+
+Three set-based UPDATE ... RETURNING sweeps, run together in one transaction:
+  - exceptions: approved/active ComplianceException past end_date -> status "expired"
+  - evidence: active ControlEvidence still "valid" whose effective expiry
+    (valid_until, else collected_at + EvidencePolicy.freshness_days of the link's
+    control; same rule as services/compliance/evidence_staleness.py) has passed ->
+    status "expired", with one EvidenceLifecycleEvent("expired") per row, inserted in bulk
+  - SoA: "na" applicability decisions (ControlContextLink) past expires_at revert to
+    "applicable" until someone decides again; justification/approver stay for audit
+
+Core UPDATEs bypass the ORM flush listeners, so the sweep maintains the derived read
+models itself in the same transaction (coverage_snapshot dirty marking,
+risk_context_summary refresh). After commit it emits change notifications: local
+subscribers (subscribe()) get the LifecycleChange with the affected ids, and on
+PostgreSQL a NOTIFY on LIFECYCLE_CHANNEL (counts only) reaches other processes.
+
+Runs as a leader-only job of the in-process scheduler (services/scheduler.py, every
+LIFECYCLE_SWEEP_SECONDS) or via scripts/lifecycle_sweep.py. Every sweep is
+idempotent: rows it changed no longer match its predicate.
+"""
+from __future__ import annotations
+
+import json
+import logging
+from datetime import date, datetime
+from itertools import chain
+from typing import Any, Callable, Dict, Iterable, List, NamedTuple, Optional, Set, Tuple
+
+from sqlalchemy import func, literal, select, Date
+from sqlalchemy.orm import Session
+
+from app.models.compliance.control_evidence import ControlEvidence
+from app.models.compliance.evidence_policy import EvidencePolicy
+from app.models.compliance.exception import ComplianceException
+from app.models.controls.control_context_link import ControlContextLink
+from app.models.evidence.evidence_lifecycle_event import EvidenceLifecycleEvent
+from app.models.risks.risk_scenario_context import RiskScenarioContext
+from app.services.compliance.coverage_snapshot import mark_scopes_dirty
+from app.services.compliance.evidence_staleness import add_days
+from app.services.risk_context_summary import context_ids_affected, refresh_context_summaries
+
+logger = logging.getLogger(__name__)
+
+LIFECYCLE_CHANNEL = "lifecycle_change"
+EXCEPTION_ACTIVE_STATUSES = ("approved", "active")
+
+
+class LifecycleChange(NamedTuple):
+    kind: str               # "exception_expired" | "evidence_expired" | "soa_expired"
+    ids: Tuple[int, ...]    # exception / evidence / control_context_link ids
+
+
+_subscribers: List[Callable[[LifecycleChange], None]] = []
+
+
+def subscribe(fn: Callable[[LifecycleChange], None]) -> Callable[[LifecycleChange], None]:
+    """Register a callback for committed sweep changes (usable as a decorator)."""
+    _subscribers.append(fn)
+    return fn
+
+
+def _notify_local(changes: Iterable[LifecycleChange]) -> None:
+    for change in changes:
+        if not change.ids:
+            continue
+        for fn in list(_subscribers):
+            try:
+                fn(change)
+            except Exception:
+                logger.exception("lifecycle subscriber %r failed", fn)
+
+
+# ---------------- sweeps (current transaction; caller commits) ----------------
+
+def sweep_exceptions(db: Session, today: date, now: datetime) -> List[Tuple[int, Optional[int]]]:
+    """[(exception id, risk_scenario_context_id)] flipped to "expired"."""
+    E = ComplianceException.__table__
+    return [tuple(r) for r in db.execute(
+        E.update()
+        .where(E.c.end_date.isnot(None), E.c.end_date < today, E.c.status.in_(EXCEPTION_ACTIVE_STATUSES))
+        .values(status="expired", updated_at=now)
+        .returning(E.c.id, E.c.risk_scenario_context_id)
+    ).all()]
+
+
+def sweep_evidence(db: Session, today: date, now: datetime) -> List[Tuple[int, int]]:
+    """[(evidence id, control_context_link_id)] flipped to "expired"; writes their lifecycle events."""
+    CE, CCL, P = ControlEvidence.__table__, ControlContextLink.__table__, EvidencePolicy.__table__
+    live = (CE.c.status == "valid", CE.c.lifecycle_status == "active")
+
+    explicit = db.execute(
+        CE.update()
+        .where(*live, CE.c.valid_until.isnot(None), CE.c.valid_until < today)
+        .values(status="expired")
+        .returning(CE.c.id, CE.c.control_context_link_id, CE.c.valid_until)
+    ).all()
+
+    policy_expired = (
+        select(CCL.c.id)
+        .join(P, P.c.control_id == CCL.c.control_id)
+        .where(CCL.c.id == CE.c.control_context_link_id,
+               CE.c.collected_at < add_days(literal(today, Date), -P.c.freshness_days))
+        .exists()
+    )
+    by_policy = db.execute(
+        CE.update()
+        .where(*live, CE.c.valid_until.is_(None), policy_expired)
+        .values(status="expired")
+        .returning(CE.c.id, CE.c.control_context_link_id, CE.c.collected_at)
+    ).all()
+
+    events = [
+        {"evidence_id": ev_id, "event": "expired", "actor_id": None, "created_at": now,
+         "notes": "valid_until passed", "meta": {"rule": "valid_until", "valid_until": str(valid_until)}}
+        for ev_id, _, valid_until in explicit
+    ] + [
+        {"evidence_id": ev_id, "event": "expired", "actor_id": None, "created_at": now,
+         "notes": "evidence policy freshness exceeded", "meta": {"rule": "policy", "collected_at": str(collected)}}
+        for ev_id, _, collected in by_policy
+    ]
+    if events:
+        db.execute(EvidenceLifecycleEvent.__table__.insert(), events)
+    return [(ev_id, link_id) for ev_id, link_id, _ in chain(explicit, by_policy)]
+
+
+def sweep_soa(db: Session, today: date, now: datetime) -> List[Tuple[int, Optional[str], Optional[int], Optional[int]]]:
+    """[(link id, scope_type, scope_id, risk_scenario_context_id)] whose "na" decision lapsed."""
+    CCL = ControlContextLink.__table__
+    return [tuple(r) for r in db.execute(
+        CCL.update()
+        .where(CCL.c.applicability == "na", CCL.c.expires_at.isnot(None), CCL.c.expires_at < today)
+        .values(applicability="applicable", status_updated_at=now)
+        .returning(CCL.c.id, CCL.c.scope_type, CCL.c.scope_id, CCL.c.risk_scenario_context_id)
+    ).all()]
+
+
+# ---------------- derived state ----------------
+
+def _context_scopes(db: Session, context_ids: Set[int]) -> Set[Tuple[str, int]]:
+    if not context_ids:
+        return set()
+    return {
+        (st, sid) for st, sid in db.query(RiskScenarioContext.scope_type, RiskScenarioContext.scope_id)
+                                   .filter(RiskScenarioContext.id.in_(context_ids)).all()
+    }
+
+
+def _link_scopes(db: Session, link_ids: Set[int]) -> Tuple[Set[Tuple[str, int]], Set[int]]:
+    """(direct scopes, risk context ids) of the given links."""
+    scopes: Set[Tuple[str, int]] = set()
+    ctx_ids: Set[int] = set()
+    if link_ids:
+        for st, sid, ctx_id in db.query(ControlContextLink.scope_type, ControlContextLink.scope_id,
+                                        ControlContextLink.risk_scenario_context_id) \
+                                 .filter(ControlContextLink.id.in_(link_ids)).all():
+            if st and sid is not None:
+                scopes.add((st, sid))
+            elif ctx_id is not None:
+                ctx_ids.add(ctx_id)
+    return scopes, ctx_ids
+
+
+def _update_derived(db: Session, exceptions, evidence, soa) -> None:
+    link_ids = {link_id for _, link_id in evidence} | {link_id for link_id, *_ in soa}
+    scopes, ctx_ids = _link_scopes(db, link_ids)
+    mark_scopes_dirty(db, scopes | _context_scopes(db, ctx_ids))
+
+    exc_ctx_ids = {ctx_id for _, ctx_id in exceptions if ctx_id is not None}
+    mark_scopes_dirty(db, _context_scopes(db, exc_ctx_ids), inherited=False, rollups=False)
+
+    refresh_context_summaries(db, context_ids_affected(db, link_ids=link_ids))
+
+
+def _notify_db(db: Session, counts: Dict[str, int]) -> None:
+    if db.get_bind().dialect.name == "postgresql" and any(counts.values()):
+        db.execute(select(func.pg_notify(LIFECYCLE_CHANNEL, json.dumps(counts))))
+
+
+def run_lifecycle_sweep(db: Session, *, today: Optional[date] = None) -> Dict[str, Any]:
+    """Run all sweeps in one transaction, commit, then notify. Returns the counts."""
+    now = datetime.utcnow()
+    today = today or now.date()
+    try:
+        exceptions = sweep_exceptions(db, today, now)
+        evidence = sweep_evidence(db, today, now)
+        soa = sweep_soa(db, today, now)
+        counts = {"exceptions_expired": len(exceptions), "evidence_expired": len(evidence),
+                  "soa_expired": len(soa)}
+        _update_derived(db, exceptions, evidence, soa)
+        _notify_db(db, counts)
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+
+    _notify_local([
+        LifecycleChange("exception_expired", tuple(i for i, _ in exceptions)),
+        LifecycleChange("evidence_expired", tuple(i for i, _ in evidence)),
+        LifecycleChange("soa_expired", tuple(r[0] for r in soa)),
+    ])
+    return {"today": today, **counts}
+
+
+def expire_exceptions(db: Session, *, today: Optional[date] = None) -> int:
+    """Exceptions-only sweep with the same derived-state maintenance (caller commits)."""
+    now = datetime.utcnow()
+    exceptions = sweep_exceptions(db, today or now.date(), now)
+    _update_derived(db, exceptions, [], [])
+    return len(exceptions)
@@ -17,7 +17,6 @@ from app.models.compliance.control_framework_mapping import ControlFrameworkMapp
 from app.models.controls.control import Control
 from app.models.controls.control_context_link import ControlContextLink
 from app.models.compliance.control_evidence import ControlEvidence
-from app.core.utils import _to_dt
 
 
 
@@ -200,17 +199,13 @@ def _load_mappings_and_evidence(
                 ControlEvidence.file_path.label("file_path"),
                 ControlEvidence.collected_at.label("collected_at"),
                 ControlEvidence.valid_until.label("valid_until"),
+                ControlEvidence.status.label("status"),
             )
             .filter(ControlEvidence.control_context_link_id.in_(link_ids))
             .order_by(ControlEvidence.collected_at.desc().nullslast())
             .all()
         )
-        now = datetime.utcnow()
         for e in evidences:
-            status = None
-            if e.valid_until:
-                vu_dt = _to_dt(e.valid_until)
-                status = "expired" if (vu_dt is not None and vu_dt < now) else "valid"
             evidence_out.append(
                 EvidenceOut(
                     evidence_id=e.id,
@@ -220,7 +215,7 @@ def _load_mappings_and_evidence(
                     file_path=e.file_path,
                     collected_at=e.collected_at,
                     valid_until=e.valid_until,
-                    status=status,
+                    status=e.status,
                 )
             )
 
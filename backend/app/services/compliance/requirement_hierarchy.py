@@ -0,0 +1,283 @@
+"""
+Per-version requirement hierarchy index.
+
+Every requirement of a framework version gets one requirement_hierarchy row: its
+pre-order number, the pre-order number of the last node of its subtree
+(pre_order_end), its post-order number, depth, top-level id, the materialized path of
+ancestor ids and the code breadcrumb. "All descendants of X" is a range predicate on
+(version_id, pre_order) and breadcrumbs are a column read instead of a parent_id walk.
+
+requirement_hierarchy_build holds one row per version with the etag of the serialized
+requirements tree (sha1 of its JSON body). The tree endpoint reads only that etag to
+answer If-None-Match; bodies are cached in-process per version and keyed by the etag,
+so a worker never serves a tree that differs from the index it just read.
+
+The index is rebuilt inside the writing transaction whenever a SessionLocal flush
+touches FrameworkRequirement rows (CSV import, CRUD); Core/bulk writers call
+rebuild_hierarchy() themselves. Versions without a build row (data older than the
+index) are indexed on first read, or up front by scripts/rebuild_requirement_hierarchy.py.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import threading
+from collections import defaultdict
+from datetime import datetime
+from itertools import chain
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from sqlalchemy import and_, event, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.inspection import inspect as sa_inspect
+from sqlalchemy.orm import Session, aliased
+
+from app.database import SessionLocal
+from app.models.compliance.framework_requirement import FrameworkRequirement
+from app.models.compliance.framework_version import FrameworkVersion
+from app.models.compliance.requirement_hierarchy import RequirementHierarchy, RequirementHierarchyBuild
+
+logger = logging.getLogger(__name__)
+
+TREE_CACHE_MAX_VERSIONS = 64
+PATH_SEP = "."
+BREADCRUMB_SEP = " > "
+
+_PENDING_KEY = "requirement_hierarchy_versions"
+
+
+# ---------------- build ----------------
+
+def _tree_node(r) -> Dict[str, Any]:
+    return {"id": r.id, "code": r.code, "title": r.title, "parent_id": r.parent_id,
+            "sort_index": r.sort_index, "children": []}
+
+
+def _dumps(tree: List[Dict[str, Any]]) -> bytes:
+    return json.dumps(tree, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+
+def _etag(body: bytes) -> str:
+    return '"%s"' % hashlib.sha1(body).hexdigest()
+
+
+def _walk(version_id: int, reqs: List[Any]) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+    """
+    (index rows in pre-order, serialized tree) of one version's requirements.
+
+    Roots are the requirements without a parent ordered by (sort_index, id), then the
+    ones whose parent is outside the version; siblings are ordered by (sort_index, id).
+    Parent cycles are unreachable from a root and are entered at their lowest id.
+    """
+    by_id = {r.id: r for r in reqs}
+    children: Dict[int, List[Any]] = defaultdict(list)
+    roots, orphans = [], []
+    for r in reqs:
+        if not r.parent_id:
+            roots.append(r)
+        elif r.parent_id in by_id:
+            children[r.parent_id].append(r)
+        else:
+            orphans.append(r)
+    order = lambda r: (r.sort_index or 0, r.id)
+    roots.sort(key=order)
+    orphans.sort(key=lambda r: (r.parent_id, r.sort_index or 0, r.id))
+    for kids in children.values():
+        kids.sort(key=order)
+
+    index: List[Dict[str, Any]] = []
+    tree: List[Dict[str, Any]] = []
+    seen: Set[int] = set()
+    post = 0
+
+    def enter(r, parent_row: Optional[Dict[str, Any]], siblings: List[Dict[str, Any]]):
+        seen.add(r.id)
+        label = r.code or str(r.id)
+        row = {
+            "requirement_id": r.id,
+            "version_id": version_id,
+            "pre_order": len(index),
+            "pre_order_end": len(index),
+            "post_order": 0,
+            "depth": parent_row["depth"] + 1 if parent_row else 0,
+            "top_level_id": parent_row["top_level_id"] if parent_row else r.id,
+            "path": f"{parent_row['path']}{PATH_SEP}{r.id}" if parent_row else str(r.id),
+            "breadcrumb": f"{parent_row['breadcrumb']}{BREADCRUMB_SEP}{label}" if parent_row else label,
+        }
+        index.append(row)
+        node = _tree_node(r)
+        siblings.append(node)
+        return [row, node, iter(children.get(r.id, ()))]
+
+    for start in chain(roots, orphans, sorted(reqs, key=lambda r: r.id)):
+        if start.id in seen:
+            continue
+        stack = [enter(start, None, tree)]
+        while stack:
+            row, node, kids = stack[-1]
+            child = next((c for c in kids if c.id not in seen), None)
+            if child is not None:
+                stack.append(enter(child, row, node["children"]))
+                continue
+            row["pre_order_end"] = len(index) - 1
+            row["post_order"] = post
+            post += 1
+            stack.pop()
+    return index, tree
+
+
+def rebuild_hierarchy(db: Session, version_ids: Iterable[int]) -> Dict[int, str]:
+    """
+    Rebuild the index (and build row) of the given versions in the current
+    transaction (caller commits). Returns {version_id: tree etag}. Every existing
+    version gets a build row, empty ones included; unknown ids only get an etag.
+    """
+    FR = FrameworkRequirement
+    H, B = RequirementHierarchy.__table__, RequirementHierarchyBuild.__table__
+    version_ids = sorted({int(v) for v in version_ids if v is not None})
+    existing = set(db.execute(select(FrameworkVersion.id).where(FrameworkVersion.id.in_(version_ids))).scalars())
+    out: Dict[int, str] = {}
+    for vid in version_ids:
+        reqs = db.execute(
+            select(FR.id, FR.code, FR.title, FR.parent_id, FR.sort_index)
+            .where(FR.framework_version_id == vid)
+        ).all()
+        rows, tree = _walk(vid, reqs)
+        body = _dumps(tree)
+        etag = _etag(body)
+        db.execute(H.delete().where(H.c.version_id == vid))
+        db.execute(B.delete().where(B.c.version_id == vid))
+        if rows:
+            db.execute(H.insert(), rows)
+        if vid in existing:
+            db.execute(B.insert(), [{"version_id": vid, "etag": etag, "node_count": len(rows),
+                                     "built_at": datetime.utcnow()}])
+        _remember(vid, etag, body)
+        out[vid] = etag
+    return out
+
+
+def ensure_hierarchy(db: Session, version_id: int) -> str:
+    """Tree etag of the version, building (and committing) its index when it has none yet."""
+    B = RequirementHierarchyBuild
+    etag = db.query(B.etag).filter(B.version_id == version_id).scalar()
+    if etag is not None:
+        return etag
+    try:
+        etag = rebuild_hierarchy(db, [version_id])[version_id]
+        db.commit()
+    except IntegrityError:
+        # another worker indexed the version concurrently
+        db.rollback()
+        etag = db.query(B.etag).filter(B.version_id == version_id).scalar()
+    except Exception:
+        db.rollback()
+        raise
+    return etag
+
+
+# ---------------- queries ----------------
+
+def descendant_ids(db: Session, version_id: int, ancestor_id: int, *, include_self: bool = True) -> Set[int]:
+    """Ids in the subtree of ancestor_id (one range scan on ix_req_hier_v_pre)."""
+    ensure_hierarchy(db, version_id)
+    H = RequirementHierarchy
+    X = aliased(RequirementHierarchy)
+    lower = H.pre_order >= X.pre_order if include_self else H.pre_order > X.pre_order
+    rows = (
+        db.query(H.requirement_id)
+        .join(X, and_(X.version_id == H.version_id, X.requirement_id == ancestor_id))
+        .filter(H.version_id == version_id, lower, H.pre_order <= X.pre_order_end)
+        .all()
+    )
+    return {rid for (rid,) in rows}
+
+
+def ancestor_ids(path: Optional[str]) -> List[int]:
+    """Ids of a stored path, root first (the requirement itself last)."""
+    return [int(p) for p in path.split(PATH_SEP)] if path else []
+
+
+# ---------------- serialized tree ----------------
+
+_lock = threading.Lock()
+_tree_cache: Dict[int, Tuple[str, bytes]] = {}
+
+
+def _remember(version_id: int, etag: str, body: bytes) -> None:
+    with _lock:
+        _tree_cache.pop(version_id, None)
+        _tree_cache[version_id] = (etag, body)
+        while len(_tree_cache) > TREE_CACHE_MAX_VERSIONS:
+            _tree_cache.pop(next(iter(_tree_cache)))
+
+
+def tree_etag(db: Session, version_id: int) -> str:
+    return ensure_hierarchy(db, version_id)
+
+
+def tree_body(db: Session, version_id: int, etag: str) -> bytes:
+    """JSON body of the tree whose etag is `etag`, served from the cache or the index (pre-order scan)."""
+    hit = _tree_cache.get(version_id)
+    if hit and hit[0] == etag:
+        return hit[1]
+    H, FR = RequirementHierarchy, FrameworkRequirement
+    rows = (
+        db.query(H.depth, FR.id, FR.code, FR.title, FR.parent_id, FR.sort_index)
+        .join(FR, FR.id == H.requirement_id)
+        .filter(H.version_id == version_id)
+        .order_by(H.pre_order.asc())
+        .all()
+    )
+    tree: List[Dict[str, Any]] = []
+    stack: List[Dict[str, Any]] = []
+    for r in rows:
+        node = _tree_node(r)
+        del stack[r.depth:]
+        (stack[-1]["children"] if stack else tree).append(node)
+        stack.append(node)
+    body = _dumps(tree)
+    _remember(version_id, etag, body)
+    return body
+
+
+def get_tree_json(db: Session, version_id: int) -> Tuple[str, bytes]:
+    etag = tree_etag(db, version_id)
+    return etag, tree_body(db, version_id, etag)
+
+
+# ---------------- write-time rebuild (flush events) ----------------
+
+def _versions_of(obj: FrameworkRequirement) -> List[int]:
+    hist = sa_inspect(obj).attrs.framework_version_id.history
+    return [v for v in chain(hist.added or (), hist.unchanged or (), hist.deleted or ()) if v is not None]
+
+
+@event.listens_for(SessionLocal, "after_flush")
+def _collect_requirement_writes(session: Session, flush_context) -> None:
+    for obj in chain(session.new, session.dirty, session.deleted):
+        if isinstance(obj, FrameworkRequirement):
+            session.info.setdefault(_PENDING_KEY, set()).update(_versions_of(obj))
+
+
+@event.listens_for(SessionLocal, "after_flush_postexec")
+def _rebuild_after_flush(session: Session, flush_context) -> None:
+    version_ids = session.info.pop(_PENDING_KEY, None)
+    if not version_ids:
+        return
+    savepoint = session.connection().begin_nested()
+    try:
+        rebuild_hierarchy(session, version_ids)
+        savepoint.commit()
+    except Exception:
+        # never fail the business write because of the index; drop the build rows so reads rebuild it
+        savepoint.rollback()
+        logger.exception("requirement_hierarchy rebuild failed")
+        B = RequirementHierarchyBuild.__table__
+        savepoint = session.connection().begin_nested()
+        try:
+            session.execute(B.delete().where(B.c.version_id.in_(version_ids)))
+            savepoint.commit()
+        except Exception:
+            savepoint.rollback()
@@ -1,131 +1,363 @@
+"""
+Framework requirement CSV import (ext_id based), optionally with obligation atoms.
+
+Requirements file: ext_id (required), code, title, text, sort_index and the parent as
+parent_ext_id (another row of the file) or parent_code (a row of the file, else an
+existing requirement of the version). Atoms file: requirement_ext_id or
+requirement_code, atom_key and obligation_text (required), role, condition, outcome,
+citation, sort_index.
+
+Rows match existing requirements of the version by code; the others are created.
+Empty cells keep the stored value. The import is planned in memory first (one SELECT
+of the version's requirements, parents resolved in one pass and levelled
+topologically; cycles are reported and left unlinked), so a dry run reports exactly
+what a real run writes, and diff=True lists it per requirement. A real run then
+writes with multi-row statements: one INSERT ... RETURNING per tree level (parents
+first, so parent_id is set on insert), one executemany UPDATE for changed existing
+rows and one INSERT ... ON CONFLICT (framework_requirement_id, atom_key) for atoms.
+
+Core writes bypass the ORM flush listeners, so in the same transaction the import
+rebuilds the version's hierarchy index and marks its coverage snapshots dirty (the
+PostgreSQL search vectors are generated columns and follow the rows); after commit it
+invalidates the in-process search index and coverage matrices.
+"""
 import csv
 from io import StringIO
-from typing import List, Dict, Optional
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Set, Tuple, Union
+
+from sqlalchemy import bindparam, insert, select, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.orm import Session
 
 from app.models.compliance.framework_requirement import FrameworkRequirement
-from app.schemas.compliance.imports import ImportResult
+from app.models.compliance.obligation_atom import ObligationAtom
+from app.schemas.compliance.imports import ImportResult, RequirementChange, RequirementImportDiff
+from app.services.compliance.coverage_matrix import invalidate_coverage_matrices
+from app.services.compliance.coverage_snapshot import mark_versions_dirty
+from app.services.compliance.requirement_hierarchy import rebuild_hierarchy
+from app.services.search import invalidate_search_index
+
+CsvSource = Union[str, Iterable[str]]
+ParentRef = Tuple[str, Any]  # ("file", ext_id) | ("db", requirement id)
+
+ATOM_FIELDS = ("role", "obligation_text", "condition", "outcome", "citation", "sort_index")
+
+def _clean(v) -> Optional[str]:
+    return (v or "").strip() or None
+
+def _sort_index(v) -> int:
+    return int(v) if (str(v or "").strip().isdigit()) else 0
 
 class RowIn:
     def __init__(self, ext_id: str, parent_ext_id: Optional[str], title: Optional[str],
-                 text: Optional[str], code: Optional[str], sort_index: Optional[int]):
+                 text: Optional[str], code: Optional[str], sort_index: Optional[int],
+                 parent_code: Optional[str] = None, line: int = 0):
         self.ext_id = (ext_id or "").strip()
-        self.parent_ext_id = (parent_ext_id or "").strip() or None
-        self.title = (title or "").strip() or None
-        self.text = (text or "").strip() or None
-        self.code = (code or "").strip() or None
-        self.sort_index = int(sort_index) if (str(sort_index or "").strip().isdigit()) else 0
-
-def parse_csv_text_idbased(text: str) -> List[RowIn]:
-    reader = csv.DictReader(StringIO(text))
-    required = {"ext_id"}
-    missing = required - set([c.strip() for c in (reader.fieldnames or [])])
+        self.parent_ext_id = _clean(parent_ext_id)
+        self.parent_code = _clean(parent_code)
+        self.title = _clean(title)
+        self.text = _clean(text)
+        self.code = _clean(code)
+        self.sort_index = _sort_index(sort_index)
+        self.line = line
+
+class AtomIn:
+    def __init__(self, raw: Dict[str, Optional[str]], line: int):
+        self.requirement_ext_id = _clean(raw.get("requirement_ext_id"))
+        self.requirement_code = _clean(raw.get("requirement_code"))
+        self.atom_key = _clean(raw.get("atom_key"))
+        self.role = _clean(raw.get("role"))
+        self.obligation_text = _clean(raw.get("obligation_text"))
+        self.condition = _clean(raw.get("condition"))
+        self.outcome = _clean(raw.get("outcome"))
+        self.citation = _clean(raw.get("citation"))
+        self.sort_index = _sort_index(raw.get("sort_index")) if _clean(raw.get("sort_index")) else None
+        self.line = line
+
+class _Existing(NamedTuple):
+    id: int
+    title: Optional[str]
+    text: Optional[str]
+    sort_index: int
+    parent_id: Optional[int]
+
+def _reader(source: CsvSource, required: Set[str]) -> csv.DictReader:
+    reader = csv.DictReader(StringIO(source) if isinstance(source, str) else source)
+    reader.fieldnames = [c.strip() for c in (reader.fieldnames or [])]
+    missing = required - set(reader.fieldnames)
     if missing:
         raise ValueError(f"CSV missing required columns: {', '.join(sorted(missing))}")
+    return reader
 
-    rows: List[RowIn] = []
-    for raw in reader:
-        rows.append(RowIn(
+def parse_csv_text_idbased(text: CsvSource) -> List[RowIn]:
+    reader = _reader(text, {"ext_id"})
+    return [
+        RowIn(
             ext_id=raw.get("ext_id"),
             parent_ext_id=raw.get("parent_ext_id"),
             title=raw.get("title"),
             text=raw.get("text"),
             code=raw.get("code"),
             sort_index=raw.get("sort_index"),
-        ))
-    return rows
+            parent_code=raw.get("parent_code"),
+            line=reader.line_num,
+        )
+        for raw in reader
+    ]
+
+def parse_atoms_csv(text: CsvSource) -> List[AtomIn]:
+    reader = _reader(text, {"atom_key", "obligation_text"})
+    if not {"requirement_ext_id", "requirement_code"} & set(reader.fieldnames):
+        raise ValueError("Atoms CSV needs a requirement_ext_id or requirement_code column")
+    return [AtomIn(raw, reader.line_num) for raw in reader]
+
+# ---------------- planning (in memory) ----------------
+
+def _resolve_parents(valid: Dict[str, RowIn], ext_by_code: Dict[str, str],
+                     existing: Dict[str, _Existing], errors: List[str]) -> Dict[str, ParentRef]:
+    parent_of: Dict[str, ParentRef] = {}
+    for r in valid.values():
+        if r.parent_ext_id:
+            if r.parent_ext_id == r.ext_id:
+                errors.append(f"Cycle self-parent for ext_id '{r.ext_id}'")
+            elif r.parent_ext_id in valid:
+                parent_of[r.ext_id] = ("file", r.parent_ext_id)
+            else:
+                errors.append(f"Missing parent_ext_id '{r.parent_ext_id}' for ext_id '{r.ext_id}'")
+        elif r.parent_code:
+            parent_ext = ext_by_code.get(r.parent_code)
+            if parent_ext == r.ext_id:
+                errors.append(f"Cycle self-parent for ext_id '{r.ext_id}'")
+            elif parent_ext is not None:
+                parent_of[r.ext_id] = ("file", parent_ext)
+            elif r.parent_code in existing:
+                parent_of[r.ext_id] = ("db", existing[r.parent_code].id)
+            else:
+                errors.append(f"Missing parent_code '{r.parent_code}' for ext_id '{r.ext_id}'")
+    return parent_of
+
+def _levels(valid: Dict[str, RowIn], parent_of: Dict[str, ParentRef], errors: List[str]) -> Dict[str, int]:
+    """Depth of every row below its nearest non-file ancestor; unlinks (and reports) cycles."""
+    level: Dict[str, int] = {}
+    for ext in valid:
+        path: List[str] = []
+        on_path: Set[str] = set()
+        cur = ext
+        while cur not in level:
+            if cur in on_path:
+                cycle = path[path.index(cur):]
+                errors.append(f"Cycle in parents: {' -> '.join(cycle + [cur])}; left unlinked")
+                for n in cycle:
+                    parent_of.pop(n, None)
+                    on_path.discard(n)
+                del path[path.index(cur):]
+                continue
+            ref = parent_of.get(cur)
+            if ref is None or ref[0] == "db":
+                level[cur] = 0
+                break
+            path.append(cur)
+            on_path.add(cur)
+            cur = ref[1]
+        depth = level[cur]
+        for n in reversed(path):
+            depth += 1
+            level[n] = depth
+    return level
+
+def _parent_id(ref: Optional[ParentRef], ids: Dict[str, int]) -> Optional[int]:
+    if ref is None:
+        return None
+    return ref[1] if ref[0] == "db" else ids.get(ref[1])
+
+def _changed_fields(r: RowIn, e: _Existing, ref: Optional[ParentRef], ids: Dict[str, int]) -> List[str]:
+    fields = []
+    if r.title is not None and r.title != (e.title or None):
+        fields.append("title")
+    if r.text is not None and r.text != (e.text or None):
+        fields.append("text")
+    if r.sort_index != e.sort_index:
+        fields.append("sort_index")
+    if ref is not None and (ref[0] == "file" and ref[1] not in ids  # parent is created by this import
+                            or _parent_id(ref, ids) != e.parent_id):
+        fields.append("parent_id")
+    return fields
+
+# ---------------- atoms ----------------
+
+def _import_atoms(db: Session, atoms: List[AtomIn], ids: Dict[str, int], valid: Dict[str, RowIn],
+                  ext_by_code: Dict[str, str], existing: Dict[str, _Existing],
+                  errors: List[str], dry_run: bool) -> Tuple[int, int]:
+    """(created, updated); requirements of this import that are not inserted yet key as ("new", ext_id)."""
+    planned: Dict[Tuple[Any, str], AtomIn] = {}
+    for a in atoms:
+        if not a.atom_key or not a.obligation_text:
+            errors.append(f"Atoms line {a.line}: missing atom_key or obligation_text")
+            continue
+        ext = a.requirement_ext_id if a.requirement_ext_id in valid else ext_by_code.get(a.requirement_code or "")
+        if ext is not None:
+            req_key: Any = ids.get(ext, ("new", ext))
+        elif a.requirement_code in existing:
+            req_key = existing[a.requirement_code].id
+        else:
+            errors.append(f"Atoms line {a.line}: requirement '{a.requirement_ext_id or a.requirement_code}' not found")
+            continue
+        if (req_key, a.atom_key) in planned:
+            errors.append(f"Atoms line {a.line}: duplicate atom_key '{a.atom_key}' for its requirement; skipped")
+            continue
+        planned[(req_key, a.atom_key)] = a
+
+    OA = ObligationAtom
+    req_ids = {k for k, _ in planned if isinstance(k, int)}
+    stored: Dict[Tuple[int, str], Tuple[Any, ...]] = {}
+    if req_ids:
+        for row in db.execute(
+            select(OA.framework_requirement_id, OA.atom_key, *(getattr(OA, f) for f in ATOM_FIELDS))
+            .where(OA.framework_requirement_id.in_(req_ids))
+        ):
+            stored[(row[0], row[1])] = tuple(row[2:])
+
+    created = updated = 0
+    writes: List[Dict[str, Any]] = []
+    for key, a in planned.items():
+        old = stored.get(key)
+        if old is None:
+            created += 1
+            old = (None,) * len(ATOM_FIELDS[:-1]) + (0,)
+        elif any(getattr(a, f) is not None and getattr(a, f) != v for f, v in zip(ATOM_FIELDS, old)):
+            updated += 1
+        else:
+            continue
+        # empty cells keep the stored value (merged here: NOT NULL applies before ON CONFLICT)
+        writes.append({"framework_requirement_id": key[0], "atom_key": a.atom_key,
+                       **{f: getattr(a, f) if getattr(a, f) is not None else v for f, v in zip(ATOM_FIELDS, old)}})
+    if dry_run or not writes:
+        return created, updated
+
+    table = OA.__table__
+    stmt = pg_insert(table)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[table.c.framework_requirement_id, table.c.atom_key],
+        set_={f: stmt.excluded[f] for f in ATOM_FIELDS},
+    )
+    db.execute(stmt, writes)
+    return created, updated
+
+# ---------------- import ----------------
 
 def import_requirements_csv_idbased(
     db: Session,
     framework_version_id: int,
-    csv_text: str,
+    csv_text: CsvSource,
     dry_run: bool = False,
+    atoms_csv: Optional[CsvSource] = None,
+    diff: bool = False,
 ) -> ImportResult:
+    """csv_text / atoms_csv: the CSV as a str or an iterable of lines (e.g. a streamed upload)."""
     rows = parse_csv_text_idbased(csv_text)
-    if not rows:
-        # NOTE: If your ImportResult still uses 'framework_id' field name, keep it and pass version id into it.
-        return ImportResult(
-            framework_version_id=framework_version_id,  # or framework_id=framework_version_id
-            total_rows=0, created=0, updated=0, linked_parents=0, dry_run=dry_run, skipped=0, errors=[]
-        )
-
-    created = updated = linked = skipped = 0
+    atoms = parse_atoms_csv(atoms_csv) if atoms_csv is not None else []
     errors: List[str] = []
+    skipped = 0
 
-    # Pass 1: insert or update rows (without parents)
-    ext_to_id: Dict[str, int] = {}
-    staged: List[FrameworkRequirement] = []
-
+    valid: Dict[str, RowIn] = {}
+    ext_by_code: Dict[str, str] = {}
     for r in rows:
         if not r.ext_id:
             skipped += 1
             continue
-
-        obj: Optional[FrameworkRequirement] = None
+        if r.ext_id in valid:
+            skipped += 1
+            errors.append(f"Line {r.line}: duplicate ext_id '{r.ext_id}'; skipped")
+            continue
+        if r.code and r.code in ext_by_code:
+            skipped += 1
+            errors.append(f"Line {r.line}: duplicate code '{r.code}' (ext_id '{r.ext_id}'); skipped")
+            continue
+        valid[r.ext_id] = r
         if r.code:
-            obj = (
-                db.query(FrameworkRequirement)
-                .filter(
-                    FrameworkRequirement.framework_version_id == framework_version_id,
-                    FrameworkRequirement.code == r.code
-                )
-                .first()
-            )
+            ext_by_code[r.code] = r.ext_id
 
-        if obj:
-            changed = False
-            if r.title is not None and r.title != (obj.title or None):
-                obj.title = r.title; changed = True
-            if r.text is not None and r.text != (obj.text or None):
-                obj.text = r.text; changed = True
-            if r.code is not None and r.code != (obj.code or None):
-                obj.code = r.code; changed = True
-            if obj.sort_index != r.sort_index:
-                obj.sort_index = r.sort_index; changed = True
-            if changed:
-                updated += 1
-        else:
-            obj = FrameworkRequirement(
-                framework_version_id=framework_version_id,
-                code=r.code,
-                title=r.title,
-                text=r.text,
-                sort_index=r.sort_index,
-            )
-            db.add(obj)
-            created += 1
+    FR = FrameworkRequirement
+    existing: Dict[str, _Existing] = {}
+    for id_, code, title, text, sort_index, parent_id in db.execute(
+        select(FR.id, FR.code, FR.title, FR.text, FR.sort_index, FR.parent_id)
+        .where(FR.framework_version_id == framework_version_id, FR.code.isnot(None))
+        .order_by(FR.id)
+    ):
+        existing.setdefault(code, _Existing(id_, title, text, sort_index, parent_id))
 
-        staged.append(obj)
+    match = {ext: existing[r.code] for ext, r in valid.items() if r.code in existing}
+    parent_of = _resolve_parents(valid, ext_by_code, existing, errors)
+    level = _levels(valid, parent_of, errors)
+    ids: Dict[str, int] = {ext: e.id for ext, e in match.items()}
 
-    if not dry_run:
-        db.flush()  # assign IDs
+    created = updated = linked = unchanged = 0
+    report = RequirementImportDiff() if diff else None
+    changes: Dict[str, List[str]] = {}
+    for ext, r in valid.items():
+        ref = parent_of.get(ext)
+        if ext not in match:
+            created += 1
+            linked += ref is not None
+            if report is not None:
+                report.created.append(RequirementChange(ext_id=ext, code=r.code))
+            continue
+        fields = _changed_fields(r, match[ext], ref, ids)
+        if not fields:
+            unchanged += 1
+            continue
+        changes[ext] = fields
+        updated += any(f != "parent_id" for f in fields)
+        linked += "parent_id" in fields
+        if report is not None:
+            report.updated.append(RequirementChange(ext_id=ext, code=r.code, fields=fields))
+    if report is not None:
+        report.unchanged = unchanged
+        matched_codes = {r.code for ext, r in valid.items() if ext in match}
+        report.not_in_file = [code for code in existing if code not in matched_codes]
 
-    # Build ext_id → db id map (for new and updated)
-    for r, obj in zip(rows, staged):
-        if obj and getattr(obj, "id", None):
-            ext_to_id[r.ext_id] = obj.id
+    if not dry_run:
+        T = FR.__table__
+        new_exts = [ext for ext in valid if ext not in match]
+        for depth in sorted({level[ext] for ext in new_exts}):
+            batch = [valid[ext] for ext in new_exts if level[ext] == depth]
+            new_ids = db.execute(
+                insert(T).returning(T.c.id, sort_by_parameter_order=True),
+                [{"framework_version_id": framework_version_id, "code": r.code, "title": r.title,
+                  "text": r.text, "sort_index": r.sort_index,
+                  "parent_id": _parent_id(parent_of.get(r.ext_id), ids)} for r in batch],
+            ).scalars().all()
+            ids.update(zip((r.ext_id for r in batch), new_ids))
+        if changes:
+            db.execute(
+                update(T).where(T.c.id == bindparam("_id"))
+                .values(title=bindparam("_title"), text=bindparam("_text"),
+                        sort_index=bindparam("_sort_index"), parent_id=bindparam("_parent_id")),
+                [{"_id": e.id,
+                  "_title": valid[ext].title if valid[ext].title is not None else e.title,
+                  "_text": valid[ext].text if valid[ext].text is not None else e.text,
+                  "_sort_index": valid[ext].sort_index,
+                  "_parent_id": _parent_id(parent_of[ext], ids) if ext in parent_of else e.parent_id}
+                 for ext, e in ((ext, match[ext]) for ext in changes)],
+            )
 
-    # Pass 2: resolve parents by parent_ext_id
-    for r, obj in zip(rows, staged):
-        if not obj:
-            continue
-        if r.parent_ext_id:
-            parent_id = ext_to_id.get(r.parent_ext_id)
-            if not parent_id:
-                errors.append(f"Missing parent_ext_id '{r.parent_ext_id}' for ext_id '{r.ext_id}'")
-                continue
-            if not dry_run and obj.parent_id != parent_id:
-                if obj.id == parent_id:
-                    errors.append(f"Cycle self-parent for ext_id '{r.ext_id}'")
-                    continue
-                obj.parent_id = parent_id
-                linked += 1
+    atoms_created, atoms_updated = _import_atoms(
+        db, atoms, ids, valid, ext_by_code, existing, errors, dry_run) if atoms else (0, 0)
 
     if not dry_run:
+        wrote_requirements = bool(created or changes)
+        if wrote_requirements:
+            rebuild_hierarchy(db, [framework_version_id])
+            mark_versions_dirty(db, [framework_version_id])
         db.commit()
+        if wrote_requirements:
+            invalidate_search_index()
+            invalidate_coverage_matrices()
+        elif atoms_created or atoms_updated:
+            invalidate_search_index()
 
     return ImportResult(
-        framework_version_id=framework_version_id,  # or framework_id=framework_version_id if your schema hasn't been renamed yet
+        framework_version_id=framework_version_id,
         total_rows=len(rows),
         created=created,
         updated=updated,
@@ -133,4 +365,9 @@ def import_requirements_csv_idbased(
         dry_run=dry_run,
         skipped=skipped,
         errors=errors,
+        unchanged=unchanged,
+        atoms_total=len(atoms),
+        atoms_created=atoms_created,
+        atoms_updated=atoms_updated,
+        diff=report,
     )
@@ -1,8 +1,8 @@
 # requirements_status.py
 
-from typing import List, Optional, Dict, Tuple, Set
+from typing import Iterable, Iterator, List, Optional, Dict, Tuple, Set
 from datetime import datetime, timezone
-from sqlalchemy import select, func, distinct, or_, and_
+from sqlalchemy import select, func, distinct, or_, and_, tuple_
 from sqlalchemy.orm import Session
 from sqlalchemy.inspection import inspect as sa_inspect
 
@@ -14,6 +14,8 @@ from app.models.compliance.framework_requirement import FrameworkRequirement
 from app.models.compliance.control_framework_mapping import ControlFrameworkMapping
 from app.models.controls.control_context_link import ControlContextLink
 from app.models.compliance.control_evidence import ControlEvidence
+from app.models.compliance.requirement_hierarchy import RequirementHierarchy
+from app.services.compliance.requirement_hierarchy import descendant_ids, ensure_hierarchy
 
 
 def _now_utc():
@@ -26,15 +28,15 @@ def _now_utc():
 def valid_evidence_filters(now_db=None):
     """
     Reusable SQLAlchemy predicates for 'valid evidence'.
+    Expiry is read from the stored status: the lifecycle sweeper moves evidence past its
+    valid_until / policy freshness to "expired", so only the start bound is checked here.
     We standardize on DB time (func.now()) to avoid date vs datetime issues.
     """
     now_db = now_db or func.now()
     filters = [ControlEvidence.status == "valid"]
-    # If your schema has these columns, include time bounds; otherwise they’re ignored by SQLA.
+    # If your schema has this column, include the start bound; otherwise it's ignored by SQLA.
     if hasattr(ControlEvidence, "valid_from"):
         filters.append(or_(ControlEvidence.valid_from.is_(None), ControlEvidence.valid_from <= now_db))
-    if hasattr(ControlEvidence, "valid_until"):
-        filters.append(or_(ControlEvidence.valid_until.is_(None), ControlEvidence.valid_until >= now_db))
     return and_(*filters)
 
 
@@ -63,6 +65,9 @@ def _required_col(model, *candidates, **kw):
 
 
 def _load_req_meta(db: Session, version_id: int) -> Dict[int, Dict]:
+    """Requirement fields plus top-level id and breadcrumb from the hierarchy index."""
+    ensure_hierarchy(db, version_id)
+    H = RequirementHierarchy
     rows = (
         db.query(
             FrameworkRequirement.id,
@@ -70,7 +75,10 @@ def _load_req_meta(db: Session, version_id: int) -> Dict[int, Dict]:
             FrameworkRequirement.title,
             FrameworkRequirement.parent_id,
             FrameworkRequirement.sort_index,
+            H.top_level_id,
+            H.breadcrumb,
         )
+        .outerjoin(H, H.requirement_id == FrameworkRequirement.id)
         .filter(FrameworkRequirement.framework_version_id == version_id)
         .all()
     )
@@ -80,28 +88,13 @@ def _load_req_meta(db: Session, version_id: int) -> Dict[int, Dict]:
             "title": r.title,
             "parent_id": r.parent_id,
             "sort_index": r.sort_index,
+            "top_level_id": r.top_level_id,
+            "breadcrumb": r.breadcrumb,
         }
         for r in rows
     }
 
 
-def _compute_path(meta_by_id: Dict[int, Dict], req_id: int, _cache: Dict[int, Tuple[List[int], List[str]]]):
-    if req_id in _cache:
-        return _cache[req_id]
-    ids_rev, codes_rev, seen = [], [], set()
-    cur = req_id
-    while cur and cur in meta_by_id and cur not in seen:
-        seen.add(cur)
-        m = meta_by_id[cur]
-        ids_rev.append(cur)
-        codes_rev.append(m.get("code") or str(cur))
-        cur = m.get("parent_id")
-    ids_path = list(reversed(ids_rev))
-    codes_path = list(reversed(codes_rev))
-    _cache[req_id] = (ids_path, codes_path)
-    return ids_path, codes_path
-
-
 # --- NEW: counts-only helper (same logic as list/rollup, but for one scope_id) ---
 def compute_status_counts(
     db: Session,
@@ -214,6 +207,110 @@ def compute_status_counts(
         "unknown": int(unknown),
     }
 
+GRID_SCOPE_CHUNK = 500  # (scope_type, scope_id) pairs per tuple-IN round trip
+
+StatusKey = Tuple[int, str, int]  # (version_id, scope_type, scope_id)
+
+
+def _counts_row(total: int, mapped: int, impl: int, met: int) -> Dict[str, int]:
+    unknown = max(total - mapped, 0)
+    return {
+        "total": int(total),
+        "applicable": int(max(total - unknown, 0)),
+        "met": int(met),
+        "met_by_exception": 0,  # presence-based logic does not split exceptions
+        "partial": int(max(impl - met, 0)),
+        "gap": int(max(mapped - impl, 0)),
+        "unknown": int(unknown),
+    }
+
+
+def _version_totals(db: Session, version_ids: List[int]) -> Dict[int, Tuple[int, int]]:
+    """{version_id: (total requirements, mapped requirements)} in one grouped query."""
+    rows = db.execute(
+        select(
+            FrameworkRequirement.framework_version_id,
+            func.count(distinct(FrameworkRequirement.id)),
+            func.count(distinct(ControlFrameworkMapping.framework_requirement_id)),
+        )
+        .select_from(FrameworkRequirement)
+        .outerjoin(ControlFrameworkMapping, ControlFrameworkMapping.framework_requirement_id == FrameworkRequirement.id)
+        .where(FrameworkRequirement.framework_version_id.in_(version_ids))
+        .group_by(FrameworkRequirement.framework_version_id)
+    ).all()
+    return {vid: (int(total), int(mapped)) for vid, total, mapped in rows}
+
+
+def _scope_req_counts(db: Session, version_ids: List[int], scopes: List[Tuple[str, int]], *, met: bool) -> Dict[StatusKey, int]:
+    """
+    Distinct requirements per (version, scope) with a CCL at the scope (met=False), or with
+    valid evidence now on such a CCL (met=True) - the grouped form of compute_status_counts.
+    """
+    CCL = ControlContextLink
+    q = (
+        select(
+            FrameworkRequirement.framework_version_id, CCL.scope_type, CCL.scope_id,
+            func.count(distinct(ControlFrameworkMapping.framework_requirement_id)),
+        )
+        .select_from(ControlFrameworkMapping)
+        .join(FrameworkRequirement, FrameworkRequirement.id == ControlFrameworkMapping.framework_requirement_id)
+        .join(CCL, CCL.control_id == ControlFrameworkMapping.control_id)
+        .where(
+            FrameworkRequirement.framework_version_id.in_(version_ids),
+            tuple_(CCL.scope_type, CCL.scope_id).in_(scopes),
+            or_(CCL.applicability.is_(None), CCL.applicability != "na"),
+        )
+        .group_by(FrameworkRequirement.framework_version_id, CCL.scope_type, CCL.scope_id)
+    )
+    if met:
+        q = q.join(ControlEvidence, ControlEvidence.control_context_link_id == CCL.id).where(valid_evidence_filters())
+    return {(vid, st, sid): int(n) for vid, st, sid, n in db.execute(q).all()}
+
+
+def iter_status_counts_many(
+    db: Session,
+    *,
+    version_ids: Iterable[int],
+    scopes: Iterable[Tuple[str, int]],
+    chunk_size: int = GRID_SCOPE_CHUNK,
+) -> Iterator[List[Tuple[StatusKey, Dict[str, int]]]]:
+    """
+    compute_status_counts for a whole (version x scope) grid, yielded one scope chunk at a
+    time: one totals query for all versions, then two grouped queries per chunk.
+    Cells come out in (scope, version) order of the inputs.
+    """
+    vids = list(dict.fromkeys(int(v) for v in version_ids))
+    pairs = list(dict.fromkeys((st, int(sid)) for st, sid in scopes))
+    if not vids or not pairs:
+        return
+    totals = _version_totals(db, vids)
+    chunk_size = max(1, int(chunk_size))
+    for i in range(0, len(pairs), chunk_size):
+        chunk = pairs[i:i + chunk_size]
+        impl = _scope_req_counts(db, vids, chunk, met=False)
+        met = _scope_req_counts(db, vids, chunk, met=True)
+        cells = []
+        for st, sid in chunk:
+            for vid in vids:
+                total, mapped = totals.get(vid, (0, 0))
+                key = (vid, st, sid)
+                cells.append((key, _counts_row(total, mapped, impl.get(key, 0), met.get(key, 0))))
+        yield cells
+
+
+def compute_status_counts_many(
+    db: Session,
+    *,
+    version_ids: Iterable[int],
+    scopes: Iterable[Tuple[str, int]],
+) -> Dict[StatusKey, Dict[str, int]]:
+    """{(version_id, scope_type, scope_id): compute_status_counts(...)} for every grid cell."""
+    out: Dict[StatusKey, Dict[str, int]] = {}
+    for cells in iter_status_counts_many(db, version_ids=version_ids, scopes=scopes):
+        out.update(cells)
+    return out
+
+
 def list_requirements_status(
     db: Session,
     version_id: int,
@@ -267,7 +364,6 @@ def list_requirements_status(
     now = _now_utc()
 
     meta_by_id = _load_req_meta(db, version_id)
-    path_cache: Dict[int, Tuple[List[int], List[str]]] = {}
 
     # All requirement ids for the version
     all_req_ids = [r for (r,) in db.execute(
@@ -330,10 +426,9 @@ def list_requirements_status(
     items: List[RequirementStatusItem] = []
     for req_id in all_req_ids:
         m = meta_by_id.get(req_id, {})
-        ids_path, codes_path = _compute_path(meta_by_id, req_id, path_cache)
-        top_level_id = ids_path[0] if ids_path else None
-        top_level_code = codes_path[0] if codes_path else None
-        breadcrumb = " > ".join(codes_path) if codes_path else None
+        top_level_id = m.get("top_level_id")
+        top_level_code = (meta_by_id.get(top_level_id, {}).get("code") or str(top_level_id)) if top_level_id else None
+        breadcrumb = m.get("breadcrumb")
 
         s = _status_for(req_id)
         score = 1.0 if s == "met" else (0.5 if s == "partial" else 0.0)
@@ -365,9 +460,8 @@ def list_requirements_status(
                  or qnorm in (x.breadcrumb or "").lower()]
 
     if ancestor_id:
-        items = [x for x in items if x.top_level_id == ancestor_id
-                 or x.parent_id == ancestor_id
-                 or str(ancestor_id) in (x.breadcrumb or "")]
+        subtree = descendant_ids(db, version_id, ancestor_id)
+        items = [x for x in items if x.requirement_id in subtree]
 
     # Sort
     reverse = (sort_dir.lower() == "desc")
@@ -1,31 +1,25 @@
 from __future__ import annotations
-from datetime import datetime
-from typing import Literal, Optional
+from typing import Literal
 from sqlalchemy.orm import Session
 from sqlalchemy import select, func
-from app.common.datetime import _to_dt
 from app.models.compliance.control_evidence import ControlEvidence
 
 StatusKey = Literal["met", "partial", "gap", "unknown"]
 
 def get_control_status(db: Session, *, context_link_id: int) -> StatusKey:
     """
-    Canonical minimal derivation:
-      - met: any evidence exists AND (valid_until is null or in the future)
-      - unknown: otherwise
+    Canonical minimal derivation from the stored evidence status:
+      - met: any "valid" evidence
+      - partial: evidence exists but none is valid (e.g. swept to "expired")
+      - unknown: no evidence
     Replace with richer logic when ready.
     """
     row = db.execute(
         select(
             func.count(ControlEvidence.id),
-            func.max(ControlEvidence.valid_until),
+            func.count(ControlEvidence.id).filter(ControlEvidence.status == "valid"),
         ).where(ControlEvidence.control_context_link_id == context_link_id)
     ).first()
-    if not row:
+    if not row or not row[0]:
         return "unknown"
-    cnt: int = int(row[0] or 0)
-    last_valid_until: Optional[datetime] = row[1]
-    vu_dt = _to_dt(last_valid_until)
-    if cnt and (last_valid_until is None or vu_dt >= datetime.utcnow()):
-        return "met"
-    return "unknown"
+    return "met" if row[1] else "partial"
@@ -1,6 +1,7 @@
-from typing import Dict, List, Optional, Tuple
+from collections import defaultdict
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
 from sqlalchemy.orm import Session
-from sqlalchemy import or_, and_
+from sqlalchemy import or_, select, literal, tuple_, union_all
 
 from app.constants.scopes import PRECEDENCE, normalize_scope
 from app.schemas.controls.effective_control import EffectiveControlOut
@@ -15,8 +16,9 @@ from app.models.org.service_consumer import OrgServiceConsumer
 # Optional models (guard imports if not present in your tree)
 try:
     from app.models.assets.asset import Asset
+    from app.models.assets.asset_tag import asset_tags_links
 except Exception:
-    Asset = None
+    Asset, asset_tags_links = None, None
 try:
     from app.models.org.site import OrgSite
 except Exception:
@@ -35,6 +37,18 @@ _STATUS_RANK = {
     "mapped": 10,
 }
 _SOURCE_RANK = {"direct": 3, "provider": 2, "baseline": 1}
+_INHERITANCE_RANK = {"direct": 3, "conditional": 2, "advisory": 1}
+
+ScopeKey = Tuple[str, int]
+
+
+class Layer(NamedTuple):
+    """One overlay layer: links sitting at (scope_type, scope_id) count as `source`."""
+    scope_type: str
+    scope_id: int
+    source: str                          # direct|provider|baseline
+    provider_info: Optional[dict] = None
+
 
 def _precedence_index(scope_type: str) -> int:
     st = normalize_scope(scope_type)
@@ -58,286 +72,215 @@ def _best(a: EffectiveControlOut, b: EffectiveControlOut) -> EffectiveControlOut
         return a if ra > rb else b
     return a
 
-def _collect_links_for_scope(db: Session, scope_type: str, scope_id: int) -> List[CCL]:
-    """Scope-only links + risk-linked links that resolve to this scope."""
-    st = normalize_scope(scope_type)
-    q1 = db.query(CCL).filter(
-        CCL.risk_scenario_context_id.is_(None),
-        CCL.scope_type == st,
-        CCL.scope_id == scope_id,
-    )
-    q2 = (
-        db.query(CCL)
-        .join(RSC, CCL.risk_scenario_context_id == RSC.id)
-        .filter(RSC.scope_type == st, RSC.scope_id == scope_id)
-    )
-    return list(q1) + list(q2)
-
-def _service_links_for_consumer(db: Session, entity_id: int, bu_id: Optional[int]):
-    """Return service-consumer rows for an entity/BU, deduped by strongest inheritance."""
-    q = db.query(OrgServiceConsumer).filter(OrgServiceConsumer.consumer_entity_id == entity_id)
-    if bu_id is None:
-        q = q.filter(OrgServiceConsumer.consumer_bu_id.is_(None))
-    else:
-        q = q.filter(or_(OrgServiceConsumer.consumer_bu_id.is_(None),
-                         OrgServiceConsumer.consumer_bu_id == bu_id))
-    rows = q.all()
-    rank = {"direct": 3, "conditional": 2, "advisory": 1}
-    by_service = {}
+def _provider_layer(sc: OrgServiceConsumer) -> Layer:
+    return Layer("service", sc.service_id, "provider", {
+        "service_id": sc.service_id,
+        "inheritance_type": sc.inheritance_type,
+        "responsibility": sc.responsibility,
+    })
+
+def _strongest_per_service(rows: List[OrgServiceConsumer]) -> List[OrgServiceConsumer]:
+    """Dedupe service-consumer rows by service, keeping the strongest inheritance."""
+    by_service: Dict[int, OrgServiceConsumer] = {}
     for sc in rows:
         cur = by_service.get(sc.service_id)
-        if not cur or rank.get(sc.inheritance_type, 0) > rank.get(cur.inheritance_type, 0):
+        if not cur or _INHERITANCE_RANK.get(sc.inheritance_type, 0) > _INHERITANCE_RANK.get(cur.inheritance_type, 0):
             by_service[sc.service_id] = sc
     return list(by_service.values())
 
-def _resolve_asset_layers(db: Session, asset_id: int) -> Optional[dict]:
-    if Asset is None:
-        return None
-    asset = db.query(Asset).get(asset_id)
-    if not asset:
-        return None
-
-    # Support both naming styles
-    atid = getattr(asset, "asset_type_id", None)
-    if atid is None:
-        atid = getattr(asset, "type_id", None)
-
-    gid = getattr(asset, "asset_group_id", None)
-    if gid is None:
-        gid = getattr(asset, "group_id", None)
-
-    # Tags: try common relationship names; fallback to single tag_id if you have it
-    tag_ids: list[int] = []
-    if hasattr(asset, "tags") and asset.tags:
-        tag_ids = [getattr(t, "id", None) or getattr(getattr(t, "tag", None), "id", None) for t in asset.tags]
-    elif hasattr(asset, "asset_tags") and asset.asset_tags:
-        for t in asset.asset_tags:
-            if hasattr(t, "id"):
-                tag_ids.append(t.id)
-            elif hasattr(t, "tag") and t.tag:
-                tag_ids.append(t.tag.id)
-    elif hasattr(asset, "tag_id") and getattr(asset, "tag_id") is not None:
-        tag_ids = [getattr(asset, "tag_id")]
-
-    tag_ids = [tid for tid in tag_ids if tid is not None]
-
-    return {
-        # normalized keys the overlay uses downstream
-        "asset_type_id": atid,
-        "asset_group_id": gid,
-        "tag_ids": tag_ids,
-
-        # org links (optional today)
-        "entity_id": getattr(asset, "entity_id", None),
-        "bu_id": getattr(asset, "business_unit_id", getattr(asset, "bu_id", None)),
-        "site_id": getattr(asset, "site_id", None),
-    }
-
-
-
+# -----------------------
+# Layer resolution (batched lookups, no per-scope queries)
+# -----------------------
+def resolve_layers_many(db: Session, scopes: Iterable[ScopeKey]) -> Dict[ScopeKey, List[Layer]]:
+    """
+    Ordered overlay layers per requested scope, most specific first. Parent pointers
+    (asset taxonomy/org, site/BU -> entity -> org group, service consumers) are loaded
+    with one query per table for all scopes together.
+    """
+    keys: List[ScopeKey] = list(dict.fromkeys((normalize_scope(st), int(sid)) for st, sid in scopes))
+    by_type: Dict[str, set] = defaultdict(set)
+    for st, sid in keys:
+        by_type[st].add(sid)
+
+    # assets -> taxonomy + org pointers, tags
+    assets: Dict[int, dict] = {}
+    if Asset is not None and by_type.get("asset"):
+        for aid, atid, gid, eid, buid, siteid in (
+            db.query(Asset.id, Asset.type_id, Asset.group_id, Asset.entity_id, Asset.business_unit_id, Asset.site_id)
+            .filter(Asset.id.in_(by_type["asset"]))
+            .all()
+        ):
+            assets[aid] = {"asset_type_id": atid, "asset_group_id": gid, "tag_ids": [],
+                           "entity_id": eid, "bu_id": buid, "site_id": siteid}
+        if assets:
+            for aid, tid in db.execute(
+                select(asset_tags_links.c.asset_id, asset_tags_links.c.tag_id)
+                .where(asset_tags_links.c.asset_id.in_(assets))
+                .order_by(asset_tags_links.c.asset_id, asset_tags_links.c.tag_id)
+            ):
+                assets[aid]["tag_ids"].append(tid)
+
+    sites: Dict[int, Optional[int]] = {}
+    if OrgSite is not None and by_type.get("site"):
+        sites = dict(db.query(OrgSite.id, OrgSite.entity_id).filter(OrgSite.id.in_(by_type["site"])).all())
+
+    bus: Dict[int, Optional[int]] = {}
+    if by_type.get("bu"):
+        bus = dict(db.query(OrgBusinessUnit.id, OrgBusinessUnit.entity_id)
+                   .filter(OrgBusinessUnit.id.in_(by_type["bu"])).all())
+
+    entity_ids = set(by_type.get("entity", ())) | set(bus.values()) | set(sites.values())
+    entity_ids |= {a["entity_id"] for a in assets.values()}
+    entity_ids.discard(None)
+    entity_group: Dict[int, Optional[int]] = {}
+    if entity_ids:
+        entity_group = dict(db.query(OrgEntity.id, OrgEntity.group_id).filter(OrgEntity.id.in_(entity_ids)).all())
+
+    consumer_bu_ids = set(by_type.get("bu", ())) | {a["bu_id"] for a in assets.values() if a["bu_id"]}
+    consumers: List[OrgServiceConsumer] = []
+    if entity_ids or consumer_bu_ids:
+        conds = []
+        if entity_ids:
+            conds.append(OrgServiceConsumer.consumer_entity_id.in_(entity_ids))
+        if consumer_bu_ids:
+            conds.append(OrgServiceConsumer.consumer_bu_id.in_(consumer_bu_ids))
+        consumers = db.query(OrgServiceConsumer).filter(or_(*conds)).order_by(OrgServiceConsumer.id).all()
+
+    def _consumers_for(entity_id: int, bu_id: Optional[int]) -> List[OrgServiceConsumer]:
+        # entity-wide rows, plus the BU's own rows when a BU is given
+        return [sc for sc in consumers
+                if sc.consumer_entity_id == entity_id and (sc.consumer_bu_id is None or sc.consumer_bu_id == bu_id)]
+
+    def _org_tail(entity_id: Optional[int], providers: List[OrgServiceConsumer]) -> List[Layer]:
+        out = [_provider_layer(sc) for sc in providers]
+        group_id = entity_group.get(entity_id) if entity_id else None
+        if group_id:
+            out.append(Layer("org_group", group_id, "baseline"))
+        return out
+
+    layers: Dict[ScopeKey, List[Layer]] = {}
+    for st, sid in keys:
+        ls = [Layer(st, sid, "direct")]
+
+        # Entity/BU overlays: (BU: parent entity) + providers + org_group baseline
+        if st == "entity" and sid in entity_group:
+            ls += _org_tail(sid, _strongest_per_service(_consumers_for(sid, None)))
+        elif st == "bu" and bus.get(sid):
+            ent_id = bus[sid]
+            ls.append(Layer("entity", ent_id, "baseline"))
+            ls += _org_tail(ent_id, _strongest_per_service(_consumers_for(ent_id, sid)))
+
+        # Asset overlays: type/group/tag + owner site/BU/entity + providers + org_group
+        elif st == "asset" and sid in assets:
+            a = assets[sid]
+            if a["asset_type_id"]:
+                ls.append(Layer("asset_type", a["asset_type_id"], "baseline"))
+            if a["asset_group_id"]:
+                ls.append(Layer("asset_group", a["asset_group_id"], "baseline"))
+            ls += [Layer("tag", tid, "baseline") for tid in a["tag_ids"]]
+            if a["site_id"] and OrgSite:
+                ls.append(Layer("site", a["site_id"], "baseline"))
+            bu_id, ent_id = a["bu_id"], a["entity_id"]
+            if bu_id:
+                ls.append(Layer("bu", bu_id, "baseline"))
+            if ent_id:
+                ls.append(Layer("entity", ent_id, "baseline"))
+                # entity-wide providers + BU-specific ones (any entity), not deduped
+                providers = [sc for sc in consumers
+                             if (sc.consumer_entity_id == ent_id and sc.consumer_bu_id is None)
+                             or (bu_id is not None and sc.consumer_bu_id == bu_id)]
+                ls += _org_tail(ent_id, providers)
+
+        # Site overlays: parent entity + providers + org_group
+        elif st == "site" and sites.get(sid):
+            ent_id = sites[sid]
+            ls.append(Layer("entity", ent_id, "baseline"))
+            ls += _org_tail(ent_id, _strongest_per_service(_consumers_for(ent_id, None)))
+
+        layers[(st, sid)] = ls
+    return layers
+
+
+def fetch_layer_links(db: Session, scope_keys: Iterable[ScopeKey]) -> Dict[ScopeKey, List[CCL]]:
+    """
+    All links resolving to any of the scopes, in one statement: scope-only links at the
+    scope plus risk-linked links whose context sits at the scope (tuple-IN on both sides).
+    Per scope the scope-only links come first, each part ordered by link id.
+    """
+    keys = list({(normalize_scope(st), int(sid)) for st, sid in scope_keys})
+    out: Dict[ScopeKey, List[CCL]] = defaultdict(list)
+    if not keys:
+        return out
+    scope_only = select(
+        CCL.id.label("link_id"), CCL.scope_type.label("st"), CCL.scope_id.label("sid"), literal(0).label("part"),
+    ).where(CCL.risk_scenario_context_id.is_(None), tuple_(CCL.scope_type, CCL.scope_id).in_(keys))
+    via_context = select(
+        CCL.id.label("link_id"), RSC.scope_type.label("st"), RSC.scope_id.label("sid"), literal(1).label("part"),
+    ).join(RSC, CCL.risk_scenario_context_id == RSC.id).where(tuple_(RSC.scope_type, RSC.scope_id).in_(keys))
+    hits = union_all(scope_only, via_context).subquery()
+
+    rows = (
+        db.query(CCL, hits.c.st, hits.c.sid)
+        .join(hits, hits.c.link_id == CCL.id)
+        .order_by(hits.c.st, hits.c.sid, hits.c.part, CCL.id)
+        .all()
+    )
+    for link, st, sid in rows:
+        out[(st, sid)].append(link)
+    return out
+
+
+def overlay_inputs(db: Session, scopes: Iterable[ScopeKey]) -> Tuple[Dict[ScopeKey, List[Layer]], Dict[ScopeKey, List[CCL]]]:
+    """Layers per scope plus the links of every distinct layer scope (one link query in total)."""
+    layers = resolve_layers_many(db, scopes)
+    links = fetch_layer_links(db, {(l.scope_type, l.scope_id) for ls in layers.values() for l in ls})
+    return layers, links
+
+
+def _effective(r: CCL, layer: Layer) -> EffectiveControlOut:
+    ec = EffectiveControlOut(
+        control_id=r.control_id,
+        link_id=r.id,
+        source=layer.source,
+        assurance_status=r.assurance_status,
+        scope_type=layer.scope_type,
+        scope_id=layer.scope_id,
+        notes=r.notes,
+    )
+    if layer.provider_info:
+        ec.provider_service_id = layer.provider_info.get("service_id")
+        ec.inheritance_type = layer.provider_info.get("inheritance_type")
+        ec.responsibility = layer.provider_info.get("responsibility")
+    return ec
 
 
 # -----------------------
 # Core API
 # -----------------------
+def get_effective_controls_many(db: Session, scopes: Iterable[ScopeKey]) -> Dict[ScopeKey, List[EffectiveControlOut]]:
+    """Effective controls for many scopes at once: {(scope_type, scope_id): winners}."""
+    layers, links = overlay_inputs(db, scopes)
+    out: Dict[ScopeKey, List[EffectiveControlOut]] = {}
+    for key, ls in layers.items():
+        winners: Dict[int, EffectiveControlOut] = {}
+        for layer in ls:
+            for r in links.get((layer.scope_type, layer.scope_id), ()):
+                ec = _effective(r, layer)
+                cur = winners.get(ec.control_id)
+                winners[ec.control_id] = _best(cur, ec) if cur else ec
+        out[key] = list(winners.values())
+    return out
+
+
 def get_effective_controls(db: Session, scope_type: str, scope_id: int) -> List[EffectiveControlOut]:
-    scope_type = normalize_scope(scope_type)
-    winners: Dict[int, EffectiveControlOut] = {}
-
-    def _consider(rows: List[CCL], source: str, base_scope: Tuple[str, int], provider_info: Optional[dict] = None):
-        for r in rows:
-            ec = EffectiveControlOut(
-                control_id=r.control_id,
-                link_id=r.id,
-                source=source,
-                assurance_status=r.assurance_status,
-                scope_type=base_scope[0],
-                scope_id=base_scope[1],
-                notes=r.notes,
-            )
-            if provider_info:
-                ec.provider_service_id = provider_info.get("service_id")
-                ec.inheritance_type = provider_info.get("inheritance_type")
-                ec.responsibility = provider_info.get("responsibility")
-            cur = winners.get(ec.control_id)
-            winners[ec.control_id] = _best(cur, ec) if cur else ec
-
-    # 1) Direct links at the requested scope
-    _consider(_collect_links_for_scope(db, scope_type, scope_id), "direct", (scope_type, scope_id))
-
-    # 2) Entity/BU overlays (provider + org_group + entity baseline for BU)
-    if scope_type in ("entity", "bu"):
-        entity_id: Optional[int] = None
-        group_id: Optional[int] = None
-
-        if scope_type == "entity":
-            ent = db.query(OrgEntity).get(scope_id)
-            if ent:
-                entity_id, group_id = ent.id, ent.group_id
-
-        elif scope_type == "bu":
-            bu = db.query(OrgBusinessUnit).get(scope_id)
-            if bu:
-                entity_id = bu.entity_id
-                ent = db.query(OrgEntity).get(entity_id)
-                if ent:
-                    group_id = ent.group_id
-            if entity_id:
-                _consider(_collect_links_for_scope(db, "entity", entity_id), "baseline", ("entity", entity_id))
-
-        if entity_id:
-            # provider services
-            for sc in _service_links_for_consumer(db, entity_id, scope_id if scope_type == "bu" else None):
-                provider_rows = _collect_links_for_scope(db, "service", sc.service_id)
-                _consider(
-                    provider_rows,
-                    "provider",
-                    ("service", sc.service_id),
-                    provider_info={
-                        "service_id": sc.service_id,
-                        "inheritance_type": sc.inheritance_type,
-                        "responsibility": sc.responsibility,
-                    },
-                )
+    key = (normalize_scope(scope_type), int(scope_id))
+    return get_effective_controls_many(db, [key])[key]
 
-        if group_id:
-            _consider(_collect_links_for_scope(db, "org_group", group_id), "baseline", ("org_group", group_id))
-
-    # ---- Asset overlays: type/group/tag + (optional) owner BU/Entity/Site + provider + org_group
-    if scope_type == "asset":
-        layers = _resolve_asset_layers(db, scope_id)
-
-        # Baselines from “near” asset taxonomies
-        atid = layers.get("asset_type_id")
-        if atid:
-            _consider(_collect_links_for_scope(db, "asset_type", atid), "baseline", ("asset_type", atid))
-
-        agid = layers.get("asset_group_id")
-        if agid:
-            _consider(_collect_links_for_scope(db, "asset_group", agid), "baseline", ("asset_group", agid))
-
-        for tid in layers.get("tag_ids", []) or []:
-            _consider(_collect_links_for_scope(db, "tag", tid), "baseline", ("tag", tid))
-
-        # Optional site baseline
-        sid = layers.get("site_id")
-        if sid and OrgSite:
-            _consider(_collect_links_for_scope(db, "site", sid), "baseline", ("site", sid))
-
-        # Parent BU baseline
-        bu_id = layers.get("bu_id")
-        if bu_id:
-            _consider(_collect_links_for_scope(db, "bu", bu_id), "baseline", ("bu", bu_id))
-
-        # Parent Entity baseline + provider + org_group
-        ent_id = layers.get("entity_id")
-        if ent_id:
-            _consider(_collect_links_for_scope(db, "entity", ent_id), "baseline", ("entity", ent_id))
-
-            # provider services (entity-wide + BU-specific if available)
-            if bu_id is None:
-                prov_rows = (
-                    db.query(OrgServiceConsumer)
-                    .filter(
-                        OrgServiceConsumer.consumer_entity_id == ent_id,
-                        OrgServiceConsumer.consumer_bu_id.is_(None),
-                    ).all()
-                )
-            else:
-                prov_rows = (
-                    db.query(OrgServiceConsumer)
-                    .filter(
-                        or_(
-                            and_(OrgServiceConsumer.consumer_entity_id == ent_id,
-                                 OrgServiceConsumer.consumer_bu_id.is_(None)),
-                            OrgServiceConsumer.consumer_bu_id == bu_id,
-                        )
-                    ).all()
-                )
-
-            for sc in prov_rows:
-                provider_links = _collect_links_for_scope(db, "service", sc.service_id)
-                _consider(
-                    provider_links,
-                    "provider",
-                    ("service", sc.service_id),
-                    provider_info={
-                        "service_id": sc.service_id,
-                        "inheritance_type": sc.inheritance_type,
-                        "responsibility": sc.responsibility,
-                    },
-                )
-
-            # Org group baseline
-            ent = db.query(OrgEntity).get(ent_id)
-            if ent and ent.group_id:
-                _consider(_collect_links_for_scope(db, "org_group", ent.group_id), "baseline",
-                          ("org_group", ent.group_id))
-
-    # 3) Asset overlays: tag/group/type (+ optional BU/site/entity/provider/group if present)
-    # if scope_type == "asset":
-    #     ctx = _resolve_asset_layers(db, scope_id)
-    #     if ctx:
-    #         # tag baselines
-    #         for tid in ctx.get("tag_ids", []) or []:
-    #             _consider(_collect_links_for_scope(db, "tag", tid), "baseline", ("tag", tid))
-    #         # group baseline
-    #         gid = ctx.get("asset_group_id")
-    #         if gid:
-    #             _consider(_collect_links_for_scope(db, "asset_group", gid), "baseline", ("asset_group", gid))
-    #         # type baseline
-    #         atid = ctx.get("asset_type_id")
-    #         if atid:
-    #             _consider(_collect_links_for_scope(db, "asset_type", atid), "baseline", ("asset_type", atid))
-    #         # optional org overlays if asset carries these pointers
-    #         bu_id = ctx.get("bu_id")
-    #         if bu_id:
-    #             _consider(_collect_links_for_scope(db, "bu", bu_id), "baseline", ("bu", bu_id))
-    #         site_id = ctx.get("site_id")
-    #         if site_id:
-    #             _consider(_collect_links_for_scope(db, "site", site_id), "baseline", ("site", site_id))
-    #         ent_id = ctx.get("entity_id")
-    #         if ent_id:
-    #             _consider(_collect_links_for_scope(db, "entity", ent_id), "baseline", ("entity", ent_id))
-    #             # provider services via entity / optional BU
-    #             for sc in _service_links_for_consumer(db, ent_id, bu_id):
-    #                 provider_rows = _collect_links_for_scope(db, "service", sc.service_id)
-    #                 _consider(
-    #                     provider_rows,
-    #                     "provider",
-    #                     ("service", sc.service_id),
-    #                     provider_info={
-    #                         "service_id": sc.service_id,
-    #                         "inheritance_type": sc.inheritance_type,
-    #                         "responsibility": sc.responsibility,
-    #                     },
-    #                 )
-    #             ent = db.query(OrgEntity).get(ent_id)
-    #             if ent and ent.group_id:
-    #                 _consider(_collect_links_for_scope(db, "org_group", ent.group_id), "baseline", ("org_group", ent.group_id))
-
-    # 4) Site overlays (if you model sites)
-
-    if scope_type == "site" and OrgSite is not None:
-        site = db.query(OrgSite).get(scope_id)
-        if site:
-            ent_id = getattr(site, "entity_id", None)
-            if ent_id:
-                _consider(_collect_links_for_scope(db, "entity", ent_id), "baseline", ("entity", ent_id))
-                for sc in _service_links_for_consumer(db, ent_id, None):
-                    provider_rows = _collect_links_for_scope(db, "service", sc.service_id)
-                    _consider(
-                        provider_rows,
-                        "provider",
-                        ("service", sc.service_id),
-                        provider_info={
-                            "service_id": sc.service_id,
-                            "inheritance_type": sc.inheritance_type,
-                            "responsibility": sc.responsibility,
-                        },
-                    )
-                ent = db.query(OrgEntity).get(ent_id)
-                if ent and ent.group_id:
-                    _consider(_collect_links_for_scope(db, "org_group", ent.group_id), "baseline", ("org_group", ent.group_id))
-
-    return list(winners.values())
+
+def get_effective_controls_for_entity_assets(db: Session, entity_id: int) -> Dict[int, List[EffectiveControlOut]]:
+    """{asset_id: winners} for every asset owned by the entity."""
+    if Asset is None:
+        return {}
+    asset_ids = [aid for (aid,) in db.query(Asset.id).filter(Asset.entity_id == entity_id).order_by(Asset.id).all()]
+    res = get_effective_controls_many(db, [("asset", aid) for aid in asset_ids])
+    return {aid: res[("asset", aid)] for aid in asset_ids}
@@ -0,0 +1,154 @@
+"""
+Process-wide control-effect matrix.
+
+The ControlEffectRating catalog (scenario x control x domain -> score 0..5) is small
+and changes rarely, so it is loaded once and kept per scenario as a compact CSR-like
+block: a sorted array of control ids plus a (controls x domains) score array. Residual
+helpers then look effects up in memory instead of querying per context.
+
+Versioning works like the appetite index: the matrix is rebuilt lazily when the version
+counter moves. The counter is bumped after a SessionLocal transaction that wrote ratings
+commits (covers crud/controls/control_effect_rating.py), or via invalidate_effect_matrix()
+after Core/bulk writes. MATRIX_MAX_AGE_SECONDS bounds staleness for other workers.
+"""
+from __future__ import annotations
+
+import threading
+import time
+from collections import defaultdict
+from itertools import chain
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from app.database import SessionLocal
+from app.models.controls.control_effect_rating import ControlEffectRating
+
+MATRIX_MAX_AGE_SECONDS = 300
+
+_PENDING_KEY = "effect_matrix_dirty"
+
+_EMPTY = (np.zeros(0, dtype=np.int64), np.zeros((0, 0), dtype=np.int16))
+
+
+class EffectMatrix:
+    def __init__(self, rows: Iterable[Tuple[int, int, int, int]], version: int):
+        """rows: (risk_scenario_id, control_id, domain_id, score) with score > 0."""
+        self.version = version
+        self.built_at = time.monotonic()
+        by_scn: Dict[int, List[Tuple[int, int, int]]] = defaultdict(list)
+        domains = set()
+        for sid, cid, did, score in rows:
+            by_scn[sid].append((cid, did, score))
+            domains.add(did)
+        self.domains: Tuple[int, ...] = tuple(sorted(domains))
+        dcol = {d: j for j, d in enumerate(self.domains)}
+        self._blocks: Dict[int, Tuple[np.ndarray, np.ndarray]] = {}
+        for sid, items in by_scn.items():
+            controls = np.unique(np.fromiter((c for c, _, _ in items), dtype=np.int64))
+            scores = np.zeros((len(controls), len(self.domains)), dtype=np.int16)
+            rows_idx = np.searchsorted(controls, [c for c, _, _ in items])
+            for r, (_, did, score) in zip(rows_idx, items):
+                scores[r, dcol[did]] = score
+            self._blocks[sid] = (controls, scores)
+
+    def __len__(self) -> int:
+        return int(sum(np.count_nonzero(s) for _, s in self._blocks.values()))
+
+    def _rows(self, scenario_id: int, control_ids: Optional[Iterable[int]]) -> np.ndarray:
+        controls, scores = self._blocks.get(scenario_id, _EMPTY)
+        if control_ids is None or not len(controls):
+            return scores
+        ids = np.unique(np.fromiter((int(c) for c in control_ids), dtype=np.int64))
+        pos = np.searchsorted(controls, ids)
+        pos = pos[pos < len(controls)]
+        pos = pos[np.isin(controls[pos], ids)]
+        return scores[pos]
+
+    def scenario_effects(self, scenario_id: int) -> Dict[int, List[int]]:
+        """{domain_id: [raw scores of every rated control]} for the scenario."""
+        sub = self._rows(scenario_id, None)
+        return {d: [int(v) for v in sub[:, j] if v] for j, d in enumerate(self.domains) if sub[:, j].any()}
+
+    def scenario_max(self, scenario_id: int) -> Dict[str, int]:
+        """{str(domain_id): max raw score} over all controls of the scenario."""
+        sub = self._rows(scenario_id, None)
+        if not len(sub):
+            return {}
+        mx = sub.max(axis=0)
+        return {str(d): int(mx[j]) for j, d in enumerate(self.domains) if mx[j]}
+
+    def effects_by_domain(self, scenario_id: int, control_ids: Iterable[int]) -> Dict[str, List[float]]:
+        """
+        Same shape as risk_analysis._effects_by_domain_for_controls: {str(domain_id): [scores]}
+        for the included controls, clamped to 0..5.
+        """
+        sub = np.clip(self._rows(scenario_id, control_ids), 0, 5)
+        return {
+            str(d): [float(v) for v in sub[:, j] if v]
+            for j, d in enumerate(self.domains)
+            if len(sub) and sub[:, j].any()
+        }
+
+
+_lock = threading.Lock()
+_version = 0
+_matrix: Optional[EffectMatrix] = None
+
+
+def invalidate_effect_matrix() -> int:
+    """Bump the version counter; the next get_effect_matrix() reloads."""
+    global _version
+    with _lock:
+        _version += 1
+        return _version
+
+
+def _load(db: Session, version: int) -> EffectMatrix:
+    rows = (
+        db.query(ControlEffectRating.risk_scenario_id, ControlEffectRating.control_id,
+                 ControlEffectRating.domain_id, ControlEffectRating.score)
+        .filter(ControlEffectRating.score > 0, ControlEffectRating.domain_id.isnot(None))
+        .all()
+    )
+    return EffectMatrix(rows, version)
+
+
+def get_effect_matrix(db: Session) -> EffectMatrix:
+    """Current matrix, reloaded from `db` when invalidated or older than MATRIX_MAX_AGE_SECONDS."""
+    global _matrix
+    if db.info.get(_PENDING_KEY):
+        # this transaction changed ratings: private matrix that sees its own writes
+        return _load(db, -1)
+    m = _matrix
+    if m is not None and m.version == _version and time.monotonic() - m.built_at < MATRIX_MAX_AGE_SECONDS:
+        return m
+    with _lock:
+        version = _version
+        m = _matrix
+        if m is not None and m.version == version and time.monotonic() - m.built_at < MATRIX_MAX_AGE_SECONDS:
+            return m
+        m = _load(db, version)
+        _matrix = m
+        return m
+
+
+# ---------------- write-time invalidation ----------------
+
+@event.listens_for(SessionLocal, "after_flush")
+def _mark_rating_writes(session: Session, flush_context) -> None:
+    if any(isinstance(o, ControlEffectRating) for o in chain(session.new, session.dirty, session.deleted)):
+        session.info[_PENDING_KEY] = True
+
+
+@event.listens_for(SessionLocal, "after_commit")
+def _bump_after_commit(session: Session) -> None:
+    if session.info.pop(_PENDING_KEY, False):
+        invalidate_effect_matrix()
+
+
+@event.listens_for(SessionLocal, "after_rollback")
+def _discard_on_rollback(session: Session) -> None:
+    session.info.pop(_PENDING_KEY, None)
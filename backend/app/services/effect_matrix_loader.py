@@ -0,0 +1,191 @@
+"""
+Control-effect matrix CSV loader.
+
+Format of app/data/control_effect_rating_full_matrix.csv: risk_scenario_id,
+control_id, domain_id, score (0..5). A full matrix is authoritative for the cells it
+lists: score 0 removes the rating (as crud upsert_control_effect_rating does), any
+other score creates or updates it. Cells the file does not list are left alone.
+
+The input is streamed (a str, or any iterable of text lines such as an upload wrapped
+by app.core.utils.open_upload_text()) without pandas. Ids are validated against id
+sets preloaded once per import; valid rows are written in batches of BATCH_SIZE: one
+SELECT of the batch's stored scores (for the diff summary), one INSERT ... ON CONFLICT
+(risk_scenario_id, control_id, domain_id) DO UPDATE for non-zero scores and one
+DELETE for zeroed cells that exist. A cell repeated inside a batch flushes the batch
+first; a dry run executes the same batches inside a rolled-back savepoint.
+
+Core writes bypass the flush listeners, so the loader marks the risk context summaries
+of the touched scenarios dirty in the same transaction (the scheduler refreshes them)
+and bumps the effect-matrix version after commit (services/effect_matrix.py), which
+drops cached residual inputs.
+"""
+from __future__ import annotations
+
+import csv
+from io import StringIO
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple, Union
+
+from sqlalchemy import select, tuple_
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+
+from app.models.controls.control import Control
+from app.models.controls.control_effect_rating import ControlEffectRating
+from app.models.risks.impact_domain import ImpactDomain
+from app.models.risks.risk_scenario import RiskScenario
+from app.schemas.controls.control_effect_rating import ControlEffectRatingImportResult
+from app.services.effect_matrix import invalidate_effect_matrix
+from app.services.risk_context_summary import mark_summaries_dirty
+
+BATCH_SIZE = 1000
+MAX_REPORTED_ERRORS = 1000
+MAX_SCORE = 5
+COLUMNS = ("risk_scenario_id", "control_id", "domain_id", "score")
+
+Cell = Tuple[int, int, int]  # (risk_scenario_id, control_id, domain_id)
+
+
+class _Report:
+    def __init__(self, dry_run: bool):
+        self.dry_run = dry_run
+        self.total_rows = self.created = self.updated = self.deleted = self.unchanged = 0
+        self.skipped = self.error_count = 0
+        self.errors: List[str] = []
+        self.scenario_ids: Set[int] = set()
+
+    def error(self, line: int, message: str) -> None:
+        self.skipped += 1
+        self.error_count += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append(f"Line {line}: {message}")
+
+    def result(self, matrix_version: Optional[int]) -> ControlEffectRatingImportResult:
+        return ControlEffectRatingImportResult(
+            total_rows=self.total_rows, created=self.created, updated=self.updated, deleted=self.deleted,
+            unchanged=self.unchanged, skipped=self.skipped, error_count=self.error_count, errors=self.errors,
+            errors_truncated=self.error_count > len(self.errors), dry_run=self.dry_run,
+            scenarios_touched=len(self.scenario_ids), matrix_version=matrix_version,
+        )
+
+
+def _reader(source: Union[str, Iterable[str]]) -> csv.DictReader:
+    reader = csv.DictReader(StringIO(source) if isinstance(source, str) else source)
+    if not reader.fieldnames:
+        raise ValueError("CSV has no header")
+    reader.fieldnames = [c.strip() for c in reader.fieldnames]
+    missing = set(COLUMNS) - set(reader.fieldnames)
+    if missing:
+        raise ValueError(f"CSV missing required columns: {', '.join(sorted(missing))}")
+    return reader
+
+
+def _check_row(raw: Dict[str, Optional[str]], scenario_ids: Set[int], control_ids: Set[int],
+               domain_ids: Set[int]) -> Tuple[Cell, int]:
+    """(cell, score) of one CSV row; ValueError with the message reported for the line."""
+    try:
+        sid, cid, did, score = (int((raw.get(c) or "").strip()) for c in COLUMNS)
+    except ValueError:
+        raise ValueError("risk_scenario_id, control_id, domain_id and score must be integers")
+    if not 0 <= score <= MAX_SCORE:
+        raise ValueError(f"score {score} outside 0..{MAX_SCORE}")
+    if sid not in scenario_ids:
+        raise ValueError(f"risk scenario {sid} not found")
+    if cid not in control_ids:
+        raise ValueError(f"control {cid} not found")
+    if did not in domain_ids:
+        raise ValueError(f"impact domain {did} not found")
+    return (sid, cid, did), score
+
+
+def _ids(db: Session, model) -> Set[int]:
+    return set(db.execute(select(model.id)).scalars())
+
+
+def _write_batch(db: Session, batch: Dict[Cell, int], rep: _Report) -> None:
+    CER = ControlEffectRating
+    stored: Dict[Cell, int] = {
+        (sid, cid, did): score
+        for sid, cid, did, score in db.execute(
+            select(CER.risk_scenario_id, CER.control_id, CER.domain_id, CER.score)
+            .where(tuple_(CER.risk_scenario_id, CER.control_id, CER.domain_id).in_(list(batch)))
+        )
+    }
+    upserts, deletes = [], []
+    for cell, score in batch.items():
+        old = stored.get(cell)
+        if score == 0:
+            if old is None:
+                rep.unchanged += 1
+                continue
+            rep.deleted += 1
+            deletes.append(cell)
+        elif old is None:
+            rep.created += 1
+            upserts.append(cell)
+        elif old != score:
+            rep.updated += 1
+            upserts.append(cell)
+        else:
+            rep.unchanged += 1
+            continue
+        rep.scenario_ids.add(cell[0])
+
+    table = CER.__table__
+    if upserts:
+        stmt = pg_insert(table)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[table.c.risk_scenario_id, table.c.control_id, table.c.domain_id],
+            set_={"score": stmt.excluded.score},
+        )
+        db.execute(stmt, [{"risk_scenario_id": s, "control_id": c, "domain_id": d, "score": batch[(s, c, d)]}
+                          for s, c, d in upserts])
+    if deletes:
+        db.execute(table.delete().where(
+            tuple_(table.c.risk_scenario_id, table.c.control_id, table.c.domain_id).in_(deletes)))
+
+
+def load_effect_ratings_csv(
+    db: Session,
+    source: Union[str, Iterable[str]],
+    *,
+    dry_run: bool = False,
+    batch_size: int = BATCH_SIZE,
+    progress: Optional[Callable[[int], None]] = None,
+) -> ControlEffectRatingImportResult:
+    """Load an effect-matrix CSV (see module docstring) and commit; returns the diff summary."""
+    rep = _Report(dry_run)
+    reader = _reader(source)
+    scenario_ids, control_ids, domain_ids = _ids(db, RiskScenario), _ids(db, Control), _ids(db, ImpactDomain)
+    savepoint = db.begin_nested() if dry_run else None
+    batch: Dict[Cell, int] = {}
+
+    def flush() -> None:
+        if batch:
+            _write_batch(db, batch, rep)
+            batch.clear()
+        if progress is not None:
+            progress(rep.total_rows)
+
+    for raw in reader:
+        rep.total_rows += 1
+        line = reader.line_num
+        try:
+            cell, score = _check_row(raw, scenario_ids, control_ids, domain_ids)
+        except ValueError as e:
+            rep.error(line, str(e))
+            continue
+
+        if cell in batch:  # a later row must see the earlier one as stored
+            flush()
+        batch[cell] = score
+        if len(batch) >= batch_size:
+            flush()
+    flush()
+
+    if savepoint is not None:
+        savepoint.rollback()
+        return rep.result(None)
+    if rep.scenario_ids:
+        mark_summaries_dirty(db, scenario_ids=rep.scenario_ids)
+    db.commit()
+    return rep.result(invalidate_effect_matrix() if rep.scenario_ids else None)
@@ -0,0 +1,235 @@
+"""
+Content-addressed storage for evidence artifacts.
+
+EvidenceArtifact rows keep metadata; the bytes live in an ArtifactStore. put_stream()
+copies an upload in CHUNK_SIZE chunks to a temporary file inside the store while
+hashing it, then renames it to its content address
+(<root>/sha256/<h[:2]>/<h[2:4]>/<h>). An upload whose digest is already stored is
+dropped, so identical files are kept once however many artifacts refer to them.
+EvidenceArtifact.location holds the store key (the path relative to the root) and
+EvidenceArtifact.storage the backend name ("disk" for LocalArtifactStore).
+
+get_artifact_store() returns the process-wide store configured by
+ARTIFACT_STORE_BACKEND / ARTIFACT_STORE_ROOT (app/config.py). Another backend (e.g.
+S3-compatible) only has to implement the ArtifactStore methods.
+
+Downloads stream through artifact_chunks(), which also serves the legacy
+storage="db" rows (scripts/migrate_artifact_blobs.py moves those into the store), and
+honour a single HTTP Range via parse_range().
+"""
+from __future__ import annotations
+
+import hashlib
+import io
+import os
+import tempfile
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from functools import lru_cache
+from pathlib import Path
+from typing import IO, Iterator, Optional, Tuple
+
+from sqlalchemy import func, select, update
+from sqlalchemy.orm import Session
+
+from app.config import ARTIFACT_STORE_BACKEND, ARTIFACT_STORE_ROOT
+from app.models.evidence.evidence_artifact import EvidenceArtifact
+
+CHUNK_SIZE = 1024 * 1024
+
+
+class ArtifactTooLarge(ValueError):
+    pass
+
+
+@dataclass
+class StoredBlob:
+    key: str
+    sha256: str
+    size: int
+    deduplicated: bool  # the content was already in the store
+
+
+class ArtifactStore(ABC):
+    name: str
+
+    @abstractmethod
+    def put_stream(self, fileobj: IO[bytes], *, max_bytes: Optional[int] = None) -> StoredBlob:
+        """Store the stream under its content address (ArtifactTooLarge past max_bytes)."""
+
+    @abstractmethod
+    def put_bytes(self, data: bytes) -> StoredBlob:
+        """put_stream() for bytes already in memory (blob migration)."""
+
+    @abstractmethod
+    def size(self, key: str) -> int:
+        """Size in bytes of the stored object."""
+
+    @abstractmethod
+    def exists(self, key: str) -> bool:
+        """Whether an object is stored under key."""
+
+    @abstractmethod
+    def iter_range(self, key: str, start: int = 0, end: Optional[int] = None,
+                   chunk_size: int = CHUNK_SIZE) -> Iterator[bytes]:
+        """Yield bytes start..end (inclusive; end=None reads to the end of the object)."""
+
+
+def content_key(sha256: str) -> str:
+    return f"sha256/{sha256[:2]}/{sha256[2:4]}/{sha256}"
+
+
+class LocalArtifactStore(ArtifactStore):
+    name = "disk"
+
+    def __init__(self, root: str | os.PathLike):
+        self.root = Path(root).resolve()
+        self._tmp = self.root / "tmp"
+
+    def _path(self, key: str) -> Path:
+        path = (self.root / key).resolve()
+        if self.root not in path.parents:
+            raise ValueError(f"invalid artifact key: {key}")
+        return path
+
+    def _commit(self, tmp_path: str, sha256: str, size: int) -> StoredBlob:
+        key = content_key(sha256)
+        path = self._path(key)
+        if path.exists():
+            os.unlink(tmp_path)
+            return StoredBlob(key, sha256, size, deduplicated=True)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        os.replace(tmp_path, path)  # same filesystem: atomic, readers never see a partial file
+        return StoredBlob(key, sha256, size, deduplicated=False)
+
+    def put_stream(self, fileobj: IO[bytes], *, max_bytes: Optional[int] = None) -> StoredBlob:
+        self._tmp.mkdir(parents=True, exist_ok=True)
+        digest, size = hashlib.sha256(), 0
+        fd, tmp_path = tempfile.mkstemp(dir=self._tmp)
+        try:
+            with os.fdopen(fd, "wb") as out:
+                while chunk := fileobj.read(CHUNK_SIZE):
+                    size += len(chunk)
+                    if max_bytes is not None and size > max_bytes:
+                        raise ArtifactTooLarge(f"artifact exceeds {max_bytes} bytes")
+                    digest.update(chunk)
+                    out.write(chunk)
+            return self._commit(tmp_path, digest.hexdigest(), size)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            raise
+
+    def put_bytes(self, data: bytes) -> StoredBlob:
+        return self.put_stream(io.BytesIO(data))
+
+    def size(self, key: str) -> int:
+        return self._path(key).stat().st_size
+
+    def exists(self, key: str) -> bool:
+        return self._path(key).is_file()
+
+    def iter_range(self, key: str, start: int = 0, end: Optional[int] = None,
+                   chunk_size: int = CHUNK_SIZE) -> Iterator[bytes]:
+        with open(self._path(key), "rb") as fh:
+            fh.seek(start)
+            remaining = None if end is None else end - start + 1
+            while remaining is None or remaining > 0:
+                chunk = fh.read(chunk_size if remaining is None else min(chunk_size, remaining))
+                if not chunk:
+                    break
+                if remaining is not None:
+                    remaining -= len(chunk)
+                yield chunk
+
+
+@lru_cache(maxsize=1)
+def get_artifact_store() -> ArtifactStore:
+    if ARTIFACT_STORE_BACKEND == "local":
+        return LocalArtifactStore(ARTIFACT_STORE_ROOT)
+    raise ValueError(f"unknown ARTIFACT_STORE_BACKEND: {ARTIFACT_STORE_BACKEND}")
+
+
+def parse_range(header: Optional[str], size: int) -> Optional[Tuple[int, int]]:
+    """
+    (start, end) inclusive for a single "bytes=" Range header, or None to send the whole
+    object (no header, malformed or multi-range headers are ignored as RFC 9110 allows).
+    Raises ValueError when the range is unsatisfiable (-> 416).
+    """
+    if not header or not header.startswith("bytes=") or "," in header:
+        return None
+    first, sep, last = header[len("bytes="):].strip().partition("-")
+    if not sep or not (first or last) or any(v and not v.isdigit() for v in (first, last)):
+        return None
+    if not first:  # suffix range: the last N bytes
+        n = int(last)
+        if n == 0 or size == 0:
+            raise ValueError("unsatisfiable range")
+        return max(size - n, 0), size - 1
+    start = int(first)
+    end = int(last) if last else size - 1
+    if start >= size:
+        raise ValueError("unsatisfiable range")
+    if start > end:
+        return None
+    return start, min(end, size - 1)
+
+
+def artifact_size(art) -> int:
+    if art.storage == "db":
+        return len(art.blob or b"")
+    return art.size if art.size is not None else get_artifact_store().size(art.location)
+
+
+def artifact_chunks(art, start: int = 0, end: Optional[int] = None) -> Iterator[bytes]:
+    """Bytes start..end (inclusive) of an EvidenceArtifact, from the store or the DB blob."""
+    if art.storage == "db":
+        blob = art.blob or b""
+        stop = len(blob) if end is None else end + 1
+        for i in range(start, stop, CHUNK_SIZE):
+            yield blob[i:min(i + CHUNK_SIZE, stop)]
+        return
+    store = get_artifact_store()
+    if art.storage != store.name or not art.location:
+        raise ValueError(f"artifact {art.id} is not readable from the '{store.name}' store")
+    yield from store.iter_range(art.location, start, end)
+
+
+def migrate_db_blobs(db: Session, *, batch_size: int = 100, dry_run: bool = False,
+                     limit: Optional[int] = None) -> dict:
+    """
+    Move storage="db" artifacts into the configured store: the blob is written to its
+    content address, then the row gets storage/location/sha256/size and blob=NULL.
+    Blobs are loaded one at a time and the rows are committed per batch, so the run can
+    be interrupted and resumed. dry_run only counts.
+    """
+    EA = EvidenceArtifact
+    pending = select(EA.id).where(EA.storage == "db", EA.blob.isnot(None)).order_by(EA.id)
+    if dry_run:
+        n, size = db.execute(
+            select(func.count(), func.coalesce(func.sum(func.length(EA.blob)), 0))
+            .where(EA.id.in_(pending if limit is None else pending.limit(limit)))
+        ).one()
+        return {"dry_run": True, "artifacts": n, "bytes": int(size)}
+
+    store = get_artifact_store()
+    moved = deduplicated = total_bytes = 0
+    last_id = 0
+    while limit is None or moved < limit:
+        n = batch_size if limit is None else min(batch_size, limit - moved)
+        ids = db.execute(pending.where(EA.id > last_id).limit(n)).scalars().all()
+        if not ids:
+            break
+        for art_id in ids:
+            blob = db.execute(select(EA.blob).where(EA.id == art_id)).scalar_one()
+            stored = store.put_bytes(blob)
+            db.execute(
+                update(EA).where(EA.id == art_id)
+                .values(storage=store.name, location=stored.key, sha256=stored.sha256, size=stored.size, blob=None)
+            )
+            moved += 1
+            deduplicated += stored.deduplicated
+            total_bytes += stored.size
+        db.commit()
+        last_id = ids[-1]
+    return {"dry_run": False, "artifacts": moved, "deduplicated": deduplicated, "bytes": total_bytes}
@@ -6,11 +6,11 @@ from sqlalchemy import func, case, and_, or_
 
 from app.models.controls.control_context_link import ControlContextLink
 
-# Evidence-aware aggregate (uses EvidenceItem if present)
-def evidence_aggregate_by_context(db: Session, ctx_ids: List[int], stale_before: datetime) -> Dict[int, Dict]:
-    if not ctx_ids:
-        return {}
-
+def _evidence_aggregate_query(db: Session, stale_before: datetime, *, per_context: bool):
+    """
+    implemented / overdue / max_evidence over ControlContextLink rows (caller filters),
+    grouped per context when per_context=True.
+    """
     # Try evidence_items if available; otherwise fall back to status_updated_at
     EvidenceItem = None
     try:
@@ -19,6 +19,8 @@ def evidence_aggregate_by_context(db: Session, ctx_ids: List[int], stale_before:
     except Exception:
         EvidenceItem = None
 
+    implemented = func.lower(ControlContextLink.assurance_status).in_(("implemented","verified"))
+    ev_latest_sub = None
     if EvidenceItem:
         ev_latest_sub = (
             db.query(
@@ -31,58 +33,35 @@ def evidence_aggregate_by_context(db: Session, ctx_ids: List[int], stale_before:
             .group_by(EvidenceItem.control_context_link_id)
             .subquery()
         )
+        latest = ev_latest_sub.c.latest_ev
+    else:
+        # --- HOTFIX fallback: use status_updated_at when evidence_items not present ---
+        latest = ControlContextLink.status_updated_at
 
-        rows = (
-            db.query(
-                ControlContextLink.risk_scenario_context_id.label("ctx"),
-                func.sum(
-                    case((func.lower(ControlContextLink.assurance_status).in_(("implemented","verified")), 1), else_=0)
-                ).label("implemented"),
-                func.sum(
-                    case((
-                        and_(
-                            func.lower(ControlContextLink.assurance_status).in_(("implemented","verified")),
-                            or_(
-                                ev_latest_sub.c.latest_ev.is_(None),
-                                ev_latest_sub.c.latest_ev < stale_before
-                            )
-                        ), 1), else_=0)
-                ).label("overdue"),
-                func.max(ev_latest_sub.c.latest_ev).label("max_evidence"),
-            )
-            .outerjoin(ev_latest_sub, ev_latest_sub.c.ccl_id == ControlContextLink.id)
-            .filter(ControlContextLink.risk_scenario_context_id.in_(ctx_ids))
-            .group_by(ControlContextLink.risk_scenario_context_id)
-            .all()
-        )
-        out = {r.ctx: {"implemented": int(r.implemented or 0),
-                       "overdue": int(r.overdue or 0),
-                       "max_evidence": r.max_evidence} for r in rows}
-        for cid in ctx_ids:
-            out.setdefault(cid, {"implemented": 0, "overdue": 0, "max_evidence": None})
-        return out
+    cols = [
+        func.sum(case((implemented, 1), else_=0)).label("implemented"),
+        func.sum(
+            case((and_(implemented, or_(latest.is_(None), latest < stale_before)), 1), else_=0)
+        ).label("overdue"),
+        func.max(latest).label("max_evidence"),
+    ]
+    if per_context:
+        cols.insert(0, ControlContextLink.risk_scenario_context_id.label("ctx"))
+    q = db.query(*cols)
+    if ev_latest_sub is not None:
+        q = q.outerjoin(ev_latest_sub, ev_latest_sub.c.ccl_id == ControlContextLink.id)
+    if per_context:
+        q = q.group_by(ControlContextLink.risk_scenario_context_id)
+    return q
+
+# Evidence-aware aggregate (uses EvidenceItem if present)
+def evidence_aggregate_by_context(db: Session, ctx_ids: List[int], stale_before: datetime) -> Dict[int, Dict]:
+    if not ctx_ids:
+        return {}
 
-    # --- HOTFIX fallback: use status_updated_at when evidence_items not present ---
     rows = (
-        db.query(
-            ControlContextLink.risk_scenario_context_id.label("ctx"),
-            func.sum(
-                case((func.lower(ControlContextLink.assurance_status).in_(("implemented","verified")), 1), else_=0)
-            ).label("implemented"),
-            func.sum(
-                case((
-                    and_(
-                        func.lower(ControlContextLink.assurance_status).in_(("implemented","verified")),
-                        or_(
-                            ControlContextLink.status_updated_at.is_(None),
-                            ControlContextLink.status_updated_at < stale_before
-                        )
-                    ), 1), else_=0)
-            ).label("overdue"),
-            func.max(ControlContextLink.status_updated_at).label("max_evidence"),
-        )
+        _evidence_aggregate_query(db, stale_before, per_context=True)
         .filter(ControlContextLink.risk_scenario_context_id.in_(ctx_ids))
-        .group_by(ControlContextLink.risk_scenario_context_id)
         .all()
     )
     out = {r.ctx: {"implemented": int(r.implemented or 0),
@@ -92,6 +71,17 @@ def evidence_aggregate_by_context(db: Session, ctx_ids: List[int], stale_before:
         out.setdefault(cid, {"implemented": 0, "overdue": 0, "max_evidence": None})
     return out
 
+# Totals over a set of contexts given as a SQL selectable of ids (one round trip)
+def evidence_totals(db: Session, ctx_ids_select, stale_before: datetime) -> Dict[str, Optional[int | datetime]]:
+    row = (
+        _evidence_aggregate_query(db, stale_before, per_context=False)
+        .filter(ControlContextLink.risk_scenario_context_id.in_(ctx_ids_select))
+        .one()
+    )
+    return {"implemented": int(row.implemented or 0),
+            "overdue": int(row.overdue or 0),
+            "max_evidence": row.max_evidence}
+
 # For a single context (used by /details)
 def evidence_aggregate_for_context(db: Session, context_id: int, stale_before: datetime) -> Dict[str, Optional[int | datetime]]:
     data = evidence_aggregate_by_context(db, [context_id], stale_before)
@@ -0,0 +1,60 @@
+"""
+Background import jobs.
+
+A job is an ImportJob row: the API creates it ("queued"), schedules run_job() as a
+FastAPI background task and returns the id; clients poll the row. run_job() does the
+work in its own SessionLocal session (one transaction, like the synchronous import)
+while status and progress are written through short separate sessions, so they are
+visible to pollers on any worker before the import commits.
+"""
+from __future__ import annotations
+
+import logging
+import uuid
+from datetime import datetime
+from typing import Any, Callable, Dict, Optional
+
+from sqlalchemy.orm import Session
+
+from app.database import SessionLocal
+from app.models.common.import_job import ImportJob
+
+logger = logging.getLogger(__name__)
+
+ProgressFn = Callable[[int], None]
+
+
+def create_job(db: Session, kind: str, params: Optional[Dict[str, Any]] = None) -> ImportJob:
+    job = ImportJob(id=uuid.uuid4().hex, kind=kind, status="queued", params=params, processed=0)
+    db.add(job); db.commit(); db.refresh(job)
+    return job
+
+
+def get_job(db: Session, job_id: str) -> Optional[ImportJob]:
+    return db.get(ImportJob, job_id)
+
+
+def _set(job_id: str, **values: Any) -> None:
+    db = SessionLocal()
+    try:
+        db.query(ImportJob).filter(ImportJob.id == job_id).update(values, synchronize_session=False)
+        db.commit()
+    finally:
+        db.close()
+
+
+def run_job(job_id: str, func: Callable[[Session, ProgressFn], Dict[str, Any]]) -> None:
+    """Run func(db, progress) for the job; its return value becomes the job report."""
+    _set(job_id, status="running", started_at=datetime.utcnow())
+    db = SessionLocal()
+    try:
+        report = func(db, lambda processed: _set(job_id, processed=processed))
+    except Exception as e:
+        db.rollback()
+        logger.exception("import job %s failed", job_id)
+        _set(job_id, status="failed", error=str(e), finished_at=datetime.utcnow())
+        return
+    finally:
+        db.close()
+    _set(job_id, status="succeeded", report=report, processed=report.get("total_rows", 0),
+         finished_at=datetime.utcnow())
@@ -1,7 +1,7 @@
 from __future__ import annotations
 from typing import List, Tuple
 from datetime import datetime, timedelta, timezone
-from sqlalchemy import func, select, distinct, or_, and_
+from sqlalchemy import and_, func, select, distinct, or_
 from sqlalchemy.orm import Session
 
 from app.schemas.dashboards.overview import (
@@ -13,13 +13,13 @@ from app.models.assets.asset import Asset
 from app.models.assets.asset_tag import AssetTag, asset_tags_links
 from app.models.risks.risk_scenario_context import RiskScenarioContext
 from app.models.risks.risk_score import RiskScore
-from app.models.policies.risk_appetite_policy import RiskAppetitePolicy
+from app.services.policy.appetite_index import get_appetite_index
 
 from app.models.controls.control_context_link import ControlContextLink
 from app.models.compliance.control_evidence import ControlEvidence
 
 from app.models.compliance.framework_version import FrameworkVersion
-from app.services.compliance.coverage_summary import compute_coverage_summary
+from app.services.compliance.coverage_snapshot import get_coverage_summaries
 
 
 def _now_utc() -> datetime:
@@ -55,7 +55,7 @@ def _controls_status_counts(db: Session, scope_type: str, scope_id: int) -> Donu
         )
     ).scalar_one() or 0
 
-    # "pass" = applicable CCL with at least one valid-now evidence
+    # "pass" = applicable CCL with at least one valid evidence (the lifecycle sweeper expires stale rows)
     passed = db.execute(
         select(func.count(distinct(ControlContextLink.id)))
         .select_from(ControlContextLink)
@@ -65,7 +65,6 @@ def _controls_status_counts(db: Session, scope_type: str, scope_id: int) -> Donu
             ControlContextLink.scope_id == scope_id,
             or_(ControlContextLink.applicability.is_(None), ControlContextLink.applicability != "na"),
             ControlEvidence.status == "valid",
-            or_(ControlEvidence.valid_until.is_(None), ControlEvidence.valid_until >= func.now()),
         )
     ).scalar_one() or 0
 
@@ -115,46 +114,31 @@ def _soa_applicability_counts(db: Session, scope_type: str, scope_id: int) -> Do
 # -------------------- KPIs: evidence / risks / assets --------------------
 
 def _evidence_due_counts(db: Session, scope_type: str, scope_id: int, within_days: int = 30) -> Tuple[int, int]:
+    """(due within `within_days` incl. overdue, overdue); overdue = stored status "expired"."""
     upper = _now_utc() + timedelta(days=within_days)
-
-    due_30 = db.execute(
-        select(func.count(ControlEvidence.id))
-        .select_from(ControlEvidence)
-        .join(ControlContextLink, ControlContextLink.id == ControlEvidence.control_context_link_id)
-        .where(
-            ControlContextLink.scope_type == scope_type,
-            ControlContextLink.scope_id == scope_id,
-            ControlEvidence.valid_until.is_not(None),
-            ControlEvidence.valid_until <= upper,
+    expired = ControlEvidence.status == "expired"
+    due_soon = and_(ControlEvidence.status == "valid", ControlEvidence.valid_until.is_not(None),
+                    ControlEvidence.valid_until <= upper)
+
+    due_30, overdue = db.execute(
+        select(
+            func.count(ControlEvidence.id).filter(or_(due_soon, expired)),
+            func.count(ControlEvidence.id).filter(expired),
         )
-    ).scalar_one() or 0
-
-    overdue = db.execute(
-        select(func.count(ControlEvidence.id))
         .select_from(ControlEvidence)
         .join(ControlContextLink, ControlContextLink.id == ControlEvidence.control_context_link_id)
         .where(
             ControlContextLink.scope_type == scope_type,
             ControlContextLink.scope_id == scope_id,
-            ControlEvidence.valid_until.is_not(None),
-            ControlEvidence.valid_until < func.now(),
         )
-    ).scalar_one() or 0
+    ).one()
 
-    return int(due_30), int(overdue)
+    return int(due_30 or 0), int(overdue or 0)
 
 
 def _risk_mix(db: Session, scope_type: str, scope_id: int) -> DonutRisks:
     # pick the most specific appetite (scope match) or fallback to global (scope NULL)
-    ap = db.query(RiskAppetitePolicy)\
-        .filter(
-            or_(
-                and_(RiskAppetitePolicy.scope == scope_type, RiskAppetitePolicy.scope_id == scope_id),
-                and_(RiskAppetitePolicy.scope.is_(None), RiskAppetitePolicy.scope_id.is_(None)),
-            )
-        )\
-        .order_by(RiskAppetitePolicy.priority.desc())\
-        .first()
+    ap = get_appetite_index(db).resolve(scope_type, scope_id)
 
     green_max = ap.green_max if ap else None
     amber_max = ap.amber_max if ap else None
@@ -214,15 +198,17 @@ def _enabled_versions(db: Session) -> List[FrameworkVersion]:
     return list(db.query(FrameworkVersion).all())  # include all; 'enabled' flag exposed per row
 
 
-def compute_overview_summary(db: Session, *, scope_type: str = "org", scope_id: int = 1) -> OverviewSummary:
+def compute_overview_summary(db: Session, *, scope_type: str = "org", scope_id: int = 1,
+                             fresh: bool = False) -> OverviewSummary:
     versions = _enabled_versions(db)
+    coverage = get_coverage_summaries(db, [v.id for v in versions], scope_type, scope_id, fresh=fresh)
 
     frameworks: List[FrameworkRow] = []
     enabled_coverages: List[float] = []
     latest_ts = None
 
     for v in versions:
-        cs = compute_coverage_summary(db, version_id=v.id, scope_type=scope_type, scope_id=scope_id)
+        cs = coverage[v.id]
         frameworks.append(FrameworkRow(
             version_id=v.id,
             framework_code=getattr(v, "code", None),
@@ -0,0 +1,202 @@
+"""
+In-process risk-appetite policy index.
+
+All RiskAppetitePolicy rows are compiled once into a dict keyed by
+(scope, scope_id, domain) -> entries ordered by precedence (priority desc,
+effective_from desc, id desc), each carrying its effective-date interval, so a
+lookup is a dict hit plus a short interval scan instead of a query per scope.
+
+Precedence used by every resolver:
+  exact (scope, scope_id) beats the global (NULL, NULL) policy, then priority,
+  then the most recent effective_from. domain=None is the total appetite.
+
+The index is rebuilt lazily when the process-wide version counter moves. The
+counter is bumped after any SessionLocal transaction that wrote a policy commits
+(see listeners below), or explicitly via invalidate_appetite_index() for Core
+writes. INDEX_MAX_AGE_SECONDS bounds staleness for writes made by other worker
+processes.
+"""
+from __future__ import annotations
+
+import threading
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
+from itertools import chain
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from app.database import SessionLocal
+from app.models.policies.risk_appetite_policy import RiskAppetitePolicy
+
+INDEX_MAX_AGE_SECONDS = 300
+
+_PENDING_KEY = "appetite_index_dirty"
+_PRIVATE_KEY = "appetite_index_private"
+
+
+@dataclass(frozen=True)
+class AppetiteEntry:
+    id: int
+    scope: Optional[str]
+    scope_id: Optional[int]
+    domain: Optional[str]
+    green_max: int
+    amber_max: int
+    domain_caps: Dict[str, Any] = field(default_factory=dict)
+    sla_days_amber: Optional[int] = None
+    sla_days_red: Optional[int] = None
+    priority: int = 0
+    effective_from: Optional[datetime] = None
+    effective_to: Optional[datetime] = None
+
+    def active_at(self, at: datetime) -> bool:
+        # NULL effective_from never matched the SQL filters (NULL <= x), keep it that way
+        if self.effective_from is None or self.effective_from > at:
+            return False
+        return self.effective_to is None or self.effective_to >= at
+
+    def as_appetite(self) -> Dict[str, Any]:
+        """Shape used by resolve_appetite_for_scope / compute_rag."""
+        return {
+            "greenMax": self.green_max,
+            "amberMax": self.amber_max,
+            "domainCaps": dict(self.domain_caps or {}),
+            "slaDays": {"amber": self.sla_days_amber, "red": self.sla_days_red},
+        }
+
+
+Key = Tuple[Optional[str], Optional[int], Optional[str]]
+
+
+class AppetiteIndex:
+    def __init__(self, entries: Iterable[AppetiteEntry], version: int):
+        self.version = version
+        self.built_at = time.monotonic()
+        by_key: Dict[Key, List[AppetiteEntry]] = {}
+        # widest "due soon" window of any policy (bounds review-SLA candidate queries)
+        self.max_sla_days_amber = 0
+        for e in entries:
+            by_key.setdefault((e.scope, e.scope_id, e.domain), []).append(e)
+            self.max_sla_days_amber = max(self.max_sla_days_amber, e.sla_days_amber or 0)
+        for lst in by_key.values():
+            lst.sort(key=lambda e: (e.priority, e.effective_from or datetime.min, e.id), reverse=True)
+        self._by_key = by_key
+
+    def __len__(self) -> int:
+        return sum(len(v) for v in self._by_key.values())
+
+    def lookup(self, scope: Optional[str], scope_id: Optional[int], domain: Optional[str] = None,
+               at: Optional[datetime] = None) -> Optional[AppetiteEntry]:
+        """Best active policy defined exactly at (scope, scope_id, domain); no fallback."""
+        at = at or datetime.utcnow()
+        for e in self._by_key.get((scope, scope_id, domain), ()):
+            if e.active_at(at):
+                return e
+        return None
+
+    def resolve(self, scope: Optional[str], scope_id: Optional[int], domain: Optional[str] = None,
+                at: Optional[datetime] = None) -> Optional[AppetiteEntry]:
+        """Exact scope first, then the global policy."""
+        at = at or datetime.utcnow()
+        if scope and scope_id is not None:
+            hit = self.lookup(scope, scope_id, domain, at)
+            if hit is not None:
+                return hit
+        return self.lookup(None, None, domain, at)
+
+    def best_of(self, candidates: Iterable[Tuple[Optional[str], Optional[int], int]], domain: Optional[str] = None,
+                at: Optional[datetime] = None) -> Optional[AppetiteEntry]:
+        """
+        Best policy among ranked candidate scopes [(scope, scope_id, specificity)]:
+        highest (specificity, priority, effective_from) wins.
+        """
+        at = at or datetime.utcnow()
+        best, best_key = None, None
+        for scope, scope_id, rank in candidates:
+            e = self.lookup(scope, scope_id, domain, at)
+            if e is None:
+                continue
+            k = (rank, e.priority, e.effective_from or datetime.min)
+            if best_key is None or k > best_key:
+                best, best_key = e, k
+        return best
+
+
+_lock = threading.Lock()
+_version = 0
+_index: Optional[AppetiteIndex] = None
+
+
+def invalidate_appetite_index() -> int:
+    """Bump the version counter; the next get_appetite_index() rebuilds."""
+    global _version
+    with _lock:
+        _version += 1
+        return _version
+
+
+def _entry(p: RiskAppetitePolicy) -> AppetiteEntry:
+    return AppetiteEntry(
+        id=p.id,
+        scope=p.scope,
+        scope_id=p.scope_id,
+        domain=p.domain,
+        green_max=p.green_max,
+        amber_max=p.amber_max,
+        domain_caps=dict(p.domain_caps_json or {}),
+        sla_days_amber=p.sla_days_amber,
+        sla_days_red=p.sla_days_red,
+        priority=p.priority or 0,
+        effective_from=p.effective_from,
+        effective_to=p.effective_to,
+    )
+
+
+def get_appetite_index(db: Session) -> AppetiteIndex:
+    """Current index, rebuilt from `db` when invalidated or older than INDEX_MAX_AGE_SECONDS."""
+    global _index
+    if db.info.get(_PENDING_KEY):
+        # this transaction changed policies: a private index that sees its own writes,
+        # cached in db.info until the next policy flush / commit / rollback
+        idx = db.info.get(_PRIVATE_KEY)
+        if idx is None:
+            idx = AppetiteIndex((_entry(p) for p in db.query(RiskAppetitePolicy).all()), -1)
+            db.info[_PRIVATE_KEY] = idx
+        return idx
+    idx = _index
+    if idx is not None and idx.version == _version and time.monotonic() - idx.built_at < INDEX_MAX_AGE_SECONDS:
+        return idx
+    with _lock:
+        version = _version
+        idx = _index
+        if idx is not None and idx.version == version and time.monotonic() - idx.built_at < INDEX_MAX_AGE_SECONDS:
+            return idx
+        idx = AppetiteIndex((_entry(p) for p in db.query(RiskAppetitePolicy).all()), version)
+        _index = idx
+        return idx
+
+
+# ---------------- write-time invalidation ----------------
+
+@event.listens_for(SessionLocal, "after_flush")
+def _mark_policy_writes(session: Session, flush_context) -> None:
+    if any(isinstance(o, RiskAppetitePolicy) for o in chain(session.new, session.dirty, session.deleted)):
+        session.info[_PENDING_KEY] = True
+        session.info.pop(_PRIVATE_KEY, None)
+
+
+@event.listens_for(SessionLocal, "after_commit")
+def _bump_after_commit(session: Session) -> None:
+    # bump only once the rows are visible to other sessions, so a rebuild can't cache pre-commit data
+    session.info.pop(_PRIVATE_KEY, None)
+    if session.info.pop(_PENDING_KEY, False):
+        invalidate_appetite_index()
+
+
+@event.listens_for(SessionLocal, "after_rollback")
+def _discard_on_rollback(session: Session) -> None:
+    session.info.pop(_PENDING_KEY, None)
+    session.info.pop(_PRIVATE_KEY, None)
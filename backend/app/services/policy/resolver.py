@@ -1,7 +1,7 @@
 import datetime
 from typing import Dict, Any, Optional, List, Tuple, Set
 from sqlalchemy.orm import Session
-from app.crud.policies.risk_appetite_policy import find_effective_for_asset
+from app.crud.policies.risk_appetite_policy import best_for_asset
 from app.crud.policies.control_applicability_policy import list_effective
 from app.models.controls.control import Control  # adjust import to your project
 from app.models.controls.control_risk_link import ControlRiskLink  # scenario template
@@ -100,15 +100,11 @@ def policy_applies_to_asset(policy, asset) -> bool:
     return any(pair in asset_pairs for pair in legacy_pairs)
 
 def resolve_appetite(db: Session, *, asset) -> Optional[Dict[str, Any]]:
-    p = find_effective_for_asset(db, asset_id=asset.id, at_time=datetime.utcnow(),domain=None)
-    # p = resolve_for(db, asset=asset, scenario=None)
+    p = best_for_asset(db, asset, at_time=datetime.utcnow(), domain=None)
     if not p:
         return None
     return {
-        "greenMax": p.green_max,
-        "amberMax": p.amber_max,
-        "domainCaps": p.domain_caps_json or {},
-        "slaDays": {"amber": p.sla_days_amber, "red": p.sla_days_red},
+        **p.as_appetite(),
         "_policy_id": p.id,  # helpful for debugging
     }
 
@@ -4,7 +4,7 @@ from sqlalchemy.orm import Session, object_session
 from app.models.risks.risk_scenario import RiskScenario
 from app.models.risks.risk_scenario_context import RiskScenarioContext
 from app.models.risks.risk_context_impact_rating import RiskContextImpactRating
-from app.models.controls.control_effect_rating import ControlEffectRating
+from app.services.effect_matrix import get_effect_matrix, EffectMatrix
 
 
 def calculate_risk_scores_by_scenario(db: Session, scenario_context_id: int) -> Dict[str, Any]:
@@ -63,15 +63,8 @@ def calculate_risk_scores_by_context(db: Session, context_id: int) -> Dict[str,
     ).all()
     impact_map = {str(r.domain_id): r.score for r in impact_ratings}
 
-    # Load control effectiveness from parent scenario
-    control_effects = db.query(ControlEffectRating).filter(
-        ControlEffectRating.risk_scenario_id == context.risk_scenario_id
-    ).all()
-    effect_map = {}
-    for eff in control_effects:
-        domain_key = str(eff.domain_id)
-        existing = effect_map.get(domain_key, 0)
-        effect_map[domain_key] = max(existing, eff.score or 0)
+    # Control effectiveness from parent scenario (max per domain, in-memory effect matrix)
+    effect_map = get_effect_matrix(db).scenario_max(context.risk_scenario_id)
 
     # Calculate per-domain residuals
     residual_map = {}
@@ -161,30 +154,13 @@ def _included_control_ids(ctx: RiskScenarioContext, *, mode: str) -> List[int]:
 
 def _effects_by_domain_for_controls(db: Session, *, scenario_id: int, control_ids: List[int]) -> Dict[str, List[float]]:
     """
-    Returns {domain_id(str): [effect_scores...]} for the included control ids under the scenario template
-    using ControlEffectRating. Scores are coerced to 0..5 domain.
+    Returns {domain_id(str): [effect_scores...]} for the included control ids under the scenario template,
+    read from the in-memory ControlEffectRating matrix. Scores are coerced to 0..5 domain
+    (prevents bad data from exploding the multiplicative model).
     """
-    out: Dict[str, List[float]] = {}
     if not control_ids:
-        return out
-    rows = (
-        db.query(ControlEffectRating)
-        .filter(ControlEffectRating.risk_scenario_id == scenario_id)
-        .filter(ControlEffectRating.control_id.in_(list(set(control_ids))))
-        .all()
-    )
-    for r in rows:
-        try:
-            dom_key = str(getattr(r, "domain_id", None))
-            if dom_key is None:
-                continue
-            score = float(getattr(r, "score", 0) or 0)
-            # clamp to 0..5 to prevent bad data from exploding multiplicative model
-            score = max(0.0, min(5.0, score))
-            out.setdefault(dom_key, []).append(score)
-        except Exception:
-            continue
-    return out
+        return {}
+    return get_effect_matrix(db).effects_by_domain(scenario_id, control_ids)
 
 
 def _residual_by_domain(
@@ -277,3 +253,27 @@ def compute_target_residual_planned(context: RiskScenarioContext) -> Dict[str, A
     likelihood = float(getattr(context, "likelihood", 0) or 0)
     overall = _overall_from_domains(residual_map, likelihood)
     return {"model": model, "residual_by_domain": residual_map, "overall": overall}
+
+
+def compute_residuals_batch(db: Session, contexts: List[RiskScenarioContext]) -> Dict[int, Dict[str, Any]]:
+    """
+    Gated residuals for a page of contexts in one pass against the effect matrix:
+    {context_id: {"effective": <compute_residual_effective_only shape>,
+                  "planned":   <compute_target_residual_planned shape>}}.
+    Contexts should have impact_ratings and control_links loaded; no per-context queries.
+    """
+    matrix: EffectMatrix = get_effect_matrix(db)
+    model = _residual_model_flag()
+    out: Dict[int, Dict[str, Any]] = {}
+    for ctx in contexts:
+        impacts = _impact_map_for_context(ctx)
+        likelihood = float(getattr(ctx, "likelihood", 0) or 0)
+        res: Dict[str, Any] = {}
+        for key, mode in (("effective", "effective_only"), ("planned", "planned")):
+            ctrl_ids = _included_control_ids(ctx, mode=mode)
+            effects = matrix.effects_by_domain(ctx.risk_scenario_id, ctrl_ids) if ctrl_ids else {}
+            residual_map = _residual_by_domain(impacts, effects, model=model)
+            res[key] = {"model": model, "residual_by_domain": residual_map,
+                        "overall": _overall_from_domains(residual_map, likelihood)}
+        out[ctx.id] = res
+    return out
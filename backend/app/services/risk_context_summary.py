@@ -0,0 +1,481 @@
+"""
+risk_context_summary read model.
+
+One denormalized row per RiskScenarioContext with the facts every list/metrics/RiskOps
+read needs (impacts, severity band, residual, appetite, RAG, control coverage counts and
+evidence freshness). Rows are maintained from SQLAlchemy flush events of SessionLocal
+sessions:
+  - per-context writes (context, impact ratings, score, links, evidence) refresh the
+    affected rows inside the same transaction as the write;
+  - appetite-policy and effect-rating writes can touch every context of a scope, a
+    scenario or the whole register, so they only set `dirty` on the affected rows and
+    refresh_dirty() recomputes them in batches (scheduler job
+    "risk_context_summary_refresh"). A failed in-transaction refresh also falls back to
+    marking its rows dirty.
+Time-relative fields (evidence staleness, effective-dated appetite) drift between
+writes; the nightly `rebuild` (scripts/risk_context_summary.py) and `check` cover that.
+"""
+from __future__ import annotations
+
+import logging
+from collections import defaultdict
+from datetime import datetime, timedelta
+from itertools import chain
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from sqlalchemy import event, func, or_, select, true, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+
+from app.database import SessionLocal
+from app.models.risks.risk_scenario_context import RiskScenarioContext
+from app.models.risks.risk_context_impact_rating import RiskContextImpactRating
+from app.models.risks.risk_score import RiskScore
+from app.models.risks.risk_context_summary import RiskContextSummary
+from app.models.controls.control_context_link import ControlContextLink
+from app.models.controls.control_effect_rating import ControlEffectRating
+from app.models.compliance.control_evidence import ControlEvidence
+from app.models.evidence.evidence_item import EvidenceItem
+from app.models.policies.risk_appetite_policy import RiskAppetitePolicy
+from app.services.evidence.freshness import evidence_aggregate_by_context
+
+logger = logging.getLogger(__name__)
+
+# evidence older than this counts as overdue (same default as the list endpoint)
+SUMMARY_EVIDENCE_DAYS = 90
+CHUNK_SIZE = 1000
+REFRESH_BATCH = 500
+
+_PENDING_KEY = "risk_context_summary_pending"
+
+# columns compared by the consistency checker (refreshed_at is bookkeeping only)
+_COMPARE_COLUMNS = [
+    c.name for c in RiskContextSummary.__table__.columns if c.name not in ("context_id", "refreshed_at", "dirty")
+]
+
+
+def _chunks(ids: List[int], size: int) -> Iterable[List[int]]:
+    for i in range(0, len(ids), size):
+        yield ids[i:i + size]
+
+
+# ---------------- compute ----------------
+
+def compute_summary_rows(db: Session, context_ids: Iterable[int], *, now: Optional[datetime] = None) -> List[Dict[str, Any]]:
+    """Compute projection rows from source tables for the given contexts (no writes)."""
+    # Lazy import: risk_context_list reads the projection this module maintains
+    from app.crud.risks.risk_context_list import (
+        _pack_ratings, _impact_overall, _severity, _severity_band, _max_dt, _as_datetime,
+        resolve_appetite_for_scope, compute_rag,
+    )
+
+    ids = sorted({int(i) for i in context_ids if i is not None})
+    if not ids:
+        return []
+    now = now or datetime.utcnow()
+
+    ctx_rows = (
+        db.query(
+            RiskScenarioContext.id,
+            RiskScenarioContext.risk_scenario_id,
+            RiskScenarioContext.scope_type,
+            RiskScenarioContext.scope_id,
+            RiskScenarioContext.status,
+            RiskScenarioContext.owner_id,
+            RiskScenarioContext.likelihood,
+            RiskScenarioContext.next_review,
+            RiskScenarioContext.updated_at,
+            RiskScore.id.label("score_id"),
+            RiskScore.initial_score,
+            RiskScore.residual_score,
+            RiskScore.last_updated,
+        )
+        .outerjoin(RiskScore, RiskScore.risk_scenario_context_id == RiskScenarioContext.id)
+        .filter(RiskScenarioContext.id.in_(ids))
+        .all()
+    )
+    if not ctx_rows:
+        return []
+
+    ratings_by_ctx: Dict[int, list] = defaultdict(list)
+    for r in (
+        db.query(RiskContextImpactRating.risk_scenario_context_id, RiskContextImpactRating.domain_id, RiskContextImpactRating.score)
+          .filter(RiskContextImpactRating.risk_scenario_context_id.in_(ids))
+          .order_by(RiskContextImpactRating.id)
+          .all()
+    ):
+        ratings_by_ctx[r.risk_scenario_context_id].append(r)
+
+    scn_ids = list({r.risk_scenario_id for r in ctx_rows})
+    rec_by_scn: Dict[int, Set[int]] = defaultdict(set)
+    for sid, cid in (
+        db.query(ControlEffectRating.risk_scenario_id, ControlEffectRating.control_id)
+          .filter(ControlEffectRating.risk_scenario_id.in_(scn_ids), ControlEffectRating.score > 0)
+          .distinct()
+          .all()
+    ):
+        rec_by_scn[sid].add(cid)
+
+    impl_by_ctx: Dict[int, Set[int]] = defaultdict(set)
+    for ctx_id, cid in (
+        db.query(ControlContextLink.risk_scenario_context_id, ControlContextLink.control_id)
+          .filter(
+              ControlContextLink.risk_scenario_context_id.in_(ids),
+              func.lower(ControlContextLink.assurance_status).in_(("implemented", "verified")),
+          )
+          .all()
+    ):
+        impl_by_ctx[ctx_id].add(cid)
+
+    ev_by_ctx = evidence_aggregate_by_context(db, ids, now - timedelta(days=SUMMARY_EVIDENCE_DAYS))
+
+    appetite_cache: Dict[Tuple[str, int], Dict[str, Any]] = {}
+
+    out: List[Dict[str, Any]] = []
+    for c in ctx_rows:
+        impacts = _pack_ratings(ratings_by_ctx.get(c.id, []))
+        impact_overall = int(_impact_overall(impacts) or 0)
+        likelihood = int(c.likelihood or 0)
+        sev = _severity(impact_overall, likelihood)
+
+        if c.score_id is not None:
+            initial = float(c.initial_score or 0)
+            residual = float(c.residual_score or 0)
+        else:
+            initial = float(impact_overall * likelihood)
+            residual = initial
+
+        key = (c.scope_type, c.scope_id)
+        if key not in appetite_cache:
+            appetite_cache[key] = resolve_appetite_for_scope(db, *key)
+        appetite = appetite_cache[key]
+        amber_max = int(appetite.get("amberMax") or 0)
+        rag = compute_rag(residual=int(residual), appetite=appetite, likelihood=likelihood, impacts=impacts)
+
+        rec_ids = rec_by_scn.get(c.risk_scenario_id, set())
+        ev = ev_by_ctx.get(c.id, {"implemented": 0, "overdue": 0, "max_evidence": None})
+        last_ev = _as_datetime(ev.get("max_evidence"))
+
+        out.append({
+            "context_id": c.id,
+            "risk_scenario_id": c.risk_scenario_id,
+            "scope_type": c.scope_type,
+            "scope_id": c.scope_id,
+            "status": c.status,
+            "owner_id": c.owner_id,
+            "likelihood": likelihood,
+            "impact_c": int(impacts.get("C") or 0),
+            "impact_i": int(impacts.get("I") or 0),
+            "impact_a": int(impacts.get("A") or 0),
+            "impact_l": int(impacts.get("L") or 0),
+            "impact_r": int(impacts.get("R") or 0),
+            "impact_overall": impact_overall,
+            "severity": sev,
+            "severity_band": _severity_band(sev),
+            "initial_score": initial,
+            "residual_score": residual,
+            "green_max": appetite.get("greenMax"),
+            "amber_max": amber_max,
+            "over_appetite": int(residual) > amber_max,
+            "rag": rag,
+            "controls_recommended": len(rec_ids),
+            "controls_implemented": len(impl_by_ctx.get(c.id, set()) & rec_ids),
+            "evidence_implemented": int(ev.get("implemented") or 0),
+            "evidence_overdue": int(ev.get("overdue") or 0),
+            "last_evidence_at": last_ev,
+            "next_review": c.next_review,
+            "updated_at": _max_dt(c.updated_at, c.last_updated, last_ev),
+            "refreshed_at": now,
+        })
+    return out
+
+
+# ---------------- write ----------------
+
+def refresh_context_summaries(db: Session, context_ids: Iterable[int], *, now: Optional[datetime] = None) -> int:
+    """
+    Upsert projection rows for the given contexts in the current transaction
+    (caller commits). Rows of contexts that no longer exist are removed.
+    Returns the number of rows written.
+    """
+    ids = sorted({int(i) for i in context_ids if i is not None})
+    if not ids:
+        return 0
+    now = now or datetime.utcnow()
+    conn = db.connection()
+    table = RiskContextSummary.__table__
+    written = 0
+    for chunk in _chunks(ids, CHUNK_SIZE):
+        rows = compute_summary_rows(db, chunk, now=now)
+        gone = set(chunk) - {r["context_id"] for r in rows}
+        if gone:
+            conn.execute(table.delete().where(table.c.context_id.in_(gone)))
+        if rows:
+            stmt = pg_insert(table).values(rows)
+            stmt = stmt.on_conflict_do_update(
+                index_elements=[table.c.context_id],
+                # `dirty` is left alone: a mark made while this row was computed must survive
+                set_={c.name: stmt.excluded[c.name] for c in table.columns if c.name not in ("context_id", "dirty")},
+            )
+            conn.execute(stmt)
+            written += len(rows)
+    return written
+
+
+def context_ids_affected(
+    db: Session,
+    *,
+    context_ids: Iterable[int] = (),
+    link_ids: Iterable[int] = (),
+    scenario_ids: Iterable[int] = (),
+    scopes: Iterable[Tuple[Optional[str], Optional[int]]] = (),
+) -> Set[int]:
+    """Resolve changed rows (links, scenarios, appetite scopes) to the context ids they affect."""
+    out: Set[int] = {int(i) for i in context_ids if i is not None}
+
+    link_ids = list({int(i) for i in link_ids if i is not None})
+    if link_ids:
+        out.update(
+            cid for (cid,) in db.query(ControlContextLink.risk_scenario_context_id)
+                                .filter(ControlContextLink.id.in_(link_ids),
+                                        ControlContextLink.risk_scenario_context_id.isnot(None))
+                                .all()
+        )
+
+    scenario_ids = list({int(i) for i in scenario_ids if i is not None})
+    if scenario_ids:
+        out.update(
+            cid for (cid,) in db.query(RiskScenarioContext.id)
+                                .filter(RiskScenarioContext.risk_scenario_id.in_(scenario_ids))
+                                .all()
+        )
+
+    scopes = set(scopes)
+    if (None, None) in scopes:
+        # global appetite applies to every context
+        out.update(cid for (cid,) in db.query(RiskScenarioContext.id).all())
+    else:
+        for st, sid in scopes:
+            out.update(
+                cid for (cid,) in db.query(RiskScenarioContext.id)
+                                    .filter(RiskScenarioContext.scope_type == st,
+                                            RiskScenarioContext.scope_id == sid)
+                                    .all()
+            )
+    return out
+
+
+def mark_summaries_dirty(
+    db: Session,
+    *,
+    context_ids: Iterable[int] = (),
+    scenario_ids: Iterable[int] = (),
+    scopes: Iterable[Tuple[Optional[str], Optional[int]]] = (),
+) -> int:
+    """
+    Flag rows for refresh_dirty() in the current transaction (caller commits): the given
+    contexts, every context of the given scenarios and of the given appetite scopes
+    ((None, None) = global appetite, i.e. every row). One UPDATE, no recomputation.
+    """
+    T = RiskContextSummary.__table__
+    preds = []
+    context_ids = {int(i) for i in context_ids if i is not None}
+    if context_ids:
+        preds.append(T.c.context_id.in_(context_ids))
+    scenario_ids = {int(i) for i in scenario_ids if i is not None}
+    if scenario_ids:
+        preds.append(T.c.risk_scenario_id.in_(scenario_ids))
+    scopes = set(scopes)
+    if (None, None) in scopes:
+        preds = [true()]
+    else:
+        preds += [(T.c.scope_type == st) & (T.c.scope_id == sid) for st, sid in scopes]
+    if not preds:
+        return 0
+    res = db.execute(update(T).where(or_(*preds), T.c.dirty.is_(False)).values(dirty=True))
+    return res.rowcount or 0
+
+
+def refresh_dirty(db: Session, *, limit: int = REFRESH_BATCH, now: Optional[datetime] = None) -> Dict[str, int]:
+    """
+    Recompute up to `limit` dirty rows. The rows are claimed first (FOR UPDATE SKIP
+    LOCKED, dirty cleared, commit), so no lock is held while computing and concurrent
+    workers skip them; marks made meanwhile set `dirty` again, and a failed computation
+    puts the claimed rows back.
+    """
+    T = RiskContextSummary.__table__
+    try:
+        ids = list(db.execute(
+            select(T.c.context_id).where(T.c.dirty.is_(True)).order_by(T.c.context_id)
+            .limit(max(1, int(limit))).with_for_update(skip_locked=True)
+        ).scalars())
+        if ids:
+            db.execute(update(T).where(T.c.context_id.in_(ids)).values(dirty=False))
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    if not ids:
+        return {"refreshed": 0}
+
+    try:
+        refresh_context_summaries(db, ids, now=now)
+        db.commit()
+    except Exception:
+        db.rollback()
+        mark_summaries_dirty(db, context_ids=ids)
+        db.commit()
+        raise
+    return {"refreshed": len(ids)}
+
+
+def refresh_all_dirty(db: Session, *, limit: int = REFRESH_BATCH) -> Dict[str, int]:
+    """Drain refresh_dirty() until no dirty row is left (one commit per batch)."""
+    now = datetime.utcnow()
+    total = batches = 0
+    while True:
+        n = refresh_dirty(db, limit=limit, now=now)["refreshed"]
+        if not n:
+            return {"refreshed": total, "batches": batches}
+        total += n
+        batches += 1
+
+
+# ---------------- incremental maintenance (flush events) ----------------
+
+def _pending(session: Session) -> Dict[str, set]:
+    return session.info.setdefault(
+        _PENDING_KEY, {"context_ids": set(), "link_ids": set(), "scenario_ids": set(), "scopes": set()}
+    )
+
+
+def _collect_change(obj, pending: Dict[str, set], *, deleted: bool) -> None:
+    if isinstance(obj, RiskScenarioContext):
+        if not deleted:  # deleted contexts drop their row via ON DELETE CASCADE
+            pending["context_ids"].add(obj.id)
+    elif isinstance(obj, (RiskContextImpactRating, RiskScore, ControlContextLink)):
+        pending["context_ids"].add(obj.risk_scenario_context_id)
+        if isinstance(obj, ControlContextLink) and not deleted:
+            pending["link_ids"].add(obj.id)
+    elif isinstance(obj, (ControlEvidence, EvidenceItem)):
+        pending["link_ids"].add(obj.control_context_link_id)
+    elif isinstance(obj, ControlEffectRating):
+        pending["scenario_ids"].add(obj.risk_scenario_id)
+    elif isinstance(obj, RiskAppetitePolicy):
+        pending["scopes"].add((obj.scope, obj.scope_id) if obj.scope is not None else (None, None))
+
+
+@event.listens_for(SessionLocal, "after_flush")
+def _collect_summary_changes(session: Session, flush_context) -> None:
+    pending = None
+    for obj in chain(session.new, session.dirty, session.deleted):
+        if isinstance(obj, (RiskScenarioContext, RiskContextImpactRating, RiskScore, ControlContextLink,
+                            ControlEvidence, EvidenceItem, ControlEffectRating, RiskAppetitePolicy)):
+            pending = pending or _pending(session)
+            _collect_change(obj, pending, deleted=obj in session.deleted)
+
+
+@event.listens_for(SessionLocal, "after_flush_postexec")
+def _refresh_summary_changes(session: Session, flush_context) -> None:
+    pending = session.info.pop(_PENDING_KEY, None)
+    if not pending:
+        return
+    conn = session.connection()
+    savepoint = conn.begin_nested()
+    ids: Set[int] = set()
+    try:
+        # appetite / effect-rating changes can span the register: defer them to refresh_dirty()
+        mark_summaries_dirty(session, scenario_ids=pending["scenario_ids"], scopes=pending["scopes"])
+        ids = context_ids_affected(session, context_ids=pending["context_ids"], link_ids=pending["link_ids"])
+        refresh_context_summaries(session, ids)
+        savepoint.commit()
+    except Exception:
+        # never fail the business write because of the read model; leave the rows to refresh_dirty()
+        savepoint.rollback()
+        logger.exception("risk_context_summary refresh failed")
+        _mark_dirty_after_failure(session, pending, ids)
+
+
+def _mark_dirty_after_failure(session: Session, pending: Dict[str, set], ids: Set[int]) -> None:
+    savepoint = session.connection().begin_nested()
+    try:
+        mark_summaries_dirty(
+            session,
+            context_ids=ids or pending["context_ids"],
+            scenario_ids=pending["scenario_ids"],
+            scopes=pending["scopes"],
+        )
+        savepoint.commit()
+    except Exception:
+        savepoint.rollback()
+        logger.exception("risk_context_summary dirty marking failed")
+
+
+# ---------------- full rebuild / consistency check ----------------
+
+def rebuild_all(db: Session, *, chunk_size: int = CHUNK_SIZE) -> Dict[str, int]:
+    """Recompute every row, one commit per chunk; also removes orphaned rows."""
+    now = datetime.utcnow()
+    ids = [cid for (cid,) in db.query(RiskScenarioContext.id).order_by(RiskScenarioContext.id).all()]
+    written = 0
+    for chunk in _chunks(ids, chunk_size):
+        written += refresh_context_summaries(db, chunk, now=now)
+        db.commit()
+    table = RiskContextSummary.__table__
+    orphans = db.execute(
+        table.delete().where(~table.c.context_id.in_(db.query(RiskScenarioContext.id).scalar_subquery()))
+    ).rowcount or 0
+    db.commit()
+    return {"contexts": len(ids), "written": written, "orphansRemoved": orphans}
+
+
+def _same(a, b) -> bool:
+    if isinstance(a, float) or isinstance(b, float):
+        return abs(float(a or 0) - float(b or 0)) < 1e-6
+    return a == b
+
+
+def check_consistency(db: Session, *, chunk_size: int = CHUNK_SIZE, sample: int = 50) -> Dict[str, Any]:
+    """
+    Compare stored rows with a fresh computation from source tables (read-only).
+    Returns counts plus up to `sample` example ids per problem class.
+    """
+    now = datetime.utcnow()
+    ids = [cid for (cid,) in db.query(RiskScenarioContext.id).order_by(RiskScenarioContext.id).all()]
+    missing: List[int] = []
+    stale: List[Dict[str, Any]] = []
+    n_missing = n_stale = 0
+    for chunk in _chunks(ids, chunk_size):
+        expected = {r["context_id"]: r for r in compute_summary_rows(db, chunk, now=now)}
+        stored = {
+            r.context_id: r
+            for r in db.query(RiskContextSummary).filter(RiskContextSummary.context_id.in_(chunk)).all()
+        }
+        for cid, exp in expected.items():
+            row = stored.get(cid)
+            if row is None:
+                n_missing += 1
+                if len(missing) < sample:
+                    missing.append(cid)
+                continue
+            diff = [col for col in _COMPARE_COLUMNS if not _same(getattr(row, col), exp[col])]
+            if diff:
+                n_stale += 1
+                if len(stale) < sample:
+                    stale.append({"contextId": cid, "columns": diff})
+        db.expunge_all()
+
+    table = RiskContextSummary.__table__
+    orphans = db.query(func.count(table.c.context_id)).filter(
+        ~table.c.context_id.in_(db.query(RiskScenarioContext.id).scalar_subquery())
+    ).scalar() or 0
+
+    return {
+        "checked": len(ids),
+        "missing": n_missing,
+        "stale": n_stale,
+        "orphans": int(orphans),
+        "consistent": not (n_missing or n_stale or orphans),
+        "missingSample": missing,
+        "staleSample": stale,
+    }
@@ -1,7 +1,9 @@
 from __future__ import annotations
-from typing import Iterable, List, Dict, Any, Tuple
+from datetime import datetime
+from typing import Iterable, List, Dict, Any, Optional, Tuple
 from sqlalchemy.orm import Session
-from sqlalchemy import and_
+from sqlalchemy import and_, exists, func, insert, literal, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from app.models.risks.risk_scenario import RiskScenario
 from app.models.risks.risk_scenario_context import RiskScenarioContext
 from app.models.assets.asset_type_threat_link import AssetTypeThreatLink
@@ -10,6 +12,10 @@ from app.models.assets.asset import Asset
 from app.models.assets.asset_type import AssetType
 from app.models.risks.risk_context_impact_rating import RiskContextImpactRating
 from app.services.risk_analysis import calculate_risk_scores_by_context
+from app.services.risk_context_summary import refresh_context_summaries
+from app.services.risk_score_batch import recalculate_scores
+
+TYPE_SCOPE = "asset_type"
 
 ImpactInput = List[Dict[str, int]]  # [{"domain_id": 1, "score": 3}, ...]
 
@@ -130,6 +136,114 @@ class RiskEngine:
             "contexts_count": len(touched_context_ids),
         }
 
+    # ---------- Generation (all types, set-based) ----------
+
+    @staticmethod
+    def _applicability(asset_type_ids: Optional[Iterable[int]] = None):
+        """
+        (asset_type_id, risk_scenario_id, threat_id, vulnerability_id) for every applicable
+        pair, same T∩V rule as applicable_scenarios_for_type(), as one SELECT.
+        """
+        S, TL, VL = RiskScenario, AssetTypeThreatLink, AssetTypeVulnerabilityLink
+        q = (
+            select(TL.asset_type_id.label("asset_type_id"), S.id.label("risk_scenario_id"),
+                   S.threat_id.label("threat_id"), S.vulnerability_id.label("vulnerability_id"))
+            .join(TL, TL.threat_id == S.threat_id)
+            .join(VL, and_(VL.vulnerability_id == S.vulnerability_id, VL.asset_type_id == TL.asset_type_id))
+            .distinct()
+        )
+        if asset_type_ids is not None:
+            q = q.where(TL.asset_type_id.in_(list(asset_type_ids)))
+        return q
+
+    def generate_all(
+        self,
+        default_likelihood: int,
+        impact_ratings: ImpactInput,
+        status: str = "Open",
+        asset_type_ids: Optional[Iterable[int]] = None,
+        dry_run: bool = False,
+        recalc_scores: bool = True,
+    ) -> Dict[str, Any]:
+        """
+        TYPE-scope contexts for every applicable (asset type, scenario) pair at once, e.g.
+        after a threat/vulnerability catalog update:
+          - missing contexts: one INSERT ... SELECT <applicability> ON CONFLICT DO NOTHING
+            RETURNING (the unique (scenario, scope_type, scope_id) key makes it idempotent)
+          - default impact ratings for the created contexts: one executemany INSERT
+          - retired: existing TYPE-scope contexts whose pair is no longer applicable;
+            reported only (they keep their ratings, links and history)
+        Created contexts are scored with the bulk scorer (services/risk_score_batch.py).
+        dry_run executes the same statements in a savepoint and rolls it back.
+        """
+        if asset_type_ids is not None:
+            asset_type_ids = sorted({int(i) for i in asset_type_ids})
+        now = datetime.utcnow()
+        C = RiskScenarioContext
+        applicable_sq = self._applicability(asset_type_ids).subquery("applicable")
+        savepoint = self.db.begin_nested() if dry_run else None
+
+        applicable = self.db.execute(select(func.count()).select_from(applicable_sq)).scalar() or 0
+
+        stmt = (
+            pg_insert(C.__table__)
+            .from_select(
+                ["risk_scenario_id", "scope_type", "scope_id", "asset_type_id", "status", "likelihood",
+                 "threat_id", "vulnerability_id", "created_at", "updated_at", "enabled"],
+                select(applicable_sq.c.risk_scenario_id, literal(TYPE_SCOPE), applicable_sq.c.asset_type_id, applicable_sq.c.asset_type_id,
+                       literal(status), literal(default_likelihood), applicable_sq.c.threat_id, applicable_sq.c.vulnerability_id,
+                       literal(now), literal(now), literal(True)),
+            )
+            .on_conflict_do_nothing(index_elements=["risk_scenario_id", "scope_type", "scope_id"])
+            .returning(C.id, C.risk_scenario_id, C.scope_id)
+        )
+        added = [
+            {"contextId": ctx_id, "scenarioId": scn_id, "assetTypeId": type_id}
+            for ctx_id, scn_id, type_id in self.db.execute(stmt)
+        ]
+        created_ids = [a["contextId"] for a in added]
+
+        if created_ids and impact_ratings:
+            self.db.execute(insert(RiskContextImpactRating.__table__), [
+                {"risk_scenario_context_id": ctx_id, "domain_id": item["domain_id"], "score": item["score"],
+                 "created_at": now, "updated_at": now, "enabled": True}
+                for ctx_id in created_ids
+                for item in impact_ratings
+            ])
+
+        still_applicable = exists().where(
+            applicable_sq.c.risk_scenario_id == C.risk_scenario_id, applicable_sq.c.asset_type_id == C.scope_id
+        )
+        retired_q = select(C.id, C.risk_scenario_id, C.scope_id).where(C.scope_type == TYPE_SCOPE, ~still_applicable)
+        if asset_type_ids is not None:
+            retired_q = retired_q.where(C.scope_id.in_(asset_type_ids))
+        retired = [
+            {"contextId": ctx_id, "scenarioId": scn_id, "assetTypeId": type_id}
+            for ctx_id, scn_id, type_id in self.db.execute(retired_q.order_by(C.id))
+        ]
+
+        report = {
+            "dryRun": dry_run,
+            "applicable": applicable,
+            "created": len(added),
+            "existing": applicable - len(added),
+            "retiredCount": len(retired),
+            "recalculated": 0,
+            "added": added,
+            "retired": retired,
+        }
+        if savepoint is not None:
+            savepoint.rollback()
+            return report
+
+        # Core statements bypass the flush listeners -> refresh the read model explicitly
+        refresh_context_summaries(self.db, created_ids, now=now)
+        self.db.commit()
+
+        if recalc_scores and created_ids:
+            report["recalculated"] = recalculate_scores(self.db, context_ids=created_ids)["written"]
+        return report
+
     # ---------- Helper (nice-to-have) ----------
 
     def preview_by_type(self, asset_type_id: int) -> Dict[str, Any]:
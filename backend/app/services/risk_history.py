@@ -6,7 +6,7 @@ from sqlalchemy.orm import Session
 
 # Readers and models
 from app.database import get_db
-from app.crud.risks.risk_score import get_score_history_by_context
+from app.services.risk_score_history import history_points
 from app.models.evidence.evidence_lifecycle_event import EvidenceLifecycleEvent
 from app.models.compliance.control_evidence import ControlEvidence
 from app.models.controls.control_context_link import ControlContextLink
@@ -37,7 +37,7 @@ def get_context_changes(
 ) -> Tuple[List[ChangeItem], Optional[str]]:
     """
     Merge residual score deltas with evidence lifecycle events for a context.
-    - Residual deltas from RiskScoreHistory (overall + per-domain)
+    - Residual deltas from score history (raw points + compacted buckets; overall + per-domain)
     - Evidence lifecycle from EvidenceLifecycleEvent joined via ControlEvidence -> ControlContextLink
     Returns items sorted by ts desc. Cursor is reserved (None for now).
     """
@@ -50,9 +50,8 @@ def get_context_changes(
     # 1) Residual score deltas
     score_items: List[ChangeItem] = []
     try:
-        hist = get_score_history_by_context(db, context_id)
-        # sort by created_at asc to compute forward diffs
-        hist_sorted = sorted(list(hist or []), key=lambda h: getattr(h, "created_at", now))
+        # ascending, starting with the last known point before the cutoff
+        hist_sorted = history_points(db, context_id, since=cutoff)
         prev = None
         for h in hist_sorted:
             ts = getattr(h, "created_at", None)
@@ -0,0 +1,120 @@
+"""
+Risk register export (CSV / NDJSON / XLSX).
+
+Rows are the list rows of crud.risks.risk_context_list (same filters, sort and
+enrichment as GET /risk_scenario_contexts/contexts), read chunk by chunk through
+iter_list_items() and flattened to EXPORT_COLUMNS. Every writer is a generator that
+emits its output per chunk, so a StreamingResponse can send the register without
+holding it in memory.
+"""
+from __future__ import annotations
+
+import csv
+import io
+import json
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Sequence
+
+from app.core.xlsx_stream import iter_xlsx
+from app.services.policy.resolver import compute_rag
+
+FORMATS = {
+    "csv": ("text/csv; charset=utf-8", "csv"),
+    "ndjson": ("application/x-ndjson", "ndjson"),
+    "xlsx": ("application/vnd.openxmlformats-officedocument.spreadsheetml.sheet", "xlsx"),
+}
+
+
+def _rag(it: Dict[str, Any]) -> Optional[str]:
+    appetite = it.get("appetite") or {}
+    if "greenMax" not in appetite or "amberMax" not in appetite:
+        return None
+    return compute_rag(it["residual"], appetite, likelihood=it["likelihood"], impacts=it["impacts"])
+
+
+# column -> value of a list row (crud.risks.risk_context_list._assemble_list_items)
+EXPORT_COLUMNS: Dict[str, Callable[[Dict[str, Any]], Any]] = {
+    "contextId": lambda it: it["contextId"],
+    "scenarioId": lambda it: it["scenarioId"],
+    "scenarioTitle": lambda it: it["scenarioTitle"],
+    "scope": lambda it: it["scope"],
+    "scopeId": lambda it: it["scopeRef"]["id"],
+    "scopeName": lambda it: it["scopeRef"]["label"],
+    "status": lambda it: it["status"],
+    "ownerId": lambda it: it["ownerId"],
+    "owner": lambda it: it["owner"],
+    "likelihood": lambda it: it["likelihood"],
+    "impactC": lambda it: it["impacts"].get("C"),
+    "impactI": lambda it: it["impacts"].get("I"),
+    "impactA": lambda it: it["impacts"].get("A"),
+    "impactL": lambda it: it["impacts"].get("L"),
+    "impactR": lambda it: it["impacts"].get("R"),
+    "impactOverall": lambda it: it["impactOverall"],
+    "severity": lambda it: it["severity"],
+    "severityBand": lambda it: it["severityBand"],
+    "initial": lambda it: it["initial"],
+    "residual": lambda it: it["residual"],
+    "residualGated": lambda it: it["residual_gated"],
+    "targetResidual": lambda it: it["targetResidual"],
+    "appetiteGreenMax": lambda it: (it.get("appetite") or {}).get("greenMax"),
+    "appetiteAmberMax": lambda it: (it.get("appetite") or {}).get("amberMax"),
+    "overAppetite": lambda it: it["overAppetite"],
+    "rag": _rag,
+    "controlsImplemented": lambda it: it["controls"]["implemented"],
+    "controlsRecommended": lambda it: it["controls"]["total"],
+    "controlCoverage": lambda it: it["controls"]["coverage"],
+    "evidenceOk": lambda it: it["evidence"]["ok"],
+    "evidenceOverdue": lambda it: it["evidence"]["overdue"],
+    "nextReview": lambda it: it["nextReview"],
+    "reviewSLAStatus": lambda it: it["reviewSLAStatus"],
+    "updatedAt": lambda it: it["updatedAt"],
+}
+
+
+def select_columns(columns: Optional[str]) -> List[str]:
+    """Comma-separated column names (None/empty = all, in EXPORT_COLUMNS order)."""
+    if not columns:
+        return list(EXPORT_COLUMNS)
+    picked = [c.strip() for c in columns.split(",") if c.strip()]
+    unknown = [c for c in picked if c not in EXPORT_COLUMNS]
+    if unknown:
+        raise ValueError(f"Unknown export columns: {', '.join(unknown)}")
+    return list(dict.fromkeys(picked))
+
+
+def _rows(chunks: Iterable[List[Dict[str, Any]]], columns: Sequence[str]) -> Iterator[List[List[Any]]]:
+    getters = [EXPORT_COLUMNS[c] for c in columns]
+    for items in chunks:
+        yield [[g(it) for g in getters] for it in items]
+
+
+def _csv(chunks, columns) -> Iterator[bytes]:
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    writer.writerow(columns)
+    for rows in _rows(chunks, columns):
+        writer.writerows(rows)
+        yield buf.getvalue().encode("utf-8")
+        buf.seek(0)
+        buf.truncate()
+    if buf.tell():
+        yield buf.getvalue().encode("utf-8")
+
+
+def _ndjson(chunks, columns) -> Iterator[bytes]:
+    for rows in _rows(chunks, columns):
+        yield "".join(json.dumps(dict(zip(columns, r)), default=str) + "\n" for r in rows).encode("utf-8")
+
+
+def _xlsx(chunks, columns) -> Iterator[bytes]:
+    def rows():
+        yield list(columns)
+        for chunk in _rows(chunks, columns):
+            yield from chunk
+    return iter_xlsx(rows(), sheet_name="Risk register")
+
+
+def write_export(chunks: Iterable[List[Dict[str, Any]]], fmt: str, columns: Sequence[str]) -> Iterator[bytes]:
+    """Encode list-row chunks (e.g. iter_list_items()) as `fmt`, yielding bytes per chunk."""
+    if fmt not in FORMATS:
+        raise ValueError(f"Unsupported export format '{fmt}'")
+    return {"csv": _csv, "ndjson": _ndjson, "xlsx": _xlsx}[fmt](chunks, columns)
@@ -0,0 +1,224 @@
+"""
+Set-based risk score recalculation.
+
+Scores a whole chunk of contexts per round-trip instead of calling
+calculate_risk_scores_by_context() per row: impact ratings for the chunk are loaded
+with one query, ControlEffectRating scores come from the in-memory effect matrix
+(services/effect_matrix.py), initial/residual per domain is computed as a NumPy pass
+over a (contexts x domains) matrix, and risk_scores / risk_score_history are written
+with bulk statements in one transaction per chunk. A history row is appended only
+for contexts whose score changed (see services/risk_score_history.py).
+
+Models (same semantics as services/risk_analysis.py):
+  - max_e:          residual = max(0, impact - max(E))        (what calculate_risk_scores_by_context stores)
+  - multiplicative: residual = round(impact * Π(1 - E/5), 2)  (E clamped to 0..5)
+E is every ControlEffectRating of the context's scenario for that domain.
+"""
+from __future__ import annotations
+
+import logging
+from collections import defaultdict
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional
+
+import numpy as np
+from sqlalchemy import insert
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+
+from app.database import SessionLocal
+from app.models.risks.risk_scenario_context import RiskScenarioContext
+from app.models.risks.risk_context_impact_rating import RiskContextImpactRating
+from app.models.risks.risk_score import RiskScore, RiskScoreHistory
+from app.services.effect_matrix import get_effect_matrix
+from app.services.risk_context_summary import refresh_context_summaries
+from app.services.risk_score_history import same_score
+
+logger = logging.getLogger(__name__)
+
+CHUNK_SIZE = 1000
+MODELS = ("max_e", "multiplicative")
+
+
+def _chunks(ids: List[int], size: int) -> Iterable[List[int]]:
+    for i in range(0, len(ids), size):
+        yield ids[i:i + size]
+
+
+def score_contexts(
+    contexts: List[Any],
+    impacts: Dict[int, Dict[int, int]],
+    effects: Dict[int, Dict[int, List[int]]],
+    *,
+    model: str = "max_e",
+) -> List[Dict[str, Any]]:
+    """
+    Pure scoring pass.
+    contexts: rows with (id, risk_scenario_id, likelihood)
+    impacts:  {context_id: {domain_id: score}}
+    effects:  {scenario_id: {domain_id: [effect scores]}}
+    Returns one dict per context shaped like calculate_risk_scores_by_context().
+    """
+    if not contexts:
+        return []
+    domains = sorted({d for m in impacts.values() for d in m})
+    col = {d: j for j, d in enumerate(domains)}
+    scenarios = sorted({c.risk_scenario_id for c in contexts if c.risk_scenario_id is not None})
+    srow = {s: i for i, s in enumerate(scenarios)}
+    n, k = len(contexts), len(domains)
+
+    imp = np.zeros((n, k), dtype=np.int64)
+    present = np.zeros((n, k), dtype=bool)
+    for i, c in enumerate(contexts):
+        for d, score in impacts.get(c.id, {}).items():
+            imp[i, col[d]] = int(score or 0)
+            present[i, col[d]] = True
+
+    # per-scenario effect aggregate; contexts without a scenario map to a trailing "no effects" row
+    if model == "multiplicative":
+        agg = np.ones((len(scenarios) + 1, k), dtype=np.float64)
+        for s, i in srow.items():
+            for d, scores in effects.get(s, {}).items():
+                if d in col:
+                    agg[i, col[d]] = np.prod([1.0 - max(0.0, min(5.0, float(e))) / 5.0 for e in scores])
+    else:
+        agg = np.zeros((len(scenarios) + 1, k), dtype=np.int64)
+        for s, i in srow.items():
+            for d, scores in effects.get(s, {}).items():
+                if d in col and scores:
+                    agg[i, col[d]] = max(scores)
+
+    sidx = np.array([srow.get(c.risk_scenario_id, len(scenarios)) for c in contexts], dtype=np.int64)
+    if model == "multiplicative":
+        residual = np.round(imp * np.maximum(0.0, agg[sidx]), 2)
+    else:
+        residual = np.maximum(0, imp - agg[sidx])
+
+    likelihood = np.array([int(c.likelihood or 0) for c in contexts], dtype=np.int64)
+    max_imp = np.where(present, imp, 0).max(axis=1, initial=0)
+    max_res = np.where(present, residual, 0).max(axis=1, initial=0)
+    initial_score = likelihood * max_imp
+    residual_score = likelihood * max_res
+
+    cast = float if model == "multiplicative" else int
+    out: List[Dict[str, Any]] = []
+    for i, c in enumerate(contexts):
+        cols = np.flatnonzero(present[i])
+        out.append({
+            "risk_scenario_context_id": c.id,
+            "initial_score": int(initial_score[i]),
+            "residual_score": cast(residual_score[i]),
+            "initial_by_domain": {str(domains[j]): int(imp[i, j]) for j in cols},
+            "residual_by_domain": {str(domains[j]): cast(residual[i, j]) for j in cols},
+        })
+    return out
+
+
+def recalculate_scores(
+    db: Session,
+    *,
+    context_ids: Optional[Iterable[int]] = None,
+    scenario_id: Optional[int] = None,
+    chunk_size: int = CHUNK_SIZE,
+    dry_run: bool = False,
+    model: str = "max_e",
+) -> Dict[str, Any]:
+    """
+    Recalculate and store scores for all contexts (or the given ids / one scenario).
+    Each chunk is committed on its own; with dry_run nothing is written and the
+    report only says how many stored scores would change.
+    """
+    if model not in MODELS:
+        raise ValueError(f"unknown residual model {model!r}")
+    chunk_size = max(1, int(chunk_size))
+
+    q = db.query(RiskScenarioContext.id)
+    if context_ids is not None:
+        q = q.filter(RiskScenarioContext.id.in_({int(i) for i in context_ids}))
+    if scenario_id is not None:
+        q = q.filter(RiskScenarioContext.risk_scenario_id == scenario_id)
+    ids = [cid for (cid,) in q.order_by(RiskScenarioContext.id).all()]
+
+    matrix = get_effect_matrix(db)
+    effects_cache: Dict[int, Dict[int, List[int]]] = {}
+    report = {"model": model, "dryRun": dry_run, "contexts": len(ids), "chunks": 0,
+              "changed": 0, "unchanged": 0, "written": 0, "historyRows": 0}
+    score_table = RiskScore.__table__
+
+    for chunk in _chunks(ids, chunk_size):
+        contexts = (
+            db.query(RiskScenarioContext.id, RiskScenarioContext.risk_scenario_id, RiskScenarioContext.likelihood)
+            .filter(RiskScenarioContext.id.in_(chunk))
+            .order_by(RiskScenarioContext.id)
+            .all()
+        )
+        impacts: Dict[int, Dict[int, int]] = defaultdict(dict)
+        for ctx_id, dom, score in (
+            db.query(RiskContextImpactRating.risk_scenario_context_id,
+                     RiskContextImpactRating.domain_id,
+                     RiskContextImpactRating.score)
+            .filter(RiskContextImpactRating.risk_scenario_context_id.in_(chunk))
+            .all()
+        ):
+            if dom is not None:
+                impacts[ctx_id][int(dom)] = score
+        for c in contexts:
+            if c.risk_scenario_id is not None and c.risk_scenario_id not in effects_cache:
+                effects_cache[c.risk_scenario_id] = matrix.scenario_effects(c.risk_scenario_id)
+
+        rows = score_contexts(contexts, impacts, effects_cache, model=model)
+        existing = {
+            s.risk_scenario_context_id: s
+            for s in db.query(RiskScore).filter(RiskScore.risk_scenario_context_id.in_(chunk)).all()
+        }
+        changed = [r for r in rows if not same_score(existing.get(r["risk_scenario_context_id"]), r)]
+        report["chunks"] += 1
+        report["changed"] += len(changed)
+        report["unchanged"] += len(rows) - len(changed)
+        if dry_run or not rows:
+            continue
+
+        now = datetime.utcnow()
+        try:
+            stmt = pg_insert(score_table)
+            stmt = stmt.on_conflict_do_update(
+                index_elements=[score_table.c.risk_scenario_context_id],
+                set_={
+                    "initial_score": stmt.excluded.initial_score,
+                    "residual_score": stmt.excluded.residual_score,
+                    "initial_by_domain": stmt.excluded.initial_by_domain,
+                    "residual_by_domain": stmt.excluded.residual_by_domain,
+                    "last_updated": stmt.excluded.last_updated,
+                },
+            )
+            db.execute(stmt, [{**r, "last_updated": now, "enabled": True} for r in rows])
+            if changed:
+                db.execute(insert(RiskScoreHistory.__table__), [{**r, "created_at": now, "enabled": True} for r in changed])
+            # Core statements bypass the read-model flush listeners
+            refresh_context_summaries(db, chunk, now=now)
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        report["written"] += len(rows)
+        report["historyRows"] += len(changed)
+
+    return report
+
+
+def recalculate_scores_detached(context_ids: Iterable[int], *, model: str = "max_e") -> None:
+    """
+    recalculate_scores() for the given contexts in its own session, for work queued
+    after a request has committed (FastAPI BackgroundTasks). Failures are logged; the
+    scores can always be rebuilt with scripts/recalculate_risk_scores.py.
+    """
+    ids = list(context_ids)
+    if not ids:
+        return
+    db = SessionLocal()
+    try:
+        recalculate_scores(db, context_ids=ids, model=model)
+    except Exception:
+        logger.exception("risk score recalculation for %d contexts failed", len(ids))
+    finally:
+        db.close()
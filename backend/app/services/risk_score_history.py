@@ -0,0 +1,392 @@
+"""
+Risk score history: retention, compaction and trend reads.
+
+Retention policy
+  - raw RiskScoreHistory points are kept for RAW_RETENTION_DAYS; older points are
+    folded into daily buckets (risk_score_history_buckets, granularity="day")
+  - daily buckets older than DAILY_RETENTION_DAYS are folded into weekly buckets
+  - per context the newest raw point before the raw cutoff is never folded, so
+    "value as of T" lookups on raw history (e.g. the 30-day reduction in
+    crud/risks/risk_context_list.py) stay correct for every T after the cutoff
+A bucket keeps point count, first/last timestamp, min/max/last residual (overall and
+per domain) and the last initial score. Merging buckets is associative, so a chunk
+can be re-run or extended by later compaction runs without double counting.
+
+Writers only append a history row when the stored score actually changed
+(same_score), so gaps in raw history mean "unchanged".
+"""
+from __future__ import annotations
+
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from sqlalchemy import func, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+
+from app.models.risks.risk_score import RiskScore, RiskScoreHistory, RiskScoreHistoryBucket
+
+RAW_RETENTION_DAYS = 90
+DAILY_RETENTION_DAYS = 365
+MIN_RAW_RETENTION_DAYS = 31     # risk_context_list reads the residual 30 days back from raw rows
+CHUNK_SIZE = 500
+GRANULARITIES = ("day", "week")
+
+Bucket = Dict[str, Any]
+
+
+class HistoryPoint(NamedTuple):
+    created_at: datetime
+    initial_score: Optional[float]
+    residual_score: Optional[float]
+    initial_by_domain: Dict[str, Any]
+    residual_by_domain: Dict[str, Any]
+
+
+def same_score(existing: Optional[RiskScore], row: Dict[str, Any]) -> bool:
+    """True when `row` (calculate_risk_scores_by_context shape) equals the stored score."""
+    if existing is None:
+        return False
+    return (
+        float(existing.initial_score or 0) == float(row["initial_score"])
+        and float(existing.residual_score or 0) == float(row["residual_score"])
+        and (existing.initial_by_domain or {}) == row["initial_by_domain"]
+        and (existing.residual_by_domain or {}) == row["residual_by_domain"]
+    )
+
+
+def bucket_start(ts: datetime, granularity: str) -> datetime:
+    day = ts.replace(hour=0, minute=0, second=0, microsecond=0)
+    if granularity == "week":
+        return day - timedelta(days=day.weekday())      # ISO week, Monday 00:00
+    return day
+
+
+# ---------------- bucket folding (pure) ----------------
+
+def _point_bucket(h: Any) -> Bucket:
+    res = float(h.residual_score or 0)
+    by_dom = {str(k): float(v or 0) for k, v in (h.residual_by_domain or {}).items()}
+    return {
+        "points": 1,
+        "first_at": h.created_at,
+        "last_at": h.created_at,
+        "residual_min": res,
+        "residual_max": res,
+        "residual_last": res,
+        "initial_last": float(h.initial_score or 0),
+        "residual_min_by_domain": dict(by_dom),
+        "residual_max_by_domain": dict(by_dom),
+        "residual_last_by_domain": by_dom,
+        "initial_last_by_domain": {str(k): float(v or 0) for k, v in (h.initial_by_domain or {}).items()},
+    }
+
+
+def _row_bucket(b: RiskScoreHistoryBucket) -> Bucket:
+    return {
+        "points": int(b.points or 0),
+        "first_at": b.first_at,
+        "last_at": b.last_at,
+        "residual_min": b.residual_min,
+        "residual_max": b.residual_max,
+        "residual_last": b.residual_last,
+        "initial_last": b.initial_last,
+        "residual_min_by_domain": dict(b.residual_min_by_domain or {}),
+        "residual_max_by_domain": dict(b.residual_max_by_domain or {}),
+        "residual_last_by_domain": dict(b.residual_last_by_domain or {}),
+        "initial_last_by_domain": dict(b.initial_last_by_domain or {}),
+    }
+
+
+def _merge_dom(a: Dict[str, float], b: Dict[str, float], pick) -> Dict[str, float]:
+    out = dict(a)
+    for k, v in b.items():
+        out[k] = pick(out[k], v) if k in out else v
+    return out
+
+
+def merge_buckets(a: Optional[Bucket], b: Bucket) -> Bucket:
+    """Combine two buckets of the same context; `last` values come from the later one."""
+    if a is None:
+        return b
+    late, early = (b, a) if b["last_at"] >= a["last_at"] else (a, b)
+    return {
+        "points": a["points"] + b["points"],
+        "first_at": min(a["first_at"], b["first_at"]),
+        "last_at": late["last_at"],
+        "residual_min": min(a["residual_min"], b["residual_min"]),
+        "residual_max": max(a["residual_max"], b["residual_max"]),
+        "residual_last": late["residual_last"],
+        "initial_last": late["initial_last"],
+        "residual_min_by_domain": _merge_dom(a["residual_min_by_domain"], b["residual_min_by_domain"], min),
+        "residual_max_by_domain": _merge_dom(a["residual_max_by_domain"], b["residual_max_by_domain"], max),
+        "residual_last_by_domain": {**early["residual_last_by_domain"], **late["residual_last_by_domain"]},
+        "initial_last_by_domain": {**early["initial_last_by_domain"], **late["initial_last_by_domain"]},
+    }
+
+
+# ---------------- compaction ----------------
+
+def _chunks(ids: List[int], size: int) -> Iterable[List[int]]:
+    for i in range(0, len(ids), size):
+        yield ids[i:i + size]
+
+
+def _upsert_buckets(db: Session, folded: Dict[Tuple[int, datetime], Bucket], granularity: str) -> None:
+    """Merge `folded` into the stored buckets (locked for the chunk) and write them back."""
+    if not folded:
+        return
+    ctx_ids = {c for c, _ in folded}
+    starts = {s for _, s in folded}
+    stored = (
+        db.query(RiskScoreHistoryBucket)
+        .filter(RiskScoreHistoryBucket.risk_scenario_context_id.in_(ctx_ids),
+                RiskScoreHistoryBucket.granularity == granularity,
+                RiskScoreHistoryBucket.bucket_start.in_(starts))
+        .with_for_update()
+        .all()
+    )
+    for b in stored:
+        key = (b.risk_scenario_context_id, b.bucket_start)
+        if key in folded:
+            folded[key] = merge_buckets(_row_bucket(b), folded[key])
+
+    table = RiskScoreHistoryBucket.__table__
+    stmt = pg_insert(table)
+    cols = [c for c in next(iter(folded.values()))]
+    stmt = stmt.on_conflict_do_update(
+        constraint="uq_rsh_bucket",
+        set_={c: getattr(stmt.excluded, c) for c in cols},
+    )
+    db.execute(stmt, [
+        {"risk_scenario_context_id": ctx, "granularity": granularity, "bucket_start": start, "enabled": True, **b}
+        for (ctx, start), b in folded.items()
+    ])
+
+
+def _fold_raw(db: Session, chunk: List[int], cutoff: datetime) -> Tuple[Dict[Tuple[int, datetime], Bucket], List[int]]:
+    H = RiskScoreHistory
+    keep = (
+        select(func.max(H.id))
+        .where(H.risk_scenario_context_id.in_(chunk), H.created_at < cutoff)
+        .group_by(H.risk_scenario_context_id)
+    )
+    rows = (
+        db.query(H.id, H.risk_scenario_context_id, H.created_at, H.initial_score, H.residual_score,
+                 H.initial_by_domain, H.residual_by_domain)
+        .filter(H.risk_scenario_context_id.in_(chunk), H.created_at < cutoff, H.id.not_in(keep))
+        .order_by(H.risk_scenario_context_id, H.created_at, H.id)
+        .yield_per(CHUNK_SIZE)
+    )
+    folded: Dict[Tuple[int, datetime], Bucket] = {}
+    ids: List[int] = []
+    for h in rows:
+        key = (h.risk_scenario_context_id, bucket_start(h.created_at, "day"))
+        folded[key] = merge_buckets(folded.get(key), _point_bucket(h))
+        ids.append(h.id)
+    return folded, ids
+
+
+def _fold_daily(db: Session, chunk: List[int], cutoff: datetime) -> Tuple[Dict[Tuple[int, datetime], Bucket], List[int]]:
+    B = RiskScoreHistoryBucket
+    rows = (
+        db.query(B)
+        .filter(B.risk_scenario_context_id.in_(chunk), B.granularity == "day", B.bucket_start < cutoff)
+        .order_by(B.risk_scenario_context_id, B.bucket_start)
+        .all()
+    )
+    folded: Dict[Tuple[int, datetime], Bucket] = {}
+    for b in rows:
+        key = (b.risk_scenario_context_id, bucket_start(b.bucket_start, "week"))
+        folded[key] = merge_buckets(folded.get(key), _row_bucket(b))
+    return folded, [b.id for b in rows]
+
+
+def compact_history(
+    db: Session,
+    *,
+    now: Optional[datetime] = None,
+    raw_days: int = RAW_RETENTION_DAYS,
+    daily_days: int = DAILY_RETENTION_DAYS,
+    chunk_size: int = CHUNK_SIZE,
+    dry_run: bool = False,
+) -> Dict[str, Any]:
+    """
+    Fold raw points older than `raw_days` into daily buckets and daily buckets older
+    than `daily_days` into weekly buckets. Cutoffs are aligned to day/week starts so a
+    bucket never overlaps raw points of the same period. One transaction per chunk of
+    contexts; with dry_run nothing is written.
+    """
+    now = now or datetime.utcnow()
+    raw_days = max(int(raw_days), MIN_RAW_RETENTION_DAYS)
+    daily_days = max(int(daily_days), raw_days)
+    chunk_size = max(1, int(chunk_size))
+    raw_cutoff = bucket_start(now - timedelta(days=raw_days), "day")
+    daily_cutoff = bucket_start(now - timedelta(days=daily_days), "week")
+
+    report = {"dryRun": dry_run, "rawCutoff": raw_cutoff, "dailyCutoff": daily_cutoff,
+              "rawFolded": 0, "dailyBuckets": 0, "dailyFolded": 0, "weeklyBuckets": 0, "chunks": 0}
+
+    H, B = RiskScoreHistory, RiskScoreHistoryBucket
+    # (source model, fold, cutoff, target granularity, report keys)
+    passes = (
+        (H, _fold_raw, raw_cutoff, "day", "rawFolded", "dailyBuckets",
+         db.query(H.risk_scenario_context_id).filter(H.created_at < raw_cutoff)),
+        (B, _fold_daily, daily_cutoff, "week", "dailyFolded", "weeklyBuckets",
+         db.query(B.risk_scenario_context_id).filter(B.granularity == "day", B.bucket_start < daily_cutoff)),
+    )
+    for model, fold, cutoff, target, folded_key, buckets_key, ctx_q in passes:
+        ctx_ids = sorted(c for (c,) in ctx_q.distinct().all())
+        for chunk in _chunks(ctx_ids, chunk_size):
+            report["chunks"] += 1
+            try:
+                folded, source_ids = fold(db, chunk, cutoff)
+                report[folded_key] += len(source_ids)
+                report[buckets_key] += len(folded)
+                if dry_run or not source_ids:
+                    db.rollback()
+                    continue
+                _upsert_buckets(db, folded, target)
+                for ids in _chunks(source_ids, CHUNK_SIZE):
+                    db.query(model).filter(model.id.in_(ids)).delete(synchronize_session=False)
+                db.commit()
+            except Exception:
+                db.rollback()
+                raise
+    return report
+
+
+# ---------------- reads ----------------
+
+def _baselines(db: Session, context_ids: List[int], before: datetime) -> Dict[int, Bucket]:
+    """Last known value per context strictly before `before` (raw point or bucket)."""
+    H, B = RiskScoreHistory, RiskScoreHistoryBucket
+    rn = func.row_number().over(partition_by=H.risk_scenario_context_id,
+                                order_by=(H.created_at.desc(), H.id.desc())).label("rn")
+    raw_sub = (
+        db.query(H.risk_scenario_context_id, H.created_at, H.initial_score, H.residual_score,
+                 H.initial_by_domain, H.residual_by_domain, rn)
+        .filter(H.risk_scenario_context_id.in_(context_ids), H.created_at < before)
+        .subquery()
+    )
+    out: Dict[int, Bucket] = {}
+    for r in db.query(raw_sub).filter(raw_sub.c.rn == 1).all():
+        out[r.risk_scenario_context_id] = _point_bucket(r)
+
+    brn = func.row_number().over(partition_by=B.risk_scenario_context_id,
+                                 order_by=(B.last_at.desc(), B.id.desc())).label("rn")
+    b_sub = db.query(B.id.label("bid"), brn).filter(
+        B.risk_scenario_context_id.in_(context_ids), B.last_at < before).subquery()
+    for b in db.query(B).join(b_sub, b_sub.c.bid == B.id).filter(b_sub.c.rn == 1).all():
+        cur = out.get(b.risk_scenario_context_id)
+        if cur is None or b.last_at > cur["last_at"]:
+            out[b.risk_scenario_context_id] = _row_bucket(b)
+    return out
+
+
+def _entry(start: datetime, granularity: str, b: Bucket) -> Dict[str, Any]:
+    return {
+        "start": start,
+        "granularity": granularity,
+        "points": b["points"],
+        "lastAt": b["last_at"],
+        "min": b["residual_min"],
+        "max": b["residual_max"],
+        "last": b["residual_last"],
+        "initialLast": b["initial_last"],
+        "minByDomain": b["residual_min_by_domain"],
+        "maxByDomain": b["residual_max_by_domain"],
+        "lastByDomain": b["residual_last_by_domain"],
+    }
+
+
+def get_trends(
+    db: Session,
+    context_ids: Iterable[int],
+    *,
+    start: datetime,
+    end: Optional[datetime] = None,
+    granularity: str = "day",
+) -> Dict[int, Dict[str, Any]]:
+    """
+    Residual trend for many contexts over [start, end], in a fixed number of queries.
+    Raw points and daily buckets are folded to `granularity`; weekly buckets stay weekly
+    (each entry says which resolution it has). Per context:
+      {"baseline": last value before `start` or None, "buckets": [entry, ...] (ascending)}
+    """
+    if granularity not in GRANULARITIES:
+        raise ValueError(f"unknown granularity {granularity!r}")
+    ids = sorted({int(c) for c in context_ids})
+    out: Dict[int, Dict[str, Any]] = {cid: {"baseline": None, "buckets": []} for cid in ids}
+    if not ids:
+        return out
+    end = end or datetime.utcnow()
+    H, B = RiskScoreHistory, RiskScoreHistoryBucket
+
+    folded: Dict[int, Dict[Tuple[str, datetime], Bucket]] = defaultdict(dict)
+
+    def add(ctx: int, g: str, s: datetime, b: Bucket) -> None:
+        key = (g, s)
+        folded[ctx][key] = merge_buckets(folded[ctx].get(key), b)
+
+    for b in (
+        db.query(B)
+        .filter(B.risk_scenario_context_id.in_(ids), B.last_at >= start, B.first_at <= end)
+        .all()
+    ):
+        g = "week" if b.granularity == "week" else granularity
+        add(b.risk_scenario_context_id, g, bucket_start(b.bucket_start, g), _row_bucket(b))
+
+    for h in (
+        db.query(H.risk_scenario_context_id, H.created_at, H.initial_score, H.residual_score,
+                 H.initial_by_domain, H.residual_by_domain)
+        .filter(H.risk_scenario_context_id.in_(ids), H.created_at >= start, H.created_at <= end)
+        .all()
+    ):
+        add(h.risk_scenario_context_id, granularity, bucket_start(h.created_at, granularity), _point_bucket(h))
+
+    for cid, base in _baselines(db, ids, start).items():
+        out[cid]["baseline"] = {"at": base["last_at"], "residual": base["residual_last"],
+                                "residualByDomain": base["residual_last_by_domain"]}
+    for cid, buckets in folded.items():
+        out[cid]["buckets"] = [_entry(s, g, b) for (g, s), b in sorted(buckets.items(), key=lambda kv: kv[0][1])]
+    return out
+
+
+def residual_series(trend: Dict[str, Any]) -> List[Dict[str, int]]:
+    """[{x, y}] sparkline points (last residual per bucket, baseline first) for one get_trends() entry."""
+    values = [trend["baseline"]["residual"]] if trend.get("baseline") else []
+    values += [e["last"] for e in trend.get("buckets", [])]
+    return [{"x": i, "y": int(v or 0)} for i, v in enumerate(values)]
+
+
+def history_points(db: Session, context_id: int, *, since: datetime) -> List[HistoryPoint]:
+    """
+    Score points for one context from `since` on, ascending, preceded by the last known
+    point before `since`. Compacted periods contribute one point per bucket (its last value).
+    """
+    H, B = RiskScoreHistory, RiskScoreHistoryBucket
+    points: List[HistoryPoint] = []
+    base = _baselines(db, [context_id], since).get(context_id)
+    if base is not None:
+        points.append(HistoryPoint(base["last_at"], base["initial_last"], base["residual_last"],
+                                   base["initial_last_by_domain"], base["residual_last_by_domain"]))
+    for b in (
+        db.query(B)
+        .filter(B.risk_scenario_context_id == context_id, B.last_at >= since)
+        .order_by(B.last_at)
+        .all()
+    ):
+        points.append(HistoryPoint(b.last_at, b.initial_last, b.residual_last,
+                                   b.initial_last_by_domain or {}, b.residual_last_by_domain or {}))
+    for h in (
+        db.query(H.created_at, H.initial_score, H.residual_score, H.initial_by_domain, H.residual_by_domain)
+        .filter(H.risk_scenario_context_id == context_id, H.created_at >= since)
+        .order_by(H.created_at, H.id)
+        .all()
+    ):
+        points.append(HistoryPoint(h.created_at, h.initial_score, h.residual_score,
+                                   h.initial_by_domain or {}, h.residual_by_domain or {}))
+    points.sort(key=lambda p: p.created_at)
+    return points
@@ -0,0 +1,110 @@
+"""
+In-process periodic job scheduler.
+
+Jobs run on the application's asyncio loop: each job is a task that sleeps for its
+interval and then runs the (synchronous) job function in a worker thread with its own
+SessionLocal session, so the event loop never blocks on the database.
+
+leader_only jobs run in one process at a time across all workers: every run first
+takes a PostgreSQL session advisory lock (pg_try_advisory_lock on a dedicated
+connection, keyed by the job name) and is skipped when another process holds it. On
+other dialects (SQLite in local runs) the lock is a no-op.
+"""
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import logging
+from contextlib import contextmanager
+from typing import Any, Callable, Iterator, List, NamedTuple, Optional
+
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from app.database import SessionLocal, engine
+
+logger = logging.getLogger(__name__)
+
+
+class Job(NamedTuple):
+    name: str
+    interval: float                 # seconds between runs
+    func: Callable[[Session], Any]
+    leader_only: bool = False
+    initial_delay: Optional[float] = None   # first run after this many seconds (default: interval)
+
+
+def advisory_key(name: str) -> int:
+    """Stable signed 64-bit advisory lock key of a job name."""
+    return int.from_bytes(hashlib.sha1(name.encode()).digest()[:8], "big", signed=True)
+
+
+@contextmanager
+def leader_lock(name: str) -> Iterator[bool]:
+    """Yields True when this process may run `name` now (held until the block exits)."""
+    if engine.dialect.name != "postgresql":
+        yield True
+        return
+    key = advisory_key(name)
+    with engine.connect() as conn:
+        acquired = bool(conn.execute(select(func.pg_try_advisory_lock(key))).scalar())
+        conn.commit()
+        try:
+            yield acquired
+        finally:
+            if acquired:
+                conn.execute(select(func.pg_advisory_unlock(key)))
+                conn.commit()
+
+
+@contextmanager
+def _always() -> Iterator[bool]:
+    yield True
+
+
+def run_job_once(job: Job) -> Any:
+    """Run one job in a fresh session; None when skipped because another process leads."""
+    with leader_lock(job.name) if job.leader_only else _always() as leader:
+        if not leader:
+            logger.debug("job %s skipped: not leader", job.name)
+            return None
+        db = SessionLocal()
+        try:
+            return job.func(db)
+        finally:
+            db.close()
+
+
+class Scheduler:
+    def __init__(self) -> None:
+        self.jobs: List[Job] = []
+        self._tasks: List[asyncio.Task] = []
+
+    def add_job(self, name: str, interval: float, func: Callable[[Session], Any], *,
+                leader_only: bool = False, initial_delay: Optional[float] = None) -> Job:
+        job = Job(name, float(interval), func, leader_only, initial_delay)
+        self.jobs.append(job)
+        return job
+
+    async def _loop(self, job: Job) -> None:
+        delay = job.interval if job.initial_delay is None else job.initial_delay
+        while True:
+            await asyncio.sleep(delay)
+            delay = job.interval
+            try:
+                result = await asyncio.to_thread(run_job_once, job)
+                if result is not None:
+                    logger.info("job %s: %s", job.name, result)
+            except Exception:
+                logger.exception("job %s failed", job.name)
+
+    def start(self) -> None:
+        """Start every job on the running event loop (call from an async startup hook)."""
+        loop = asyncio.get_running_loop()
+        self._tasks = [loop.create_task(self._loop(job), name=f"job:{job.name}") for job in self.jobs]
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
@@ -0,0 +1,135 @@
+"""
+Batched scope label resolution.
+
+resolve_scope_labels() takes a set of (scope_type, scope_id) pairs and issues one
+`SELECT id, name ... WHERE id IN (...)` per scope type. Results are memoized in
+  - a request-scoped cache on the Session (`db.info`, one Session per request via get_db)
+  - a small process-wide TTL cache shared across requests (labels rarely change;
+    a rename shows up after SCOPE_LABEL_TTL_SECONDS at the latest).
+"""
+from __future__ import annotations
+
+import importlib
+import threading
+import time
+from collections import OrderedDict, defaultdict
+from typing import Dict, Iterable, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+SCOPE_LABEL_TTL_SECONDS = 60
+SCOPE_LABEL_CACHE_SIZE = 5000
+
+_REQUEST_KEY = "scope_labels"
+
+# scope_type -> (module, class); label column is `name` on all of them
+_SCOPE_MODELS = {
+    "asset": ("app.models.assets.asset", "Asset"),
+    "asset_group": ("app.models.assets.asset_group", "AssetGroup"),
+    "asset_type": ("app.models.assets.asset_type", "AssetType"),
+    "tag": ("app.models.assets.asset_tag", "AssetTag"),
+    "entity": ("app.models.org.entity", "OrgEntity"),
+    "bu": ("app.models.org.business_unit", "OrgBusinessUnit"),
+    "site": ("app.models.org.site", "OrgSite"),
+    "service": ("app.models.org.service", "OrgService"),
+    "org_group": ("app.models.org.group", "OrgGroup"),
+}
+_model_cache: Dict[str, Optional[type]] = {}
+
+Pair = Tuple[Optional[str], Optional[int]]
+
+_lock = threading.Lock()
+_process_cache: "OrderedDict[Pair, Tuple[str, float]]" = OrderedDict()
+
+
+def _model_for(scope_type: str):
+    """Import the scope model once; None when the module/class is not available."""
+    if scope_type not in _model_cache:
+        mod_path, cls_name = _SCOPE_MODELS.get(scope_type, (None, None))
+        model = None
+        if mod_path:
+            try:
+                model = getattr(importlib.import_module(mod_path), cls_name)
+            except Exception:
+                model = None
+        _model_cache[scope_type] = model
+    return _model_cache[scope_type]
+
+
+def _fallback(scope_type: Optional[str], scope_id: Optional[int]) -> str:
+    if not scope_type:
+        return "Organization"
+    return f"{scope_type}:{scope_id}" if scope_id is not None else scope_type
+
+
+def _process_get(pair: Pair, now: float) -> Optional[str]:
+    with _lock:
+        hit = _process_cache.get(pair)
+        if hit is None:
+            return None
+        label, expires = hit
+        if expires < now:
+            del _process_cache[pair]
+            return None
+        _process_cache.move_to_end(pair)
+        return label
+
+
+def _process_put(labels: Dict[Pair, str], now: float) -> None:
+    expires = now + SCOPE_LABEL_TTL_SECONDS
+    with _lock:
+        for pair, label in labels.items():
+            _process_cache[pair] = (label, expires)
+            _process_cache.move_to_end(pair)
+        while len(_process_cache) > SCOPE_LABEL_CACHE_SIZE:
+            _process_cache.popitem(last=False)
+
+
+def clear_scope_label_cache() -> None:
+    with _lock:
+        _process_cache.clear()
+
+
+def clear_request_scope_labels(db: Session) -> None:
+    """Drop the Session's label memo (long-running readers such as exports, per chunk)."""
+    db.info.pop(_REQUEST_KEY, None)
+
+
+def resolve_scope_labels(db: Session, pairs: Iterable[Pair]) -> Dict[Pair, str]:
+    """{(scope_type, scope_id): label} for all pairs; one query per scope type on cache misses."""
+    request_cache: Dict[Pair, str] = db.info.setdefault(_REQUEST_KEY, {})
+    now = time.monotonic()
+    out: Dict[Pair, str] = {}
+    missing: Dict[str, set] = defaultdict(set)
+
+    for pair in set(pairs):
+        st, sid = pair
+        if pair in request_cache:
+            out[pair] = request_cache[pair]
+            continue
+        if not st or sid is None or _model_for(st) is None:
+            out[pair] = request_cache[pair] = _fallback(st, sid)
+            continue
+        cached = _process_get(pair, now)
+        if cached is not None:
+            out[pair] = request_cache[pair] = cached
+            continue
+        missing[st].add(sid)
+
+    fetched: Dict[Pair, str] = {}
+    for st, ids in missing.items():
+        model = _model_for(st)
+        names = {rid: name for rid, name in db.query(model.id, model.name).filter(model.id.in_(ids)).all()}
+        for sid in ids:
+            name = names.get(sid)
+            fetched[(st, sid)] = name if name else _fallback(st, sid)
+
+    if fetched:
+        _process_put(fetched, now)
+        request_cache.update(fetched)
+        out.update(fetched)
+    return out
+
+
+def scope_label(db: Session, scope_type: Optional[str], scope_id: Optional[int]) -> str:
+    return resolve_scope_labels(db, [(scope_type, scope_id)])[(scope_type, scope_id)]
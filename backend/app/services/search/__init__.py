@@ -0,0 +1,52 @@
+"""
+Unified ranked search over requirements, obligation atoms, controls and risk scenarios.
+
+PostgreSQL databases use the tsvector/pg_trgm indexes of the search migration
+(search.postgres); any other dialect (SQLite in local runs and tests) uses the
+in-process index (search.memory). Both return the same hit dicts, ordered by
+(score desc, kind, id) and paged with an opaque keyset cursor.
+"""
+from __future__ import annotations
+
+from typing import Any, Dict, Iterable, Optional
+
+from sqlalchemy.orm import Session
+
+from app.services.search import memory, postgres
+from app.services.search.common import KINDS, decode_cursor, encode_cursor, parse_kinds
+from app.services.search.memory import invalidate_search_index
+
+MAX_QUERY_LENGTH = 200
+
+
+def search(
+    db: Session,
+    q: str,
+    *,
+    kinds: Optional[Iterable[str]] = None,
+    version_id: Optional[int] = None,
+    limit: int = 20,
+    cursor: Optional[str] = None,
+) -> Dict[str, Any]:
+    """
+    {"q", "items", "next_cursor"}; items carry kind, id, code, title, score, highlight
+    (matches wrapped in <mark>) and, for requirements/obligations, version_id and
+    requirement_id. ValueError on unknown kinds or a malformed cursor.
+    """
+    q = (q or "").strip()[:MAX_QUERY_LENGTH]
+    wanted = parse_kinds(kinds)
+    after = decode_cursor(cursor)
+    if not q:
+        return {"q": q, "items": [], "next_cursor": None}
+
+    backend = postgres if db.get_bind().dialect.name == "postgresql" else memory
+    items, has_more = backend.search(db, q, kinds=wanted, version_id=version_id, limit=limit, cursor=after)
+    last = items[-1] if items else None
+    return {
+        "q": q,
+        "items": items,
+        "next_cursor": encode_cursor(last["score"], last["kind"], last["id"]) if has_more and last else None,
+    }
+
+
+__all__ = ["KINDS", "search", "invalidate_search_index"]
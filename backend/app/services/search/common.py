@@ -0,0 +1,66 @@
+"""Shared pieces of the search backends: kinds, scoring weights and the keyset cursor."""
+from __future__ import annotations
+
+import base64
+import html
+import json
+from typing import Iterable, List, Optional, Tuple
+
+KINDS = ("requirement", "obligation", "control", "risk_scenario")
+
+CODE_WEIGHT = 0.5            # code similarity (pg_trgm) is added to the text rank with this weight
+TRGM_THRESHOLD = 0.3         # pg_trgm default similarity threshold of the % operator
+SCORE_DIGITS = 6             # scores are rounded so keyset comparisons are exact
+TITLE_MAX = 300
+
+# highlights are HTML: the source text is escaped, then wrapped in these tags
+MARK_START, MARK_END = "<mark>", "</mark>"
+HTML_ESCAPES = (("&", "&amp;"), ("<", "&lt;"), (">", "&gt;"))   # "&" first; same as escape_html()
+
+Cursor = Tuple[float, str, int]   # (score, kind, id) of the last hit of the previous page
+
+
+def parse_kinds(kinds: Optional[Iterable[str]]) -> List[str]:
+    """Requested kinds in KINDS order; all when empty. ValueError on an unknown kind."""
+    wanted = {k.strip() for k in (kinds or ()) if k and k.strip()}
+    unknown = wanted - set(KINDS)
+    if unknown:
+        raise ValueError(f"Unknown search kind(s): {', '.join(sorted(unknown))}")
+    return [k for k in KINDS if not wanted or k in wanted]
+
+
+def encode_cursor(score: float, kind: str, id_: int) -> str:
+    raw = json.dumps([round(float(score), SCORE_DIGITS), kind, int(id_)], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: Optional[str]) -> Optional[Cursor]:
+    if not cursor:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        score, kind, id_ = json.loads(raw)
+        if kind not in KINDS:
+            raise ValueError(kind)
+        return float(score), str(kind), int(id_)
+    except Exception:
+        raise ValueError("Invalid cursor")
+
+
+def after_cursor(key: Tuple[float, str, int], cursor: Optional[Cursor]) -> bool:
+    """True when a hit with key (score, kind, id) sorts after the cursor (score desc, kind, id)."""
+    if cursor is None:
+        return True
+    score, kind, id_ = key
+    c_score, c_kind, c_id = cursor
+    return score < c_score or (score == c_score and (kind, id_) > (c_kind, c_id))
+
+
+def escape_html(text: Optional[str]) -> Optional[str]:
+    return None if text is None else html.escape(text, quote=False)
+
+
+def clip(text: Optional[str], n: int = TITLE_MAX) -> Optional[str]:
+    if text is None or len(text) <= n:
+        return text
+    return text[: n - 1].rstrip() + "…"
@@ -0,0 +1,248 @@
+"""
+In-process search backend (SQLite / local development and tests).
+
+Mirrors the PostgreSQL backend closely enough to exercise the endpoint: an inverted
+index over the same text fields (lowercased word tokens, a small stopword list, all
+terms must match, "-term" excludes), a tf-idf rank in place of ts_rank_cd, pg_trgm's
+similarity formula for codes, and <mark> highlights (over HTML-escaped text) cut around
+the first match.
+
+The index is process-wide and versioned like services/compliance/coverage_matrix.py:
+it is rebuilt lazily after a SessionLocal transaction that wrote requirements,
+obligation atoms, controls or risk scenarios commits, after
+invalidate_search_index() (Core/bulk writers), or when older than
+INDEX_MAX_AGE_SECONDS.
+"""
+from __future__ import annotations
+
+import math
+import re
+import threading
+import time
+from collections import Counter, defaultdict
+from itertools import chain
+from typing import Any, Dict, FrozenSet, List, NamedTuple, Optional, Set, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from app.database import SessionLocal
+from app.models.compliance.framework_requirement import FrameworkRequirement
+from app.models.compliance.obligation_atom import ObligationAtom
+from app.models.controls.control import Control
+from app.models.risks.risk_scenario import RiskScenario
+from app.services.search.common import (
+    CODE_WEIGHT, MARK_END, MARK_START, SCORE_DIGITS, TRGM_THRESHOLD, Cursor, after_cursor, clip, escape_html,
+)
+
+INDEX_MAX_AGE_SECONDS = 300
+HIGHLIGHT_CONTEXT = 80       # characters kept on each side of the first match
+
+_PENDING_KEY = "search_index_dirty"
+
+_WORD = re.compile(r"\w+", re.UNICODE)
+_STOPWORDS = frozenset(
+    "a an and are as at be by for from in is it of on or that the this to with "
+    "der die das und oder ein eine zu von mit für im ist".split()
+)
+
+
+def _tokens(text: Optional[str]) -> List[str]:
+    return [t for t in _WORD.findall((text or "").lower()) if t not in _STOPWORDS]
+
+
+def _trigrams(text: Optional[str]) -> FrozenSet[str]:
+    """pg_trgm trigrams: per alphanumeric word, padded with two leading and one trailing blank."""
+    out: Set[str] = set()
+    for word in re.findall(r"[^\W_]+", (text or "").lower()):
+        padded = f"  {word} "
+        out.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return frozenset(out)
+
+
+def _similarity(a: FrozenSet[str], b: FrozenSet[str]) -> float:
+    return len(a & b) / len(a | b) if a and b else 0.0
+
+
+def _query_terms(q: str) -> Tuple[List[str], Set[str]]:
+    """(terms that must all match, "-term" exclusions)"""
+    words = re.findall(r"-?\w+", q.lower())
+    terms = [w for w in words if not w.startswith("-") and w not in _STOPWORDS]
+    return terms, {w[1:] for w in words if w.startswith("-") and len(w) > 1}
+
+
+class _Doc(NamedTuple):
+    kind: str
+    id: int
+    code: Optional[str]
+    title: Optional[str]
+    version_id: Optional[int]
+    requirement_id: Optional[int]
+    texts: Tuple[str, ...]          # highlight candidates, in preference order
+
+
+class SearchIndex:
+    def __init__(self, docs: List[_Doc], version: int):
+        self.version = version
+        self.built_at = time.monotonic()
+        self.docs = docs
+        self.postings: Dict[str, Dict[int, int]] = defaultdict(dict)
+        self.code_grams: Dict[int, FrozenSet[str]] = {}
+        for i, d in enumerate(docs):
+            for tok, tf in Counter(chain.from_iterable(_tokens(t) for t in (d.code, *d.texts))).items():
+                self.postings[tok][i] = tf
+            if d.code:
+                self.code_grams[i] = _trigrams(d.code)
+
+    def _idf(self, tok: str) -> float:
+        return math.log(1 + len(self.docs) / (1 + len(self.postings.get(tok, ()))))
+
+    def query(self, q: str, kinds: List[str], version_id: Optional[int]) -> List[Tuple[float, str, int, int]]:
+        """[(score, kind, id, doc index)] of every match, unsorted."""
+        terms, excluded = _query_terms(q)
+
+        rank: Dict[int, float] = {}
+        if terms:
+            docs = set(self.postings.get(terms[0], {}))
+            for t in terms[1:]:
+                docs &= set(self.postings.get(t, {}))
+            idf = {t: self._idf(t) for t in terms}
+            for i in docs:
+                tfs = [(self.postings[t][i], idf[t]) for t in terms]
+                rank[i] = sum(tf / (tf + 1) * w for tf, w in tfs) / (10 * len(terms))
+
+        q_grams, q_lower = _trigrams(q), q.lower()
+        code_sim: Dict[int, float] = {}
+        for i, grams in self.code_grams.items():
+            sim = _similarity(q_grams, grams)
+            if sim >= TRGM_THRESHOLD or self.docs[i].code.lower().startswith(q_lower):
+                code_sim[i] = sim
+
+        wanted = set(kinds)
+        out = []
+        for i in set(rank) | set(code_sim):
+            d = self.docs[i]
+            if d.kind not in wanted or (version_id is not None and d.version_id != version_id):
+                continue
+            if excluded and any(i in self.postings.get(t, {}) for t in excluded):
+                continue
+            if d.kind == "risk_scenario" and i not in rank:
+                continue            # scenarios have no code; text matches only (as in PostgreSQL)
+            score = round(rank.get(i, 0.0) + CODE_WEIGHT * code_sim.get(i, 0.0), SCORE_DIGITS)
+            out.append((score, d.kind, d.id, i))
+        return out
+
+
+def highlight(texts: Tuple[str, ...], q: str) -> Optional[str]:
+    terms = set(_query_terms(q)[0])
+    if not terms:
+        return escape_html(clip(next((t for t in texts if t), None), 2 * HIGHLIGHT_CONTEXT))
+    for text in texts:
+        spans = [m.span() for m in _WORD.finditer(text or "") if m.group().lower() in terms]
+        if not spans:
+            continue
+        lo = max(0, spans[0][0] - HIGHLIGHT_CONTEXT)
+        hi = min(len(text), spans[0][1] + HIGHLIGHT_CONTEXT)
+        parts, pos = [], lo
+        for s, e in spans:
+            if s < lo or e > hi:
+                continue
+            parts += [escape_html(text[pos:s]), MARK_START, escape_html(text[s:e]), MARK_END]
+            pos = e
+        parts.append(escape_html(text[pos:hi]))
+        return ("…" if lo else "") + "".join(parts) + ("…" if hi < len(text) else "")
+    return escape_html(clip(next((t for t in texts if t), None), 2 * HIGHLIGHT_CONTEXT))
+
+
+def _join(*parts: Optional[str]) -> str:
+    return " ".join(p for p in parts if p)
+
+
+def _load(db: Session, version: int) -> SearchIndex:
+    FR, OA, C, S = FrameworkRequirement, ObligationAtom, Control, RiskScenario
+    docs: List[_Doc] = []
+    for id_, code, title, text, vid in db.query(FR.id, FR.code, FR.title, FR.text, FR.framework_version_id):
+        docs.append(_Doc("requirement", id_, code, title, vid, id_, (_join(title, text),)))
+    for id_, key, text, cond, outcome, citation, req_id, vid in (
+            db.query(OA.id, OA.atom_key, OA.obligation_text, OA.condition, OA.outcome, OA.citation,
+                     OA.framework_requirement_id, FR.framework_version_id)
+            .join(FR, FR.id == OA.framework_requirement_id)):
+        docs.append(_Doc("obligation", id_, key, text, vid, req_id, (_join(text, cond, outcome), _join(citation))))
+    for id_, code, t_en, t_de, d_en, d_de, enabled in db.query(C.id, C.reference_code, C.title_en, C.title_de,
+                                                               C.description_en, C.description_de, C.enabled):
+        if enabled is not False:
+            docs.append(_Doc("control", id_, code, t_en or t_de, None, None, (_join(t_en, d_en), _join(t_de, d_de))))
+    for id_, t_en, t_de, d_en, d_de, enabled in db.query(S.id, S.title_en, S.title_de, S.description_en,
+                                                         S.description_de, S.enabled):
+        if enabled is not False:
+            docs.append(_Doc("risk_scenario", id_, None, t_en or t_de, None, None, (_join(t_en, d_en), _join(t_de, d_de))))
+    return SearchIndex(docs, version)
+
+
+_lock = threading.Lock()
+_version = 0
+_index: Optional[SearchIndex] = None
+
+
+def invalidate_search_index() -> int:
+    global _version, _index
+    with _lock:
+        _version += 1
+        _index = None
+        return _version
+
+
+def _fresh(ix: Optional[SearchIndex], version: int) -> bool:
+    return ix is not None and ix.version == version and time.monotonic() - ix.built_at < INDEX_MAX_AGE_SECONDS
+
+
+def get_search_index(db: Session) -> SearchIndex:
+    global _index
+    if db.info.get(_PENDING_KEY):
+        return _load(db, -1)
+    ix = _index
+    if _fresh(ix, _version):
+        return ix
+    with _lock:
+        if not _fresh(_index, _version):
+            _index = _load(db, _version)
+        return _index
+
+
+def search(db: Session, q: str, *, kinds: List[str], version_id: Optional[int],
+           limit: int, cursor: Optional[Cursor]) -> Tuple[List[Dict[str, Any]], bool]:
+    """(hits of the page in rank order, has_more); same contract as the PostgreSQL backend."""
+    ix = get_search_index(db)
+    hits = sorted(
+        (h for h in ix.query(q, kinds, version_id) if after_cursor(h[:3], cursor)),
+        key=lambda h: (-h[0], h[1], h[2]),
+    )
+    items = []
+    for score, kind, id_, i in hits[:limit]:
+        d = ix.docs[i]
+        items.append({
+            "kind": kind, "id": id_, "score": score, "code": d.code, "title": clip(d.title),
+            "version_id": d.version_id, "requirement_id": d.requirement_id,
+            "highlight": highlight(d.texts, q),
+        })
+    return items, len(hits) > limit
+
+
+# ---------------- write-time invalidation ----------------
+
+@event.listens_for(SessionLocal, "after_flush")
+def _mark_search_writes(session: Session, flush_context) -> None:
+    if any(isinstance(o, (FrameworkRequirement, ObligationAtom, Control, RiskScenario))
+           for o in chain(session.new, session.dirty, session.deleted)):
+        session.info[_PENDING_KEY] = True
+
+
+@event.listens_for(SessionLocal, "after_commit")
+def _bump_after_commit(session: Session) -> None:
+    if session.info.pop(_PENDING_KEY, False):
+        invalidate_search_index()
+
+
+@event.listens_for(SessionLocal, "after_rollback")
+def _discard_on_rollback(session: Session) -> None:
+    session.info.pop(_PENDING_KEY, None)
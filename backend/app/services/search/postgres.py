@@ -0,0 +1,197 @@
+"""
+PostgreSQL search backend.
+
+Text matches use the generated tsvector columns of the search migration (GIN indexed;
+english for requirements/obligations, english + german for controls and risk
+scenarios) with websearch_to_tsquery; codes additionally match by pg_trgm similarity
+(%) or prefix (ILIKE 'q%'), both served by the gin_trgm_ops indexes.
+
+One UNION ALL query ranks every kind (ts_rank_cd + CODE_WEIGHT x similarity, rounded)
+and returns the page after the keyset cursor; titles and ts_headline highlights (over
+HTML-escaped text) are then fetched for the page rows only, one query per kind present
+on the page.
+"""
+from __future__ import annotations
+
+from decimal import Decimal
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import Numeric, and_, cast, func, literal, literal_column, or_, select, tuple_, union_all
+from sqlalchemy.dialects.postgresql import REGCONFIG
+from sqlalchemy.orm import Session
+
+from app.models.compliance.framework_requirement import FrameworkRequirement
+from app.models.compliance.obligation_atom import ObligationAtom
+from app.models.controls.control import Control
+from app.models.risks.risk_scenario import RiskScenario
+from app.services.search.common import (
+    CODE_WEIGHT, HTML_ESCAPES, MARK_END, MARK_START, SCORE_DIGITS, Cursor, clip,
+)
+
+HEADLINE_OPTIONS = (
+    f"StartSel={MARK_START}, StopSel={MARK_END}, MaxWords=30, MinWords=10, "
+    "MaxFragments=2, FragmentDelimiter=\" … \""
+)
+
+EN = cast(literal("english"), REGCONFIG)
+DE = cast(literal("german"), REGCONFIG)
+
+
+def _like_prefix(q: str) -> str:
+    return q.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+
+
+def _round(score):
+    return func.round(cast(score, Numeric), SCORE_DIGITS)
+
+
+def _enabled(model):
+    return or_(model.enabled.is_(None), model.enabled.is_(True))
+
+
+def _code_match(col, q: str):
+    return or_(col.op("%")(q), col.ilike(_like_prefix(q), escape="\\"))
+
+
+def _ranked(kind: str, q: str, version_id: Optional[int]):
+    q_en, q_de = func.websearch_to_tsquery(EN, q), func.websearch_to_tsquery(DE, q)
+    label = literal(kind).label("kind")
+
+    if kind == "requirement":
+        FR = FrameworkRequirement
+        tsv = literal_column("framework_requirements.search_tsv")
+        score = func.ts_rank_cd(tsv, q_en) + CODE_WEIGHT * func.similarity(func.coalesce(FR.code, ""), q)
+        stmt = select(label, FR.id.label("id"), _round(score).label("score")) \
+            .where(or_(tsv.op("@@")(q_en), _code_match(FR.code, q)))
+        if version_id is not None:
+            stmt = stmt.where(FR.framework_version_id == version_id)
+        return stmt
+
+    if kind == "obligation":
+        OA = ObligationAtom
+        tsv = literal_column("obligation_atoms.search_tsv")
+        score = func.ts_rank_cd(tsv, q_en) + CODE_WEIGHT * func.similarity(OA.atom_key, q)
+        stmt = select(label, OA.id.label("id"), _round(score).label("score")) \
+            .where(or_(tsv.op("@@")(q_en), _code_match(OA.atom_key, q)))
+        if version_id is not None:
+            stmt = stmt.join(FrameworkRequirement, FrameworkRequirement.id == OA.framework_requirement_id) \
+                       .where(FrameworkRequirement.framework_version_id == version_id)
+        return stmt
+
+    if kind == "control":
+        tsv_en = literal_column("controls.search_tsv_en")
+        tsv_de = literal_column("controls.search_tsv_de")
+        score = (func.greatest(func.ts_rank_cd(tsv_en, q_en), func.ts_rank_cd(tsv_de, q_de))
+                 + CODE_WEIGHT * func.similarity(func.coalesce(Control.reference_code, ""), q))
+        return select(label, Control.id.label("id"), _round(score).label("score")) \
+            .where(_enabled(Control),
+                   or_(tsv_en.op("@@")(q_en), tsv_de.op("@@")(q_de), _code_match(Control.reference_code, q)))
+
+    # risk_scenario
+    tsv_en = literal_column("risk_scenarios.search_tsv_en")
+    tsv_de = literal_column("risk_scenarios.search_tsv_de")
+    score = func.greatest(func.ts_rank_cd(tsv_en, q_en), func.ts_rank_cd(tsv_de, q_de))
+    return select(label, RiskScenario.id.label("id"), _round(score).label("score")) \
+        .where(_enabled(RiskScenario), or_(tsv_en.op("@@")(q_en), tsv_de.op("@@")(q_de)))
+
+
+def _page(db: Session, q: str, kinds: List[str], version_id: Optional[int],
+          limit: int, cursor: Optional[Cursor]) -> List[Tuple[str, int, float]]:
+    hits = union_all(*(_ranked(k, q, version_id) for k in kinds)).subquery("hits")
+    stmt = select(hits.c.kind, hits.c.id, hits.c.score)
+    if cursor is not None:
+        c_score, c_kind, c_id = cursor
+        c_score = Decimal(f"{c_score:.{SCORE_DIGITS}f}")
+        stmt = stmt.where(or_(
+            hits.c.score < c_score,
+            and_(hits.c.score == c_score, tuple_(hits.c.kind, hits.c.id) > tuple_(literal(c_kind), literal(c_id))),
+        ))
+    stmt = stmt.order_by(hits.c.score.desc(), hits.c.kind.asc(), hits.c.id.asc()).limit(limit + 1)
+    return [(kind, id_, float(score)) for kind, id_, score in db.execute(stmt).all()]
+
+
+def _headline(cfg, text, q_cfg):
+    # escape the source first: ts_headline copies it verbatim around the <mark> selectors
+    text = func.coalesce(text, "")
+    for char, entity in HTML_ESCAPES:
+        text = func.replace(text, char, entity)
+    return func.ts_headline(cfg, text, q_cfg, HEADLINE_OPTIONS)
+
+
+def _marked(*candidates: Optional[str]) -> Optional[str]:
+    """First headline that actually highlights something (else the first non-empty one)."""
+    for h in candidates:
+        if h and MARK_START in h:
+            return h
+    return next((h for h in candidates if h), None)
+
+
+def _details(db: Session, q: str, kind: str, ids: List[int]) -> Dict[int, Dict[str, Any]]:
+    q_en, q_de = func.websearch_to_tsquery(EN, q), func.websearch_to_tsquery(DE, q)
+    out: Dict[int, Dict[str, Any]] = {}
+
+    if kind == "requirement":
+        FR = FrameworkRequirement
+        rows = db.execute(
+            select(FR.id, FR.code, FR.title, FR.framework_version_id,
+                   _headline(EN, func.concat_ws(" ", FR.title, FR.text), q_en))
+            .where(FR.id.in_(ids))
+        ).all()
+        for id_, code, title, vid, hl in rows:
+            out[id_] = {"code": code, "title": clip(title), "version_id": vid, "requirement_id": id_,
+                        "highlight": hl}
+
+    elif kind == "obligation":
+        OA = ObligationAtom
+        rows = db.execute(
+            select(OA.id, OA.atom_key, OA.obligation_text, OA.framework_requirement_id,
+                   FrameworkRequirement.framework_version_id,
+                   _headline(EN, func.concat_ws(" ", OA.obligation_text, OA.condition, OA.outcome), q_en))
+            .join(FrameworkRequirement, FrameworkRequirement.id == OA.framework_requirement_id)
+            .where(OA.id.in_(ids))
+        ).all()
+        for id_, key, text, req_id, vid, hl in rows:
+            out[id_] = {"code": key, "title": clip(text), "version_id": vid, "requirement_id": req_id,
+                        "highlight": hl}
+
+    elif kind == "control":
+        C = Control
+        rows = db.execute(
+            select(C.id, C.reference_code, func.coalesce(C.title_en, C.title_de),
+                   _headline(EN, func.concat_ws(" ", C.title_en, C.description_en), q_en),
+                   _headline(DE, func.concat_ws(" ", C.title_de, C.description_de), q_de))
+            .where(C.id.in_(ids))
+        ).all()
+        for id_, code, title, hl_en, hl_de in rows:
+            out[id_] = {"code": code, "title": clip(title), "highlight": _marked(hl_en, hl_de)}
+
+    else:
+        S = RiskScenario
+        rows = db.execute(
+            select(S.id, func.coalesce(S.title_en, S.title_de),
+                   _headline(EN, func.concat_ws(" ", S.title_en, S.description_en), q_en),
+                   _headline(DE, func.concat_ws(" ", S.title_de, S.description_de), q_de))
+            .where(S.id.in_(ids))
+        ).all()
+        for id_, title, hl_en, hl_de in rows:
+            out[id_] = {"code": None, "title": clip(title), "highlight": _marked(hl_en, hl_de)}
+    return out
+
+
+def search(db: Session, q: str, *, kinds: List[str], version_id: Optional[int],
+           limit: int, cursor: Optional[Cursor]) -> Tuple[List[Dict[str, Any]], bool]:
+    """(hits of the page in rank order, has_more)."""
+    page = _page(db, q, kinds, version_id, limit, cursor)
+    has_more = len(page) > limit
+    page = page[:limit]
+
+    ids_by_kind: Dict[str, List[int]] = {}
+    for kind, id_, _ in page:
+        ids_by_kind.setdefault(kind, []).append(id_)
+    details = {kind: _details(db, q, kind, ids) for kind, ids in ids_by_kind.items()}
+
+    items = [
+        {"kind": kind, "id": id_, "score": score, **details[kind].get(id_, {})}
+        for kind, id_, score in page
+    ]
+    return items, has_more
@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+"""
+Compact risk_score_history into daily/weekly buckets.
+
+Usage:
+  python3 backend/scripts/compact_risk_score_history.py [--raw-days N] [--daily-days N]
+                                                        [--chunk-size N] [--dry-run]
+
+Raw points older than --raw-days are folded into daily buckets, daily buckets older
+than --daily-days into weekly ones (see app/services/risk_score_history.py). Safe to
+run repeatedly, e.g. nightly from cron.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+from pathlib import Path
+
+
+def main() -> int:
+    backend_dir = Path(__file__).resolve().parents[1]
+    sys.path.insert(0, str(backend_dir))
+
+    from app.database import SessionLocal
+    from app.services.risk_score_history import (
+        compact_history, RAW_RETENTION_DAYS, DAILY_RETENTION_DAYS, CHUNK_SIZE,
+    )
+
+    parser = argparse.ArgumentParser(description="risk score history compaction")
+    parser.add_argument("--raw-days", type=int, default=RAW_RETENTION_DAYS)
+    parser.add_argument("--daily-days", type=int, default=DAILY_RETENTION_DAYS)
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+    parser.add_argument("--dry-run", action="store_true")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        out = compact_history(db, raw_days=args.raw_days, daily_days=args.daily_days,
+                              chunk_size=args.chunk_size, dry_run=args.dry_run)
+        print(json.dumps(out, indent=2, default=str))
+        return 0
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,41 @@
+#!/usr/bin/env python3
+"""
+Run the lifecycle sweep once (exception, evidence and SoA expiry).
+
+Usage:
+  python3 backend/scripts/lifecycle_sweep.py [--date YYYY-MM-DD]
+
+Same work as the in-process scheduler job "lifecycle_sweep". --date sweeps as of
+another day (e.g. to catch up after downtime or to preview on a copy).
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+from datetime import date
+from pathlib import Path
+
+
+def main() -> int:
+    backend_dir = Path(__file__).resolve().parents[1]
+    sys.path.insert(0, str(backend_dir))
+
+    from app.database import SessionLocal
+    from app.services.compliance.lifecycle_sweeper import run_lifecycle_sweep
+
+    parser = argparse.ArgumentParser(description="lifecycle sweep")
+    parser.add_argument("--date", type=date.fromisoformat, default=None, help="sweep as of this day")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        print(json.dumps(run_lifecycle_sweep(db, today=args.date), indent=2, default=str))
+        return 0
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,45 @@
+#!/usr/bin/env python3
+"""
+Move evidence artifacts stored as DB blobs (storage="db") into the artifact store.
+
+Usage:
+  python3 backend/scripts/migrate_artifact_blobs.py [--batch-size N] [--limit N] [--dry-run]
+
+Uses the store configured by ARTIFACT_STORE_BACKEND / ARTIFACT_STORE_ROOT; a relative
+root resolves against backend/, so it is the directory the API serves from whatever
+the working directory. Rows are committed per batch, so the script can be stopped and
+re-run; --dry-run only reports how many artifacts and bytes would move.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+from pathlib import Path
+
+
+def main() -> int:
+    backend_dir = Path(__file__).resolve().parents[1]
+    sys.path.insert(0, str(backend_dir))
+
+    from app.database import SessionLocal
+    from app.services.evidence.artifact_store import migrate_db_blobs
+
+    parser = argparse.ArgumentParser(description="move DB-blob artifacts to the artifact store")
+    parser.add_argument("--batch-size", type=int, default=100)
+    parser.add_argument("--limit", type=int, default=None, help="move at most N artifacts")
+    parser.add_argument("--dry-run", action="store_true")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        print(json.dumps(migrate_db_blobs(db, batch_size=args.batch_size, dry_run=args.dry_run,
+                                          limit=args.limit), indent=2))
+        return 0
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+"""
+Rebuild the requirement_hierarchy index.
+
+Usage:
+  python3 backend/scripts/rebuild_requirement_hierarchy.py [--versions 1,2]
+
+Without --versions, rebuilds every framework version (e.g. right after the migration,
+so the first tree/status reads do not have to index the version). With --versions,
+only those (e.g. after a bulk requirement load that bypassed the ORM). One commit per
+version; prints {version_id: tree etag}.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+from pathlib import Path
+
+
+def main() -> int:
+    backend_dir = Path(__file__).resolve().parents[1]
+    sys.path.insert(0, str(backend_dir))
+
+    from app.database import SessionLocal
+    from app.models.compliance.framework_version import FrameworkVersion
+    from app.services.compliance.requirement_hierarchy import rebuild_hierarchy
+
+    parser = argparse.ArgumentParser(description="requirement_hierarchy rebuild")
+    parser.add_argument("--versions", default=None, help="comma-separated framework version ids")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        if args.versions:
+            ids = [int(v) for v in args.versions.split(",") if v.strip()]
+        else:
+            ids = [vid for (vid,) in db.query(FrameworkVersion.id).order_by(FrameworkVersion.id.asc()).all()]
+        out = {}
+        for vid in ids:
+            out.update(rebuild_hierarchy(db, [vid]))
+            db.commit()
+        print(json.dumps(out, indent=2, default=str))
+        return 0
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+"""
+Recalculate stored risk scores in bulk (risk_scores upsert + risk_score_history).
+
+Usage:
+  python3 backend/scripts/recalculate_risk_scores.py [--chunk-size N] [--dry-run]
+                                                     [--model max_e|multiplicative] [--scenario-id ID]
+
+One transaction per chunk; --dry-run only reports how many stored scores would change.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+from pathlib import Path
+
+
+def main() -> int:
+    backend_dir = Path(__file__).resolve().parents[1]
+    sys.path.insert(0, str(backend_dir))
+
+    from app.database import SessionLocal
+    from app.services.risk_score_batch import recalculate_scores, CHUNK_SIZE, MODELS
+
+    parser = argparse.ArgumentParser(description="bulk risk score recalculation")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+    parser.add_argument("--dry-run", action="store_true")
+    parser.add_argument("--model", choices=MODELS, default="max_e")
+    parser.add_argument("--scenario-id", type=int, default=None)
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        out = recalculate_scores(
+            db,
+            scenario_id=args.scenario_id,
+            chunk_size=args.chunk_size,
+            dry_run=args.dry_run,
+            model=args.model,
+        )
+        print(json.dumps(out, indent=2))
+        return 0
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+"""
+Refresh the coverage_snapshot read model.
+
+Usage:
+  python3 backend/scripts/refresh_coverage_snapshots.py [--batch N] [--max-age SECONDS]
+  python3 backend/scripts/refresh_coverage_snapshots.py --versions 1,2
+
+Without --versions, recomputes every dirty snapshot and every snapshot older than
+--max-age (same work as the in-process scheduler job). With --versions, marks all
+snapshots of those framework versions dirty first (e.g. after a bulk import that
+bypassed the ORM) and then refreshes.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+from pathlib import Path
+
+
+def main() -> int:
+    backend_dir = Path(__file__).resolve().parents[1]
+    sys.path.insert(0, str(backend_dir))
+
+    from app.database import SessionLocal
+    from app.services.compliance.coverage_snapshot import (
+        REFRESH_BATCH, SNAPSHOT_MAX_AGE_SECONDS, mark_versions_dirty, refresh_all_dirty,
+    )
+
+    parser = argparse.ArgumentParser(description="coverage_snapshot refresh")
+    parser.add_argument("--batch", type=int, default=REFRESH_BATCH)
+    parser.add_argument("--max-age", type=int, default=SNAPSHOT_MAX_AGE_SECONDS, help="seconds")
+    parser.add_argument("--versions", default=None, help="comma-separated framework version ids to mark dirty")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        out = {}
+        if args.versions:
+            ids = [int(v) for v in args.versions.split(",") if v.strip()]
+            out["marked"] = mark_versions_dirty(db, ids)
+            db.commit()
+        out.update(refresh_all_dirty(db, limit=args.batch, max_age_seconds=args.max_age))
+        print(json.dumps(out, indent=2, default=str))
+        return 0
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+"""
+Maintain the risk_context_summary read model.
+
+Usage:
+  python3 backend/scripts/risk_context_summary.py rebuild [--chunk-size N]
+  python3 backend/scripts/risk_context_summary.py check [--chunk-size N] [--sample N]
+
+`rebuild` recomputes every row from the source tables (run once after the
+migration, or to repair drift). `check` recomputes without writing and reports
+missing / stale / orphaned rows; exits 1 when the projection is inconsistent.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+from pathlib import Path
+
+
+def main() -> int:
+    backend_dir = Path(__file__).resolve().parents[1]
+    sys.path.insert(0, str(backend_dir))
+
+    from app.database import SessionLocal
+    from app.services.risk_context_summary import rebuild_all, check_consistency, CHUNK_SIZE
+
+    parser = argparse.ArgumentParser(description="risk_context_summary maintenance")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    p_rebuild = sub.add_parser("rebuild", help="recompute all summary rows")
+    p_rebuild.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+    p_check = sub.add_parser("check", help="compare summary rows with the source tables")
+    p_check.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+    p_check.add_argument("--sample", type=int, default=50)
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        if args.cmd == "rebuild":
+            out = rebuild_all(db, chunk_size=args.chunk_size)
+            db.commit()
+        else:
+            out = check_consistency(db, chunk_size=args.chunk_size, sample=args.sample)
+        print(json.dumps(out, indent=2, default=str))
+        return 0 if out.get("consistent", True) else 1
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -1,6 +1,10 @@
 import os
 import pytest
 from fastapi.testclient import TestClient
+from sqlalchemy import ARRAY, create_engine
+from sqlalchemy.dialects.postgresql import ARRAY as PG_ARRAY, CITEXT, INET, JSONB, TSVECTOR
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.pool import StaticPool
 
 # Ensure predictable TZ if any datetime formatting is involved
 os.environ.setdefault("TZ", "Europe/Berlin")
@@ -10,6 +14,10 @@ try:
 except Exception as exc:  # pragma: no cover
     app = None
 
+# PostgreSQL-only column types are stored as JSON/text by the SQLite test database
+for _type in (JSONB, ARRAY, PG_ARRAY, TSVECTOR, INET, CITEXT):
+    compiles(_type, "sqlite")(lambda element, compiler, **kw: "JSON")
+
 
 @pytest.fixture(scope="session")
 def client():
@@ -17,3 +25,19 @@ def client():
         pytest.skip("FastAPI app not available for tests")
     return TestClient(app)
 
+
+@pytest.fixture
+def db():
+    """Session (SessionLocal, so the write listeners run) on a fresh in-memory SQLite database."""
+    from app.core.base import Base
+    from app.database import SessionLocal
+
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    # iam_users declares ix_iam_users_email twice (index=True and Index()), which SQLite rejects
+    Base.metadata.create_all(engine, tables=[t for t in Base.metadata.sorted_tables if t.name != "iam_users"])
+    session = SessionLocal(bind=engine)
+    try:
+        yield session
+    finally:
+        session.close()
+        engine.dispose()
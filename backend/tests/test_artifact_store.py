@@ -0,0 +1,41 @@
+import pytest
+
+from app.services.evidence.artifact_store import parse_range
+
+
+@pytest.mark.parametrize("header", [
+    None,
+    "",
+    "items=0-10",         # other unit
+    "bytes=0-1,5-6",      # multi-range: served whole
+    "bytes=abc",
+    "bytes=-",
+    "bytes=x-5",
+    "bytes=5-2",          # last < first: invalid, ignored
+])
+def test_parse_range_ignored(header):
+    assert parse_range(header, 100) is None
+
+
+@pytest.mark.parametrize("header, expected", [
+    ("bytes=0-0", (0, 0)),
+    ("bytes=0-99", (0, 99)),
+    ("bytes=10-", (10, 99)),
+    ("bytes=90-500", (90, 99)),   # end clipped to the object
+    ("bytes=-10", (90, 99)),      # suffix: last 10 bytes
+    ("bytes=-500", (0, 99)),      # suffix longer than the object
+])
+def test_parse_range_satisfiable(header, expected):
+    assert parse_range(header, 100) == expected
+
+
+@pytest.mark.parametrize("header, size", [
+    ("bytes=100-", 100),
+    ("bytes=100-200", 100),
+    ("bytes=-0", 100),
+    ("bytes=-5", 0),
+    ("bytes=0-", 0),
+])
+def test_parse_range_unsatisfiable(header, size):
+    with pytest.raises(ValueError):
+        parse_range(header, size)
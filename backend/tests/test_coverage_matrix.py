@@ -0,0 +1,57 @@
+import random
+
+import pytest
+
+from app.constants.compliance import INHERITANCE_MULTIPLIER, STATUS_VALUE
+from app.services.compliance import coverage_matrix
+
+
+def _loop_scores(requirements, mappings, effective):
+    """Reference: the per-requirement loop the matrix replaces."""
+    scores, entries = [], []
+    for r in requirements:
+        rows = [(c, w or 100) for req_id, c, w in mappings if req_id == r.id]
+        total = sum(w for _, w in rows) or 1.0
+        acc, hits = 0.0, []
+        for ctrl_id, w in rows:
+            eff = effective.get(ctrl_id)
+            if not eff:
+                continue
+            value = STATUS_VALUE.get(eff.get("assurance_status"), 0.0) \
+                * INHERITANCE_MULTIPLIER.get(eff.get("inheritance_type"), 1.0)
+            c = round(w / total * value, 6)
+            acc += c
+            hits.append((ctrl_id, c))
+        scores.append(min(round(acc, 6), 1.0))
+        entries.append(hits)
+    return scores, entries
+
+
+@pytest.mark.parametrize("seed", [1, 2, 3])
+def test_matrix_scores_match_per_requirement_loop(seed):
+    rnd = random.Random(seed)
+    requirements = [coverage_matrix.RequirementRow(i, f"R{i}", None) for i in range(1, 41)]
+    mappings = [
+        (r.id, c, rnd.choice([None, 0, 7, 30, 50, 100]))
+        for r in requirements
+        for c in rnd.sample(range(1, 25), rnd.randint(0, 5))
+    ]
+    mappings.append((999, 3, 100))   # requirement outside the version: ignored
+    statuses = list(STATUS_VALUE) + ["unknown"]
+    effective = {
+        c: {"assurance_status": rnd.choice(statuses), "inheritance_type": rnd.choice(list(INHERITANCE_MULTIPLIER))}
+        for c in rnd.sample(range(1, 30), 15)
+    }
+
+    m = coverage_matrix.CoverageMatrix(1, requirements, mappings, version=0)
+    scores, entries = m.score(effective)
+    ref_scores, ref_entries = _loop_scores(requirements, mappings, effective)
+
+    assert scores == ref_scores
+    assert [[(e.control_id, e.contribution) for e in row] for row in entries] == ref_entries
+
+
+def test_matrix_without_mappings():
+    m = coverage_matrix.CoverageMatrix(1, [coverage_matrix.RequirementRow(1, "R1", None)], [], version=0)
+    assert not m.has_mappings(0)
+    assert m.score({5: {"assurance_status": "fresh"}}) == ([0.0], [[]])
@@ -0,0 +1,47 @@
+import pytest
+
+from app.services import effect_matrix_loader as loader
+
+KNOWN = dict(scenario_ids={1, 2}, control_ids={10}, domain_ids={1, 2, 3, 4, 5})
+
+
+def _row(sid="1", cid="10", did="3", score="4"):
+    return {"risk_scenario_id": sid, "control_id": cid, "domain_id": did, "score": score}
+
+
+def test_reader_strips_header_names():
+    reader = loader._reader(" risk_scenario_id , control_id,domain_id ,score,extra\n1,10,3,4,x\n")
+    assert list(reader) == [{**_row(), "extra": "x"}]
+
+
+def test_reader_accepts_lines():
+    reader = loader._reader(["risk_scenario_id,control_id,domain_id,score\n", "1,10,3,4\n"])
+    assert list(reader) == [_row()]
+
+
+@pytest.mark.parametrize("text, message", [
+    ("", "no header"),
+    ("risk_scenario_id,control_id,score\n1,10,4\n", "domain_id"),
+])
+def test_reader_rejects_bad_header(text, message):
+    with pytest.raises(ValueError, match=message):
+        loader._reader(text)
+
+
+def test_check_row_valid():
+    assert loader._check_row(_row(sid=" 2 ", score="0"), **KNOWN) == ((2, 10, 3), 0)
+
+
+@pytest.mark.parametrize("row, message", [
+    (_row(score="x"), "must be integers"),
+    (_row(did=""), "must be integers"),
+    (_row(score="2.5"), "must be integers"),
+    (_row(score="6"), "outside 0..5"),
+    (_row(score="-1"), "outside 0..5"),
+    (_row(sid="9"), "risk scenario 9 not found"),
+    (_row(cid="11"), "control 11 not found"),
+    (_row(did="6"), "impact domain 6 not found"),
+])
+def test_check_row_errors(row, message):
+    with pytest.raises(ValueError, match=message):
+        loader._check_row(row, **KNOWN)
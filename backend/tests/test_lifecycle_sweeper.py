@@ -0,0 +1,73 @@
+from datetime import date
+
+import pytest
+
+from app.crud.m4.evidence import list_by_context
+from app.models.compliance.control_evidence import ControlEvidence
+from app.models.compliance.control_framework_mapping import ControlFrameworkMapping
+from app.models.compliance.evidence_policy import EvidencePolicy
+from app.models.compliance.framework import Framework
+from app.models.compliance.framework_requirement import FrameworkRequirement
+from app.models.compliance.framework_version import FrameworkVersion
+from app.models.controls.control import Control
+from app.models.controls.control_context_link import ControlContextLink
+from app.models.risks.risk_scenario import RiskScenario
+from app.models.risks.risk_scenario_context import RiskScenarioContext
+from app.services.compliance.assurance import compute_assurance_rollup
+from app.services.compliance.lifecycle_sweeper import run_lifecycle_sweep
+from app.services.compliance.status_engine import get_control_status
+from app.services.overview.overview import _controls_status_counts, _evidence_due_counts
+
+TODAY = date(2025, 6, 1)
+
+
+@pytest.fixture
+def linked(db):
+    db.add(Framework(id=1, name="ISO 27001"))
+    db.add(FrameworkVersion(id=1, framework_id=1, version_label="2022"))
+    db.add(RiskScenario(id=1, title_en="Ransomware", title_de="Ransomware"))
+    db.add(Control(id=1, reference_code="CTL-BK", title_en="Backups", description_en="Offline backups."))
+    db.flush()
+    db.add(FrameworkRequirement(id=1, framework_version_id=1, code="A.8.13", title="Backup"))
+    db.add(RiskScenarioContext(id=1, risk_scenario_id=1, scope_type="entity", scope_id=1))
+    db.flush()
+    db.add(ControlFrameworkMapping(framework_requirement_id=1, control_id=1))
+    db.add(EvidencePolicy(control_id=1, freshness_days=90))
+    db.add(ControlContextLink(id=1, risk_scenario_context_id=1, scope_type="entity", scope_id=1, control_id=1,
+                              assurance_status="implemented"))
+    db.flush()
+    db.add(ControlEvidence(id=1, control_context_link_id=1, title="Restore test", evidence_type="report",
+                           collected_at=date(2025, 1, 2)))
+    db.commit()
+    return db
+
+
+def _best_status(db):
+    return compute_assurance_rollup(db, 1, 1)["details"][0]["best_status"]
+
+
+def test_swept_evidence_turns_the_control_expired(linked):
+    # readers trust the stored status: until the sweep the evidence counts as valid
+    assert _best_status(linked) == "fresh"
+    assert get_control_status(linked, context_link_id=1) == "met"
+    assert _controls_status_counts(linked, "entity", 1).controls_pass == 1
+    assert _evidence_due_counts(linked, "entity", 1) == (0, 0)
+
+    assert run_lifecycle_sweep(linked, today=TODAY)["evidence_expired"] == 1
+    assert linked.get(ControlEvidence, 1).status == "expired"
+
+    assert _best_status(linked) == "expired"
+    assert get_control_status(linked, context_link_id=1) == "partial"
+    assert _controls_status_counts(linked, "entity", 1).controls_pass == 0
+    assert _evidence_due_counts(linked, "entity", 1) == (1, 1)
+    assert list_by_context(linked, 1)[2]["overdue"] == 1
+    assert run_lifecycle_sweep(linked, today=TODAY)["evidence_expired"] == 0
+
+
+def test_valid_evidence_outranks_expired_evidence(linked):
+    run_lifecycle_sweep(linked, today=TODAY)
+    linked.add(ControlEvidence(id=2, control_context_link_id=1, title="Restore test", evidence_type="report",
+                               collected_at=date(2025, 5, 20)))
+    linked.commit()
+    assert _best_status(linked) == "fresh"
+    assert get_control_status(linked, context_link_id=1) == "met"
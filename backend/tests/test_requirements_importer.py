@@ -0,0 +1,29 @@
+from app.services.compliance import requirements_importer as importer
+
+
+def _valid(*ext_ids):
+    return {e: importer.RowIn(ext_id=e, parent_ext_id=None, title=e, text=None, code=None, sort_index=0)
+            for e in ext_ids}
+
+
+def test_levels_parents_before_children():
+    # listed child-first on purpose: levels must not depend on file order
+    valid = _valid("c", "b", "a", "d")
+    parent_of = {"c": ("file", "b"), "b": ("file", "a"), "d": ("db", 42)}
+    errors = []
+    level = importer._levels(valid, parent_of, errors)
+    assert level == {"a": 0, "b": 1, "c": 2, "d": 0}
+    assert errors == []
+    order = sorted(valid, key=level.__getitem__)
+    assert order.index("a") < order.index("b") < order.index("c")
+
+
+def test_levels_unlinks_cycles():
+    valid = _valid("a", "b", "c", "x")
+    parent_of = {"a": ("file", "b"), "b": ("file", "a"), "c": ("file", "a"), "x": ("file", "c")}
+    errors = []
+    level = importer._levels(valid, parent_of, errors)
+    assert len(errors) == 1 and errors[0].startswith("Cycle in parents:")
+    assert "a" not in parent_of and "b" not in parent_of
+    assert level["a"] == level["b"] == 0
+    assert level["c"] == 1 and level["x"] == 2
@@ -0,0 +1,37 @@
+import json
+
+import pytest
+
+from app.services import risk_register_export as export
+
+
+def test_select_columns_defaults_to_all():
+    assert export.select_columns(None) == list(export.EXPORT_COLUMNS)
+    assert export.select_columns("") == list(export.EXPORT_COLUMNS)
+
+
+def test_select_columns_keeps_order_strips_and_dedupes():
+    assert export.select_columns(" residual, contextId ,,residual") == ["residual", "contextId"]
+
+
+def test_select_columns_rejects_unknown():
+    with pytest.raises(ValueError, match="nope"):
+        export.select_columns("contextId,nope")
+
+
+def test_write_export_csv_and_ndjson():
+    chunks = [[{"contextId": 1, "residual": 12.5}], [{"contextId": 2, "residual": 3}]]
+    columns = export.select_columns("contextId,residual")
+
+    csv_out = b"".join(export.write_export(iter(chunks), "csv", columns)).decode("utf-8")
+    assert csv_out.splitlines() == ["contextId,residual", "1,12.5", "2,3"]
+
+    nd = b"".join(export.write_export(iter(chunks), "ndjson", columns)).decode("utf-8")
+    assert [json.loads(line) for line in nd.splitlines()] == [
+        {"contextId": 1, "residual": 12.5}, {"contextId": 2, "residual": 3},
+    ]
+
+
+def test_write_export_rejects_unknown_format():
+    with pytest.raises(ValueError):
+        export.write_export([], "pdf", ["contextId"])
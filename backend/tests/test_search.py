@@ -0,0 +1,109 @@
+import pytest
+
+from app.models.compliance.framework import Framework
+from app.models.compliance.framework_requirement import FrameworkRequirement
+from app.models.compliance.framework_version import FrameworkVersion
+from app.models.compliance.obligation_atom import ObligationAtom
+from app.models.controls.control import Control
+from app.models.risks.risk_scenario import RiskScenario
+from app.services.search import search
+from app.services.search.memory import highlight
+
+
+@pytest.fixture
+def catalog(db):
+    db.add(Framework(id=1, name="ISO 27001"))
+    db.add_all([FrameworkVersion(id=v, framework_id=1, version_label=f"v{v}") for v in (1, 2)])
+    db.flush()
+    db.add_all([
+        FrameworkRequirement(id=1, framework_version_id=1, code="A.8.20", title="Network firewall",
+                             text="Firewall rules are reviewed; firewall changes are logged."),
+        FrameworkRequirement(id=2, framework_version_id=1, code="A.8.15", title="Logging",
+                             text="Event logging covers the firewall."),
+        FrameworkRequirement(id=3, framework_version_id=2, code="A.8.20", title="Firewall", text="Network security."),
+    ])
+    db.flush()
+    db.add(ObligationAtom(id=1, framework_requirement_id=2, atom_key="LOG-1", obligation_text="shall keep logs"))
+    db.add_all([
+        Control(id=1, reference_code="CTL-FW", title_en="Firewall management", description_en="Manage firewall rules."),
+        Control(id=2, reference_code="CTL-OFF", title_en="Firewall (retired)", description_en="Old.", enabled=False),
+    ])
+    db.add(RiskScenario(id=1, title_en="Firewall bypass", title_de="Umgehung der Firewall",
+                        description_en='Attacker injects <script>alert("x")</script> into firewall rules'))
+    db.commit()
+    return db
+
+
+def _hits(result):
+    return [(h["kind"], h["id"]) for h in result["items"]]
+
+
+def test_memory_search_ranks_by_term_frequency_then_kind_and_id(catalog):
+    result = search(catalog, "firewall", version_id=1)
+    hits = _hits(result)
+    assert ("requirement", 1) in hits and ("requirement", 2) in hits
+    assert hits.index(("requirement", 1)) < hits.index(("requirement", 2))   # three matches beat one
+    scores = [(-h["score"], h["kind"], h["id"]) for h in result["items"]]
+    assert scores == sorted(scores)
+
+
+def test_memory_search_filters(catalog):
+    # every term must match; "-term" excludes
+    assert _hits(search(catalog, "firewall logged", kinds=["requirement"])) == [("requirement", 1)]
+    assert ("requirement", 1) not in _hits(search(catalog, "firewall -logged", kinds=["requirement"]))
+    # kinds and version filters; disabled controls are not indexed
+    assert {k for k, _ in _hits(search(catalog, "firewall", kinds=["control"]))} == {"control"}
+    assert ("control", 2) not in _hits(search(catalog, "firewall"))
+    assert ("requirement", 3) not in _hits(search(catalog, "firewall", version_id=1))
+    assert ("requirement", 3) in _hits(search(catalog, "firewall", version_id=2))
+
+
+def test_memory_search_matches_codes_by_prefix(catalog):
+    assert ("control", 1) in _hits(search(catalog, "CTL-F", kinds=["control"]))
+
+
+def test_memory_search_pages_with_cursor(catalog):
+    seen, cursor = [], None
+    while True:
+        page = search(catalog, "firewall", limit=2, cursor=cursor)
+        seen += _hits(page)
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+    assert seen == _hits(search(catalog, "firewall", limit=100))
+
+
+def test_search_escapes_highlighted_text(catalog):
+    hit = next(h for h in search(catalog, "attacker")["items"] if h["kind"] == "risk_scenario")
+    assert "<script>" not in hit["highlight"]
+    assert "&lt;script&gt;alert(\"x\")&lt;/script&gt;" in hit["highlight"]
+    assert "<mark>Attacker</mark>" in hit["highlight"]
+
+
+@pytest.mark.parametrize("texts, q, expected", [
+    (("a <b>firewall</b> & more",), "firewall", "a &lt;b&gt;<mark>firewall</mark>&lt;/b&gt; &amp; more"),
+    (("no match <here>",), "zzz", "no match &lt;here&gt;"),
+    (("<i>x</i>",), "", "&lt;i&gt;x&lt;/i&gt;"),
+])
+def test_highlight_escapes_html(texts, q, expected):
+    assert highlight(texts, q) == expected
+
+
+def test_memory_search_matches_codes_by_similarity(catalog):
+    assert ("requirement", 1) in _hits(search(catalog, "A.8.2", kinds=["requirement"], version_id=1))
+    assert ("control", 1) in _hits(search(catalog, "CTL-FWX", kinds=["control"]))
+
+
+def test_postgres_headline_escapes_before_marking():
+    from sqlalchemy import column
+    from sqlalchemy.dialects import postgresql
+
+    from app.services.search.postgres import EN, _headline, _marked
+
+    sql = str(_headline(EN, column("text"), column("q")).compile(
+        dialect=postgresql.dialect(), compile_kwargs={"literal_binds": True}))
+    amp, lt, gt = sql.index("'&amp;'"), sql.index("'&lt;'"), sql.index("'&gt;'")
+    assert amp < lt < gt   # "&" is replaced innermost, i.e. first
+    assert sql.startswith("ts_headline(") and "StartSel=<mark>" in sql
+    assert _marked(None, "plain", "a <mark>hit</mark>") == "a <mark>hit</mark>"
+    assert _marked("", "plain") == "plain"
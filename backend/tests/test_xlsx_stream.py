@@ -0,0 +1,47 @@
+import io
+import random
+import re
+import zipfile
+from datetime import date
+
+from app.core.xlsx_stream import iter_xlsx
+
+
+def _sheet(chunks):
+    with zipfile.ZipFile(io.BytesIO(b"".join(chunks))) as zf:
+        assert zf.testzip() is None
+        assert {"[Content_Types].xml", "xl/workbook.xml", "xl/worksheets/sheet1.xml"} <= set(zf.namelist())
+        return zf.read("xl/worksheets/sheet1.xml").decode("utf-8")
+
+
+def test_iter_xlsx_cells():
+    xml = _sheet(iter_xlsx([["name", "n", "ok", "day", "empty"], ["a<b & c", 3, True, date(2024, 1, 2), None]]))
+    assert xml.count("<row>") == 2
+    assert "a&lt;b &amp; c" in xml
+    assert "<c><v>3</v></c>" in xml
+    assert '<c t="b"><v>1</v></c>' in xml
+    assert "2024-01-02" in xml
+    assert "<c/>" in xml
+
+
+def test_iter_xlsx_drops_illegal_xml_and_non_finite_numbers():
+    xml = _sheet(iter_xlsx([["bell\x07", float("nan"), float("inf")]]))
+    assert "bell</t>" in xml
+    assert "nan" not in xml.lower() and "inf" not in xml.lower()
+
+
+def test_iter_xlsx_streams_in_chunks():
+    rnd = random.Random(0)
+    rows = (["row", i, "%0128x" % rnd.getrandbits(512)] for i in range(2000))   # incompressible text
+    chunks = list(iter_xlsx(rows, flush_rows=100))
+    assert len(chunks) > 2
+    xml = _sheet(chunks)
+    assert len(re.findall("<row>", xml)) == 2000
+
+
+def test_iter_xlsx_sheet_name_is_escaped_and_truncated():
+    with zipfile.ZipFile(io.BytesIO(b"".join(iter_xlsx([], sheet_name='R&D "risks" ' + "x" * 40)))) as zf:
+        workbook = zf.read("xl/workbook.xml").decode("utf-8")
+    name = re.search(r'<sheet name="([^"]*)"', workbook).group(1)
+    assert name.startswith("R&amp;D &quot;risks&quot;")
+    assert len(name.replace("&amp;", "&").replace("&quot;", '"')) == 31